@@ -0,0 +1,93 @@
+"""
+ADMISSION CONTROL - Backpressure and load shedding for `/analyze`.
+
+Under burst load, accepting everything just piles up blocked LLM calls until
+clients time out. Each request is instead given one of three outcomes:
+
+- admit:   normal path (queue for an LLM slot, full LLM summary)
+- degrade: the estimated LLM queue wait for this request's priority exceeds
+           ANALYZE_DEGRADE_AFTER_SECONDS, so answer immediately with a
+           rules-only manifest built from pre-classified results (no LLM text)
+- shed:    ANALYZE_MAX_IN_FLIGHT requests are already in progress; reject fast
+           with 503 + Retry-After
+
+Configuration (environment):
+    ANALYZE_MAX_IN_FLIGHT          Requests in progress per process (default: 32)
+    ANALYZE_DEGRADE_AFTER_SECONDS  Queue wait that triggers degraded mode (default: 20;
+                                   0 disables degraded mode)
+
+Usage:
+    decision = get_admission_controller().admit(triage.priority)
+    if decision.action == "shed": ...          # 503, Retry-After: decision.retry_after
+    try: ...
+    finally: get_admission_controller().release()
+"""
+
+import math
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from llm_scheduler import PriorityScheduler, get_llm_scheduler
+
+
+class AdmissionDecision(BaseModel):
+    action: str  # "admit" | "degrade" | "shed"
+    estimated_wait: float = 0.0  # Seconds
+    retry_after: int = 0  # Seconds (for "shed")
+
+
+class AdmissionController:
+    """Bounds in-flight /analyze requests and picks degraded mode under load"""
+
+    def __init__(self, scheduler: PriorityScheduler, max_in_flight: int = 32,
+                 degrade_after_seconds: float = 20.0):
+        self.scheduler = scheduler
+        self.max_in_flight = max(1, max_in_flight)
+        self.degrade_after_seconds = degrade_after_seconds
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {"admit": 0, "degrade": 0, "shed": 0}
+
+    def admit(self, priority: str) -> AdmissionDecision:
+        """Decide how to serve a request; admitted/degraded ones must call release()"""
+        wait = self.scheduler.estimated_wait(priority)
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.counts["shed"] += 1
+                return AdmissionDecision(action="shed", estimated_wait=wait,
+                                         retry_after=max(1, math.ceil(wait)))
+            self.in_flight += 1
+            action = "degrade" if 0 < self.degrade_after_seconds < wait else "admit"
+            self.counts[action] += 1
+        return AdmissionDecision(action=action, estimated_wait=wait)
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "degrade_after_seconds": self.degrade_after_seconds,
+                "decisions": dict(self.counts),
+            }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller configured from the ANALYZE_* environment variables"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            get_llm_scheduler(),
+            max_in_flight=int(os.getenv("ANALYZE_MAX_IN_FLIGHT", "32")),
+            degrade_after_seconds=float(os.getenv("ANALYZE_DEGRADE_AFTER_SECONDS", "20")),
+        )
+    return _controller
@@ -1,97 +1,154 @@
 import json
 import os
-from typing import TypedDict, List
+import time
+from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
 from schema import RawLabReport, SmartSummary, UIManifest
 from prompts import MASTER_PROMPT
 from ui_mapper import UIManifestGenerator
+from json_repair import repair_json, salvage_summary
+from manifest_executor import get_manifest_executor
+from preclassify import build_rules_only_summary
+from history_store import attach_history
+from lab_results import ResultTable
+from llm_budget import PromptPlan, get_llm_budget
+from llm_backends import GeminiPrefixStore, local_backend_from_env, prefix_cache_from_env
+from summary_reuse import ReportFingerprint, get_summary_reuse
+from summary_structs import decode_summary
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize Gemini with JSON mode enforcement
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.1,
-    model_kwargs={"response_mime_type": "application/json"}
-)
+GEMINI_MODEL = "gemini-2.5-flash"
+
+if os.getenv("LLM_BACKEND", "gemini").lower() == "local":
+    # Offline stand-in (llm_backends.py): rules-only answers, simulated latency
+    llm, prompt_prefix = local_backend_from_env()
+else:
+    # Initialize Gemini with JSON mode enforcement
+    llm = ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        temperature=0.1,
+        model_kwargs={"response_mime_type": "application/json"}
+    )
+    # MASTER_PROMPT is registered once as a context cache and sent by handle
+    prompt_prefix = prefix_cache_from_env(GeminiPrefixStore(GEMINI_MODEL))
 
 class AgentState(TypedDict):
     raw_data: dict      # Input
+    results: ResultTable # raw_data's report_results, flattened (optional; built from raw_data if absent)
+    summary_fingerprint: Optional[ReportFingerprint] # For summary reuse (optional; computed if absent)
     smart_summary: dict # Intermediate (LLM Output)
+    summary_repairs: List[str] # Repairs/drops applied to a malformed LLM response
+    llm_usage: dict     # Token counts, cost and prompt trimming of the LLM call (llm_budget.py)
+    defer_ui: bool      # Skip mapping; caller pages the manifest (manifest_pages.py)
     ui_manifest: List[dict] # Final (Frontend Input)
 
+def invoke_llm(plan: PromptPlan, handle: Optional[str]):
+    """
+    Summarizer call. With a cached-prefix handle only the report is sent;
+    if the provider rejects the handle (expired, deleted), the handle is
+    dropped and the call is retried with MASTER_PROMPT inline.
+    """
+    question = ("human", f"Analyze this report: {plan.text}")
+    if handle is not None:
+        try:
+            return llm.invoke([question], cached_content=handle)
+        except Exception as e:
+            print(f"⚠️ Cached prompt prefix rejected, retrying inline: {e}")
+            prompt_prefix.invalidate(handle, e)
+    return llm.invoke([("system", MASTER_PROMPT), question])
+
 # --- NODE 1: CLINICAL SUMMARIZER ---
 def generate_summary(state: AgentState):
     print("--- Generating Clinical Summary ---")
-    raw_text = json.dumps(state['raw_data'])
+    # Panels are sent as flat rows (lab_results.py): no nesting to encode,
+    # and no null fields. Over the latency budget, only abnormal and key
+    # normal results are sent (llm_budget.py)
+    budget = get_llm_budget()
+    handle = prompt_prefix.handle(MASTER_PROMPT)
+    plan = budget.plan(MASTER_PROMPT, state['raw_data'], state.get('results'), prefix_cached=handle is not None)
     
-    # Call Gemini with enhanced Master Prompt
-    response = llm.invoke([
-        ("system", MASTER_PROMPT),
-        ("human", f"Analyze this report: {raw_text}")
-    ])
+    # Call Gemini with enhanced Master Prompt (a cached prefix when available)
+    start = time.perf_counter()
+    response = invoke_llm(plan, handle)
+    usage = budget.record(response, plan, time.perf_counter() - start)
     
-    # Parse JSON
-    summary_data = json.loads(response.content)
+    # Parse JSON (tolerating fences, trailing commas and truncation)
+    repaired = repair_json(response.content)
+    summary_repairs = list(repaired.repairs)
+    summary_data = repaired.data
+    if not summary_repairs:
+        # Valid JSON is not yet a valid summary: checked on the raw text
+        # (decoded straight into summary structs with msgspec)
+        try:
+            decode_summary(response.content)
+        except ValueError as e:
+            summary_repairs.append(f"invalid summary: {e}")
+    if summary_repairs:
+        salvage = salvage_summary(summary_data, repaired.truncated_paths)
+        summary_data = salvage.data
+        summary_repairs += [f"dropped {entry}" for entry in salvage.dropped]
+        summary_repairs += [f"defaulted {field}" for field in salvage.defaults_applied]
+        print(f"⚠️ Repaired malformed LLM response:")
+        for repair in summary_repairs:
+            print(f"  - {repair}")
+    elif not plan.trimmed:
+        # Clean summaries can be reused for near-identical later reports
+        reuse = get_summary_reuse()
+        fingerprint = state.get('summary_fingerprint') or reuse.fingerprint(state['raw_data'], state.get('results'))
+        reuse.store(fingerprint, summary_data)
     
     # STORE LOCALLY (As requested)
     with open("patient_smart_summary.json", "w") as f:
         json.dump(summary_data, f, indent=2)
         
-    return {"smart_summary": summary_data}
+    return {"smart_summary": summary_data, "summary_repairs": summary_repairs, "llm_usage": usage.model_dump()}
 
 # --- NODE 2: UI MAPPER (Declarative Rules-Based Generation) ---
 def map_to_ui(state: AgentState):
     """
     Transform SmartSummary into UIManifest using declarative rules engine.
     
-    Process:
+    Process (inside the manifest worker pool):
     1. Convert dict to SmartSummary Pydantic model
-    2. Create UIManifestGenerator
-    3. Apply rules to generate component sequence
-    4. Validate manifest
-    5. Return to frontend
+    2. Apply rules to generate component sequence
+    3. Validate manifest
+    4. Return to frontend
+    
+    The patient's earlier values for the abnormal findings are attached first
+    (SmartSummary.history, for TrendChart) and this report is queued for the
+    history store.
     """
+    summary = attach_history(state['smart_summary'], state.get('raw_data'), state.get('results'))
+    
+    if state.get("defer_ui"):
+        print("--- UI Mapping Deferred (paged manifest) ---")
+        return {"ui_manifest": [], "smart_summary": summary}
+    
     print("--- Mapping to UI Components (Rules-Based) ---")
     
     try:
-        # Convert raw dict to SmartSummary Pydantic model
-        summary_dict = state['smart_summary']
-        smart_summary = SmartSummary(**summary_dict)
-        
-        # Initialize generator with rules engine
-        generator = UIManifestGenerator()
-        
-        # Generate manifest using declarative rules
-        ui_manifest = generator.generate_from_summary(smart_summary)
+        # Validate, generate and check the manifest in the manifest worker
+        # pool (see manifest_executor.py); this node already runs off-loop
+        payload = get_manifest_executor().run_sync(summary)
+        validation = payload["validation"]
         
-        # Validate manifest
-        validation = generator.validate_manifest(ui_manifest)
-        
-        if not validation.is_valid:
+        if not validation["is_valid"]:
             print(f"⚠️ Manifest validation warnings:")
-            for error in validation.errors:
+            for error in validation["errors"]:
                 print(f"  - {error}")
-            for warning in validation.warnings:
+            for warning in validation["warnings"]:
                 print(f"  - {warning}")
         
-        # Convert UIManifest to JSON-serializable dict
-        manifest_dict = [
-            {
-                "id": item.id,
-                "type": item.type,
-                "version": item.version,
-                "props": item.props,
-                "rendering_hints": item.rendering_hints
-            }
-            for item in ui_manifest.items
-        ]
+        # Items come back serialized (and possibly from the manifest cache)
+        # as [{id, type, version, props, rendering_hints}, ...]
+        manifest_dict = json.loads(payload["items_json"])
         
         print(f"✓ Generated manifest with {len(manifest_dict)} components")
         
-        return {"ui_manifest": manifest_dict}
+        return {"ui_manifest": manifest_dict, "smart_summary": summary}
         
     except Exception as e:
         print(f"✗ Error in UI mapping: {str(e)}")
@@ -219,6 +276,42 @@ def _map_to_ui_legacy(state: AgentState):
 
     return {"ui_manifest": manifest}
 
+def map_rules_only(raw_data: dict, results: Optional[ResultTable] = None, defer_ui: bool = False) -> dict:
+    """
+    Degraded path: build a manifest without calling the LLM.
+    
+    Used when the LLM queue is overloaded. A deterministic summary is built
+    from pre-classified results (values, ranges, statuses; no causes/effects
+    text) and sent through the regular mapper, which itself falls back to the
+    legacy mapper if the rules engine fails. Returns the same state keys as
+    smart_report_app.invoke.
+    """
+    print("--- Mapping Rules-Only Summary (LLM skipped) ---")
+    results = results if results is not None else ResultTable.from_report(raw_data)
+    summary = build_rules_only_summary(raw_data, results)
+    state = {"raw_data": raw_data, "results": results, "smart_summary": summary, "defer_ui": defer_ui}
+    return {**state, "summary_repairs": [], **map_to_ui(state)}
+
+def skeleton_summary(raw_data: dict, results: Optional[ResultTable] = None) -> dict:
+    """
+    Progressive path: the deterministic summary (with trends) behind the
+    skeleton manifest, until the LLM summary replaces it (manifest_upgrades.py).
+    The report is recorded in the history store by the LLM run, not here.
+    """
+    results = results if results is not None else ResultTable.from_report(raw_data)
+    return attach_history(build_rules_only_summary(raw_data, results), raw_data, results, record=False)
+
+def map_reused_summary(raw_data: dict, summary: dict, results: Optional[ResultTable] = None,
+                       defer_ui: bool = False) -> dict:
+    """
+    Near-duplicate path: the summary of an earlier, near-identical report
+    with this report's values patched in (summary_reuse.py) goes straight
+    to the mapper. Returns the same state keys as smart_report_app.invoke.
+    """
+    print("--- Reusing Near-Identical Summary (LLM skipped) ---")
+    state = {"raw_data": raw_data, "results": results, "smart_summary": summary, "defer_ui": defer_ui}
+    return {**state, "summary_repairs": [], **map_to_ui(state)}
+
 # --- GRAPH SETUP ---
 workflow = StateGraph(AgentState)
 workflow.add_node("summarizer", generate_summary)
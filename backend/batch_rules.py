@@ -0,0 +1,357 @@
+"""
+BATCH RULES - Columnar rules evaluation over many summaries at once.
+
+Population-level reporting runs the manifest rules over tens of thousands
+of stored summaries. Evaluating each rule's lambda per summary repeats the
+same work over and over: walking every reading per rule and running the
+same string tests ("'Lipid' in parameter_name") on the same few hundred
+distinct parameter names.
+
+SummaryTable loads summaries once into columns:
+
+- per summary: the length of every list field and the scalar fields
+  (risk_assessment)
+- per reading (abnormal and normal): the owning summary's row, and
+  parameter_name / risk_level / system stored as codes into a per-column
+  dictionary of distinct values
+
+BatchEvaluator evaluates each DSL condition over the whole table:
+len(field) is a length column; any_risk / count_risk / count_containing /
+count_system run their test once per *distinct* value and become a
+group-by count of matching readings per summary (itertools.compress +
+Counter, so the per-reading loop stays in C); correlated_pairs resolves
+each distinct name once and counts relationships once per distinct set of
+biomarkers; comparisons and and/or/not
+apply element-wise. Identical calls shared by several rules are computed
+once per batch. A condition outside that subset (or that fails, e.g.
+division by zero) is evaluated per summary with the rule's compiled lambda,
+so results always match RuleSet.evaluate.
+
+Plans are emitted in bulk: summaries with the same rule matches share one
+component template, and templates without for_each components are
+resolved to component IDs once for all of them.
+
+NumPy / Arrow are not dependencies of this service; the column operations
+are plain lists and itertools, which is where the per-summary loop spent
+its time anyway.
+
+Usage:
+    table = SummaryTable(smart_summaries)
+    evaluator = BatchEvaluator(warm_generator().rules_engine.rule_set)
+    matches = evaluator.evaluate(table)     # {rule name: [result per summary]}
+    plans = evaluator.plans(table, matches)
+    # plans[i] == ((component_id, type, rule, key), ...) in manifest order,
+    # the same IDs and order as plan_from_summary(summaries[i])
+"""
+
+import ast
+import operator
+from collections import Counter
+from itertools import compress, repeat
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from correlations import get_correlation_index
+from rules_dsl import CONSTANTS, FIELDS, SYSTEM_KEYWORDS, parse_condition
+from summary_structs import SummaryStruct
+from ui_mapper import component_id
+from ui_rules import RuleSet
+
+# Reading attributes stored as columns, per list field
+READING_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "abnormal": ("parameter_name", "risk_level", "system"),
+    "normal": ("parameter_name",),
+}
+
+SCALAR_FIELDS = ("risk_assessment",)
+
+LIST_FIELDS = ("abnormal", "normal", "key_concerns", "follow_ups", "lifestyle", "history")
+
+# (component ID, component type, rule, key)
+PlannedComponent = Tuple[str, str, Optional[str], Optional[str]]
+
+_COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b, ast.NotIn: lambda a, b: a not in b,
+}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_UNARY = {ast.Not: operator.not_, ast.USub: operator.neg}
+
+
+class _Dictionary(dict):
+    """Value -> code, assigning the next code to unseen values"""
+
+    def __missing__(self, value):
+        code = self[value] = len(self)
+        return code
+
+
+class _Column(list):
+    """One value per summary (distinguishes columns from list literals)"""
+
+
+class _NotVectorizable(Exception):
+    """Condition uses DSL features the table has no columns for"""
+
+
+class ReadingColumns:
+    """Dictionary-encoded columns for the readings of one list field"""
+
+    def __init__(self, readings: Sequence[Any], rows: List[int], starts: List[int], columns: Sequence[str]):
+        self.rows = rows        # Owning summary, per reading
+        self.starts = starts    # First reading of each summary (readings are contiguous per summary)
+        self.codes: Dict[str, List[int]] = {}
+        self.values: Dict[str, List[Any]] = {}
+        for column in columns:
+            dictionary = _Dictionary()
+            self.codes[column] = list(map(dictionary.__getitem__, map(attrgetter(column), readings)))
+            self.values[column] = list(dictionary)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def matching(self, column: str, test: Callable[[Any], bool]) -> "map":
+        """Per reading: does `test` hold for its value (run once per distinct value)"""
+        hits = [bool(test(value)) for value in self.values[column]]
+        return map(hits.__getitem__, self.codes[column])
+
+    def keys(self, column: str, row: int, length: int) -> List[Any]:
+        """Column values of one summary's readings"""
+        values, start = self.values[column], self.starts[row]
+        return [values[code] for code in self.codes[column][start:start + length]]
+
+
+class SummaryTable:
+    """Summaries as columns: per-summary lengths and scalars, per-reading codes"""
+
+    def __init__(self, summaries: Sequence[SummaryStruct]):
+        self.summaries = summaries
+        self.size = len(summaries)
+        getters = {field: attrgetter(FIELDS[field]) for field in LIST_FIELDS}
+        self.lengths: Dict[str, List[int]] = {}
+        self.readings: Dict[str, ReadingColumns] = {}
+        for field in LIST_FIELDS:
+            lists = list(map(getters[field], summaries))
+            self.lengths[field] = list(map(len, lists))
+            if field in READING_COLUMNS:
+                readings: List[Any] = []
+                rows: List[int] = []
+                starts: List[int] = []
+                for row, elements in enumerate(lists):
+                    starts.append(len(readings))
+                    readings.extend(elements)
+                    rows.extend(repeat(row, len(elements)))
+                self.readings[field] = ReadingColumns(readings, rows, starts, READING_COLUMNS[field])
+        self.scalars: Dict[str, List[Any]] = {
+            field: list(map(attrgetter(FIELDS[field]), summaries)) for field in SCALAR_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    def count_where(self, field: str, matching: "map") -> _Column:
+        """Group-by count: matching readings of `field` per summary"""
+        counts = Counter(compress(self.readings[field].rows, matching))
+        return _Column(map(counts.__getitem__, range(self.size)))
+
+
+class _ColumnEvaluator:
+    """Evaluates condition ASTs to columns over one table, sharing identical calls"""
+
+    def __init__(self, table: SummaryTable):
+        self.table = table
+        self._calls: Dict[str, Any] = {}
+
+    def evaluate(self, node: ast.AST) -> Any:
+        """A _Column (one value per summary) or a constant"""
+        if isinstance(node, ast.Expression):
+            return self.evaluate(node.body)
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            values = [self.evaluate(element) for element in node.elts]
+            if any(isinstance(value, _Column) for value in values):
+                raise _NotVectorizable("non-constant list")
+            return values if isinstance(node, ast.List) else tuple(values)
+        if isinstance(node, ast.Name):
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            if node.id in self.table.scalars:
+                return _Column(self.table.scalars[node.id])
+            raise _NotVectorizable(f"field {node.id!r} used as a value")
+        if isinstance(node, ast.Call):
+            key = ast.dump(node)
+            if key not in self._calls:
+                self._calls[key] = self._call(node)
+            return self._calls[key]
+        if isinstance(node, ast.Compare):
+            left, result = self.evaluate(node.left), None
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.evaluate(comparator)
+                step = self._elementwise(_COMPARE[type(op)], left, right)
+                result = step if result is None else self._elementwise(lambda a, b: a and b, result, step)
+                left = right
+            return result
+        if isinstance(node, ast.BoolOp):
+            combine = (lambda a, b: a and b) if isinstance(node.op, ast.And) else (lambda a, b: a or b)
+            result = self.evaluate(node.values[0])
+            for value in node.values[1:]:
+                result = self._elementwise(combine, result, self.evaluate(value))
+            return result
+        if isinstance(node, ast.UnaryOp):
+            return self._elementwise(_UNARY[type(node.op)], self.evaluate(node.operand))
+        if isinstance(node, ast.BinOp):
+            return self._elementwise(_BINARY[type(node.op)], self.evaluate(node.left), self.evaluate(node.right))
+        raise _NotVectorizable(type(node).__name__)
+
+    def _elementwise(self, function: Callable, *operands: Any) -> Any:
+        if not any(isinstance(operand, _Column) for operand in operands):
+            return function(*operands)
+        return _Column(map(function, *(operand if isinstance(operand, _Column) else repeat(operand, self.table.size)
+                                       for operand in operands)))
+
+    def _call(self, node: ast.Call) -> _Column:
+        name = node.func.id
+        if not node.args or not isinstance(node.args[0], ast.Name) or node.args[0].id not in self.table.lengths:
+            raise _NotVectorizable(f"{name}() over a non-list argument")
+        field = node.args[0].id
+        arguments = [self.evaluate(argument) for argument in node.args[1:]]
+        if any(isinstance(argument, _Column) for argument in arguments):
+            raise _NotVectorizable(f"{name}() with per-summary arguments")
+
+        if name == "len" and not arguments:
+            return _Column(self.table.lengths[field])
+        if name == "correlated_pairs" and not arguments and field in self.table.readings:
+            return self._correlated_pairs(field)
+        readings = self.table.readings.get(field)
+        if readings is None or len(arguments) != 1:
+            raise _NotVectorizable(f"{name}({field}, ...)")
+        columns = READING_COLUMNS[field]
+        argument = arguments[0]
+
+        if name in ("any_risk", "count_risk") and "risk_level" in columns:
+            counts = self.table.count_where(field, readings.matching("risk_level", lambda v: v == argument))
+            return _Column(map(bool, counts)) if name == "any_risk" else counts
+        if name == "count_containing":
+            return self.table.count_where(field, readings.matching("parameter_name", lambda v: argument in v))
+        if name == "count_system" and "system" in columns:
+            keywords = SYSTEM_KEYWORDS.get(argument, [])
+            by_system = readings.matching("system", lambda v: v == argument)
+            by_name = readings.matching("parameter_name", lambda v: any(k in v for k in keywords))
+            return self.table.count_where(field, map(operator.or_, by_system, by_name))
+        raise _NotVectorizable(f"{name}({field}, ...)")
+
+    def _correlated_pairs(self, field: str) -> _Column:
+        """Relationships among each summary's readings, counted once per distinct biomarker set"""
+        readings, index = self.table.readings[field], get_correlation_index()
+        biomarkers = list(map(index.code, readings.values["parameter_name"]))
+        codes = list(map(biomarkers.__getitem__, readings.codes["parameter_name"]))
+        counts: Dict[frozenset, int] = {}
+        column = _Column()
+        for start, length in zip(readings.starts, self.table.lengths[field]):
+            present = frozenset(codes[start:start + length])
+            count = counts.get(present)
+            if count is None:
+                count = counts[present] = index.edges_among(present - {None})
+            column.append(count)
+        return column
+
+
+class BatchEvaluator:
+    """Rules of one RuleSet evaluated and expanded over whole SummaryTables"""
+
+    def __init__(self, rule_set: RuleSet):
+        self.rule_set = rule_set
+        self.rules = rule_set.rules
+        self._trees = {rule.name: parse_condition(rule.when) for rule in self.rules if rule.when is not None}
+        # Conditions that can't be expressed over columns show up on an empty table
+        probe = _ColumnEvaluator(SummaryTable([]))
+        self.vectorized = set()
+        for name, tree in self._trees.items():
+            try:
+                probe.evaluate(tree)
+                self.vectorized.add(name)
+            except _NotVectorizable:
+                pass
+
+    def evaluate(self, table: SummaryTable) -> Dict[str, List[Any]]:
+        """{rule name: condition result per summary}, as RuleSet.evaluate per summary"""
+        evaluator = _ColumnEvaluator(table)
+        matches: Dict[str, List[Any]] = {}
+        for rule in self.rules:
+            if rule.name in self.vectorized:
+                try:
+                    result = evaluator.evaluate(self._trees[rule.name])
+                    matches[rule.name] = result if isinstance(result, _Column) else [result] * table.size
+                    continue
+                except (_NotVectorizable, ArithmeticError):
+                    pass  # e.g. a division by zero the per-summary lambda would short-circuit
+            matches[rule.name] = list(map(rule.condition, table.summaries))
+        return matches
+
+    def _template(self, signature: Tuple[bool, ...]) -> List[Tuple[str, str, Optional[Any]]]:
+        """Component segments for summaries matching exactly these rules (RuleSet.expand order)"""
+        segments: List[Tuple[str, str, Optional[Any]]] = []
+        for rule, matched in zip(self.rules, signature):
+            if not matched:
+                continue
+            for action in rule.actions:
+                segment = [(action.component_type, rule.name, action)] if action.for_each \
+                    else [(action.component_type, rule.name, None)]
+                if action.action_type == "prepend":
+                    segments[0:0] = segment
+                else:
+                    segments.extend(segment)
+        return segments
+
+    def _keys(self, table: SummaryTable, row: int, action: Any) -> List[Any]:
+        """Component keys of a for_each action's elements for one summary"""
+        length = table.lengths[action.for_each][row]
+        if not action.key:
+            return [None] * length
+        readings = table.readings.get(action.for_each)
+        if readings is not None and action.key in readings.codes:
+            return readings.keys(action.key, row, length)
+        elements = attrgetter(FIELDS[action.for_each])(table.summaries[row])
+        return [getattr(element, action.key) for element in elements]
+
+    @staticmethod
+    def _resolve(identities: List[Tuple[str, str, Optional[str]]]) -> Tuple[PlannedComponent, ...]:
+        """Component IDs with ordinals, as UIManifestGenerator.plan_from_specs assigns them"""
+        ordinals: Dict[tuple, int] = {}
+        planned = []
+        for identity in identities:
+            ordinal = ordinals[identity] = ordinals.get(identity, -1) + 1
+            planned.append((component_id(*identity, ordinal), *identity))
+        return tuple(planned)
+
+    def plans(self, table: SummaryTable,
+              matches: Optional[Dict[str, List[Any]]] = None) -> List[Tuple[PlannedComponent, ...]]:
+        """Per summary: ((component ID, type, rule, key), ...) in manifest order"""
+        if matches is None:
+            matches = self.evaluate(table)
+        signatures = zip(*(map(bool, matches[rule.name]) for rule in self.rules)) if self.rules \
+            else repeat((), table.size)
+        templates: Dict[Tuple[bool, ...], Any] = {}
+        plans: List[Tuple[PlannedComponent, ...]] = []
+        for row, signature in enumerate(signatures):
+            template = templates.get(signature)
+            if template is None:
+                segments = self._template(signature)
+                if all(action is None for _, _, action in segments):
+                    template = self._resolve([(component_type, rule, None) for component_type, rule, _ in segments])
+                else:
+                    template = segments
+                templates[signature] = template
+            if isinstance(template, tuple):
+                plans.append(template)  # Shared: no per-summary components
+                continue
+            identities = []
+            for component_type, rule, action in template:
+                if action is None:
+                    identities.append((component_type, rule, None))
+                else:
+                    identities.extend((component_type, rule, key) for key in self._keys(table, row, action))
+            plans.append(self._resolve(identities))
+        return plans
@@ -13,6 +13,9 @@ The registry is used by:
 3. API Export: To generate JSON schemas and TypeScript types
 """
 
+import hashlib
+import json
+from functools import lru_cache
 from typing import Type, Dict, List, Optional, Any
 from pydantic import BaseModel
 from datetime import datetime
@@ -48,6 +51,7 @@ class ComponentDefinition(BaseModel):
     rendering_hints: Dict[str, Any]  # {position, width, severity_triggers, etc.}
     deprecations: Optional[List[str]] = None  # Lists deprecated versions
     breaking_changes: Optional[Dict[str, str]] = None  # {version: description}
+    columnar_props: List[str] = []  # List-of-records props that may be sent as {columns, data}
 
 
 # ============================================================================
@@ -80,6 +84,7 @@ CRITICAL_ALERT_DEF = ComponentDefinition(
     description="Full-width red banner displaying CRITICAL findings. Non-dismissible. Always placed at top after InsightHeader.",
     category="Alert",
     props_model=CriticalAlertProps,
+    columnar_props=["findings"],
     rendering_hints={
         "position": "top",
         "width": "full",
@@ -115,6 +120,7 @@ REASSURANCE_GRID_DEF = ComponentDefinition(
     description="Green-themed grid displaying normal findings. Used to reassure patients that not all values are abnormal. Reduces cognitive load.",
     category="Grid",
     props_model=ReassuranceGridProps,
+    columnar_props=["items"],
     rendering_hints={
         "position": "bottom",
         "width": "full",
@@ -133,6 +139,7 @@ ACTION_TIMELINE_DEF = ComponentDefinition(
     description="Milestone-based timeline component showing when and why follow-up tests should be performed. Helps patient understand clinical pathway.",
     category="Visualization",
     props_model=ActionTimelineProps,
+    columnar_props=["events"],
     rendering_hints={
         "position": "middle",
         "width": "full",
@@ -150,6 +157,7 @@ GUIDELINE_TABLE_DEF = ComponentDefinition(
     description="Professional table component showing recommended actions (diet, exercise, medication). Supports two types: lifestyle and medication. Includes category badges and priority indicators.",
     category="Table",
     props_model=GuidelineTableProps,
+    columnar_props=["rows"],
     rendering_hints={
         "position": "bottom",
         "width": "full",
@@ -345,6 +353,17 @@ def list_components(category: Optional[str] = None) -> List[ComponentDefinition]
     return components
 
 
+def registry_fingerprint() -> str:
+    """
+    Short digest of registered component names and versions.
+
+    Computed on every call (the registry is a plain dict), so bumping any
+    ComponentDefinition.version changes it immediately.
+    """
+    signature = "|".join(f"{name}@{d.version}" for name, d in sorted(COMPONENT_REGISTRY.items()))
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+
 def export_as_json_schema() -> Dict[str, Any]:
     """Export entire registry as JSON Schema for API consumption"""
     schemas = {}
@@ -360,5 +379,17 @@ def export_as_json_schema() -> Dict[str, Any]:
             "renderingHints": component_def.rendering_hints,
             "deprecations": component_def.deprecations or [],
             "breakingChanges": component_def.breaking_changes or {},
+            "columnarProps": component_def.columnar_props,
         }
-    return schemas
\ No newline at end of file
+    return schemas
+
+@lru_cache(maxsize=1)
+def get_schema_export_json() -> bytes:
+    """
+    Serialized `export_as_json_schema()` output, built once per process.
+
+    The registry is static at runtime, so the JSON Schema generation (the
+    expensive part) only needs to run once. Under a preloading server this
+    happens in the parent and forked workers share the bytes copy-on-write.
+    """
+    return json.dumps(export_as_json_schema(), separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,319 @@
+"""
+RESPONSE COMPRESSION - Content-encoding middleware for manifest responses.
+
+Manifests are very repetitive (component types, hint keys, section titles,
+clinical phrasing), but individual responses are small, which is where
+generic compressors do worst. Besides gzip (always) and br/zstd (when the
+optional `brotli` / `zstandard` packages are installed), responses can be
+compressed with zstd against a pre-trained, versioned dictionary using the
+Compression Dictionary Transport scheme (`dcz`, RFC 9842):
+
+1. Client fetches GET /api/compression-dictionary (response carries
+   `Use-As-Dictionary`), or ships the same file with its build
+2. Client sends `Accept-Encoding: dcz` and `Available-Dictionary: :<base64 sha256>:`
+3. Server answers `Content-Encoding: dcz`: a 40-byte header (magic +
+   dictionary SHA-256) followed by a zstd frame compressed with the dictionary
+
+Applies to /analyze, /debug/generate-manifest, /api/schema-export, the
+paged manifest routes and the editable summary routes. The dictionary is
+trained offline by train_manifest_dictionary.py and committed as
+dictionaries/manifest-<version>.zdict.
+
+Configuration (environment):
+    COMPRESSION_ENABLED     true|false (default: true)
+    COMPRESSION_MIN_BYTES   Smaller bodies are sent uncompressed (default: 512)
+
+Usage:
+    app.add_middleware(CompressionMiddleware, paths=COMPRESSED_PATHS)
+"""
+
+import base64
+import gzip
+import hashlib
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import LatencyRecorder
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd / dcz disabled
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # Optional: br disabled
+    brotli = None
+
+DICTIONARY_VERSION = "v1"
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionaries")
+DICTIONARY_PATH = os.path.join(DICTIONARY_DIR, f"manifest-{DICTIONARY_VERSION}.zdict")
+
+# Routes (and their sub-paths) whose JSON responses are compressed
+COMPRESSED_PATHS = ("/analyze", "/debug/generate-manifest", "/api/schema-export", "/manifest/pages", "/summaries",
+                    "/jobs")
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Bodies above this are compressed in the threadpool instead of on the loop
+OFFLOAD_BYTES = 64 * 1024
+
+# dcz framing: magic number followed by the SHA-256 of the dictionary
+_DCZ_MAGIC = b"\x5e\x2a\x4d\x18\x20\x00\x00\x00"
+
+
+class ManifestDictionary:
+    """A versioned zstd dictionary plus its Compression Dictionary Transport identity"""
+
+    def __init__(self, version: str, data: bytes):
+        self.version = version
+        self.data = data
+        self.sha256 = hashlib.sha256(data).digest()
+        self.available_header = f":{base64.b64encode(self.sha256).decode('ascii')}:"
+        self._compression_dict = zstandard.ZstdCompressionDict(data)
+        self._compression_dict.precompute_compress(level=ZSTD_LEVEL)
+
+    def compress(self, body: bytes) -> bytes:
+        """dcz-encode a body (header + zstd frame with this dictionary)"""
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._compression_dict)
+        return _DCZ_MAGIC + self.sha256 + compressor.compress(body)
+
+    def decompress(self, payload: bytes) -> bytes:
+        """Inverse of compress (used by tests and benchmarks)"""
+        header = _DCZ_MAGIC + self.sha256
+        if not payload.startswith(header):
+            raise ValueError("Not a dcz payload for this dictionary")
+        decompressor = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(self.data))
+        return decompressor.decompress(payload[len(header):])
+
+
+@lru_cache(maxsize=1)
+def get_manifest_dictionary() -> Optional[ManifestDictionary]:
+    """The current dictionary, or None if zstandard or the dictionary file is missing"""
+    if zstandard is None or not os.path.exists(DICTIONARY_PATH):
+        return None
+    with open(DICTIONARY_PATH, "rb") as f:
+        return ManifestDictionary(DICTIONARY_VERSION, f.read())
+
+
+def _zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def available_encodings() -> List[str]:
+    """Server preference order of the encodings this process can produce"""
+    encodings = []
+    if get_manifest_dictionary() is not None:
+        encodings.append("dcz")
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """{coding: q} from an Accept-Encoding header ('gzip;q=0.5, br' -> {'gzip': 0.5, 'br': 1.0})"""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def select_encoding(accept_encoding: str, available_dictionary: Optional[str] = None) -> Optional[str]:
+    """Best encoding both sides support, or None for identity"""
+    accepted = parse_accept_encoding(accept_encoding)
+    dictionary = get_manifest_dictionary()
+    for coding in available_encodings():
+        q = accepted.get(coding, accepted.get("*", 0.0) if coding != "dcz" else 0.0)
+        if q <= 0:
+            continue
+        if coding == "dcz" and (dictionary is None or available_dictionary != dictionary.available_header):
+            continue
+        return coding
+    return None
+
+
+def compress_body(body: bytes, coding: str) -> bytes:
+    if coding == "dcz":
+        return get_manifest_dictionary().compress(body)
+    if coding == "zstd":
+        return _zstd(body)
+    if coding == "br":
+        return _brotli(body)
+    return _gzip(body)
+
+
+_CODING_SUFFIX_RE = re.compile(r'-(?:gzip|br|zstd|dcz\.[\w.-]+?)"')
+
+
+def etag_suffix(coding: str) -> str:
+    """Suffix of the ETag of an encoded body (dcz bytes also depend on the dictionary version)"""
+    return f"-dcz.{get_manifest_dictionary().version}" if coding == "dcz" else f"-{coding}"
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag for the body encoded with `coding`: '"<hash>"' -> '"<hash>-gzip"' (weak tags too)"""
+    return f"{etag[:-1]}{etag_suffix(coding)}\"" if etag.endswith('"') else etag
+
+
+def identity_etags(header: str) -> str:
+    """If-Match / If-None-Match with the coding suffixes removed, as the routes compare their own ETags"""
+    return _CODING_SUFFIX_RE.sub('"', header)
+
+
+class CompressionStats:
+    """Per-encoding CPU time and bytes in/out"""
+
+    def __init__(self):
+        self.time: Dict[str, LatencyRecorder] = {}
+        self.bytes_in: Dict[str, int] = {}
+        self.bytes_out: Dict[str, int] = {}
+        self.skipped = 0
+
+    def record(self, coding: str, seconds: float, size_in: int, size_out: int) -> None:
+        self.time.setdefault(coding, LatencyRecorder()).record(seconds)
+        self.bytes_in[coding] = self.bytes_in.get(coding, 0) + size_in
+        self.bytes_out[coding] = self.bytes_out.get(coding, 0) + size_out
+
+    def summary(self) -> Dict[str, Any]:
+        dictionary = get_manifest_dictionary()
+        return {
+            "encodings": available_encodings(),
+            "dictionary": dictionary.version if dictionary else None,
+            "skipped": self.skipped,
+            "by_encoding": {
+                coding: {
+                    "bytes_in": self.bytes_in[coding],
+                    "bytes_out": self.bytes_out[coding],
+                    "ratio": round(self.bytes_in[coding] / self.bytes_out[coding], 3) if self.bytes_out[coding] else 0.0,
+                    "time": recorder.summary(),
+                }
+                for coding, recorder in self.time.items()
+            },
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete JSON responses on selected paths.
+
+    Responses on these routes are single, fully built bodies (not streams),
+    so the body is buffered, compressed once and sent with Content-Length.
+    An encoded body's ETag carries the coding ('"<hash>-gzip"'); If-Match
+    and If-None-Match are passed to the route without it.
+    Event streams (text/event-stream, e.g. manifest upgrades) pass through
+    unbuffered.
+    """
+
+    def __init__(self, app: Callable, paths: Tuple[str, ...] = COMPRESSED_PATHS,
+                 minimum_size: Optional[int] = None, enabled: Optional[bool] = None):
+        self.app = app
+        self.paths = paths
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_BYTES", "512"))
+        self.enabled = enabled if enabled is not None else os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+
+    def _matches(self, path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or not self._matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        # Encoded bodies get their own ETag; conditions are matched on the route's
+        request_headers = Headers(scope=scope)
+        conditions = {name: request_headers[name] for name in ("if-match", "if-none-match") if name in request_headers}
+        if any(identity_etags(value) != value for value in conditions.values()):
+            scope = {**scope, "headers": [(k, v) for k, v in scope["headers"] if k.decode("latin-1") not in conditions]
+                     + [(name.encode(), identity_etags(value).encode("latin-1")) for name, value in conditions.items()]}
+
+        coding = select_encoding(request_headers.get("accept-encoding", ""),
+                                 request_headers.get("available-dictionary"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        revalidating_encoded = etag_suffix(coding) + '"' in conditions.get("if-none-match", "")
+
+        start_message: Optional[Dict[str, Any]] = None
+        chunks: List[bytes] = []
+        streaming = False
+
+        async def buffered_send(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                streaming = Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream")
+                if streaming:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if streaming or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await send_compressed(b"".join(chunks))
+
+        async def send_compressed(body: bytes):
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if coding == "dcz":
+                headers.add_vary_header("Available-Dictionary")
+            compressible = (
+                start_message["status"] == 200
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith("application/json")
+                and len(body) >= self.minimum_size
+            )
+            if compressible:
+                started = time.perf_counter()
+                if len(body) > OFFLOAD_BYTES:
+                    compressed = await run_in_threadpool(compress_body, body, coding)
+                else:
+                    compressed = compress_body(body, coding)
+                compression_stats.record(coding, time.perf_counter() - started, len(body), len(compressed))
+                body = compressed
+                headers["Content-Encoding"] = coding
+                headers["Content-Length"] = str(len(body))
+            else:
+                compression_stats.skipped += 1
+            if "etag" in headers and (compressible or (start_message["status"] == 304 and revalidating_encoded)):
+                headers["ETag"] = encoded_etag(headers["etag"], coding)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
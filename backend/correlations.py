@@ -0,0 +1,270 @@
+"""
+CORRELATIONS - Precomputed biomarker relationship index for CorrelationMap.
+
+Known relationships between biomarkers (HbA1c <-> Glucose <-> Triglycerides,
+Creatinine <-> eGFR, ...) live in rules/biomarker_correlations.json. They are
+loaded once per process into a compact, read-only index:
+
+- an alias table: normalized name -> biomarker code ("Glucose Fasting",
+  "FBS" and "Fasting Blood Sugar" all resolve to glucose_fasting)
+- a CSR adjacency: `offsets[code]:offsets[code + 1]` slices the neighbour,
+  relationship, strength and direction arrays (array module, no per-edge
+  objects). Each relationship is stored once per endpoint; the copy with
+  forward=1 keeps the direction written in the file.
+
+The subgraph induced by a report's findings is then built in
+O(findings + their edges): resolve each finding's name, and for each
+resolved biomarker scan only its own neighbour slice. Comparing every pair
+of findings is never needed.
+
+Names are normalized by lowercasing and dropping punctuation. A name that
+doesn't resolve whole is tried piece by piece, split on parentheses,
+commas, semicolons and slashes: "ALT (SGPT)" -> "alt", "sgpt". A piece
+counts only if all the others merely qualify or restate that biomarker
+(QUALIFIER_WORDS, or words of its own label and aliases): "Calcium, Total"
+is calcium, but "Cholesterol/HDL Ratio", "BUN/Creatinine Ratio" and
+"Glucose (Urine)" resolve to nothing.
+
+Configuration (environment):
+    CORRELATIONS_FILE   Relationship data (default: rules/biomarker_correlations.json)
+
+Usage:
+    index = get_correlation_index()
+    index.resolve("HbA1c (Glycosylated Hemoglobin)")     # -> "hba1c"
+    props = index.subgraph(summary.clinical_summary.abnormal_readings)
+    # {"nodes": [{id, label, severity}], "edges": [{source, target, relationship, strength}]}
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from array import array
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CORRELATIONS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "rules", "biomarker_correlations.json"
+)
+
+# Most severe first; a biomarker reported twice takes the more severe level
+SEVERITY_ORDER = {"CRITICAL": 0, "HIGH": 1, "MODERATE": 2, "LOW": 3, "NORMAL": 4}
+
+# Parameter names remembered by code(); cleared when full
+RESOLVE_CACHE_SIZE = 4096
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_PIECES = re.compile(r"[(),;/\[\]]")
+
+# Name pieces made of these only say how or in what the analyte was measured.
+# Not here on purpose: ratio, index, urine, direct, free, random, ... (other analytes)
+QUALIFIER_WORDS = frozenset((
+    "serum", "plasma", "blood", "whole", "venous", "capillary", "total", "calculated", "calc", "measured",
+    "fasting", "level", "levels", "test", "cardio", "automated", "method", "hplc", "enzymatic", "kinetic",
+    "immunoassay", "clia", "eclia", "cmia", "elisa", "ifcc", "ngsp", "photometry", "spectrophotometry",
+    "colorimetric", "turbidimetric",
+))
+
+
+def normalize_name(name: str) -> str:
+    """'HbA1c (GLYCOSYLATED HEMOGLOBIN)' -> 'hba1c glycosylated hemoglobin'"""
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def _severity(finding: Any) -> str:
+    """Risk level of an abnormal reading; NORMAL for normal readings"""
+    return getattr(finding, "risk_level", "NORMAL")
+
+
+class CorrelationIndex:
+    """Read-only biomarker relationship graph with alias lookup"""
+
+    def __init__(self, document: bytes, source: str = "<memory>"):
+        data = json.loads(document)
+        self.source = source
+        self.fingerprint = hashlib.sha256(document).hexdigest()[:16]
+
+        self.ids: List[str] = []
+        self.labels: List[str] = []
+        self._aliases: Dict[str, int] = {}
+        self._words: List[frozenset] = []  # Words of each biomarker's ID, label and aliases
+        self._resolved: Dict[str, Optional[int]] = {}
+        for biomarker in data["biomarkers"]:
+            code = len(self.ids)
+            if biomarker["id"] in self.ids:
+                raise ValueError(f"Duplicate biomarker id {biomarker['id']!r} in {source}")
+            self.ids.append(biomarker["id"])
+            self.labels.append(biomarker.get("label", biomarker["id"]))
+            words = set()
+            for alias in [biomarker["id"], self.labels[-1], *biomarker.get("aliases", [])]:
+                key = normalize_name(alias)
+                if self._aliases.setdefault(key, code) != code:
+                    raise ValueError(f"Alias {alias!r} names two biomarkers in {source}")
+                words.update(key.split())
+            self._words.append(frozenset(words))
+
+        codes = {biomarker_id: code for code, biomarker_id in enumerate(self.ids)}
+        self.relationships: List[str] = []
+        relationship_codes: Dict[str, int] = {}
+        adjacency: List[List[Tuple[int, int, float, int]]] = [[] for _ in self.ids]
+        seen = set()
+        for entry in data["relationships"]:
+            source_id, target_id, relationship, strength = entry
+            if source_id not in codes or target_id not in codes:
+                raise ValueError(f"Relationship {entry} names an unknown biomarker in {source}")
+            a, b = codes[source_id], codes[target_id]
+            if a == b or (min(a, b), max(a, b)) in seen:
+                raise ValueError(f"Self or duplicate relationship {entry} in {source}")
+            seen.add((min(a, b), max(a, b)))
+            if relationship not in relationship_codes:
+                relationship_codes[relationship] = len(self.relationships)
+                self.relationships.append(relationship)
+            r = relationship_codes[relationship]
+            adjacency[a].append((b, r, float(strength), 1))
+            adjacency[b].append((a, r, float(strength), 0))
+
+        # CSR arrays
+        self.offsets = array("I", [0])
+        self.neighbors = array("H")
+        self.relationship = array("B")
+        self.strength = array("f")
+        self.forward = array("B")
+        for entries in adjacency:
+            for neighbor, r, strength, forward in entries:
+                self.neighbors.append(neighbor)
+                self.relationship.append(r)
+                self.strength.append(strength)
+                self.forward.append(forward)
+            self.offsets.append(len(self.neighbors))
+
+    @classmethod
+    def from_file(cls, path: str) -> "CorrelationIndex":
+        with open(path, "rb") as f:
+            return cls(f.read(), source=path)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.neighbors) // 2
+
+    def code(self, name: str) -> Optional[int]:
+        """Biomarker code for a parameter name, or None if unknown"""
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        code = self._aliases.get(normalize_name(name))
+        if code is None:
+            code = self._piece_code(name)
+        if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[name] = code
+        return code
+
+    def _piece_code(self, name: str) -> Optional[int]:
+        """The one biomarker named by a piece of the name, if the other pieces only qualify it"""
+        codes = set()
+        unresolved = []
+        for piece in _PIECES.split(name):
+            key = normalize_name(piece)
+            if key:
+                code = self._aliases.get(key)
+                if code is None:
+                    unresolved.append(key)
+                else:
+                    codes.add(code)
+        if len(codes) != 1:
+            return None  # No analyte, or two ("BUN/Creatinine Ratio")
+        code = codes.pop()
+        allowed = QUALIFIER_WORDS | self._words[code]
+        return code if all(set(key.split()) <= allowed for key in unresolved) else None
+
+    def resolve_alias(self, name: str) -> Optional[str]:
+        """Biomarker ID if the whole name is a known alias (no piece-by-piece matching), else None"""
+        code = self._aliases.get(normalize_name(name))
+        return None if code is None else self.ids[code]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Biomarker ID for a parameter name, or None if unknown"""
+        code = self.code(name)
+        return None if code is None else self.ids[code]
+
+    def neighbors_of(self, biomarker_id: str) -> List[Dict[str, Any]]:
+        """Relationships of one biomarker (any direction)"""
+        code = self.ids.index(biomarker_id)
+        return [{"id": self.ids[self.neighbors[i]], "relationship": self.relationships[self.relationship[i]],
+                 "strength": round(self.strength[i], 3)}
+                for i in range(self.offsets[code], self.offsets[code + 1])]
+
+    def _present(self, findings: Iterable[Any]) -> Dict[int, Any]:
+        """Biomarker code -> the finding representing it (most severe, then first)"""
+        present: Dict[int, Any] = {}
+        for finding in findings:
+            code = self.code(finding.parameter_name)
+            if code is None:
+                continue
+            current = present.get(code)
+            if current is None or SEVERITY_ORDER.get(_severity(finding), 9) < SEVERITY_ORDER.get(_severity(current), 9):
+                present[code] = finding
+        return present
+
+    def count_edges(self, findings: Iterable[Any]) -> int:
+        """Number of known relationships among the findings"""
+        return self.edges_among(self._present(findings))
+
+    def edges_among(self, codes: Collection[int]) -> int:
+        """Number of known relationships among biomarker codes (a set or dict)"""
+        neighbors, forward, offsets = self.neighbors, self.forward, self.offsets
+        return sum(1 for code in codes for i in range(offsets[code], offsets[code + 1])
+                   if forward[i] and neighbors[i] in codes)
+
+    def subgraph(self, findings: Iterable[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        CorrelationMap props for the relationships among the findings.
+
+        Nodes are the findings with at least one relationship, labelled with
+        the report's parameter name; edges keep the direction from the data file.
+        """
+        present = self._present(findings)
+        neighbors, forward, offsets = self.neighbors, self.forward, self.offsets
+        edges = []
+        connected = set()
+        for code in present:
+            for i in range(offsets[code], offsets[code + 1]):
+                if forward[i] and neighbors[i] in present:
+                    edges.append({
+                        "source": self.ids[code],
+                        "target": self.ids[neighbors[i]],
+                        "relationship": self.relationships[self.relationship[i]],
+                        "strength": round(self.strength[i], 3),
+                    })
+                    connected.add(code)
+                    connected.add(neighbors[i])
+        nodes = [{"id": self.ids[code], "label": finding.parameter_name, "severity": _severity(finding)}
+                 for code, finding in present.items() if code in connected]
+        return {"nodes": nodes, "edges": edges}
+
+    def stats(self) -> Dict[str, Any]:
+        arrays = (self.offsets, self.neighbors, self.relationship, self.strength, self.forward)
+        return {
+            "file": self.source,
+            "fingerprint": self.fingerprint,
+            "biomarkers": len(self.ids),
+            "aliases": len(self._aliases),
+            "relationships": self.edge_count,
+            "adjacency_bytes": sum(a.itemsize * len(a) for a in arrays),
+            "alias_table_bytes": sys.getsizeof(self._aliases),
+        }
+
+
+_index: Optional[CorrelationIndex] = None
+
+
+def get_correlation_index() -> CorrelationIndex:
+    """Process-wide index loaded from CORRELATIONS_FILE"""
+    global _index
+    if _index is None:
+        _index = CorrelationIndex.from_file(os.getenv("CORRELATIONS_FILE") or DEFAULT_CORRELATIONS_FILE)
+    return _index
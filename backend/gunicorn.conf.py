@@ -0,0 +1,44 @@
+"""
+Production serving profile: gunicorn master + uvicorn workers with preload.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+With preload_app the master imports main.py once, so COMPONENT_REGISTRY, the
+compiled rules engine and the serialized schema export are built a single
+time and shared copy-on-write by every forked worker. Per-worker resources
+(manifest worker pool, LLM client connections) are created post-fork in the
+app lifespan.
+
+Configuration (environment):
+    SMART_REPORT_WORKERS  Worker processes (default: number of CPU cores)
+    BACKEND_HOST          Bind host (default: 0.0.0.0)
+    BACKEND_PORT          Bind port (default: 8000)
+    WORKER_TIMEOUT        Seconds before a silent worker is restarted (default: 120,
+                          long enough for a slow LLM call)
+    SUMMARY_STORE_DB      Editable summaries shared by the workers (default with more
+                          than one worker: summaries.db; see manifest_edits.py)
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"{os.getenv('BACKEND_HOST', '0.0.0.0')}:{os.getenv('BACKEND_PORT', '8000')}"
+workers = int(os.getenv("SMART_REPORT_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Editable summaries (POST/GET/PATCH /summaries) must be visible to every worker
+if workers > 1:
+    os.environ.setdefault("SUMMARY_STORE_DB", "summaries.db")
+
+
+def when_ready(server):
+    # Everything allocated so far (registry, rules, schema export) is
+    # long-lived: move it out of the GC's generations so collections in the
+    # workers don't touch those pages and break copy-on-write sharing.
+    gc.freeze()
+    server.log.info("Preloaded shared state frozen; spawning %s workers", workers)
@@ -0,0 +1,416 @@
+"""
+HISTORY STORE - Per-patient, per-parameter lab values over time (SQLite).
+
+Every analyzed RawLabReport is recorded here so later reports can show
+trends (TrendChart). Values live in one WITHOUT ROWID table clustered on
+(patient, parameter, observed_at):
+
+    results(patient_id, parameter_id, observed_at, value, value_text, unit)
+
+The primary key *is* the covering index: "last N values of parameter P for
+patient X" is one reverse range scan over adjacent b-tree pages, with no
+lookups into a separate table. Patients and parameter names are interned in
+small side tables; parameter names are keyed by their biomarker ID when the
+whole name is a known alias (correlations.py), so "Glucose Fasting" and
+"FBS" share a series, and by the normalized name otherwise ("Cholesterol/HDL
+Ratio" never joins the Total Cholesterol series). Results of one report that
+share a key with different values are not recorded.
+
+Values are recorded at the report's collection (else report) date; reports
+without one are not recorded, so re-analyzing them adds no points.
+
+Writes are batched: record_report() only queues rows; a writer thread
+commits them in one transaction per HISTORY_BATCH_SIZE rows or
+HISTORY_FLUSH_SECONDS. The database runs in WAL mode, so lookups (one
+connection per reading thread) never wait for the writer, and several
+worker processes can share one file. Connections are opened on first use,
+after gunicorn forks.
+
+Patients are keyed by patient_details.patient_id only. Reports without
+one are neither recorded nor given history: a name is not an identity, and
+two patients sharing one would see each other's values. History is opt-in
+(HISTORY_DB unset: disabled).
+
+Configuration (environment):
+    HISTORY_DB              SQLite file, e.g. lab_history.db (default: unset, history disabled)
+    HISTORY_BATCH_SIZE      Rows per write transaction (default: 500)
+    HISTORY_FLUSH_SECONDS   Max delay before queued rows are written (default: 1.0)
+    HISTORY_POINTS          Values per TrendChart, including the current report (default: 10)
+    HISTORY_PARAMETERS      Findings looked up per report (default: 20)
+
+Usage:
+    store = get_history_store()
+    store.record_report(raw_report_dict)                  # queued, non-blocking
+    summary = attach_history(summary_dict, raw_report_dict)   # what map_to_ui does
+    store.last_values("id:12345", ["HbA1c", "Glucose"], limit=10, before=observed_at)
+    # {"hba1c": [(observed_at, value, value_text, unit), ...newest first], ...}
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from correlations import get_correlation_index, normalize_name
+from metrics import LatencyRecorder
+from lab_results import ResultTable, to_number
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    label TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    patient_id INTEGER NOT NULL,
+    parameter_id INTEGER NOT NULL,
+    observed_at INTEGER NOT NULL,
+    value REAL,
+    value_text TEXT,
+    unit TEXT,
+    PRIMARY KEY (patient_id, parameter_id, observed_at)
+) WITHOUT ROWID;
+"""
+
+LAST_VALUES_SQL = """
+SELECT observed_at, value, value_text, unit FROM results
+WHERE patient_id = ? AND parameter_id = ? AND observed_at < ?
+ORDER BY observed_at DESC LIMIT ?
+"""
+
+# (patient key, parameter key, label, observed_at, value, value_text, unit)
+Row = Tuple[str, str, str, int, Optional[float], Optional[str], Optional[str]]
+
+# (observed_at, value, value_text, unit)
+Point = Tuple[int, Optional[float], Optional[str], Optional[str]]
+
+
+def patient_key(patient_details: Dict[str, Any]) -> Optional[str]:
+    """Stable patient key from the lab's patient ID (None without one)"""
+    patient_id = str(patient_details.get("patient_id") or "").strip()
+    return f"id:{patient_id}" if patient_id else None
+
+
+def parameter_key(name: str) -> str:
+    """Series key for a parameter name (biomarker ID if the whole name is an alias, else the normalized name)"""
+    return get_correlation_index().resolve_alias(name) or normalize_name(name)
+
+
+def observed_at(report: Dict[str, Any]) -> Optional[int]:
+    """Collection (else report) time of a raw report as epoch seconds; None if absent or unparseable"""
+    sample = report.get("sample_details") or {}
+    for field in ("collected_at", "reported_at"):
+        text = sample.get(field)
+        if not text:
+            continue
+        try:
+            moment = datetime.fromisoformat(str(text))
+        except ValueError:
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp())
+    return None
+
+
+def report_rows(report: Dict[str, Any], table: Optional[ResultTable] = None) -> List[Row]:
+    """Rows to record for a raw report (leaf results with a value; none without a patient ID or date)"""
+    patient = patient_key(report.get("patient_details") or {})
+    when = observed_at(report)
+    if patient is None or when is None:
+        return []
+    table = table if table is not None else ResultTable.from_report(report)
+    rows = []
+    for row in table.results:
+        name = table.text(table.name, row)
+        value, value_text = table.raw_value(row), table.text(table.value_text, row)
+        if not name or (value is None and not value_text):
+            continue
+        number = table.number(row)
+        text = value_text or (str(value) if value is not None and number is None else None)
+        rows.append((patient, parameter_key(name), name, when, number, text, table.text(table.unit, row)))
+    # One point per series and date: a key reported twice with different values is ambiguous
+    values: Dict[str, Set[Tuple[Any, ...]]] = {}
+    for row in rows:
+        values.setdefault(row[1], set()).add(row[4:])
+    seen = set()
+    unique = []
+    for row in rows:
+        if len(values[row[1]]) == 1 and row[1] not in seen:
+            seen.add(row[1])
+            unique.append(row)
+    return unique
+
+
+class HistoryStore:
+    """SQLite-backed value history with a batching writer thread"""
+
+    def __init__(self, path: str, batch_size: int = 500, flush_seconds: float = 1.0):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Optional[List[Row]]]" = queue.Queue()
+        self._local = threading.local()
+        self._ids_lock = threading.Lock()
+        self._parameter_ids: Dict[str, int] = {}
+        self._patient_ids: Dict[str, int] = {}
+        self.rows_written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.lookups = LatencyRecorder()
+        self.batch_writes = LatencyRecorder()
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections are per thread)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    # --- writes ---
+
+    def record_report(self, report: Dict[str, Any], table: Optional[ResultTable] = None) -> int:
+        """Queue a raw report's results for the writer; returns the number of rows queued"""
+        rows = report_rows(report, table)
+        if rows:
+            self._queue.put(rows)
+        return len(rows)
+
+    def record_rows(self, rows: List[Row]) -> None:
+        """Queue prepared rows (bulk loads)"""
+        if rows:
+            self._queue.put(rows)
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer"""
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        while True:
+            pending: List[List[Row]] = [self._queue.get()]
+            size = len(pending[0] or [])
+            deadline = time.monotonic() + self.flush_seconds
+            while pending[-1] is not None and size < self.batch_size:
+                try:
+                    rows = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                pending.append(rows)
+                size += len(rows or [])
+            stop = pending[-1] is None
+            try:
+                self._write(connection, [row for rows in pending if rows for row in rows])
+            except sqlite3.Error as e:
+                self.write_errors += 1
+                print(f"⚠️ History write failed ({size} rows dropped): {e}")
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+            if stop:
+                connection.close()
+                return
+
+    def _write(self, connection: sqlite3.Connection, rows: List[Row]) -> None:
+        if not rows:
+            return
+        started = time.perf_counter()
+        with connection:
+            patients = self._intern(connection, "patients", "key", {row[0]: None for row in rows}, self._patient_ids)
+            parameters = self._intern(connection, "parameters", "key",
+                                      {row[1]: row[2] for row in rows}, self._parameter_ids)
+            # A report analyzed again replaces its values
+            connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                [(patients[p], parameters[k], when, value, text, unit) for p, k, _, when, value, text, unit in rows],
+            )
+        # Cache IDs only once committed: after a rollback they may be reused for other keys
+        with self._ids_lock:
+            self._patient_ids.update(patients)
+            self._parameter_ids.update(parameters)
+        self.rows_written += len(rows)
+        self.batches += 1
+        self.batch_writes.record(time.perf_counter() - started)
+
+    def _intern(self, connection: sqlite3.Connection, table: str, column: str,
+                keys: Dict[str, Optional[str]], cache: Dict[str, int]) -> Dict[str, int]:
+        """IDs for keys, inserting new ones (labels are kept for parameters); `cache` is only read"""
+        found = {key: cache[key] for key in keys if key in cache}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            if table == "parameters":
+                connection.executemany("INSERT OR IGNORE INTO parameters (key, label) VALUES (?, ?)",
+                                       [(key, keys[key]) for key in missing])
+            else:
+                connection.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)",
+                                       [(key,) for key in missing])
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                found.update(connection.execute(
+                    f"SELECT {column}, id FROM {table} WHERE {column} IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return found
+
+    # --- reads ---
+
+    def _lookup_id(self, connection: sqlite3.Connection, table: str, key: str, cache: Dict[str, int]) -> Optional[int]:
+        found = cache.get(key)
+        if found is None:
+            row = connection.execute(f"SELECT id FROM {table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                found = row[0]
+                with self._ids_lock:
+                    cache[key] = found
+        return found
+
+    def last_values(self, patient: str, names: Sequence[str], limit: int = 10,
+                    before: Optional[int] = None) -> Dict[str, List[Point]]:
+        """
+        Up to `limit` most recent values (newest first) per parameter for a patient,
+        observed before `before` (epoch seconds; default: any time).
+
+        Keyed by parameter_key(name); parameters without values are omitted.
+        """
+        started = time.perf_counter()
+        connection = self._reader()
+        before = before if before is not None else 2 ** 62
+        history: Dict[str, List[Point]] = {}
+        patient_id = self._lookup_id(connection, "patients", patient, self._patient_ids)
+        if patient_id is not None:
+            for name in names:
+                key = parameter_key(name)
+                if key in history:
+                    continue
+                parameter_id = self._lookup_id(connection, "parameters", key, self._parameter_ids)
+                if parameter_id is None:
+                    continue
+                points = connection.execute(LAST_VALUES_SQL, (patient_id, parameter_id, before, limit)).fetchall()
+                if points:
+                    history[key] = points
+        self.lookups.record(time.perf_counter() - started)
+        return history
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db": self.path,
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "queued_reports": self._queue.qsize(),
+            "write_errors": self.write_errors,
+            "batch_write": self.batch_writes.summary(),
+            "lookup": self.lookups.summary(),
+        }
+
+
+def trend_history(summary: Dict[str, Any], report: Dict[str, Any],
+                  store: Optional["HistoryStore"] = None) -> List[Dict[str, Any]]:
+    """
+    SmartSummary `history` entries for a report's abnormal readings.
+
+    Each entry holds the earlier numeric values of one parameter plus this
+    report's value (oldest first); parameters without earlier values are left out.
+    """
+    store = store or get_history_store()
+    patient = patient_key(report.get("patient_details") or {})
+    if store is None or patient is None:
+        return []
+    readings = ((summary.get("clinical_summary") or {}).get("abnormal_readings") or [])
+    readings = readings[:int(os.getenv("HISTORY_PARAMETERS", "20"))]
+    points = int(os.getenv("HISTORY_POINTS", "10"))
+    when = observed_at(report) or int(time.time())  # Undated: shown as today, not recorded
+    try:
+        found = store.last_values(patient, [r.get("parameter_name", "") for r in readings],
+                                  limit=max(1, points - 1), before=when)
+    except sqlite3.Error as e:
+        print(f"⚠️ History lookup failed: {e}")
+        return []
+
+    history = []
+    for reading in readings:
+        previous = found.pop(parameter_key(reading.get("parameter_name", "")), None)
+        current = to_number(reading.get("value"))
+        series = [(at, value) for at, value, _, _ in reversed(previous or []) if value is not None]
+        if not series or current is None:
+            continue
+        series.append((when, current))
+        history.append({
+            "parameter_name": reading["parameter_name"],
+            "unit": reading.get("units"),
+            "points": [{"date": datetime.fromtimestamp(at, timezone.utc).strftime("%Y-%m-%d"), "value": value}
+                       for at, value in series],
+        })
+    return history
+
+
+def attach_history(summary: Dict[str, Any], report: Dict[str, Any],
+                   table: Optional[ResultTable] = None, record: bool = True) -> Dict[str, Any]:
+    """
+    Summary with `history` for its findings' earlier values, and the report
+    queued for recording (unless `record` is False, e.g. for a skeleton that
+    the LLM summary will replace). History never fails an analysis: errors
+    are logged and the summary is returned unchanged.
+    """
+    store = get_history_store()
+    if store is None or not report:
+        return summary
+    try:
+        history = trend_history(summary, report, store)
+        if record:
+            store.record_report(report, table)
+    except Exception as e:
+        print(f"⚠️ History unavailable for this report: {e}")
+        return summary
+    return {**summary, "history": history} if history else summary
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Process-wide store on HISTORY_DB (None when history is disabled)"""
+    global _store
+    path = os.getenv("HISTORY_DB", "")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(
+                path,
+                batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "500")),
+                flush_seconds=float(os.getenv("HISTORY_FLUSH_SECONDS", "1.0")),
+            )
+    return _store
+
+
+def shutdown_history_store() -> None:
+    """Write queued rows and stop the writer (if the store was opened)"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
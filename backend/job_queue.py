@@ -0,0 +1,346 @@
+"""
+JOB QUEUE - Durable queue for asynchronous /jobs analyses (SQLite, WAL).
+
+Long LLM calls tie up HTTP connections and trip proxy timeouts. POST /jobs
+only triages and enqueues the report (202 + job ID); separate worker
+processes (job_worker.py) run the smart_report_app graph and store the
+manifest, which clients poll at GET /jobs/{id} or are told about by
+webhook. The API tier and the LLM-bound workers share nothing but the
+database file, so they scale independently.
+
+    jobs(id, status, rank, priority, payload, webhook_url, attempts, max_attempts,
+         available_at, lease, created_at, started_at, finished_at, result, error,
+         webhook_status)
+
+- Order: like the LLM scheduler, by effective arrival time (created_at
+  minus the triage class head start, LLM_AGING_SECONDS), so CRITICAL
+  reports go first without starving ROUTINE ones.
+- Claiming is a single UPDATE ... RETURNING of the first ready job: queued
+  jobs whose available_at has passed, and running jobs whose lease expired.
+  Each claim gets a fresh lease token.
+- Visibility timeout: a claimed job stays invisible for
+  JOB_VISIBILITY_SECONDS. Workers extend the lease (heartbeat) while the
+  graph runs, so only the jobs of crashed or hung workers reappear; a job
+  whose lease expired JOB_MAX_ATTEMPTS times fails (claim() reports it to
+  its on_expired callback, so the webhook still fires).
+- Results and failures are written only under the current lease, so a
+  worker that lost its lease cannot overwrite a newer attempt.
+- A failed attempt is retried after JOB_RETRY_SECONDS * 2^(attempt - 1),
+  up to JOB_MAX_ATTEMPTS attempts.
+- enqueue raises QueueFull beyond JOB_QUEUE_MAX waiting jobs (503 +
+  Retry-After at the API); finished jobs are deleted after
+  JOB_RETENTION_SECONDS.
+
+Webhook URLs must be http(s). With JOB_WEBHOOK_HOSTS set, only those hosts
+are accepted; without it, any host whose addresses are all public (no
+loopback, private, link-local or other internal targets such as cloud
+metadata endpoints). Workers re-check the URL before each delivery.
+
+Configuration (environment):
+    JOBS_DB                  SQLite file shared by the API and workers (default: jobs.db)
+    JOB_VISIBILITY_SECONDS   Lease length, extended while a job runs (default: 120)
+    JOB_MAX_ATTEMPTS         Attempts before a job fails (default: 3)
+    JOB_RETRY_SECONDS        Backoff before the first retry, doubled per attempt (default: 10)
+    JOB_QUEUE_MAX            Waiting jobs before enqueue is refused (default: 1000)
+    JOB_RETENTION_SECONDS    How long finished jobs can be polled (default: 604800)
+    JOB_WEBHOOK_HOSTS        Comma-separated hosts webhooks may target (default: any public host)
+
+Usage:
+    jobs = get_job_queue()
+    job_id = jobs.enqueue(report_dict, priority="ROUTINE", webhook_url=None)
+    claim = jobs.claim("worker-host:1234", on_expired=notify)  # Claim | None
+    jobs.heartbeat(claim)                       # False if the lease was lost
+    jobs.complete(claim, {"ui_manifest": [...]}) / jobs.fail(claim, "error")
+    jobs.get(job_id)                            # JobStatus | None
+"""
+
+import ipaddress
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from lab_results import loads_report
+from llm_scheduler import head_starts
+from preclassify import PRIORITY_CLASSES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    rank REAL NOT NULL,
+    priority TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    webhook_url TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    webhook_status TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, rank);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL;
+"""
+
+# queued: available_at = not before (retry backoff); running: available_at = lease expiry
+CLAIM_SQL = """
+UPDATE jobs SET status = 'running', attempts = attempts + 1, lease = ?, available_at = ?,
+                started_at = COALESCE(started_at, ?)
+WHERE id = (
+    SELECT id FROM jobs WHERE status IN ('queued', 'running') AND available_at <= ?
+    ORDER BY rank LIMIT 1
+)
+RETURNING id, payload, webhook_url, attempts, max_attempts
+"""
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+# Suggested poll interval for unfinished jobs (Retry-After on GET /jobs/{id})
+POLL_AFTER_SECONDS = 2
+
+
+class QueueFull(Exception):
+    """Too many jobs waiting; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Claim(BaseModel):
+    """A job leased to one worker"""
+    job_id: str
+    lease: str
+    attempt: int
+    max_attempts: int
+    payload: Dict[str, Any]
+    webhook_url: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    """What GET /jobs/{id} reports"""
+    job_id: str
+    status: str
+    priority: str
+    attempts: int
+    max_attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    webhook_status: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None  # {"ui_manifest": [...], ...} once succeeded
+
+
+def check_webhook_url(url: str, allowed_hosts: List[str]) -> str:
+    """
+    The URL if it is http(s) to an allowed host: one of `allowed_hosts` when
+    configured, else a host that resolves to public addresses only.
+    ValueError otherwise (including unresolvable hosts).
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Webhook URL must be an absolute http(s) URL: {url}")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"Webhook host not allowed: {host}")
+        return url
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port, proto=socket.IPPROTO_TCP)}
+    except (OSError, UnicodeError):
+        raise ValueError(f"Webhook host cannot be resolved: {host}") from None
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])  # Drop an IPv6 zone
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Webhook host {host} resolves to a non-public address: {address}")
+    return url
+
+
+class JobQueue:
+    """SQLite-backed job queue shared by API and worker processes"""
+
+    def __init__(self, path: str, visibility_seconds: float = 120.0, max_attempts: int = 3,
+                 retry_seconds: float = 10.0, max_queued: int = 1000, retention_seconds: float = 604800.0,
+                 aging_seconds: float = 30.0, webhook_hosts: Optional[List[str]] = None):
+        self.path = path
+        self.visibility_seconds = max(1.0, visibility_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_seconds = retry_seconds
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.head_start = head_starts(aging_seconds)
+        self.webhook_hosts = [host.strip().lower() for host in webhook_hosts or [] if host.strip()]
+        self._local = threading.local()
+        self.enqueued = 0
+        self.refused = 0
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, in autocommit mode (each statement is its own transaction)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # --- API side ---
+
+    def enqueue(self, report: Dict[str, Any], priority: str = "ROUTINE", webhook_url: Optional[str] = None,
+                payload: Optional[str] = None) -> str:
+        """
+        Queue a report (stored as `payload`, its JSON text, when given); raises
+        QueueFull when too many jobs wait, ValueError for a bad webhook URL
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if webhook_url:
+            check_webhook_url(webhook_url, self.webhook_hosts)
+        connection = self._connection()
+        queued = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if queued >= self.max_queued:
+            self.refused += 1
+            raise QueueFull(f"{queued} jobs waiting", retry_after=max(1, math.ceil(self.retry_seconds)))
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        connection.execute(
+            "INSERT INTO jobs (id, status, rank, priority, payload, webhook_url, max_attempts, available_at, "
+            "created_at) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, now - self.head_start[priority], priority, payload or json.dumps(report), webhook_url or None,
+             self.max_attempts, now, now),
+        )
+        self.enqueued += 1
+        return job_id
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        row = self._connection().execute(
+            "SELECT id, status, priority, attempts, max_attempts, created_at, started_at, finished_at, error, "
+            "webhook_status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return JobStatus(
+            job_id=row[0], status=row[1], priority=row[2], attempts=row[3], max_attempts=row[4],
+            created_at=row[5], started_at=row[6], finished_at=row[7], error=row[8], webhook_status=row[9],
+            result=json.loads(row[10]) if row[10] else None,
+        )
+
+    # --- worker side ---
+
+    def claim(self, worker: str, on_expired: Optional[Callable[[Claim, str], None]] = None) -> Optional[Claim]:
+        """
+        Lease the first ready job (None if there is none). Jobs reclaimed after
+        their last attempt's lease expired are failed here instead, and passed
+        to on_expired(claim, error) for their webhook.
+        """
+        connection = self._connection()
+        while True:
+            now = time.time()
+            lease = f"{worker}:{uuid.uuid4().hex[:8]}"
+            row = connection.execute(CLAIM_SQL, (lease, now + self.visibility_seconds, now, now)).fetchone()
+            if row is None:
+                return None
+            claim = Claim(job_id=row[0], lease=lease, payload=loads_report(row[1]), webhook_url=row[2],
+                          attempt=row[3], max_attempts=row[4])
+            if claim.attempt <= claim.max_attempts:
+                return claim
+            # Reclaimed after its last attempt's lease expired (worker crashed or hung)
+            error = f"No result after {claim.max_attempts} attempts (lease expired)"
+            if self._finish(claim, "failed", None, error) and on_expired is not None:
+                claim.attempt = claim.max_attempts  # The reclaim itself was counted
+                on_expired(claim, error)
+
+    def heartbeat(self, claim: Claim) -> bool:
+        """Extend the lease; False if it was lost (expired and reclaimed)"""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET available_at = ? WHERE id = ? AND lease = ? AND status = 'running'",
+            (time.time() + self.visibility_seconds, claim.job_id, claim.lease))
+        return cursor.rowcount == 1
+
+    def _finish(self, claim: Claim, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease = NULL "
+            "WHERE id = ? AND lease = ? AND status = 'running'",
+            (status, json.dumps(result) if result is not None else None, error, time.time(),
+             claim.job_id, claim.lease))
+        return cursor.rowcount == 1
+
+    def complete(self, claim: Claim, result: Dict[str, Any]) -> bool:
+        """Store the result; False if the lease was lost (the result is dropped)"""
+        return self._finish(claim, "succeeded", result, None)
+
+    def fail(self, claim: Claim, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt: re-queued with backoff while attempts remain
+        (and `retry`), else failed. Returns the new status, None if the lease was lost.
+        """
+        if not retry or claim.attempt >= claim.max_attempts:
+            return "failed" if self._finish(claim, "failed", None, error) else None
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'queued', available_at = ?, error = ?, lease = NULL "
+            "WHERE id = ? AND lease = ? AND status = 'running'",
+            (time.time() + self.retry_seconds * 2 ** (claim.attempt - 1), error, claim.job_id, claim.lease))
+        return "queued" if cursor.rowcount == 1 else None
+
+    def set_webhook_status(self, job_id: str, webhook_status: str) -> None:
+        self._connection().execute("UPDATE jobs SET webhook_status = ? WHERE id = ?", (webhook_status, job_id))
+
+    def purge(self) -> int:
+        """Delete jobs finished more than the retention period ago; returns the count"""
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (time.time() - self.retention_seconds,))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        connection = self._connection()
+        now = time.time()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = connection.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        expired = connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND available_at <= ?", (now,)).fetchone()[0]
+        return {
+            "jobs": counts,
+            "oldest_queued_seconds": round(now - oldest, 1) if oldest is not None else 0.0,
+            "expired_leases": expired,
+            "enqueued": self.enqueued,  # By this process
+            "refused": self.refused,
+            "max_queued": self.max_queued,
+        }
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue on JOBS_DB, configured from the JOB_* environment variables"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                os.getenv("JOBS_DB", "jobs.db"),
+                visibility_seconds=float(os.getenv("JOB_VISIBILITY_SECONDS", "120")),
+                max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+                retry_seconds=float(os.getenv("JOB_RETRY_SECONDS", "10")),
+                max_queued=int(os.getenv("JOB_QUEUE_MAX", "1000")),
+                retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", "604800")),
+                aging_seconds=float(os.getenv("LLM_AGING_SECONDS", "30")),
+                webhook_hosts=os.getenv("JOB_WEBHOOK_HOSTS", "").split(","),
+            )
+    return _queue
@@ -0,0 +1,271 @@
+"""
+JOB WORKER - Runs queued /jobs analyses (job_queue.py) in worker processes.
+
+    cd backend && python job_worker.py [--processes 2] [--threads 1]
+
+The supervisor starts --processes worker processes (restarting any that
+die). Each imports the agent graph once and runs --threads claim loops:
+claim the first ready job, analyze its report as /analyze does (summary
+reuse, else the smart_report_app graph) while a heartbeat thread extends
+the lease, then store the manifest or the error and, once the job is final,
+POST its webhook (also for jobs failed because their last attempt's lease
+expired). processes x threads caps the LLM calls in flight; the API
+tier never waits on them.
+
+Webhooks carry {job_id, status, attempts, error, result_url} (no report
+data; the result is fetched from GET /jobs/{id}), signed with
+JOB_WEBHOOK_SECRET when set: X-Signature: sha256=<HMAC-SHA256 of the body>.
+The URL is re-checked (job_queue.check_webhook_url) before every attempt,
+as the host may resolve differently than at enqueue time, and redirects
+are not followed.
+
+SIGTERM / SIGINT: each loop finishes its current job, then exits. A job
+cut off harder than that reappears after its visibility timeout.
+
+Configuration (environment):
+    JOB_WORKER_PROCESSES   Worker processes (default: 2)
+    JOB_WORKER_THREADS     Claim loops per process (default: 1)
+    JOB_POLL_SECONDS       Idle poll interval (default: 1.0)
+    JOB_WEBHOOK_SECRET     HMAC key for webhook signatures (default: unsigned)
+    JOB_WEBHOOK_ATTEMPTS   Delivery attempts per webhook (default: 3)
+    JOB_WEBHOOK_TIMEOUT    Seconds per delivery attempt (default: 10)
+    Queue settings: JOBS_DB and JOB_* in job_queue.py. MANIFEST_EXECUTOR
+    defaults to inline here (the worker process is the isolation).
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from job_queue import Claim, check_webhook_url, get_job_queue
+
+# Purge finished jobs past their retention this often (per process)
+PURGE_SECONDS = 300
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    """A redirect could point the POST at a host check_webhook_url refuses"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_webhook_opener = urllib.request.build_opener(_NoRedirects)
+
+
+def deliver_webhook(url: str, payload: Dict[str, Any], secret: Optional[str], attempts: int,
+                    timeout: float, allowed_hosts: Optional[List[str]] = None) -> str:
+    """
+    POST the payload (retrying with backoff); returns "delivered", "refused: ..."
+    if the URL no longer passes check_webhook_url, or the last error
+    """
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Signature"] = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    error = "not attempted"
+    for attempt in range(max(1, attempts)):
+        if attempt:
+            time.sleep(2 ** attempt)
+        try:
+            check_webhook_url(url, allowed_hosts or [])
+        except ValueError as e:
+            return f"refused: {e}"
+        try:
+            with _webhook_opener.open(urllib.request.Request(url, data=body, headers=headers, method="POST"),
+                                      timeout=timeout) as response:
+                if 200 <= response.status < 300:
+                    return "delivered"
+                error = f"HTTP {response.status}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return f"failed: {error}"
+
+
+class Worker:
+    """Claim loops, lease heartbeats and webhook delivery for one process"""
+
+    def __init__(self, name: str, threads: int = 1, poll_seconds: float = 1.0):
+        self.name = name
+        self.threads = max(1, threads)
+        self.poll_seconds = poll_seconds
+        self.jobs = get_job_queue()
+        self.stopping = threading.Event()
+        self._loops_done = threading.Event()  # Heartbeats continue while stopping loops finish their jobs
+        self._active: Dict[str, Claim] = {}
+        self._active_lock = threading.Lock()
+        self._purged_at = 0.0
+        self.webhook_secret = os.getenv("JOB_WEBHOOK_SECRET") or None
+        self.webhook_attempts = int(os.getenv("JOB_WEBHOOK_ATTEMPTS", "3"))
+        self.webhook_timeout = float(os.getenv("JOB_WEBHOOK_TIMEOUT", "10"))
+
+    def analyze(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """The /analyze pipeline without HTTP: reused summary, else the graph"""
+        from agents import map_reused_summary, smart_report_app
+        from lab_results import ResultTable
+        from summary_reuse import get_summary_reuse
+
+        results = ResultTable.from_report(report)
+        reuse = get_summary_reuse()
+        fingerprint = reuse.fingerprint(report, results)
+        reused = reuse.lookup(fingerprint)
+        if reused is not None:
+            state = map_reused_summary(report, reused, results)
+        else:
+            state = smart_report_app.invoke({"raw_data": report, "results": results,
+                                             "summary_fingerprint": fingerprint})
+        if not state.get("ui_manifest"):
+            raise RuntimeError("Agent returned empty manifest")
+        return {
+            "ui_manifest": state["ui_manifest"],
+            "summary_repairs": state.get("summary_repairs") or [],
+            "summary_reused": reused is not None,
+            "llm_usage": state.get("llm_usage"),
+        }
+
+    def _heartbeat_loop(self) -> None:
+        interval = self.jobs.visibility_seconds / 3
+        while not self._loops_done.wait(interval):
+            with self._active_lock:
+                claims = list(self._active.values())
+            for claim in claims:
+                try:
+                    if not self.jobs.heartbeat(claim):
+                        print(f"⚠️ Lost the lease on job {claim.job_id}; its result will be dropped")
+                except Exception as e:
+                    print(f"⚠️ Heartbeat failed for job {claim.job_id}: {e}")
+
+    def _notify(self, claim: Claim, status: str, error: Optional[str]) -> None:
+        if not claim.webhook_url:
+            return
+        webhook_status = deliver_webhook(
+            claim.webhook_url,
+            {"job_id": claim.job_id, "status": status, "attempts": claim.attempt, "error": error,
+             "result_url": f"/jobs/{claim.job_id}"},
+            self.webhook_secret, self.webhook_attempts, self.webhook_timeout, self.jobs.webhook_hosts,
+        )
+        self.jobs.set_webhook_status(claim.job_id, webhook_status)
+        if webhook_status != "delivered":
+            print(f"⚠️ Webhook for job {claim.job_id} {webhook_status}")
+
+    def _notify_expired(self, claim: Claim, error: str) -> None:
+        print(f"✗ Job {claim.job_id} failed: {error}")
+        self._notify(claim, "failed", error)
+
+    def process(self, claim: Claim) -> None:
+        print(f"--- Job {claim.job_id} (attempt {claim.attempt}/{claim.max_attempts}) ---")
+        with self._active_lock:
+            self._active[claim.job_id] = claim
+        try:
+            result, error = self.analyze(claim.payload), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        finally:
+            with self._active_lock:
+                self._active.pop(claim.job_id, None)
+
+        if error is not None:
+            status = self.jobs.fail(claim, error)
+            print(f"✗ Job {claim.job_id} attempt {claim.attempt} failed ({status or 'lease lost'}): {error}")
+        elif self.jobs.complete(claim, result):
+            status = "succeeded"
+            print(f"✓ Job {claim.job_id} done ({len(result['ui_manifest'])} components)")
+        else:
+            status = None
+            print(f"⚠️ Job {claim.job_id} finished after its lease was lost; result dropped")
+        if status in ("succeeded", "failed"):
+            self._notify(claim, status, error)
+
+    def _claim_loop(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                claim = self.jobs.claim(self.name, on_expired=self._notify_expired)
+            except Exception as e:
+                print(f"⚠️ Job queue unavailable: {e}")
+                claim = None
+            if claim is None:
+                if time.time() - self._purged_at > PURGE_SECONDS:
+                    self._purged_at = time.time()
+                    self.jobs.purge()
+                self.stopping.wait(self.poll_seconds)
+                continue
+            self.process(claim)
+
+    def run(self) -> None:
+        """Run the claim loops until stop() (or SIGTERM / SIGINT)"""
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+        loops = [threading.Thread(target=self._claim_loop, name=f"job-loop-{i}") for i in range(self.threads)]
+        for loop in loops:
+            loop.start()
+        for loop in loops:
+            loop.join()
+        self._loops_done.set()
+
+    def stop(self, *_: Any) -> None:
+        self.stopping.set()
+
+
+def worker_main(index: int, threads: int, poll_seconds: float) -> None:
+    """Entry point of one worker process"""
+    os.environ.setdefault("MANIFEST_EXECUTOR", "inline")
+    worker = Worker(f"{socket.gethostname()}:{os.getpid()}", threads, poll_seconds)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    import agents  # Graph, LLM client and prompt prefix, once per process
+    from history_store import shutdown_history_store
+    print(f"✓ Job worker {index} ({worker.name}) ready with {worker.threads} thread(s)")
+    try:
+        worker.run()
+    finally:
+        shutdown_history_store()  # Commit queued history rows
+        agents.prompt_prefix.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "2")))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("JOB_WORKER_THREADS", "1")))
+    parser.add_argument("--poll-seconds", type=float, default=float(os.getenv("JOB_POLL_SECONDS", "1.0")))
+    args = parser.parse_args()
+
+    get_job_queue()  # Create the schema before the workers race to
+    # Spawned, not forked: no inherited SQLite connection or LLM client state
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+
+    def stop(*_):
+        stopping.set()
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM: finish the current job, then exit
+
+    def spawn(index: int) -> multiprocessing.Process:
+        process = context.Process(target=worker_main, args=(index, args.threads, args.poll_seconds),
+                                          name=f"job-worker-{index}")
+        process.start()
+        return process
+
+    processes = {index: spawn(index) for index in range(max(1, args.processes))}
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while not stopping.is_set():
+        for index, process in list(processes.items()):
+            if not process.is_alive() and not stopping.is_set():
+                print(f"⚠️ Job worker {index} exited ({process.exitcode}); restarting")
+                processes[index] = spawn(index)
+        stopping.wait(1.0)
+    for process in processes.values():
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
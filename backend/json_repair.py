@@ -0,0 +1,349 @@
+"""
+LENIENT JSON REPAIR - Salvages truncated or slightly malformed LLM output.
+
+Gemini occasionally returns a response that `json.loads` rejects outright:
+- Wrapped in markdown fences (```json ... ```) or surrounded by prose
+- Trailing commas before a closing bracket
+- Truncated mid-stream (unclosed strings, arrays and objects)
+
+Throwing such a response away forces a full (expensive) retry. This module
+repairs the common defects in a single streaming pass and then salvages every
+complete reading from the result, reporting exactly what had to be dropped.
+
+Usage:
+    result = repair_json(response.content)        # -> RepairResult
+    salvage = salvage_summary(result.data, result.truncated_paths)
+    smart_summary = SmartSummary(**salvage.data)
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+from schema import (
+    AbnormalReading,
+    NormalReading,
+    FollowUpTest,
+    LifestyleModification,
+    MedicationConsideration,
+    DetailedAnalysisItem,
+    OverallHealthStatus,
+)
+
+
+class JSONRepairError(ValueError):
+    """Raised when the input cannot be turned into a JSON document at all"""
+
+
+class RepairResult(BaseModel):
+    """Parsed document plus a log of the repairs that were applied"""
+    data: Any
+    repairs: List[str] = []
+    dropped_text: str = ""  # Tail of the input discarded by truncation repair
+    truncated_paths: List[str] = []  # Objects force-closed by truncation repair, e.g. "a.b[3]"
+
+
+class SalvageResult(BaseModel):
+    """SmartSummary-shaped dict plus the entries that could not be kept"""
+    data: Dict[str, Any]
+    dropped: List[str] = []
+    defaults_applied: List[str] = []
+
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z0-9_-]*\s*\n?|\n?\s*```\s*$")
+_CLOSERS = {"{": "}", "[": "]"}
+_BARE_TOKEN_RE = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?|true|false|null")
+_TRUNCATED_MARKER = "__truncated__"
+
+
+def _strip_wrapping(text: str, repairs: List[str]) -> str:
+    """Remove markdown fences and any prose before/after the JSON document"""
+    stripped = _FENCE_RE.sub("", text)
+    if stripped != text:
+        repairs.append("removed markdown code fences")
+
+    starts = [i for i in (stripped.find("{"), stripped.find("[")) if i >= 0]
+    if not starts:
+        raise JSONRepairError("No JSON object or array found in response")
+    start = min(starts)
+    if stripped[:start].strip():
+        repairs.append(f"removed {start} characters of leading text")
+    return stripped[start:]
+
+
+def _scan(text: str, repairs: List[str]) -> Tuple[str, str]:
+    """
+    Single streaming pass that rewrites `text` into valid JSON.
+
+    A checkpoint (output length + open container stack) is recorded after every
+    complete value. If the input ends while a container, string or bare token
+    is still open, output is cut back to the last checkpoint and the remaining
+    containers are closed, so only the incomplete trailing element is lost.
+
+    Returns:
+        Tuple of (repaired JSON text, discarded input tail)
+    """
+    out: List[str] = []
+    stack: List[str] = []       # Open containers: "{" or "["
+    key_mode: List[bool] = []   # Parallel to stack: True if next string in object is a key
+    checkpoint: Optional[Tuple[int, Tuple[str, ...], int]] = None
+
+    in_string = False
+    string_is_key = False
+    escape = False
+    bare_start = -1
+    i = 0
+    n = len(text)
+
+    def mark(pos: int) -> None:
+        nonlocal checkpoint
+        checkpoint = (len(out), tuple(stack), pos)
+
+    def finish_bare(pos: int) -> None:
+        nonlocal bare_start
+        token = "".join(out[bare_start:])
+        if not _BARE_TOKEN_RE.fullmatch(token):
+            raise JSONRepairError(f"Invalid literal {token!r} at offset {pos}")
+        bare_start = -1
+        mark(pos)
+
+    while i < n:
+        ch = text[i]
+
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if not string_is_key:
+                    mark(i + 1)
+            elif ch == "\n":
+                # Raw newlines are illegal inside JSON strings
+                out[-1] = "\\n"
+            i += 1
+            continue
+
+        if bare_start >= 0 and (ch.isspace() or ch in ',:]}"{['):
+            finish_bare(i)
+
+        if ch.isspace():
+            out.append(ch)
+        elif ch in "{[":
+            if stack and stack[-1] == "{" and key_mode[-1]:
+                raise JSONRepairError(f"Container used as object key at offset {i}")
+            out.append(ch)
+            stack.append(ch)
+            key_mode.append(ch == "{")
+            mark(i + 1)
+        elif ch in "}]":
+            if not stack:
+                break
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repairs.append(f"removed trailing comma at offset {i}")
+            opener = stack.pop()
+            key_mode.pop()
+            if _CLOSERS[opener] != ch:
+                repairs.append(f"replaced mismatched '{ch}' with '{_CLOSERS[opener]}' at offset {i}")
+            out.append(_CLOSERS[opener])
+            if not stack:
+                i += 1
+                break
+            mark(i + 1)
+        elif ch == ":":
+            out.append(ch)
+            if stack and stack[-1] == "{":
+                key_mode[-1] = False
+        elif ch == ",":
+            out.append(ch)
+            if stack and stack[-1] == "{":
+                key_mode[-1] = True
+        elif ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and key_mode[-1]
+            out.append(ch)
+        else:
+            if bare_start < 0:
+                bare_start = len(out)
+            out.append(ch)
+        i += 1
+
+    trailing = text[i:]
+    if trailing.strip():
+        repairs.append(f"removed {len(trailing.strip())} characters of trailing text")
+
+    if not stack and not in_string:
+        if bare_start >= 0:
+            finish_bare(n)
+        return "".join(out), ""
+
+    # Truncated input: roll back to the last complete value and close the rest
+    if checkpoint is None:
+        raise JSONRepairError("Response truncated before any complete value")
+    cut, open_stack, consumed = checkpoint
+    out = out[:cut]
+    for opener in reversed(open_stack):
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+        if opener == "{":
+            # Tag force-closed objects so salvage can tell partial entries apart
+            out.append(f'{"" if out[-1] == "{" else ","}"{_TRUNCATED_MARKER}":true')
+        out.append(_CLOSERS[opener])
+    repairs.append(f"closed {len(open_stack)} unclosed container(s) after truncation")
+    return "".join(out), text[consumed:]
+
+
+def repair_json(text: str) -> RepairResult:
+    """
+    Parse `text` as JSON, repairing common LLM output defects if needed.
+
+    Args:
+        text: Raw LLM response content
+
+    Returns:
+        RepairResult: Parsed data and the list of repairs applied (empty if
+        the input was already valid JSON)
+
+    Raises:
+        JSONRepairError: If nothing parseable could be recovered
+    """
+    try:
+        return RepairResult(data=json.loads(text))
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    repairs: List[str] = []
+    body = _strip_wrapping(text or "", repairs)
+    repaired, dropped_text = _scan(body, repairs)
+    try:
+        data = json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise JSONRepairError(f"Repaired text is still invalid JSON: {e}") from e
+
+    truncated_paths: List[str] = []
+    _collect_truncated(data, "", truncated_paths)
+    return RepairResult(
+        data=data,
+        repairs=repairs,
+        dropped_text=dropped_text,
+        truncated_paths=truncated_paths,
+    )
+
+
+def _collect_truncated(node: Any, path: str, found: List[str]) -> None:
+    """Strip truncation markers from `node` in place, recording their paths"""
+    if isinstance(node, dict):
+        if node.pop(_TRUNCATED_MARKER, None):
+            found.append(path)
+        for key, value in node.items():
+            _collect_truncated(value, f"{path}.{key}" if path else key, found)
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            _collect_truncated(value, f"{path}[{index}]", found)
+
+
+# ============================================================================
+# SMART SUMMARY SALVAGE
+# ============================================================================
+
+# (section, list field, item model, label field)
+_SALVAGED_LISTS: List[Tuple[str, str, Type[BaseModel], str]] = [
+    ("clinical_summary", "abnormal_readings", AbnormalReading, "parameter_name"),
+    ("clinical_summary", "normal_readings", NormalReading, "parameter_name"),
+    ("management_plan", "follow_up_tests", FollowUpTest, "recommended_tests"),
+    ("management_plan", "lifestyle_modifications", LifestyleModification, "category"),
+    ("management_plan", "medication_considerations", MedicationConsideration, "condition"),
+    (None, "detailed_analysis", DetailedAnalysisItem, "parameter"),
+]
+
+_DEFAULT_OVERALL_STATUS = {
+    "risk_assessment": "Unknown",
+    "key_concerns": [],
+    "immediate_action_items": [],
+}
+
+
+def _keep_valid(items: Any, model: Type[BaseModel], label: str, path: str,
+                truncated: Set[str], dropped: List[str]) -> List[Any]:
+    """Keep only the list entries that are complete and validate against `model`"""
+    if not isinstance(items, list):
+        dropped.append(f"{path} (not a list)")
+        return []
+    kept = []
+    for index, item in enumerate(items):
+        name = item.get(label, "?") if isinstance(item, dict) else "?"
+        item_path = f"{path}[{index}]"
+        if any(p == item_path or p.startswith(item_path + ".") for p in truncated):
+            dropped.append(f"{item_path} ({name}, truncated)")
+            continue
+        try:
+            model(**item)
+            kept.append(item)
+        except Exception:
+            dropped.append(f"{item_path} ({name})")
+    return kept
+
+
+def salvage_summary(data: Any, truncated_paths: Optional[List[str]] = None) -> SalvageResult:
+    """
+    Reduce a (possibly repaired) SmartSummary dict to its valid parts.
+
+    Incomplete list entries (e.g. a reading cut off mid-way by truncation) are
+    dropped individually instead of failing the whole summary. Missing
+    sections are filled with empty defaults so rules-based mapping can run.
+
+    Args:
+        data: Parsed LLM output
+        truncated_paths: RepairResult.truncated_paths; entries cut off by
+            truncation are dropped even if they would still validate
+
+    Returns:
+        SalvageResult: Cleaned dict plus dropped entries and applied defaults
+    """
+    if not isinstance(data, dict):
+        raise JSONRepairError("Summary must be a JSON object")
+
+    summary = dict(data)
+    truncated = set(truncated_paths or [])
+    dropped: List[str] = []
+    defaults: List[str] = []
+
+    for section in ("clinical_summary", "management_plan"):
+        if not isinstance(summary.get(section), dict):
+            summary[section] = {}
+            defaults.append(section)
+        else:
+            summary[section] = dict(summary[section])
+
+    for section, field, model, label in _SALVAGED_LISTS:
+        container = summary[section] if section else summary
+        path = f"{section}.{field}" if section else field
+        if field not in container or container[field] is None:
+            container[field] = []
+            if field in ("abnormal_readings", "normal_readings", "follow_up_tests", "lifestyle_modifications"):
+                defaults.append(path)
+            continue
+        container[field] = _keep_valid(container[field], model, label, path, truncated, dropped)
+
+    clinical = summary["clinical_summary"]
+    try:
+        OverallHealthStatus(**clinical.get("overall_health_status") or {})
+    except Exception:
+        partial = clinical.get("overall_health_status")
+        status = dict(_DEFAULT_OVERALL_STATUS)
+        if isinstance(partial, dict):
+            # Keep whichever fields survived with the right type
+            for key, default in _DEFAULT_OVERALL_STATUS.items():
+                if isinstance(partial.get(key), type(default)):
+                    status[key] = partial[key]
+        clinical["overall_health_status"] = status
+        defaults.append("clinical_summary.overall_health_status")
+
+    return SalvageResult(data=summary, dropped=dropped, defaults_applied=defaults)
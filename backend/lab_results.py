@@ -0,0 +1,456 @@
+"""
+LAB RESULTS - Flattened, array-backed table of a report's results.
+
+`report_results` is a tree: panels hold `members`, which may be panels
+again. Every stage that reads results (pre-classification, the prompt
+builder, the history store) used to walk that tree itself and re-parse the
+same values and reference ranges. ResultTable flattens it once, without
+recursion (an explicit stack, so nesting depth is not limited by the
+interpreter), into parallel columns:
+
+- parent / depth / is_panel: tree shape (parent -1 for top-level entries)
+- name, value_text, unit, reference_range, interpretation, test_notes:
+  codes into one interned string pool (0 = missing), array("I")
+- value: numeric value, NaN when missing or not numeric; value_kind
+  records how it was reported (none, float, int or text) and value_str
+  keeps the original string of a text value ("6.5 %", "Positive")
+- low / high: parsed reference range bounds (NaN = unbounded), each
+  distinct range string parsed once
+
+Rows are in document order (a panel precedes its members). `results` lists
+the rows that carry a result: every non-panel row, plus panels that report
+a value of their own.
+
+Request bodies go straight to a table with parse_report(): the JSON is
+decoded without a nesting limit (json.loads, else an iterative decoder for
+trees deeper than the interpreter's recursion limit) and each row, without
+its members, is validated with schema.RecursiveMember while flattening (the
+model itself would recurse through the tree). Problems raise
+ReportValidationError with pydantic's errors, located in the whole body.
+
+Usage:
+    report, table = parse_report(request_body)       # ReportValidationError if invalid
+    table = ResultTable.from_report(raw_report_dict)
+    for i in table.results:
+        table.text(table.name, i), table.number(i), table.bounds(i)
+    table.member(i)                  # flat member dict (no "members")
+    table.prompt_rows()              # compact rows for the LLM prompt
+"""
+
+import json
+import math
+import re
+import sys
+from array import array
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE as _JSON_NUMBER_RE
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from schema import RawLabReport, RecursiveMember
+
+_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+")
+_RANGE_RE = re.compile(r"^\s*([-+]?\d*\.?\d+)\s*(?:-|–|to)\s*([-+]?\d*\.?\d+)\s*$")
+_BOUND_RE = re.compile(r"^\s*(<=|>=|<|>|≤|≥|upto|up to)\s*([-+]?\d*\.?\d+)\s*$", re.IGNORECASE)
+
+NAN = float("nan")
+
+# value_kind codes
+VALUE_NONE, VALUE_FLOAT, VALUE_INT, VALUE_TEXT = range(4)
+
+# Text fields of a member, each stored as a column of string codes
+TEXT_FIELDS = ("test_name", "value_text", "unit", "reference_range", "interpretation", "test_notes")
+
+# Validation errors reported per request (the rest are counted in the message)
+MAX_VALIDATION_ERRORS = 20
+
+
+class ReportValidationError(ValueError):
+    """A request body that is not a valid RawLabReport; `errors` in pydantic's format"""
+
+    def __init__(self, errors: List[Dict[str, Any]], total: Optional[int] = None):
+        self.errors = errors[:MAX_VALIDATION_ERRORS]
+        self.total = total or len(errors)
+        super().__init__(f"{self.total} validation error(s) in the lab report")
+
+
+def to_number(value: Any) -> Optional[float]:
+    """Best-effort numeric value (handles '6.5', '6.5 %', 6.5; None otherwise)"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value))
+    return float(match.group()) if match else None
+
+
+def parse_reference_range(text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a lab reference range into (low, high) bounds.
+
+    Supports '0.70-1.30', '13.0 to 17.0', '>59', '< 150', 'Upto 200'.
+    Unparseable ranges return (None, None).
+    """
+    if not text:
+        return None, None
+    match = _RANGE_RE.match(text)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    match = _BOUND_RE.match(text)
+    if match:
+        op, bound = match.group(1).lower(), float(match.group(2))
+        if op in (">", ">=", "≥"):
+            return bound, None
+        return None, bound
+    return None, None
+
+
+_VALUE_KINDS = {type(None): VALUE_NONE, float: VALUE_FLOAT, int: VALUE_INT}
+
+
+def _optional(number: float) -> Optional[float]:
+    return None if math.isnan(number) else number
+
+
+def _number_or_nan(value: Any) -> float:
+    number = to_number(value)
+    return NAN if number is None else number
+
+
+def _bounds(text: Optional[str]) -> Tuple[float, float]:
+    low, high = parse_reference_range(text)
+    return (NAN if low is None else low, NAN if high is None else high)
+
+
+def _intern_all(codes: Dict[str, int], texts: List[Any]) -> List[int]:
+    """String codes for a column (0 for None); new strings get the next code"""
+    setdefault = codes.setdefault
+    return [0 if text is None else setdefault(text if type(text) is str else str(text), len(codes) + 1)
+            for text in texts]
+
+
+class ResultTable:
+    """report_results flattened into parallel columns, one row per member"""
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = [None]
+        self.parent = array("i")
+        self.depth = array("I")
+        self.is_panel = array("B")
+        self.value = array("d")
+        self.value_kind = array("B")
+        self.value_str = array("I")
+        self.low = array("d")
+        self.high = array("d")
+        self.results = array("I")
+        self.name, self.value_text, self.unit, self.reference_range, self.interpretation, self.test_notes = (
+            array("I") for _ in TEXT_FIELDS
+        )
+
+    @classmethod
+    def from_report(cls, report: Dict[str, Any]) -> "ResultTable":
+        return cls.from_results(report.get("report_results") or [])
+
+    @classmethod
+    def from_results(cls, report_results: List[Dict[str, Any]], validate: bool = False) -> "ResultTable":
+        """
+        Flatten (possibly nested) report_results; entries that aren't dicts are
+        skipped. With `validate`, every row is checked against
+        schema.RecursiveMember instead and ReportValidationError is raised.
+        """
+        members: List[Dict[str, Any]] = []
+        parents: List[int] = []
+        depths: List[int] = []
+        positions: List[int] = []  # Index in the parent's list, for error locations
+        skipped: List[Tuple[int, int, Any]] = []
+        stack = [(member, -1, 0, position) for position, member in reversed(list(enumerate(report_results or [])))]
+        while stack:
+            member, parent, depth, position = stack.pop()
+            if not isinstance(member, dict):
+                skipped.append((parent, position, member))
+                continue
+            row = len(members)
+            members.append(member)
+            parents.append(parent)
+            depths.append(depth)
+            positions.append(position)
+            children = member.get("members")
+            if children and isinstance(children, list):
+                stack.extend([(child, row, depth + 1, i) for i, child in reversed(list(enumerate(children)))])
+
+        if validate:
+            _validate_members(members, parents, positions, skipped)
+
+        # Columns are filled one field at a time over the flat member list
+        table = cls()
+        table.parent.extend(parents)
+        table.depth.extend(depths)
+        codes: Dict[str, int] = {}
+        for column, field in zip(table._text_columns(), TEXT_FIELDS):
+            column.extend(_intern_all(codes, [member.get(field) for member in members]))
+
+        values = [member.get("value") for member in members]
+        kinds = [_VALUE_KINDS.get(type(value), VALUE_TEXT) for value in values]
+        table.value_kind.extend(kinds)
+        table.value.extend([
+            value if kind == VALUE_FLOAT else float(value) if kind == VALUE_INT else _number_or_nan(value)
+            for value, kind in zip(values, kinds)
+        ])
+        table.value_str.extend(_intern_all(codes, [value if kind == VALUE_TEXT else None
+                                                   for value, kind in zip(values, kinds)]))
+        panels = [bool(member.get("is_panel")) for member in members]
+        table.is_panel.extend(panels)
+        table.results.extend([row for row, (panel, value) in enumerate(zip(panels, values))
+                              if not panel or value is not None])
+        table.strings.extend(codes)
+
+        # Each distinct reference range is parsed once
+        bounds = {code: _bounds(table.strings[code]) for code in set(table.reference_range)}
+        table.low.extend([bounds[code][0] for code in table.reference_range])
+        table.high.extend([bounds[code][1] for code in table.reference_range])
+        return table
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def text(self, column: array, row: int) -> Optional[str]:
+        """String in a text column (table.name, table.unit, ...) for a row"""
+        return self.strings[column[row]]
+
+    def number(self, row: int) -> Optional[float]:
+        """Numeric value, or None if missing or not numeric"""
+        return _optional(self.value[row])
+
+    def raw_value(self, row: int) -> Optional[Any]:
+        """Value as reported: the original string, the number, or None"""
+        kind = self.value_kind[row]
+        if kind == VALUE_TEXT:
+            return self.strings[self.value_str[row]]
+        if kind == VALUE_INT:
+            return int(self.value[row])
+        return self.value[row] if kind == VALUE_FLOAT else None
+
+    def bounds(self, row: int) -> Tuple[Optional[float], Optional[float]]:
+        """Parsed reference range (low, high); None for an open or unparsed side"""
+        return _optional(self.low[row]), _optional(self.high[row])
+
+    def member(self, row: int) -> Dict[str, Any]:
+        """Flat member dict for a row (as in report_results, without members)"""
+        member: Dict[str, Any] = {"is_panel": bool(self.is_panel[row])}
+        for column, field in zip(self._text_columns(), TEXT_FIELDS):
+            member[field] = self.strings[column[row]]
+        member["value"] = self.raw_value(row)
+        return member
+
+    def _text_columns(self) -> Tuple[array, ...]:
+        return (self.name, self.value_text, self.unit, self.reference_range, self.interpretation, self.test_notes)
+
+    def prompt_rows(self, rows: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Rows for the LLM prompt: every member (or only `rows`, in the given
+        order) with its parent panel's name instead of nesting, and without
+        empty fields.
+        """
+        entries = []
+        strings, columns = self.strings, self._text_columns()
+        for row in range(len(self.parent)) if rows is None else rows:
+            entry: Dict[str, Any] = {}
+            parent = self.parent[row]
+            if parent >= 0:
+                entry["panel"] = strings[self.name[parent]]
+            if self.is_panel[row]:
+                entry["is_panel"] = True
+            for column, field in zip(columns, TEXT_FIELDS):
+                text = strings[column[row]]
+                if text is not None:
+                    entry[field] = text
+                if field == "test_name":
+                    value = self.raw_value(row)
+                    if value is not None:
+                        entry["value"] = value
+            entries.append(entry)
+        return entries
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the string pool"""
+        columns = (self.parent, self.depth, self.is_panel, self.value, self.value_kind, self.value_str, self.low, self.high,
+                   self.results, *self._text_columns())
+        return (sum(sys.getsizeof(column) for column in columns) + sys.getsizeof(self.strings)
+                + sum(sys.getsizeof(s) for s in self.strings if s is not None))
+
+
+def prompt_report(report: Dict[str, Any], table: Optional[ResultTable] = None,
+                  rows: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """Report for the summarizer prompt: report_results replaced by flat rows (all, or only `rows`)"""
+    table = table if table is not None else ResultTable.from_report(report)
+    return {**{k: v for k, v in report.items() if k != "report_results"}, "report_results": table.prompt_rows(rows)}
+
+
+# --- request bodies ---
+
+_REPORT_FIELDS = ("patient_details", "lab_details", "sample_details", "global_remarks")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_CONSTANTS = (("true", True), ("false", False), ("null", None),
+                   ("NaN", NAN), ("Infinity", float("inf")), ("-Infinity", float("-inf")))
+
+
+def _error(loc: Tuple[Any, ...], kind: str, message: str, value: Any = None) -> Dict[str, Any]:
+    return {"type": kind, "loc": ["body", *loc], "msg": message,
+            "input": value if not isinstance(value, (dict, list)) else type(value).__name__}
+
+
+def _member_errors(member: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    pydantic errors of one row against RecursiveMember. Members are rows of
+    their own, so a list of them is validated as empty here; a row's coerced
+    is_panel (and a boolean value) is written back for the table to read.
+    """
+    children = member.get("members")
+    row = {**member, "members": []} if isinstance(children, list) else member
+    try:
+        validated = RecursiveMember.model_validate(row)
+    except ValidationError as e:
+        return e.errors(include_url=False)
+    member["is_panel"] = validated.is_panel
+    if type(member.get("value")) is bool:
+        member["value"] = validated.value
+    return []
+
+
+def _validate_members(members: List[Dict[str, Any]], parents: List[int], positions: List[int],
+                      skipped: List[Tuple[int, int, Any]]) -> None:
+    def loc(parent: int, position: int) -> Tuple[Any, ...]:
+        path: List[Any] = [position]
+        while parent >= 0:
+            path += ["members", positions[parent]]
+            parent = parents[parent]
+        return ("report_results", *reversed(path))
+
+    errors = [_error(loc(parent, position), "dict_type", "Input should be a valid dictionary", entry)
+              for parent, position, entry in skipped]
+    for row, member in enumerate(members):
+        for error in _member_errors(member):
+            errors.append(_error((*loc(parents[row], positions[row]), *error["loc"]),
+                                 error["type"], error["msg"], error["input"]))
+    if errors:
+        raise ReportValidationError(errors)
+
+
+def _json_key(text: str, pos: int) -> Tuple[str, int]:
+    """Object key at `pos` and the position after its colon"""
+    if text[pos:pos + 1] != '"':
+        raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+    key, pos = scanstring(text, pos + 1)
+    pos = _WHITESPACE.match(text, pos).end()
+    if text[pos:pos + 1] != ":":
+        raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+    return key, _WHITESPACE.match(text, pos + 1).end()
+
+
+def _json_scalar(text: str, pos: int) -> Tuple[Any, int]:
+    if text[pos:pos + 1] == '"':
+        return scanstring(text, pos + 1)
+    match = _JSON_NUMBER_RE.match(text, pos)
+    if match:
+        integer, fraction, exponent = match.groups()
+        if fraction or exponent:
+            return float(integer + (fraction or "") + (exponent or "")), match.end()
+        return int(integer), match.end()
+    for literal, value in _JSON_CONSTANTS:
+        if text.startswith(literal, pos):
+            return value, pos + len(literal)
+    raise json.JSONDecodeError("Expecting value", text, pos)
+
+
+def loads_deep(text: str) -> Any:
+    """json.loads with an explicit stack instead of recursion (no nesting limit; slower)"""
+    containers: List[Any] = []
+    keys: List[Optional[str]] = []
+    pos = _WHITESPACE.match(text, 0).end()
+    while True:
+        opening = text[pos:pos + 1]
+        if opening in ("{", "["):
+            container: Any = {} if opening == "{" else []
+            pos = _WHITESPACE.match(text, pos + 1).end()
+            if text[pos:pos + 1] != ("}" if opening == "{" else "]"):
+                containers.append(container)
+                key = None
+                if opening == "{":
+                    key, pos = _json_key(text, pos)
+                keys.append(key)
+                continue
+            value, pos = container, pos + 1
+        else:
+            value, pos = _json_scalar(text, pos)
+
+        # Store the value, closing every container it completes
+        while True:
+            if not containers:
+                end = _WHITESPACE.match(text, pos).end()
+                if end != len(text):
+                    raise json.JSONDecodeError("Extra data", text, end)
+                return value
+            container = containers[-1]
+            if type(container) is dict:
+                container[keys[-1]] = value
+            else:
+                container.append(value)
+            pos = _WHITESPACE.match(text, pos).end()
+            delimiter = text[pos:pos + 1]
+            if delimiter == ",":
+                pos = _WHITESPACE.match(text, pos + 1).end()
+                if type(container) is dict:
+                    keys[-1], pos = _json_key(text, pos)
+                break
+            if delimiter != ("}" if type(container) is dict else "]"):
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+            pos += 1
+            containers.pop()
+            keys.pop()
+            value = container
+
+
+def loads_report(body: Union[bytes, str]) -> Any:
+    """Decode a JSON body: json.loads, or loads_deep if it is nested beyond the recursion limit"""
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    try:
+        return json.loads(text)
+    except RecursionError:
+        return loads_deep(text)
+
+
+def parse_report(body: Union[bytes, str]) -> Tuple[Dict[str, Any], ResultTable]:
+    """
+    Request body -> (report dict, ResultTable), validated with schema.RawLabReport
+    for the top level and RecursiveMember row by row on the flattened table.
+    Unknown top-level keys are dropped; raises ReportValidationError (malformed
+    JSON included).
+    """
+    try:
+        document = loads_report(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ReportValidationError([_error((), "json_invalid", f"Invalid JSON: {e}")]) from None
+    if not isinstance(document, dict):
+        raise ReportValidationError([_error((), "dict_type", "Input should be a valid dictionary", document)])
+
+    # Top level against RawLabReport, with the results validated row by row below
+    results = document.get("report_results")
+    errors: List[Dict[str, Any]] = []
+    report: Dict[str, Any] = {}
+    try:
+        top = RawLabReport.model_validate({**document, "report_results": []} if isinstance(results, list) else document)
+        report = {field: getattr(top, field) for field in _REPORT_FIELDS}
+    except ValidationError as e:
+        errors = [_error(error["loc"], error["type"], error["msg"], error["input"])
+                  for error in e.errors(include_url=False)]
+    table = None
+    if isinstance(results, list):
+        try:
+            table = ResultTable.from_results(results, validate=True)
+        except ReportValidationError as e:
+            raise ReportValidationError(errors + e.errors, len(errors) + e.total) from None
+    if errors:
+        raise ReportValidationError(errors)
+    report["report_results"] = results
+    return report, table
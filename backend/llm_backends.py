@@ -0,0 +1,328 @@
+"""
+LLM BACKENDS - Cached MASTER_PROMPT prefix, and an offline stand-in model.
+
+MASTER_PROMPT is several KB and identical on every call. With prefix
+caching it is registered with the provider once (Gemini context caching:
+a CachedContent holding it as the system instruction) and each call refers
+to it by handle, so it is neither re-sent nor re-processed; cached tokens
+are also billed at a discount (see llm_budget.py).
+
+PrefixCache owns the handle:
+- created on first use, per process and prompt (keyed by its hash)
+- refreshed (TTL extended) once it is within PROMPT_CACHE_REFRESH_SECONDS
+  of expiry; if that fails a new one is created
+- one caller at a time creates or refreshes it, outside the lock; while a
+  creation is in flight other callers send the prompt inline (during a
+  refresh they keep using the still-valid handle)
+- on any failure, or when the provider rejects the handle, the prompt is
+  sent inline; creation is retried after PROMPT_CACHE_RETRY_SECONDS (the
+  provider may also refuse prompts below its minimum cacheable size)
+
+Stores: GeminiPrefixStore (google-genai caches API) and LocalPrefixStore,
+which pairs with LocalChatModel: an offline stand-in for the chat model
+(LLM_BACKEND=local) that answers with the rules-only summary of the report
+and simulates latency, with cached prefix tokens prefilled at
+CACHED_PREFILL_FACTOR of the normal cost and reported as cache reads, so
+latency and token savings can be measured without an API key.
+
+Configuration (environment):
+    LLM_BACKEND                   gemini | local (default: gemini)
+    PROMPT_CACHE_ENABLED          Use a cached prompt prefix (default: true)
+    PROMPT_CACHE_TTL_SECONDS      Lifetime requested for the cached prefix (default: 3600)
+    PROMPT_CACHE_REFRESH_SECONDS  Refresh this long before expiry (default: 300)
+    PROMPT_CACHE_RETRY_SECONDS    Back-off after a failed creation (default: 600)
+    LOCAL_LLM_PREFILL_MS_PER_1K   Stand-in prefill time per 1k uncached input tokens (default: 250)
+    LOCAL_LLM_DECODE_MS_PER_1K    Stand-in decode time per 1k output tokens (default: 1000)
+
+Usage:
+    cache = PrefixCache(GeminiPrefixStore(model))
+    handle = cache.handle(MASTER_PROMPT)         # None: send the prompt inline
+    response = llm.invoke([("human", text)], cached_content=handle)
+    cache.invalidate(handle, error)              # if the provider rejected it
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+
+from lab_results import ResultTable
+from llm_budget import estimate_tokens
+from preclassify import build_rules_only_summary
+
+try:
+    from google import genai
+    from google.genai import types as genai_types
+except ImportError:  # Optional: prompts are sent inline without it
+    genai = None
+
+# Share of normal prefill time the stand-in spends on cached prefix tokens
+CACHED_PREFILL_FACTOR = 0.1
+
+
+def prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
+
+
+# ============================================================================
+# PREFIX STORES
+# ============================================================================
+
+class GeminiPrefixStore:
+    """Gemini context caches holding a system instruction"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._client = None
+
+    def _caches(self):
+        if genai is None:
+            raise RuntimeError("google-genai is not installed")
+        if self._client is None:
+            self._client = genai.Client()  # GOOGLE_API_KEY
+        return self._client.caches
+
+    @staticmethod
+    def _expiry(cache: Any, ttl_seconds: int) -> float:
+        expire_time = getattr(cache, "expire_time", None)
+        return expire_time.timestamp() if isinstance(expire_time, datetime) else time.time() + ttl_seconds
+
+    def create(self, prompt: str, ttl_seconds: int) -> Tuple[str, float]:
+        cache = self._caches().create(model=self.model, config=genai_types.CreateCachedContentConfig(
+            display_name=f"master-prompt-{prompt_digest(prompt)}",
+            system_instruction=prompt,
+            ttl=f"{ttl_seconds}s",
+        ))
+        return cache.name, self._expiry(cache, ttl_seconds)
+
+    def refresh(self, handle: str, ttl_seconds: int) -> float:
+        cache = self._caches().update(name=handle, config=genai_types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"))
+        return self._expiry(cache, ttl_seconds)
+
+    def delete(self, handle: str) -> None:
+        self._caches().delete(name=handle)
+
+
+class LocalPrefixStore:
+    """In-memory prefixes for LocalChatModel (expire like provider caches)"""
+
+    def __init__(self):
+        self._prefixes: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, prompt: str, ttl_seconds: int) -> Tuple[str, float]:
+        handle = f"localCachedContents/{prompt_digest(prompt)}-{time.monotonic_ns()}"
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._prefixes[handle] = (prompt, expires_at)
+        return handle, expires_at
+
+    def refresh(self, handle: str, ttl_seconds: int) -> float:
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            prompt, _ = self.resolve(handle)
+            self._prefixes[handle] = (prompt, expires_at)
+        return expires_at
+
+    def delete(self, handle: str) -> None:
+        with self._lock:
+            self._prefixes.pop(handle, None)
+
+    def resolve(self, handle: str) -> Tuple[str, float]:
+        """(prompt, expires_at) of a live handle; KeyError if unknown or expired"""
+        prompt, expires_at = self._prefixes[handle]
+        if expires_at <= time.time():
+            raise KeyError(f"cached content {handle} expired")
+        return prompt, expires_at
+
+
+# ============================================================================
+# HANDLE MANAGEMENT
+# ============================================================================
+
+class PrefixCache:
+    """Handle of the cached system prompt: created once, refreshed before expiry, None on failure"""
+
+    def __init__(self, store: Any, enabled: bool = True, ttl_seconds: int = 3600,
+                 refresh_seconds: int = 300, retry_seconds: int = 600):
+        self.store = store
+        self.enabled = enabled
+        self.ttl_seconds = max(60, ttl_seconds)
+        self.refresh_seconds = min(max(0, refresh_seconds), self.ttl_seconds // 2)
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._handle: Optional[str] = None
+        self._digest: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._renewing = False  # A create / refresh call is in flight
+        self.hits = 0
+        self.inline = 0
+        self.creates = 0
+        self.refreshes = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def _fail(self, error: Exception) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._handle = None
+        self._retry_at = time.time() + self.retry_seconds
+        print(f"⚠️ Prompt prefix cache unavailable, sending prompts inline: {self.last_error}")
+
+    def handle(self, prompt: str) -> Optional[str]:
+        """Live handle for `prompt` (creating or refreshing it), or None to send it inline"""
+        if not self.enabled:
+            return None
+        digest = prompt_digest(prompt)
+        with self._lock:
+            now = time.time()
+            live = self._handle is not None and self._digest == digest and now < self._expires_at
+            if live and (self._renewing or now < self._expires_at - self.refresh_seconds):
+                # Fresh, or being refreshed by another caller: still valid meanwhile
+                self.hits += 1
+                return self._handle
+            if self._renewing or now < self._retry_at:
+                # Another caller is creating it: this call goes inline rather than wait
+                self.inline += 1
+                return None
+            self._renewing = True
+            handle = self._handle if live else None
+        try:
+            return self._renew(prompt, digest, handle)
+        finally:
+            with self._lock:
+                self._renewing = False
+
+    def _renew(self, prompt: str, digest: str, handle: Optional[str]) -> Optional[str]:
+        """Refresh `handle`, or create a new one; the provider is called without holding the lock"""
+        if handle is not None:
+            try:
+                expires_at = self.store.refresh(handle, self.ttl_seconds)
+                with self._lock:
+                    if self._handle == handle:  # Not invalidated meanwhile
+                        self._expires_at = expires_at
+                        self.refreshes += 1
+                        self.hits += 1
+                        return handle
+                    self.inline += 1
+                    return None
+            except Exception as e:
+                print(f"⚠️ Prompt prefix refresh failed ({e}); creating a new one")
+                with self._lock:
+                    if self._handle == handle:
+                        self._handle = None
+        try:
+            created, expires_at = self.store.create(prompt, self.ttl_seconds)
+        except Exception as e:
+            with self._lock:
+                self._fail(e)
+                self.inline += 1
+            return None
+        with self._lock:
+            self._handle, self._expires_at, self._digest = created, expires_at, digest
+            self.creates += 1
+            self.hits += 1
+        return created
+
+    def invalidate(self, handle: str, error: Exception) -> None:
+        """The provider rejected `handle`: drop it and send prompts inline until the retry time"""
+        with self._lock:
+            self.rejected += 1
+            self.inline += 1
+            if self._handle == handle:
+                self._fail(error)
+
+    def close(self) -> None:
+        """Delete the cached prefix (it would otherwise live until its TTL)"""
+        with self._lock:
+            handle, self._handle = self._handle, None
+        if handle is not None:
+            try:
+                self.store.delete(handle)
+            except Exception as e:
+                print(f"⚠️ Could not delete cached prompt prefix {handle}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = self.hits - self.rejected
+            calls = cached + self.inline
+            return {
+                "enabled": self.enabled,
+                "store": type(self.store).__name__,
+                "handle": self._handle,
+                "expires_in_seconds": round(self._expires_at - time.time(), 1) if self._handle else None,
+                "cached_calls": cached,
+                "inline_calls": self.inline,
+                "cached_share": round(cached / calls, 4) if calls else 0.0,
+                "creates": self.creates,
+                "refreshes": self.refreshes,
+                "rejected_handles": self.rejected,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+
+# ============================================================================
+# OFFLINE STAND-IN MODEL
+# ============================================================================
+
+class LocalChatModel:
+    """
+    Offline chat model: answers "Analyze this report: <json>" with the
+    rules-only summary of that report, after a simulated prefill + decode
+    delay. Cached prefix tokens (cached_content=handle) are prefilled at
+    CACHED_PREFILL_FACTOR and reported as cache reads in usage_metadata.
+    """
+
+    def __init__(self, store: LocalPrefixStore, prefill_ms_per_1k: float = 250.0, decode_ms_per_1k: float = 1000.0):
+        self.store = store
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.decode_ms_per_1k = decode_ms_per_1k
+
+    def invoke(self, messages: List[Tuple[str, str]], cached_content: Optional[str] = None, **_: Any) -> AIMessage:
+        prefix = self.store.resolve(cached_content)[0] if cached_content else ""
+        text = "".join(content for _, content in messages)
+        question = messages[-1][1]
+        report = json.loads(question[question.index("{"):])
+        content = json.dumps(build_rules_only_summary(report, ResultTable.from_report(report)))
+
+        cached_tokens = estimate_tokens(prefix)
+        input_tokens = cached_tokens + estimate_tokens(text)
+        output_tokens = estimate_tokens(content)
+        prefill = ((input_tokens - cached_tokens) + cached_tokens * CACHED_PREFILL_FACTOR) * self.prefill_ms_per_1k
+        time.sleep((prefill + output_tokens * self.decode_ms_per_1k) / 1e6)
+        return AIMessage(content=content, response_metadata={"model_name": "local"}, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        })
+
+
+def prefix_cache_from_env(store: Any) -> PrefixCache:
+    """PrefixCache over `store`, configured from PROMPT_CACHE_*"""
+    return PrefixCache(
+        store,
+        enabled=os.getenv("PROMPT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        ttl_seconds=int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600")),
+        refresh_seconds=int(os.getenv("PROMPT_CACHE_REFRESH_SECONDS", "300")),
+        retry_seconds=int(os.getenv("PROMPT_CACHE_RETRY_SECONDS", "600")),
+    )
+
+
+def local_backend_from_env() -> Tuple[LocalChatModel, PrefixCache]:
+    """Offline stand-in model and its prefix cache, configured from LOCAL_LLM_* / PROMPT_CACHE_*"""
+    store = LocalPrefixStore()
+    model = LocalChatModel(
+        store,
+        prefill_ms_per_1k=float(os.getenv("LOCAL_LLM_PREFILL_MS_PER_1K", "250")),
+        decode_ms_per_1k=float(os.getenv("LOCAL_LLM_DECODE_MS_PER_1K", "1000")),
+    )
+    return model, prefix_cache_from_env(store)
@@ -0,0 +1,265 @@
+"""
+LLM BUDGET - Token/cost accounting for the summarizer call and adaptive
+prompt trimming under a latency budget.
+
+Accounting: input/output tokens come from the response's usage metadata
+(LangChain `usage_metadata`, or Gemini's `usage_metadata` in
+`response_metadata`). Backends that report none are estimated from text
+length (CHARS_PER_TOKEN, calibrated against real counts once any were
+seen) and flagged `estimated`. Input tokens read from a cached prompt
+prefix (llm_backends.py) are counted separately and billed at the cached
+rate. Each call is logged; totals, cost and call latency are exposed at
+/metrics ("llm_usage").
+
+Budget mode (LLM_LATENCY_BUDGET_SECONDS > 0): before the call, latency is
+predicted from the prompt's estimated input tokens and the measured
+seconds per uncached input token (EWMA over completed calls;
+LLM_SECONDS_PER_1K_TOKENS until then). Output length grows with the
+results sent, so the input-token rate covers both. A prompt predicted over budget is trimmed: every abnormal
+result is kept, plus the LLM_BUDGET_NORMAL_RESULTS normal results closest
+to a reference bound (MASTER_PROMPT only asks for 5-7 key normal
+parameters); the number of omitted results is sent along.
+
+Configuration (environment):
+    LLM_LATENCY_BUDGET_SECONDS   Trim prompts predicted to take longer (default: 0 = never trim)
+    LLM_SECONDS_PER_1K_TOKENS    Latency model before any call was measured (default: 3.0)
+    LLM_BUDGET_NORMAL_RESULTS    Normal results kept in a trimmed prompt (default: 7)
+    LLM_INPUT_COST_PER_MTOK      USD per million input tokens (default: 0.30)
+    LLM_CACHED_INPUT_COST_PER_MTOK  USD per million input tokens read from a cached prefix (default: 0.075)
+    LLM_OUTPUT_COST_PER_MTOK     USD per million output tokens (default: 2.50)
+
+Usage:
+    budget = get_llm_budget()
+    plan = budget.plan(MASTER_PROMPT, raw_report_dict, table, prefix_cached=handle is not None)
+    response = llm.invoke(...)
+    usage = budget.record(response, plan, seconds)              # logged + counted
+"""
+
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from lab_results import ResultTable, prompt_report
+from metrics import LatencyRecorder
+from preclassify import classify_row
+
+# Characters per token for estimates (JSON-heavy prompts, before calibration)
+CHARS_PER_TOKEN = 4.0
+
+# Weight of the newest call in the latency and calibration averages
+EWMA_ALPHA = 0.2
+
+_ABNORMAL = ("HIGH", "LOW", "ABNORMAL")
+
+
+class PromptPlan(BaseModel):
+    """Report text for the summarizer and what the budget decided about it"""
+    text: str
+    estimated_input_tokens: int
+    uncalibrated_input_tokens: int  # Before scaling by the calibration against reported counts
+    estimated_cached_tokens: int = 0  # System prompt sent as a cached prefix
+    predicted_seconds: float
+    trimmed: bool = False
+    omitted_results: int = 0
+
+
+class TokenUsage(BaseModel):
+    """Token counts and cost of one LLM call"""
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    cached_input_tokens: int = 0  # Part of input_tokens read from a cached prefix
+    estimated: bool  # No usage metadata; counted from text length
+    cost_usd: float
+    seconds: float
+    trimmed: bool = False
+    omitted_results: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Uncalibrated token estimate for a text"""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def reported_usage(response: Any) -> Optional[Tuple[int, int, int]]:
+    """(input, output, cached input) tokens from a chat response's metadata, None if it has none"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("input_tokens") is not None:
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        return int(usage["input_tokens"]), int(usage.get("output_tokens") or 0), int(cached)
+    usage = (getattr(response, "response_metadata", None) or {}).get("usage_metadata") or {}
+    if usage.get("prompt_token_count") is not None:
+        return (int(usage["prompt_token_count"]), int(usage.get("candidates_token_count") or 0),
+                int(usage.get("cached_content_token_count") or 0))
+    return None
+
+
+def _bound_margin(table: ResultTable, row: int) -> float:
+    """Distance of a value to its nearest reference bound, relative to the range (inf if unknown)"""
+    value = table.number(row)
+    low, high = table.bounds(row)
+    if value is None or (low is None and high is None):
+        return math.inf
+    if low is not None and high is not None and high > low:
+        return min(value - low, high - value) / (high - low)
+    bound = low if low is not None else high
+    return abs(value - bound) / abs(bound) if bound else math.inf
+
+
+def key_results(table: ResultTable, normal_results: int) -> Tuple[List[int], int]:
+    """
+    Result rows of a trimmed prompt, in document order: every abnormal
+    result plus the `normal_results` others closest to a reference bound.
+    Returns (rows, number omitted).
+    """
+    keep, others = [], []
+    for row in table.results:
+        result = classify_row(table, row)
+        if result.status in _ABNORMAL or result.critical:
+            keep.append(row)
+        else:
+            others.append(row)
+    others.sort(key=lambda row: _bound_margin(table, row))
+    keep += others[:max(0, normal_results)]
+    return sorted(keep), max(0, len(others) - normal_results)
+
+
+class LLMBudget:
+    """Per-process token accounting and latency model for the summarizer call"""
+
+    def __init__(self, latency_budget: float = 0.0, seconds_per_1k_tokens: float = 3.0,
+                 normal_results: int = 7, input_cost_per_mtok: float = 0.30, output_cost_per_mtok: float = 2.50,
+                 cached_input_cost_per_mtok: float = 0.075):
+        self.latency_budget = max(0.0, latency_budget)
+        self.normal_results = normal_results
+        self.input_cost = input_cost_per_mtok / 1e6
+        self.cached_input_cost = cached_input_cost_per_mtok / 1e6
+        self.output_cost = output_cost_per_mtok / 1e6
+        self._seconds_per_token = seconds_per_1k_tokens / 1000
+        self._calibration = 1.0  # Reported / estimated input tokens
+        self._lock = threading.Lock()
+        self.call_time = LatencyRecorder()
+        self.requests = 0
+        self.estimated_requests = 0
+        self.trimmed_requests = 0
+        self.omitted_results = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.max_input_tokens = 0
+        self.cost_usd = 0.0
+
+    def predict_seconds(self, input_tokens: int) -> float:
+        return input_tokens * self._seconds_per_token
+
+    def _plan(self, overhead: int, prefix_cached: bool, text: str, **fields: Any) -> PromptPlan:
+        uncalibrated = overhead + estimate_tokens(text)
+        tokens = round(uncalibrated * self._calibration)
+        cached = round(overhead * self._calibration) if prefix_cached else 0
+        return PromptPlan(text=text, estimated_input_tokens=tokens, uncalibrated_input_tokens=uncalibrated,
+                          estimated_cached_tokens=cached, predicted_seconds=self.predict_seconds(tokens - cached),
+                          **fields)
+
+    def plan(self, system_prompt: str, report: Dict[str, Any], table: Optional[ResultTable] = None,
+             prefix_cached: bool = False) -> PromptPlan:
+        """
+        Report JSON for the prompt; trimmed to key results if predicted over
+        the latency budget. With prefix_cached, the system prompt is sent as
+        a cached prefix and left out of the prediction.
+        """
+        table = table if table is not None else ResultTable.from_report(report)
+        overhead = estimate_tokens(system_prompt)
+        full = self._plan(overhead, prefix_cached, json.dumps(prompt_report(report, table)))
+        if not self.latency_budget or full.predicted_seconds <= self.latency_budget:
+            return full
+
+        rows, omitted = key_results(table, self.normal_results)
+        if not omitted:
+            return full
+        trimmed = prompt_report(report, table, rows)
+        trimmed["omitted_normal_results"] = omitted
+        return self._plan(overhead, prefix_cached, json.dumps(trimmed), trimmed=True, omitted_results=omitted)
+
+    def record(self, response: Any, plan: PromptPlan, seconds: float) -> TokenUsage:
+        """Account one call (and update the latency model); logs and returns its usage"""
+        reported = reported_usage(response)
+        content = getattr(response, "content", "")
+        if reported is None:
+            input_tokens, cached_tokens = plan.estimated_input_tokens, plan.estimated_cached_tokens
+            output_tokens = round(estimate_tokens(str(content)) * self._calibration)
+        else:
+            input_tokens, output_tokens, cached_tokens = reported
+        uncached_tokens = max(0, input_tokens - cached_tokens)
+        cost = (uncached_tokens * self.input_cost + cached_tokens * self.cached_input_cost
+                + output_tokens * self.output_cost)
+        usage = TokenUsage(
+            input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens,
+            cached_input_tokens=cached_tokens, estimated=reported is None, cost_usd=round(cost, 6), seconds=round(seconds, 3),
+            trimmed=plan.trimmed, omitted_results=plan.omitted_results,
+        )
+
+        with self._lock:
+            if reported is not None and plan.uncalibrated_input_tokens:
+                ratio = input_tokens / plan.uncalibrated_input_tokens
+                self._calibration += EWMA_ALPHA * (ratio - self._calibration)
+            if uncached_tokens and seconds > 0:
+                self._seconds_per_token += EWMA_ALPHA * (seconds / uncached_tokens - self._seconds_per_token)
+            self.requests += 1
+            self.estimated_requests += reported is None
+            self.trimmed_requests += plan.trimmed
+            self.omitted_results += plan.omitted_results
+            self.input_tokens += input_tokens
+            self.cached_input_tokens += cached_tokens
+            self.output_tokens += output_tokens
+            self.max_input_tokens = max(self.max_input_tokens, input_tokens)
+            self.cost_usd += cost
+        self.call_time.record(seconds)
+
+        print(f"LLM usage: {input_tokens} in ({cached_tokens} cached) / {output_tokens} out tokens"
+              f"{' (estimated)' if usage.estimated else ''}, "
+              f"${usage.cost_usd:.4f}, {seconds:.1f}s (predicted {plan.predicted_seconds:.1f}s)"
+              + (f", trimmed {plan.omitted_results} normal results" if plan.trimmed else ""))
+        return usage
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "estimated_requests": self.estimated_requests,
+                "input_tokens": self.input_tokens,
+                "cached_input_tokens": self.cached_input_tokens,
+                "output_tokens": self.output_tokens,
+                "mean_input_tokens": round(self.input_tokens / requests, 1) if requests else 0.0,
+                "mean_output_tokens": round(self.output_tokens / requests, 1) if requests else 0.0,
+                "max_input_tokens": self.max_input_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "latency_budget_seconds": self.latency_budget,
+                "trimmed_requests": self.trimmed_requests,
+                "omitted_results": self.omitted_results,
+                "seconds_per_1k_tokens": round(self._seconds_per_token * 1000, 4),
+                "estimate_calibration": round(self._calibration, 4),
+                "call": self.call_time.summary(),
+            }
+
+
+_budget: Optional[LLMBudget] = None
+
+
+def get_llm_budget() -> LLMBudget:
+    """Process-wide accounting configured from LLM_* (see module docstring)"""
+    global _budget
+    if _budget is None:
+        _budget = LLMBudget(
+            latency_budget=float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "0")),
+            seconds_per_1k_tokens=float(os.getenv("LLM_SECONDS_PER_1K_TOKENS", "3.0")),
+            normal_results=int(os.getenv("LLM_BUDGET_NORMAL_RESULTS", "7")),
+            input_cost_per_mtok=float(os.getenv("LLM_INPUT_COST_PER_MTOK", "0.30")),
+            output_cost_per_mtok=float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", "2.50")),
+            cached_input_cost_per_mtok=float(os.getenv("LLM_CACHED_INPUT_COST_PER_MTOK", "0.075")),
+        )
+    return _budget
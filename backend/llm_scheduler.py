@@ -0,0 +1,149 @@
+"""
+LLM ADMISSION SCHEDULER - Priority dispatch of the LLM concurrency budget.
+
+Every `/analyze` request needs one LLM slot. Without scheduling, a report with
+a critical troponin waits behind a queue of routine wellness panels. Waiting
+requests are kept in a priority queue ordered by an *effective arrival time*:
+
+    effective = enqueued_at - HEAD_START[priority]
+
+CRITICAL requests jump ahead of anything that arrived up to `aging_seconds`
+before them (ELEVATED: half of that), but a ROUTINE request that has already
+waited longer than the head start is served first. That bound is the
+starvation protection: no class waits more than `aging_seconds` behind a
+continuous stream of higher-priority arrivals.
+
+Configuration (environment):
+    LLM_MAX_CONCURRENCY   Concurrent LLM calls per process (default: 4)
+    LLM_AGING_SECONDS     CRITICAL head start in seconds (default: 30)
+    LLM_EXPECTED_SECONDS  Assumed LLM call duration before any were measured (default: 15)
+
+Usage:
+    async with get_llm_scheduler().slot(triage.priority):
+        result = await run_in_threadpool(smart_report_app.invoke, state)
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import LatencyRecorder
+from preclassify import PRIORITY_CLASSES
+
+
+def head_starts(aging_seconds: float) -> Dict[str, float]:
+    """Seconds each priority class is treated as having arrived early"""
+    return {"CRITICAL": aging_seconds, "ELEVATED": aging_seconds / 2, "ROUTINE": 0.0}
+
+
+class PriorityScheduler:
+    """Counting semaphore whose waiters are served by effective arrival time"""
+
+    def __init__(self, slots: int = 4, aging_seconds: float = 30.0,
+                 expected_service_seconds: float = 15.0):
+        self.slots = max(1, slots)
+        self.expected_service_seconds = expected_service_seconds
+        self.head_start = head_starts(aging_seconds)
+        self._available = self.slots
+        self._waiters: List[Tuple[float, int, asyncio.Future, str]] = []
+        self._sequence = itertools.count()
+        self.queue_wait = {p: LatencyRecorder() for p in PRIORITY_CLASSES}
+        self.service_time = LatencyRecorder()
+        self.admitted = {p: 0 for p in PRIORITY_CLASSES}
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {p: 0 for p in PRIORITY_CLASSES}
+        for _, _, future, priority in self._waiters:
+            if not future.done():
+                depth[priority] += 1
+        return depth
+
+    def estimated_wait(self, priority: str) -> float:
+        """
+        Rough queue wait (seconds) a new request of `priority` would see.
+
+        Counts live waiters that would be served first and assumes each slot
+        frees up after the recent median service time.
+        """
+        if self._available > 0:
+            return 0.0
+        key = time.monotonic() - self.head_start[priority]
+        ahead = sum(1 for k, _, future, _ in self._waiters if k <= key and not future.done())
+        recent = self.service_time.summary()
+        service = recent["p50_ms"] / 1000 if recent["count"] else self.expected_service_seconds
+        return (ahead + 1) * service / self.slots
+
+    async def acquire(self, priority: str) -> float:
+        """Wait for a slot; returns the time spent queued (seconds)"""
+        if priority not in self.head_start:
+            raise ValueError(f"Unknown priority class: {priority}")
+        enqueued_at = time.monotonic()
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)  # Drop waiters that were cancelled
+
+        if self._available > 0 and not self._waiters:
+            self._available -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (enqueued_at - self.head_start[priority], next(self._sequence), future, priority)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed over just as we were cancelled
+                    self.release()
+                raise
+
+        waited = time.monotonic() - enqueued_at
+        self.queue_wait[priority].record(waited)
+        self.admitted[priority] += 1
+        return waited
+
+    def release(self) -> None:
+        """Hand the slot to the best live waiter, or return it to the pool"""
+        while self._waiters:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._available += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.service_time.record(time.monotonic() - started)
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "in_use": self.slots - self._available,
+            "queue_depth": self.queue_depth(),
+            "admitted": dict(self.admitted),
+            "queue_wait": {p: r.summary() for p, r in self.queue_wait.items()},
+            "service_time": self.service_time.summary(),
+        }
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_llm_scheduler() -> PriorityScheduler:
+    """Process-wide scheduler configured from the LLM_* environment variables"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PriorityScheduler(
+            slots=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            aging_seconds=float(os.getenv("LLM_AGING_SECONDS", "30")),
+            expected_service_seconds=float(os.getenv("LLM_EXPECTED_SECONDS", "15")),
+        )
+    return _scheduler
@@ -20,23 +20,82 @@
 #     import uvicorn
 #     uvicorn.run(app, host="0.0.0.0", port=8000)
 
+import os
+import time
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, Tuple
 
 # Import your agent workflow and component registry
-from agents import smart_report_app
-from components import export_as_json_schema 
+from agents import smart_report_app, map_rules_only, map_reused_summary, prompt_prefix, skeleton_summary
+from admission import get_admission_controller
+from manifest_pages import SessionExpired, default_page_size, get_page_store
+from manifest_edits import RevisionConflict, SummaryNotFound, get_summary_store
+from compression import COMPRESSED_PATHS, CompressionMiddleware, compression_stats, get_manifest_dictionary
+from components import get_schema_export_json
+from manifest_executor import get_manifest_executor, shutdown_manifest_executor, warm_generator
+from llm_scheduler import get_llm_scheduler
+from preclassify import triage_report
+from lab_results import ReportValidationError, ResultTable, parse_report
+from schema import RawLabReport
+from ui_mapper import MANIFEST_FORMATS, PROPS_ENCODINGS, encode_items, manifest_content_hash
+from ui_rules import start_rules_watcher
+from rules_profiler import get_rules_profiler
+from history_store import get_history_store, shutdown_history_store
+from summary_reuse import ReportFingerprint, get_summary_reuse
+from llm_budget import get_llm_budget
+from manifest_upgrades import DELIVERY_MODES, UpgradeNotFound, get_upgrade_registry
+from job_queue import POLL_AFTER_SECONDS, QueueFull, get_job_queue
+
+# --- SHARED READ-ONLY STATE ---
+def preload_shared_state():
+    """
+    Build registry-derived state at import time.
+
+    COMPONENT_REGISTRY is built on import of components.py; this also compiles
+    the rules engine, serializes the schema export and loads the compression
+    dictionary. Under gunicorn with
+    preload_app (see gunicorn.conf.py) it runs once in the master process and
+    forked workers share the result copy-on-write.
+    """
+    warm_generator()
+    get_schema_export_json()
+    get_manifest_dictionary()
+
+preload_shared_state()
+
+# --- APP LIFECYCLE ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn (and pre-warm) manifest workers before accepting traffic
+    get_manifest_executor()
+    # Hot-reload rules/manifest_rules.json in this process (RULES_RELOAD_SECONDS)
+    start_rules_watcher(warm_generator().rules_engine)
+    yield
+    await get_upgrade_registry().shutdown()  # Pending skeletons stay final
+    shutdown_manifest_executor()
+    shutdown_history_store()  # Commit queued history rows
+    prompt_prefix.close()  # Delete the cached MASTER_PROMPT prefix
+    if get_rules_profiler().enabled:
+        get_rules_profiler().dump()
 
 # --- APP CONFIGURATION ---
 app = FastAPI(
     title="Smart Health Report API",
     description="Generative AI Engine for Clinical Summarization",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# --- RESPONSE COMPRESSION ---
+# gzip / br / zstd, and zstd with the trained manifest dictionary (dcz)
+app.add_middleware(CompressionMiddleware, paths=COMPRESSED_PATHS)
+
 # --- CORS MIDDLEWARE ---
 # Required to allow your React Frontend (localhost:5173) to call this Backend (localhost:8000)
 app.add_middleware(
@@ -47,18 +106,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- REQUEST MODEL ---
-# This matches the structure sent from frontend/App.jsx
-class RecursiveMember(BaseModel):
-    test_name: str
-    value: Optional[float | str] = None
-    unit: Optional[str] = None
-    reference_range: Optional[str] = None
-    interpretation: Optional[str] = None
+# --- MANIFEST ENCODING NEGOTIATION ---
+# Manifest format (?manifest_format= / X-Manifest-Format):
+#   "full" (default): every item carries its rendering_hints
+#   "compact": hints factored into a top-level table keyed "type@version"
+# Props encoding (?props_encoding= / X-Props-Encoding):
+#   "rows" (default): list-of-records props as lists of dicts
+#   "columnar": declared props (ComponentDefinition.columnar_props) as {columns, data}
+# Delivery, /analyze only (?delivery= / X-Manifest-Delivery):
+#   "complete" (default): the manifest once the LLM summary is mapped
+#   "progressive": a rules-only skeleton at once, upgraded over SSE (manifest_upgrades.py)
 
-class RawLabReport(BaseModel):
-    patient_details: Dict[str, Any] = Field(default_factory=dict)
-    report_results: List[RecursiveMember]
+MANIFEST_VARY = "X-Manifest-Format, X-Props-Encoding"
+ANALYZE_VARY = f"{MANIFEST_VARY}, X-Manifest-Delivery"
+
+def _negotiated(request: Request, param: str, header: str, allowed: tuple) -> str:
+    value = (request.query_params.get(param) or request.headers.get(header) or allowed[0]).strip().lower()
+    if value not in allowed:
+        raise HTTPException(status_code=400, detail=f"Unknown {param}: {value} (expected one of {allowed})")
+    return value
+
+def requested_encoding(request: Request) -> Tuple[str, str]:
+    """(manifest_format, props_encoding) requested by the client"""
+    return (
+        _negotiated(request, "manifest_format", "x-manifest-format", MANIFEST_FORMATS),
+        _negotiated(request, "props_encoding", "x-props-encoding", PROPS_ENCODINGS),
+    )
+
+def encoding_fields(manifest_format: str, props_encoding: str) -> Dict[str, Any]:
+    """Body markers for non-default encodings (absent for full/rows)"""
+    fields = {}
+    if manifest_format != "full":
+        fields["manifest_format"] = manifest_format
+    if props_encoding != "rows":
+        fields["props_encoding"] = props_encoding
+    return fields
+
+def manifest_body(items: List[Dict[str, Any]], manifest_format: str, props_encoding: str) -> Dict[str, Any]:
+    """Response body for manifest item dicts in the negotiated encoding"""
+    hints, items = encode_items(items, manifest_format, props_encoding)
+    body = encoding_fields(manifest_format, props_encoding)
+    if hints is not None:
+        body["hints"] = hints
+    body["ui_manifest"] = items
+    return body
+
+def manifest_etag(content_hash: str, manifest_format: str, props_encoding: str) -> str:
+    """Strong ETag per representation (same content, different bytes per encoding)"""
+    suffix = "".join(f"-{v}" for v in encoding_fields(manifest_format, props_encoding).values())
+    return f'"{content_hash}{suffix}"'
 
 # --- API ENDPOINTS ---
 
@@ -67,35 +163,398 @@ def health_check():
     """Simple check to see if backend is running."""
     return {"status": "active", "service": "Smart Health Engine"}
 
-@app.post("/analyze")
-async def analyze_report(report: RawLabReport):
+def lab_report(body: bytes) -> Tuple[Dict[str, Any], ResultTable]:
+    """
+    Request body (schema.RawLabReport) -> report dict and its ResultTable,
+    validated row by row with RecursiveMember rather than recursing through
+    the model (any nesting depth); invalid bodies get FastAPI's usual 422.
+    """
+    try:
+        return parse_report(body)
+    except ReportValidationError as e:
+        raise RequestValidationError(e.errors) from None
+
+# Bodies are read by lab_report, not a model parameter, so their schema is
+# added to OpenAPI here: RawLabReport (and RecursiveMember) as components
+_REPORT_SCHEMAS = RawLabReport.model_json_schema(ref_template="#/components/schemas/{model}")
+_REPORT_SCHEMAS = {**_REPORT_SCHEMAS.pop("$defs", {}), "RawLabReport": _REPORT_SCHEMAS}
+REPORT_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"$ref": "#/components/schemas/RawLabReport"}}}}}
+_route_openapi = app.openapi
+
+def report_openapi() -> Dict[str, Any]:
+    schema = _route_openapi()
+    schema.setdefault("components", {}).setdefault("schemas", {}).update(_REPORT_SCHEMAS)
+    return schema
+
+app.openapi = report_openapi
+
+@app.post("/analyze", openapi_extra=REPORT_BODY)
+async def analyze_report(request: Request, response: Response, page_limit: Optional[int] = Query(None, ge=1)):
     """
     Main Endpoint:
-    1. Receives Raw JSON
-    2. Invokes LangGraph Agent (Gemini 2.5)
-    3. Returns UI Manifest
+    1. Receives Raw JSON (a schema.RawLabReport, read by lab_report)
+    2. Triages it (CRITICAL / ELEVATED / ROUTINE) from lab flags and ranges
+    3. Admission control: sheds with 503 when too many requests are in flight
+    4. Reuses the summary of a near-identical earlier report if there is one
+       (summary_reuse.py; no LLM call, X-Summary-Reused: true)
+    5. Otherwise answers with a rules-only manifest when the LLM queue is too
+       long, or waits for an LLM slot (critical reports are dispatched first)
+    6. Invokes LangGraph Agent (Gemini 2.5); reports predicted to exceed
+       LLM_LATENCY_BUDGET_SECONDS are summarized from abnormal and key normal
+       results only (llm_budget.py; X-Prompt-Trimmed: <omitted results>)
+    7. Returns UI Manifest (in the encoding from requested_encoding)
+    
+    With ?page_limit=N only the first N components are built and returned,
+    plus a next_cursor for GET /manifest/pages/{cursor} (see manifest_pages.py).
+    
+    With ?delivery=progressive, step 6 runs in the background: the response
+    is a rules-only skeleton (X-Manifest-Mode: skeleton) stored as an
+    editable summary, and the LLM upgrade arrives as a manifest delta on
+    GET /summaries/{summary_id}/events (see manifest_upgrades.py).
     """
+    manifest_format, props_encoding = requested_encoding(request)
+    delivery = _negotiated(request, "delivery", "x-manifest-delivery", DELIVERY_MODES)
+    if delivery == "progressive" and page_limit is not None:
+        raise HTTPException(status_code=400, detail="page_limit is not supported with progressive delivery")
+    # Flattened once; triage, the prompt and the history store all read it
+    input_data, results = lab_report(await request.body())
+    print(f"Received Analysis Request for: {input_data['patient_details'].get('name', 'Unknown')}")
+    
+    triage = triage_report(input_data, table=results)
+    print(f"Triage: {triage.priority} ({triage.abnormal_count} abnormal, {triage.critical_count} critical)")
+    
+    admission = get_admission_controller()
+    decision = admission.admit(triage.priority)
+    if decision.action == "shed":
+        print(f"Shedding request (estimated wait {decision.estimated_wait:.1f}s)")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is at capacity, please retry shortly",
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+    
+    handed_off = False  # A progressive upgrade releases admission when the LLM is done
     try:
-        print(f"Received Analysis Request for: {report.patient_details.get('name', 'Unknown')}")
+        # Same results, classifications and (within tolerance) values as an
+        # earlier report: its summary is reused with this report's values
+        reuse = get_summary_reuse()
+        fingerprint = reuse.fingerprint(input_data, results)
+        reused = reuse.lookup(fingerprint)
+        degraded = False
         
-        # Convert Pydantic model to standard dictionary for the Agent
-        input_data = report.model_dump()
+        if reused is not None:
+            result = await run_in_threadpool(map_reused_summary, input_data, reused, results, page_limit is not None)
+            response.headers["X-Summary-Reused"] = "true"
+        elif decision.action == "degrade":
+            # LLM queue too long: deterministic manifest without LLM text
+            print(f"Degraded mode (estimated wait {decision.estimated_wait:.1f}s)")
+            result = await run_in_threadpool(map_rules_only, input_data, results, page_limit is not None)
+            response.headers["X-Manifest-Mode"] = "rules-only"
+            degraded = True
+            if page_limit is None:
+                manifest = result["ui_manifest"]
+                response.headers["ETag"] = manifest_etag(manifest_content_hash(manifest), manifest_format, props_encoding)
+                response.headers["Vary"] = ANALYZE_VARY
+                return {**manifest_body(manifest, manifest_format, props_encoding), "degraded": True}
+        elif delivery == "progressive":
+            # Skeleton now; the LLM summary follows as an SSE manifest delta
+            registry = get_upgrade_registry()
+            started = time.perf_counter()
+            editable = await run_in_threadpool(
+                lambda: get_summary_store().create(skeleton_summary(input_data, results)))
+            registry.skeleton_latency.record(time.perf_counter() - started)
+            registry.start(editable.summary_id, upgrade_skeleton(
+                editable.summary_id, input_data, results, fingerprint, triage.priority))
+            handed_off = True
+            snapshot = editable.snapshot()
+            response.headers["X-Manifest-Mode"] = "skeleton"
+            response.headers["ETag"] = manifest_etag(snapshot["content_hash"], manifest_format, props_encoding)
+            response.headers["Vary"] = ANALYZE_VARY
+            return {
+                **manifest_body(snapshot["items"], manifest_format, props_encoding),
+                "summary_id": snapshot["summary_id"],
+                "revision": snapshot["revision"],
+                "upgrade_events": f"/summaries/{snapshot['summary_id']}/events",
+            }
+        else:
+            # Invoke the LangGraph workflow defined in agents.py
+            # This runs the 'Summarizer' node then the 'UI Mapper' node.
+            # The graph blocks (LLM call + mapping), so keep it off the event loop.
+            async with get_llm_scheduler().slot(triage.priority):
+                result = await run_in_threadpool(
+                    smart_report_app.invoke,
+                    {"raw_data": input_data, "results": results, "summary_fingerprint": fingerprint,
+                     "defer_ui": page_limit is not None},
+                )
+            usage = result.get("llm_usage") or {}
+            if usage.get("trimmed"):
+                # Over the latency budget: only abnormal and key normal results were summarized
+                response.headers["X-Prompt-Trimmed"] = str(usage["omitted_results"])
         
-        # Invoke the LangGraph workflow defined in agents.py
-        # This runs the 'Summarizer' node then the 'UI Mapper' node
-        result = smart_report_app.invoke({"raw_data": input_data})
+        if page_limit is not None:
+            response.headers["X-Manifest-Mode"] = "rules-only" if degraded else "full"
+            response.headers["Vary"] = ANALYZE_VARY
+            page = await manifest_page(result["smart_summary"], None, page_limit, manifest_format, props_encoding)
+            return {**page, "degraded": True} if degraded else page
         
         # Extract and return only the UI Manifest list
         manifest = result.get('ui_manifest', [])
         
         if not manifest:
             raise HTTPException(status_code=500, detail="Agent returned empty manifest")
-            
-        return {"ui_manifest": manifest}
+        
+        response.headers["X-Manifest-Mode"] = "full"
+        response.headers["ETag"] = manifest_etag(manifest_content_hash(manifest), manifest_format, props_encoding)
+        response.headers["Vary"] = ANALYZE_VARY
+        return manifest_body(manifest, manifest_format, props_encoding)
 
     except Exception as e:
         print(f"CRITICAL ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not handed_off:
+            admission.release()
+
+async def upgrade_skeleton(summary_id: str, input_data: Dict[str, Any], results: ResultTable,
+                           fingerprint: ReportFingerprint, priority: str) -> Dict[str, Any]:
+    """
+    Background half of a progressive /analyze: the LLM graph (summary only,
+    mapping deferred) in an LLM slot, then the stored skeleton replaced by
+    its summary. Returns the manifest delta; releases the admission slot.
+    """
+    try:
+        async with get_llm_scheduler().slot(priority):
+            result = await run_in_threadpool(
+                smart_report_app.invoke,
+                {"raw_data": input_data, "results": results, "summary_fingerprint": fingerprint,
+                 "defer_ui": True},
+            )
+        delta = await run_in_threadpool(get_summary_store().replace, summary_id, result["smart_summary"])
+        usage = result.get("llm_usage") or {}
+        if usage.get("trimmed"):
+            delta["prompt_trimmed"] = usage["omitted_results"]
+        return delta
+    finally:
+        get_admission_controller().release()
+
+# --- PAGED MANIFESTS ---
+
+async def manifest_page(summary: Optional[Dict[str, Any]], cursor: Optional[str], limit: int,
+                        manifest_format: str, props_encoding: str) -> Dict[str, Any]:
+    """
+    One page of a cursor-paginated manifest.
+
+    With a summary, the session is opened (or reused) and resumes at `cursor`
+    (first page if None); without one, the cursor's session must still exist.
+    """
+    store = get_page_store()
+
+    def build():
+        session = store.open(summary) if summary is not None else store.resume(cursor)
+        return session.page(cursor or session.first_cursor(), limit)
+
+    page = await run_in_threadpool(build)
+    return {
+        **manifest_body(page["items"], manifest_format, props_encoding),
+        "next_cursor": page["next_cursor"],
+        "total_components": page["total_components"],
+    }
+
+@app.post("/manifest/pages")
+async def open_manifest_pages(summary: Dict[str, Any], request: Request,
+                              limit: Optional[int] = Query(None, ge=1), cursor: Optional[str] = None):
+    """
+    Paged manifest for a Smart Summary: returns the first page
+    (?limit=, default MANIFEST_PAGE_SIZE) and a next_cursor.
+    
+    Header, alerts and the highest-risk findings come first; props for later
+    pages are generated only when those pages are requested. Pass ?cursor=
+    with the same summary to resume a session this process no longer holds.
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    try:
+        return await manifest_page(summary, cursor, limit or default_page_size(),
+                                   manifest_format, props_encoding)
+    except Exception as e:
+        print(f"Manifest Page Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/manifest/pages/{cursor}")
+async def next_manifest_page(cursor: str, request: Request, limit: Optional[int] = Query(None, ge=1)):
+    """
+    Next page of a paged manifest. 410 Gone if the session expired
+    (re-POST the summary with ?cursor= to resume).
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    try:
+        return await manifest_page(None, cursor, limit or default_page_size(), manifest_format, props_encoding)
+    except SessionExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except Exception as e:
+        print(f"Manifest Page Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+# --- EDITABLE SUMMARIES ---
+# Store a Smart Summary, then correct it with JSON Patch (RFC 6902); each
+# edit returns a manifest delta keyed by component ID (see manifest_edits.py)
+
+def summary_etag(revision: int) -> str:
+    return f'"{revision}"'
+
+def delta_body(delta: Dict[str, Any], manifest_format: str, props_encoding: str) -> Dict[str, Any]:
+    """Manifest delta with added/updated items in the negotiated encoding"""
+    added_hints, added = encode_items(delta["added"], manifest_format, props_encoding)
+    updated_hints, updated = encode_items(delta["updated"], manifest_format, props_encoding)
+    body = {**delta, **encoding_fields(manifest_format, props_encoding), "added": added, "updated": updated}
+    if added_hints is not None:
+        body["hints"] = {**added_hints, **updated_hints}
+    return body
+
+@app.post("/summaries")
+async def create_summary(summary: Dict[str, Any], request: Request, response: Response):
+    """
+    Store a Smart Summary for editing; returns its summary_id, revision and
+    full manifest. Apply corrections with PATCH /summaries/{summary_id}.
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    try:
+        editable = await run_in_threadpool(get_summary_store().create, summary)
+    except Exception as e:
+        print(f"Summary Store Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    snapshot = editable.snapshot()
+    response.headers["ETag"] = summary_etag(snapshot["revision"])
+    return {
+        "summary_id": snapshot["summary_id"],
+        "revision": snapshot["revision"],
+        "content_hash": snapshot["content_hash"],
+        "validation": snapshot["validation"],
+        **manifest_body(snapshot["items"], manifest_format, props_encoding),
+    }
+
+@app.get("/summaries/{summary_id}")
+def get_summary(summary_id: str, request: Request, response: Response):
+    """Current (edited) Smart Summary, revision and full manifest"""
+    manifest_format, props_encoding = requested_encoding(request)
+    try:
+        snapshot = get_summary_store().get(summary_id).snapshot()
+    except SummaryNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    response.headers["ETag"] = summary_etag(snapshot["revision"])
+    items = snapshot.pop("items")
+    return {**snapshot, **manifest_body(items, manifest_format, props_encoding)}
+
+@app.patch("/summaries/{summary_id}")
+async def patch_summary(summary_id: str, operations: List[Dict[str, Any]], request: Request, response: Response):
+    """
+    Apply a JSON Patch to a stored Smart Summary and return the manifest delta:
+    
+        {"revision", "content_hash", "added": [items], "removed": [ids],
+         "updated": [items], "order": [ids] | null, "validation", "stats"}
+    
+    Only rules and components that depend on the patched fields are
+    recomputed. Send `If-Match: "<revision>"` to reject the edit (412) if
+    someone else changed the summary first. 404 if the summary is gone,
+    422 for an invalid patch or a result that is not a valid summary.
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    if_match = request.headers.get("if-match")
+    try:
+        revision = int(if_match.strip('W/"')) if if_match and if_match != "*" else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match: {if_match}")
+    try:
+        delta = await run_in_threadpool(get_summary_store().patch, summary_id, operations, revision)
+    except SummaryNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RevisionConflict as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response.headers["ETag"] = summary_etag(delta["revision"])
+    return delta_body(delta, manifest_format, props_encoding)
+
+@app.get("/summaries/{summary_id}/events")
+async def summary_events(summary_id: str, request: Request):
+    """
+    Server-Sent Events for a progressive /analyze skeleton: one "upgrade"
+    event with the manifest delta to the LLM summary (same shape as
+    PATCH /summaries/{summary_id}, plus prompt_trimmed if the prompt was
+    trimmed), or one "error" event if the LLM failed (the skeleton is final).
+    
+    Encoding via ?manifest_format= / ?props_encoding= (EventSource cannot
+    set headers). 404 if this process holds no upgrade for the summary
+    (another worker's skeleton, or expired: fetch the complete manifest);
+    204 when Last-Event-ID shows the final event was received, which stops
+    EventSource from reconnecting.
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    registry = get_upgrade_registry()
+    try:
+        upgrade = registry.get(summary_id)
+    except UpgradeNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if upgrade.done.is_set() and request.headers.get("last-event-id") == upgrade.final_event_id():
+        return Response(status_code=204)
+    return StreamingResponse(
+        registry.events(upgrade, lambda delta: delta_body(delta, manifest_format, props_encoding)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- ASYNC JOBS ---
+# Enqueue a report and poll for its manifest; job_worker.py processes run
+# the graph, so no HTTP connection waits on the LLM (see job_queue.py)
+
+@app.post("/jobs", status_code=202, openapi_extra=REPORT_BODY)
+async def create_job(request: Request, response: Response):
+    """
+    Queue a report for analysis; returns its job_id and status_url (also
+    the Location header). Optional ?webhook_url= / X-Webhook-URL is POSTed
+    {job_id, status, attempts, error, result_url} once the job is final.
+    
+    Jobs run in triage order (CRITICAL first, with aging). 503 + Retry-After
+    when JOB_QUEUE_MAX jobs are waiting; 400 for a rejected webhook URL.
+    """
+    webhook_url = request.query_params.get("webhook_url") or request.headers.get("x-webhook-url")
+    body = await request.body()
+    input_data, results = lab_report(body)
+    triage = triage_report(input_data, table=results)
+    try:
+        # The body is stored as sent: deeply nested reports cannot be re-serialized by json.dumps
+        job_id = await run_in_threadpool(get_job_queue().enqueue, input_data, triage.priority, webhook_url,
+                                         body.decode("utf-8"))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full ({e}), please retry shortly",
+                            headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"Queued job {job_id} ({triage.priority}) for: {input_data['patient_details'].get('name', 'Unknown')}")
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return {"job_id": job_id, "status": "queued", "priority": triage.priority, "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request, response: Response):
+    """
+    Job status: queued | running (Retry-After suggests the next poll),
+    succeeded (with the manifest, in the encoding from requested_encoding)
+    or failed (with the last error). 404 if unknown or past retention.
+    """
+    manifest_format, props_encoding = requested_encoding(request)
+    job = await run_in_threadpool(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    body = job.model_dump(exclude={"result"})
+    if job.status in ("queued", "running"):
+        response.headers["Retry-After"] = str(POLL_AFTER_SECONDS)
+    elif job.result is not None:
+        manifest = job.result.pop("ui_manifest")
+        body.update(job.result)
+        body.update(manifest_body(manifest, manifest_format, props_encoding))
+        response.headers["ETag"] = manifest_etag(manifest_content_hash(manifest), manifest_format, props_encoding)
+        response.headers["Vary"] = MANIFEST_VARY
+    return body
 
 @app.get("/api/schema-export")
 def export_component_schemas():
@@ -125,37 +584,160 @@ def export_component_schemas():
     }
     """
     try:
-        schemas = export_as_json_schema()
-        return schemas
+        # Precomputed once per process (see preload_shared_state)
+        return Response(content=get_schema_export_json(), media_type="application/json")
     except Exception as e:
         print(f"Error exporting schemas: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to export schemas: {str(e)}")
 
-# --- DEBUG ENDPOINTS ---
+@app.get("/api/compression-dictionary")
+def compression_dictionary():
+    """
+    Current zstd dictionary for `dcz` responses (see compression.py).
+    
+    Clients that send `Available-Dictionary: :<base64 sha256>:` with
+    `Accept-Encoding: dcz` get manifest responses compressed against it.
+    404 when zstandard or the dictionary file is unavailable.
+    """
+    dictionary = get_manifest_dictionary()
+    if dictionary is None:
+        raise HTTPException(status_code=404, detail="No compression dictionary available")
+    return Response(
+        content=dictionary.data,
+        media_type="application/octet-stream",
+        headers={
+            "Use-As-Dictionary": f'match="/*", id="{dictionary.version}"',
+            "X-Dictionary-Version": dictionary.version,
+            "X-Dictionary-Hash": dictionary.available_header,
+            "Cache-Control": "public, max-age=86400",
+        },
+    )
+
+@app.get("/api/rules")
+def rules_info():
+    """Loaded manifest rules: source file, fingerprint, rules by priority, reload status"""
+    return warm_generator().rules_engine.rules_info()
+
+@app.post("/api/rules/reload")
+def reload_rules():
+    """
+    Recompile rules/manifest_rules.json now (this process only).
+    
+    Process-pool manifest workers pick changes up through their own watcher
+    (RULES_RELOAD_SECONDS). A file that fails to compile is rejected with
+    422 and the current rules stay active.
+    """
+    engine = warm_generator().rules_engine
+    reloaded = engine.reload(force=True)
+    if not reloaded and engine.last_reload_error:
+        raise HTTPException(status_code=422, detail=engine.last_reload_error)
+    return {"reloaded": reloaded, "fingerprint": engine.fingerprint}
 
-from schema import SmartSummary
-from ui_mapper import UIManifestGenerator
+@app.get("/api/rules/profile")
+def rules_profile():
+    """
+    Per-rule call counts, match rate and condition / props generation time
+    (cumulative and p99), plus props time per component type. Rules are
+    ordered by total time. Empty unless profiling is on (RULES_PROFILING).
+    """
+    return get_rules_profiler().stats()
+
+@app.post("/api/rules/profile")
+def configure_rules_profile(enabled: Optional[bool] = None, reset: bool = False, dump: bool = False):
+    """
+    Control the rules profiler of this process at runtime.
+    
+    ?enabled=true|false switches instrumentation, ?reset=true clears the
+    collected stats, ?dump=true writes them to RULES_PROFILE_FILE.
+    """
+    profiler = get_rules_profiler()
+    result: Dict[str, Any] = {}
+    if dump:
+        try:
+            result["dumped_to"] = profiler.dump()
+        except OSError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to dump rules profile: {e}")
+    if reset:
+        profiler.reset()
+    if enabled is not None:
+        profiler.enabled = enabled
+    result["enabled"] = profiler.enabled
+    return result
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Runtime metrics snapshot (JSON).
+
+    - manifest_executor: queue depth, queue wait and execution time of the
+      mapping + validation worker pool, plus manifest cache hit rate
+    - llm_scheduler: slot usage, queue depth and queue wait per priority class
+    - admission: in-flight /analyze requests and admit/degrade/shed counts
+    - compression: bytes in/out and CPU time per content encoding
+    - manifest_pages: open paged-manifest sessions
+    - summaries: stored editable summaries and patches applied
+    - history: rows written to the history store, batch write and lookup times
+    - summary_reuse: near-duplicate summary hits/misses and lookup time
+    - llm_usage: LLM input/output tokens, cost, call latency and prompts
+      trimmed for the latency budget
+    - prompt_cache: calls sent with the cached MASTER_PROMPT prefix vs
+      inline, handle creates/refreshes and failures
+    - manifest_upgrades: progressive /analyze skeleton build time, pending
+      and finished LLM upgrades and time from skeleton to upgrade
+    - jobs: /jobs queue depth by status, oldest waiting job, expired leases
+    """
+    history = get_history_store()
+    return {
+        "manifest_executor": get_manifest_executor().stats(),
+        "llm_scheduler": get_llm_scheduler().stats(),
+        "admission": get_admission_controller().stats(),
+        "compression": compression_stats.summary(),
+        "manifest_pages": get_page_store().stats(),
+        "summaries": get_summary_store().stats(),
+        "history": history.stats() if history is not None else None,
+        "summary_reuse": get_summary_reuse().stats(),
+        "llm_usage": get_llm_budget().stats(),
+        "prompt_cache": prompt_prefix.stats(),
+        "manifest_upgrades": get_upgrade_registry().stats(),
+        "jobs": get_job_queue().stats(),
+    }
+
+# --- DEBUG ENDPOINTS ---
 
 @app.post("/debug/generate-manifest")
-async def debug_generate_manifest(summary: Dict[str, Any]):
+async def debug_generate_manifest(summary: Dict[str, Any], request: Request):
     """
     Debug Endpoint: Directly generate UI Manifest from Smart Summary JSON.
     Bypasses the LLM generation step.
+    
+    The manifest is deterministic, so repeated summaries are served from the
+    manifest cache and its content hash is returned as an ETag; a matching
+    If-None-Match gets 304 Not Modified with no body. Supports the compact
+    format and columnar props (see requested_encoding).
     """
+    manifest_format, props_encoding = requested_encoding(request)
     try:
-        # Validate input against schema
-        smart_summary = SmartSummary(**summary)
-        
-        # Generate manifest
-        generator = UIManifestGenerator()
-        manifest = generator.generate_from_summary(smart_summary)
-        
-        return {"ui_manifest": [item.dict() for item in manifest.items]}
+        # Validate + generate in the manifest worker pool (off the event loop)
+        payload = await get_manifest_executor().run(summary, manifest_format, props_encoding)
     except Exception as e:
         print(f"Debug Generation Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    
+    etag = manifest_etag(payload["content_hash"], manifest_format, props_encoding)
+    headers = {"ETag": etag, "Vary": MANIFEST_VARY}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    # Items (and hints) are pre-serialized, cached bytes; wrap without re-encoding
+    body = b"{"
+    for key, value in encoding_fields(manifest_format, props_encoding).items():
+        body += f'"{key}":"{value}",'.encode()
+    if payload["hints_json"] is not None:
+        body += b'"hints":' + payload["hints_json"] + b","
+    body += b'"ui_manifest":' + payload["items_json"] + b"}"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # --- SERVER ENTRY POINT ---
 if __name__ == "__main__":
-    # Run with reload enabled for development
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Run with reload enabled for development.
+    # Production (multi-process, preloaded): gunicorn -c gunicorn.conf.py main:app
+    uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("BACKEND_PORT", "8000")), reload=True)
\ No newline at end of file
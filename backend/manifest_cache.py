@@ -0,0 +1,116 @@
+"""
+MANIFEST CACHE - Memoized manifest payloads for repeated summaries.
+
+Manifest generation is a pure function of the SmartSummary, the rule set and
+the component registry. Finished payloads (serialized item bytes, content hash
+and validation result) are kept in an LRU keyed on:
+
+    <rules/registry fingerprint>:<sha256 of the canonical summary JSON>:<wire encoding>
+
+The fingerprint is re-checked on every lookup; when any
+ComponentDefinition.version or the rules change, the whole cache is dropped.
+
+Configuration (environment):
+    MANIFEST_CACHE_SIZE   Max cached manifests per process (default: 256; 0 disables)
+
+Usage:
+    cache = get_manifest_cache()
+    key, payload = cache.lookup(summary_dict, manifest_fingerprint(engine))
+    if payload is None:
+        payload = build_manifest_payload(summary_dict)
+        cache.store(key, payload)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from components import registry_fingerprint
+from ui_mapper import canonical_json
+from ui_rules import RulesEngine
+
+
+def manifest_fingerprint(rules_engine: RulesEngine) -> str:
+    """Combined rules + registry fingerprint for cache keys"""
+    return f"{rules_engine.fingerprint}{registry_fingerprint()}"
+
+
+def summary_digest(summary_dict: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON of a (raw) SmartSummary dict"""
+    return hashlib.sha256(canonical_json(summary_dict)).hexdigest()
+
+
+class ManifestCache:
+    """Thread-safe LRU of manifest payloads with fingerprint invalidation"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, summary_dict: Dict[str, Any], fingerprint: str,
+               encoding: str = "full/rows") -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return (key, cached payload or None); clears the cache if the fingerprint changed"""
+        key = f"{fingerprint}:{summary_digest(summary_dict)}:{encoding}"
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._fingerprint = fingerprint
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return key, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return key, payload
+
+    def store(self, key: str, payload: Dict[str, Any]) -> None:
+        if not self.max_entries or not key.startswith(f"{self._fingerprint}:"):
+            return  # Disabled, or computed under a fingerprint that is already stale
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+            cached_bytes = sum(len(p["items_json"]) + len(p["hints_json"] or b"")
+                               for p in self._entries.values())
+        lookups = self.hits + self.misses
+        return {
+            "max_entries": self.max_entries,
+            "size": size,
+            "bytes": cached_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: Optional[ManifestCache] = None
+
+
+def get_manifest_cache() -> ManifestCache:
+    """Process-wide cache configured from MANIFEST_CACHE_SIZE"""
+    global _cache
+    if _cache is None:
+        _cache = ManifestCache(max_entries=int(os.getenv("MANIFEST_CACHE_SIZE", "256")))
+    return _cache
@@ -0,0 +1,443 @@
+"""
+MANIFEST EDITS - JSON Patch edits to stored summaries with incremental manifests.
+
+Clinicians correct single readings (risk level, note) after review.
+Re-running the LLM, or even the whole mapping, for that is wasteful: an
+edit to one abnormal reading touches one MetricAccordion plus the few
+components that aggregate abnormal readings.
+
+A stored summary keeps its last manifest (item dicts by ID), the rule
+condition results and the raw element behind each per-element component.
+A JSON Patch (RFC 6902) is applied to the raw summary dict, and:
+
+1. Patch paths are mapped to the rules DSL fields they touch
+   ("/clinical_summary/abnormal_readings/3/risk_level" -> {"abnormal"})
+2. Only rule conditions reading a changed field are re-evaluated
+   (Rule.reads, from the DSL); the rest keep their previous result
+3. Props are regenerated only for components whose generator reads a
+   changed field (@reads in ui_rules.py) or whose for_each element changed;
+   every other item is reused as-is
+4. The response is a delta keyed by the stable component IDs: added items,
+   removed IDs, updated items and the new order (when it changed)
+
+A rules reload (different fingerprint) makes the next edit a full
+recompute. Each edit bumps the summary's revision; sending the revision
+back (If-Match) rejects edits made against a stale copy.
+
+Without SUMMARY_STORE_DB summaries are kept per process, so under several
+gunicorn workers a summary is only found by the worker that created it
+(404 from the others). With it, summaries and revisions are stored in
+SQLite (WAL) and shared by every worker; edits are serialized by a write
+transaction, and a worker whose cached manifest is behind the stored
+revision rebuilds it (a full recompute) before applying the edit.
+gunicorn.conf.py sets it when running more than one worker.
+
+Configuration (environment):
+    SUMMARY_STORE_DB     SQLite file shared by the workers (default: unset, per process)
+    SUMMARY_STORE_SIZE   Manifests cached per process (default: 256)
+    SUMMARY_TTL          Seconds a summary is kept after its last use (default: 3600)
+
+Usage:
+    store = get_summary_store()
+    editable = store.create(summary_dict)          # full manifest
+    delta = store.get(summary_id).patch([
+        {"op": "replace", "path": "/clinical_summary/abnormal_readings/0/risk_level", "value": "HIGH"},
+    ], revision=0)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+import jsonpatch
+import jsonpointer
+
+from manifest_cache import manifest_fingerprint
+from manifest_executor import warm_generator
+from rules_dsl import FIELDS, field_pointer
+from summary_structs import summary_struct
+from ui_mapper import canonical_json
+
+_FIELD_POINTERS = {field: field_pointer(field) for field in FIELDS}
+
+
+class SummaryNotFound(LookupError):
+    """No stored summary with this ID (never created, evicted or expired)"""
+
+
+class RevisionConflict(ValueError):
+    """The edit was made against an older revision of the summary"""
+
+
+def changed_fields(operations: List[Dict[str, Any]]) -> FrozenSet[str]:
+    """
+    DSL fields a JSON Patch may change.
+
+    A path inside a field ("/clinical_summary/abnormal_readings/2/note")
+    changes that field; a path above fields ("/clinical_summary") changes
+    every field below it; "test" operations change nothing.
+    """
+    fields = set()
+    for operation in operations:
+        if operation.get("op") == "test":
+            continue
+        paths = [operation.get("path", "")]
+        if operation.get("op") == "move":
+            paths.append(operation.get("from", ""))
+        for path in paths:
+            for field, pointer in _FIELD_POINTERS.items():
+                if path == pointer or path.startswith(pointer + "/") or pointer.startswith(path + "/") or path == "":
+                    fields.add(field)
+    return frozenset(fields)
+
+
+def _copy_along(root: Any, pointer: str, copied: set) -> None:
+    """Shallow-copy every container on the way to `pointer`'s parent (root is already a copy)"""
+    node = root
+    for token in jsonpointer.JsonPointer(pointer).parts[:-1]:
+        try:
+            key = int(token) if isinstance(node, list) else token
+            child = node[key]
+        except (KeyError, IndexError, ValueError, TypeError):
+            return  # Bad path; jsonpatch reports it
+        if isinstance(child, (dict, list)) and id(child) not in copied:
+            child = dict(child) if isinstance(child, dict) else list(child)
+            copied.add(id(child))
+            node[key] = child
+        node = child
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    JSON Patch without deep-copying the document.
+
+    Containers on each operation's path are copied (copy-on-write) and the
+    operation is applied in place to that copy, so `document` is never modified
+    and untouched subtrees are shared with it.
+    """
+    jsonpatch.JsonPatch(operations)  # Validate every operation before touching anything
+    result = dict(document)
+    copied = {id(result)}
+    for operation in operations:
+        # Per operation: an earlier move/add can change what a path points at
+        for key in ("path", "from"):
+            if isinstance(operation.get(key), str):
+                _copy_along(result, operation[key], copied)
+        result = jsonpatch.JsonPatch([operation]).apply(result, in_place=True)
+    return result
+
+
+def _element(summary_dict: Dict[str, Any], field: str, index: int) -> Any:
+    """Raw element `index` of a list field in a summary dict"""
+    value: Any = summary_dict
+    for key in FIELDS[field].split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value[index] if isinstance(value, list) and index < len(value) else None
+
+
+class EditableManifest:
+    """A stored summary, its current manifest and what is needed to update it incrementally"""
+
+    def __init__(self, summary_id: str, summary_dict: Dict[str, Any], revision: int = 0):
+        self.summary_id = summary_id
+        self.revision = revision
+        self.touched_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.summary_dict: Dict[str, Any] = {}
+        self.fingerprint: Optional[str] = None
+        self.matches: Dict[str, bool] = {}
+        self.items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.elements: Dict[str, Any] = {}
+        self._item_json: Dict[str, bytes] = {}
+        self.content_hash = ""
+        self.last_validation: Dict[str, Any] = {}
+        self._recompute(summary_dict, None)
+
+    def _recompute(self, summary_dict: Dict[str, Any], changed: Optional[FrozenSet[str]]) -> Dict[str, Any]:
+        """Bring the manifest up to date with summary_dict; returns the delta"""
+        try:
+            summary = summary_struct(summary_dict)
+        except Exception as e:
+            raise ValueError(str(e)) from None
+
+        generator = warm_generator()
+        rule_set = generator.rules_engine.rule_set
+        fingerprint = manifest_fingerprint(generator.rules_engine)
+        full = changed is None or fingerprint != self.fingerprint
+
+        matches = rule_set.evaluate(summary, None if full else self.matches, None if full else changed)
+        specs = rule_set.expand(summary, matches)
+        plan = generator.plan_from_specs(specs, summary)
+
+        items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        elements: Dict[str, Any] = {}
+        regenerated = []
+        for spec, lazy_item in zip(specs, plan):
+            element = _element(summary_dict, *spec["element"]) if spec.get("element") else None
+            if element is not None:
+                elements[lazy_item.id] = element
+            previous = self.items.get(lazy_item.id)
+            reusable = (
+                not full
+                and previous is not None
+                and spec.get("reads") is not None
+                and not (spec["reads"] & changed)
+                and (element is None or self.elements.get(lazy_item.id) == element)
+            )
+            if reusable:
+                items[lazy_item.id] = previous
+            else:
+                item = lazy_item.to_dict()
+                regenerated.append(item)
+                items[lazy_item.id] = item
+
+        validation = generator.validate_items(regenerated)
+        delta = {
+            "added": [items[i] for i in items if i not in self.items],
+            "removed": [i for i in self.items if i not in items],
+            "updated": [item for item in regenerated
+                        if item["id"] in self.items and self.items[item["id"]] != item],
+            "order": None,
+            "validation": validation.model_dump(),
+            "stats": {
+                "full": full,
+                "rules_evaluated": sum(1 for rule in rule_set.rules
+                                       if full or rule.reads is None or rule.reads & changed),
+                "props_generated": len(regenerated),
+                "components": len(items),
+            },
+        }
+        previous_order = [i for i in self.items if i in items]
+        if delta["added"] or delta["removed"] or previous_order != list(items):
+            delta["order"] = list(items)
+
+        # Same digest as manifest_content_hash, re-serializing only regenerated items
+        item_json = {i: self._item_json[i] if items[i] is self.items.get(i) else canonical_json(items[i])
+                     for i in items}
+
+        self.summary_dict = summary_dict
+        self.fingerprint = fingerprint
+        self.matches = matches
+        self.items = items
+        self.elements = elements
+        self._item_json = item_json
+        self.content_hash = hashlib.sha256(b"[" + b",".join(item_json.values()) + b"]").hexdigest()
+        self.last_validation = delta["validation"]
+        return delta
+
+    def patch(self, operations: List[Dict[str, Any]], revision: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply a JSON Patch to the summary and update the manifest.
+
+        Returns the delta plus the new revision and content hash. Raises
+        RevisionConflict if `revision` is given and not current, ValueError
+        for an invalid patch or a patched summary that fails validation
+        (the stored summary is then unchanged).
+        """
+        with self._lock:
+            if revision is not None and revision != self.revision:
+                raise RevisionConflict(
+                    f"Summary {self.summary_id} is at revision {self.revision}, edit was made against {revision}"
+                )
+            try:
+                summary_dict = apply_patch(self.summary_dict, operations)
+            except (jsonpatch.JsonPatchException, jsonpointer.JsonPointerException, TypeError) as e:
+                # Pointer errors embed the whole document; keep the message short
+                message = str(e) if len(str(e)) <= 200 else f"{str(e)[:200]}..."
+                raise ValueError(f"Invalid patch: {message}") from None
+            delta = self._recompute(summary_dict, changed_fields(operations))
+            self.revision += 1
+            return {"summary_id": self.summary_id, "revision": self.revision,
+                    "content_hash": self.content_hash, **delta}
+
+    def replace(self, summary_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the whole summary (full recompute), e.g. a skeleton by the
+        LLM summary; returns the delta like patch(). Earlier edits are
+        superseded; raises ValueError if the summary fails validation.
+        """
+        with self._lock:
+            delta = self._recompute(summary_dict, None)
+            self.revision += 1
+            return {"summary_id": self.summary_id, "revision": self.revision,
+                    "content_hash": self.content_hash, **delta}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current summary and full manifest"""
+        with self._lock:
+            return {
+                "summary_id": self.summary_id,
+                "revision": self.revision,
+                "smart_summary": self.summary_dict,
+                "items": list(self.items.values()),
+                "content_hash": self.content_hash,
+                "validation": self.last_validation,
+            }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    touched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_touched ON summaries (touched_at);
+"""
+
+
+class SummaryStore:
+    """
+    LRU of editable summaries with an idle TTL. With a database `path` the
+    summaries (and revisions) live in SQLite, shared by every worker process;
+    the LRU then only caches their manifests and is rebuilt from the row when
+    another process changed the summary.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, EditableManifest]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.created = 0
+        self.expired = 0
+        self.patches = 0
+        self.reloads = 0
+        if path:
+            self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, in autocommit mode (transactions are explicit)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _cache(self, editable: EditableManifest) -> EditableManifest:
+        with self._lock:
+            self._entries[editable.summary_id] = editable
+            self._entries.move_to_end(editable.summary_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return editable
+
+    def create(self, summary_dict: Dict[str, Any]) -> EditableManifest:
+        """Store a summary and build its manifest (raises ValueError if invalid)"""
+        editable = EditableManifest(uuid.uuid4().hex, summary_dict)
+        if self.path:
+            now = time.time()
+            connection = self._connection()
+            connection.execute("INSERT INTO summaries (id, revision, summary, touched_at) VALUES (?, 0, ?, ?)",
+                               (editable.summary_id, json.dumps(summary_dict), now))
+            connection.execute("DELETE FROM summaries WHERE touched_at < ?", (now - self.ttl_seconds,))
+        self._cache(editable)
+        with self._lock:
+            self.created += 1
+        return editable
+
+    def _not_found(self, summary_id: str) -> SummaryNotFound:
+        if self.path:
+            return SummaryNotFound(f"Summary {summary_id} not found")
+        return SummaryNotFound(f"Summary {summary_id} not found in this process (summaries are per process "
+                               f"unless SUMMARY_STORE_DB is set; with several workers, set it)")
+
+    def get(self, summary_id: str) -> EditableManifest:
+        if not self.path:
+            with self._lock:
+                editable = self._entries.get(summary_id)
+                if editable is not None and time.monotonic() - editable.touched_at > self.ttl_seconds:
+                    del self._entries[summary_id]
+                    self.expired += 1
+                    editable = None
+                if editable is None:
+                    raise self._not_found(summary_id)
+                editable.touched_at = time.monotonic()
+                self._entries.move_to_end(summary_id)
+                return editable
+
+        # Shared: the row decides; the cached manifest is used if it is at the row's revision
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute("SELECT revision, summary, touched_at FROM summaries WHERE id = ?",
+                                 (summary_id,)).fetchone()
+        if row is None or now - row[2] > self.ttl_seconds:
+            with self._lock:
+                self._entries.pop(summary_id, None)
+                self.expired += row is not None
+            raise self._not_found(summary_id)
+        connection.execute("UPDATE summaries SET touched_at = ? WHERE id = ?", (now, summary_id))
+        with self._lock:
+            editable = self._entries.get(summary_id)
+            if editable is not None and editable.revision == row[0]:
+                editable.touched_at = time.monotonic()
+                self._entries.move_to_end(summary_id)
+                return editable
+            self.reloads += 1
+        return self._cache(EditableManifest(summary_id, json.loads(row[1]), row[0]))
+
+    def _update(self, summary_id: str, change: Callable[[EditableManifest], Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply `change` to the summary; shared, inside a write transaction that stores the result"""
+        if not self.path:
+            return change(self.get(summary_id))
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")  # Edits from all workers are serialized
+        try:
+            editable = self.get(summary_id)
+            delta = change(editable)
+            connection.execute("UPDATE summaries SET revision = ?, summary = ? WHERE id = ?",
+                               (delta["revision"], json.dumps(editable.summary_dict), summary_id))
+            connection.execute("COMMIT")
+            return delta
+        except BaseException:
+            connection.execute("ROLLBACK")
+            with self._lock:  # It may hold an edit that was not stored
+                self._entries.pop(summary_id, None)
+            raise
+
+    def patch(self, summary_id: str, operations: List[Dict[str, Any]],
+              revision: Optional[int] = None) -> Dict[str, Any]:
+        delta = self._update(summary_id, lambda editable: editable.patch(operations, revision))
+        with self._lock:
+            self.patches += 1
+        return delta
+
+    def replace(self, summary_id: str, summary_dict: Dict[str, Any]) -> Dict[str, Any]:
+        return self._update(summary_id, lambda editable: editable.replace(summary_dict))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "shared": bool(self.path),
+                "summaries": len(self._entries),
+                "max_summaries": self.max_entries,
+                "created": self.created,
+                "patches": self.patches,
+                "reloads": self.reloads,
+                "expired": self.expired,
+            }
+
+
+_store: Optional[SummaryStore] = None
+
+
+def get_summary_store() -> SummaryStore:
+    """Process-wide store configured from SUMMARY_STORE_DB / SUMMARY_STORE_SIZE / SUMMARY_TTL"""
+    global _store
+    if _store is None:
+        _store = SummaryStore(
+            max_entries=int(os.getenv("SUMMARY_STORE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("SUMMARY_TTL", "3600")),
+            path=os.getenv("SUMMARY_STORE_DB") or None,
+        )
+    return _store
@@ -0,0 +1,244 @@
+"""
+MANIFEST EXECUTOR - Runs CPU-bound manifest generation off the event loop.
+
+`UIManifestGenerator.generate_from_summary` and `validate_manifest` are pure
+CPU work. Running them inside async handlers stalls every other coroutine, so
+this module hands the mapping + validation stage to a configurable pool:
+
+- inline:  run in the calling thread (no isolation, lowest overhead)
+- thread:  ThreadPoolExecutor (default; frees the loop, shares the GIL)
+- process: ProcessPoolExecutor with pre-warmed workers that import the
+           component registry and build the rules engine once at startup
+
+Repeated summaries are answered from the manifest cache (manifest_cache.py)
+without touching the pool.
+
+Configuration (environment):
+    MANIFEST_EXECUTOR=inline|thread|process   (default: thread)
+    MANIFEST_WORKERS=<int>                    (default: 2)
+
+Usage:
+    executor = get_manifest_executor()
+    payload = await executor.run(summary_dict)   # from async code
+    payload = executor.run_sync(summary_dict)    # from graph nodes / threads
+    # payload: {"items_json": bytes, "hints_json": bytes | None, "content_hash": str,
+    #           "validation": {...}, "exec_ms": float, "cached": bool}
+    items = json.loads(payload["items_json"])
+
+    # Compact format: hints factored into a "type@version" table (ui_mapper.compact_items)
+    # Columnar props: list-of-records props as {columns, data} (ui_mapper.columnar_items)
+    payload = await executor.run(summary_dict, manifest_format="compact", props_encoding="columnar")
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from manifest_cache import ManifestCache, get_manifest_cache, manifest_fingerprint
+from metrics import LatencyRecorder
+from summary_structs import summary_struct
+from ui_mapper import (MANIFEST_FORMATS, PROPS_ENCODINGS, UIManifestGenerator, canonical_json, encode_items,
+                       manifest_content_hash)
+from ui_rules import start_rules_watcher
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Per-process generator; built once by warm_generator (preload, pool initializer or first job)
+_generator: Optional[UIManifestGenerator] = None
+
+
+def warm_generator() -> UIManifestGenerator:
+    """Build this process's generator (registry lookups + compiled rules) once"""
+    global _generator
+    if _generator is None:
+        _generator = UIManifestGenerator()
+    return _generator
+
+
+def _init_worker() -> None:
+    """Process pool initializer: reuse a forked generator or build one, and watch the rules file"""
+    start_rules_watcher(warm_generator().rules_engine)
+
+
+def _warmup() -> int:
+    """No-op task used to force worker processes to start before traffic"""
+    return os.getpid()
+
+
+def build_manifest_payload(summary_dict: Dict[str, Any], manifest_format: str = "full",
+                           props_encoding: str = "rows") -> Dict[str, Any]:
+    """
+    Validate a SmartSummary dict, generate its manifest and validate that.
+
+    Runs inside the pool, so it takes a plain dict and returns the items
+    already serialized (bytes pickle far cheaper than nested dicts, and the
+    same bytes are cached and served). Errors are re-raised as ValueError so
+    they survive the process boundary.
+
+    The summary is converted once into slots structs (summary_structs.py) and
+    items stay plain dicts; no pydantic model is built per item.
+    """
+    generator = warm_generator()
+
+    start = time.perf_counter()
+    try:
+        summary = summary_struct(summary_dict)
+        item_dicts = generator.plan_from_summary(summary).item_dicts()
+        validation = generator.validate_items(item_dicts)
+        hints, items = encode_items(item_dicts, manifest_format, props_encoding)
+        hints_json = canonical_json(hints) if hints is not None else None
+        items_json = canonical_json(items)
+        # Full/rows items are the canonical items; hash the bytes already encoded
+        content_hash = (hashlib.sha256(items_json).hexdigest() if items is item_dicts
+                        else manifest_content_hash(item_dicts))
+    except Exception as e:
+        raise ValueError(str(e)) from None
+
+    return {
+        "items_json": items_json,
+        "hints_json": hints_json,
+        "content_hash": content_hash,
+        "validation": validation.model_dump(),
+        "exec_ms": (time.perf_counter() - start) * 1000,
+        "cached": False,
+    }
+
+
+class ManifestExecutor:
+    """Pool wrapper that tracks queue depth and queue wait per job"""
+
+    def __init__(self, mode: str = "thread", workers: int = 2, cache: Optional[ManifestCache] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown manifest executor mode: {mode} (expected one of {EXECUTOR_MODES})")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.cache = cache
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.failed = 0
+        self.queue_wait = LatencyRecorder()
+        self.exec_time = LatencyRecorder()
+
+    def start(self) -> "ManifestExecutor":
+        """Create the pool; process workers are spawned and warmed eagerly"""
+        if self._pool is not None or self.mode == "inline":
+            return self
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="manifest")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            for future in [self._pool.submit(_warmup) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def submit(self, summary_dict: Dict[str, Any], manifest_format: str = "full",
+               props_encoding: str = "rows") -> Future:
+        """Queue one manifest job (or serve it from cache); returns a concurrent.futures.Future"""
+        if manifest_format not in MANIFEST_FORMATS:
+            raise ValueError(f"Unknown manifest format: {manifest_format} (expected one of {MANIFEST_FORMATS})")
+        if props_encoding not in PROPS_ENCODINGS:
+            raise ValueError(f"Unknown props encoding: {props_encoding} (expected one of {PROPS_ENCODINGS})")
+        cache_key = None
+        if self.cache is not None and self.cache.max_entries:
+            fingerprint = manifest_fingerprint(warm_generator().rules_engine)
+            cache_key, cached = self.cache.lookup(summary_dict, fingerprint, f"{manifest_format}/{props_encoding}")
+            if cached is not None:
+                future: Future = Future()
+                future.set_result({**cached, "cached": True})
+                return future
+
+        with self._lock:
+            self._in_flight += 1
+            self.submitted += 1
+        submitted_at = time.perf_counter()
+
+        if self.mode == "inline":
+            future = Future()
+            try:
+                future.set_result(build_manifest_payload(summary_dict, manifest_format, props_encoding))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            if self._pool is None:
+                self.start()
+            future = self._pool.submit(build_manifest_payload, summary_dict, manifest_format, props_encoding)
+
+        def _on_done(done: Future) -> None:
+            total = time.perf_counter() - submitted_at
+            with self._lock:
+                self._in_flight -= 1
+            if done.exception() is not None:
+                with self._lock:
+                    self.failed += 1
+                return
+            if cache_key is not None:
+                self.cache.store(cache_key, done.result())
+            exec_seconds = done.result()["exec_ms"] / 1000
+            self.exec_time.record(exec_seconds)
+            # Wait = time not spent executing (queueing + IPC for process mode)
+            self.queue_wait.record(max(0.0, total - exec_seconds))
+
+        future.add_done_callback(_on_done)
+        return future
+
+    async def run(self, summary_dict: Dict[str, Any], manifest_format: str = "full",
+                  props_encoding: str = "rows") -> Dict[str, Any]:
+        """Await a manifest job without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(summary_dict, manifest_format, props_encoding))
+
+    def run_sync(self, summary_dict: Dict[str, Any], manifest_format: str = "full",
+                 props_encoding: str = "rows") -> Dict[str, Any]:
+        """Run a manifest job and block the calling (non-loop) thread"""
+        return self.submit(summary_dict, manifest_format, props_encoding).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "queue_depth": max(0, in_flight - self.workers) if self.mode != "inline" else 0,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "queue_wait": self.queue_wait.summary(),
+            "exec_time": self.exec_time.summary(),
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[ManifestExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_manifest_executor() -> ManifestExecutor:
+    """Process-wide executor configured from MANIFEST_EXECUTOR / MANIFEST_WORKERS (cached)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ManifestExecutor(
+                    mode=os.getenv("MANIFEST_EXECUTOR", "thread"),
+                    workers=int(os.getenv("MANIFEST_WORKERS", "2")),
+                    cache=get_manifest_cache(),
+                ).start()
+    return _executor
+
+
+def shutdown_manifest_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
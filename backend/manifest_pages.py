@@ -0,0 +1,237 @@
+"""
+MANIFEST PAGES - Cursor-paginated manifests for very large reports.
+
+`generate_from_summary` builds every component's props up front. For extreme
+reports (hundreds of MetricAccordions, a ReassuranceGrid with hundreds of
+rows) that is wasted work and payload when the user only looks at the top.
+
+A paged session keeps the summary's lazy component plan
+(UIManifestGenerator.plan_from_summary); props are generated only for the
+components on the pages actually requested:
+
+- Page order matches the full manifest, except abnormal findings are sorted
+  by risk (CRITICAL first) so the first page carries header, alerts and the
+  most important findings
+- List-of-records props (ComponentDefinition.columnar_props) longer than
+  `chunk_rows` are split across several items of the same type
+- Component IDs are the same as in the full manifest (chunks after the
+  first get a ":<row offset>" suffix)
+
+Sessions are per process (LRU + TTL since the session was last used). A cursor for an evicted session raises
+SessionExpired; clients can resume by re-posting the summary with the cursor.
+
+Configuration (environment):
+    MANIFEST_PAGE_SIZE      Components per page (default: 20)
+    MANIFEST_PAGE_ROWS      Max rows per list-of-records item (default: 50)
+    MANIFEST_SESSIONS       Sessions kept per process (default: 128)
+    MANIFEST_SESSION_TTL    Seconds a session is kept unused (default: 900)
+
+Usage:
+    store = get_page_store()
+    session = store.open(summary_dict)
+    page = session.page(session.first_cursor(), limit=20)
+    page = store.resume(page["next_cursor"]).page(page["next_cursor"], limit=20)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from components import COMPONENT_REGISTRY
+from manifest_cache import manifest_fingerprint, summary_digest
+from manifest_executor import warm_generator
+from summary_structs import SummaryStruct, summary_struct
+from ui_mapper import LazyManifest, LazyManifestItem
+
+_RISK_RANK = {"CRITICAL": 0, "HIGH": 1, "MODERATE": 2, "LOW": 3}
+
+
+class SessionExpired(LookupError):
+    """The cursor's session is no longer held by this process"""
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int, int]:
+    """'<session>.<spec index>.<row offset>' -> (session_id, spec_index, row_offset)"""
+    try:
+        session_id, spec_index, row_offset = cursor.split(".")
+        return session_id, int(spec_index), int(row_offset)
+    except ValueError:
+        raise ValueError(f"Malformed cursor: {cursor!r}") from None
+
+
+def prioritize_findings(plan: LazyManifest, summary: SummaryStruct) -> List[LazyManifestItem]:
+    """Stable-sort per-finding MetricAccordions by risk level, keeping every other slot"""
+    risk = {f.parameter_name: _RISK_RANK.get(f.risk_level, len(_RISK_RANK))
+            for f in summary.clinical_summary.abnormal_readings}
+    items = list(plan)
+    slots = [i for i, item in enumerate(items)
+             if item.rule == "render_abnormal_findings" and item.type == "MetricAccordion"]
+    ordered = sorted((items[i] for i in slots), key=lambda item: risk.get(item.key, len(_RISK_RANK)))
+    for slot, item in zip(slots, ordered):
+        items[slot] = item
+    return items
+
+
+class ManifestSession:
+    """One summary's lazy component plan; props are generated as pages are requested"""
+
+    def __init__(self, session_id: str, summary: SummaryStruct, chunk_rows: int):
+        # IDs are assigned by the plan in full-manifest order, before re-ordering
+        self.session_id = session_id
+        self.items = prioritize_findings(warm_generator().plan_from_summary(summary), summary)
+        self.chunk_rows = max(1, chunk_rows)
+        self.touched_at = time.monotonic()  # Last opened / resumed; the TTL counts from here
+        self._lock = threading.Lock()
+
+    @property
+    def props_generated(self) -> int:
+        return sum(1 for item in self.items if item.materialized)
+
+    def first_cursor(self) -> str:
+        return f"{self.session_id}.0.0"
+
+    def _item_props(self, index: int) -> Dict[str, Any]:
+        with self._lock:
+            return self.items[index].props
+
+    def _split_prop(self, component_type: str, props: Dict[str, Any]) -> Optional[str]:
+        """Name of the list-of-records prop to chunk, if any exceeds chunk_rows"""
+        component_def = COMPONENT_REGISTRY.get(component_type)
+        for name in (component_def.columnar_props if component_def else []):
+            if isinstance(props.get(name), list) and len(props[name]) > self.chunk_rows:
+                return name
+        return None
+
+    def page(self, cursor: str, limit: int) -> Dict[str, Any]:
+        """
+        Items from `cursor` on, up to `limit` components (each chunk counts as one).
+
+        Returns {"items": [...], "next_cursor": str | None, "total_components": int}.
+        """
+        session_id, index, row_offset = parse_cursor(cursor)
+        if session_id != self.session_id:
+            raise ValueError("Cursor belongs to a different session")
+        limit = max(1, limit)
+        items: List[Dict[str, Any]] = []
+
+        while index < len(self.items) and len(items) < limit:
+            lazy_item = self.items[index]
+            props = self._item_props(index)
+
+            split = self._split_prop(lazy_item.type, props)
+            if split is None:
+                item_id, item_props = lazy_item.id, props
+                index, row_offset = index + 1, 0
+            else:
+                rows = props[split]
+                end = row_offset + self.chunk_rows
+                item_id = lazy_item.id if row_offset == 0 else f"{lazy_item.id}:{row_offset}"
+                item_props = {**props, split: rows[row_offset:end]}
+                index, row_offset = (index + 1, 0) if end >= len(rows) else (index, end)
+
+            items.append({
+                "id": item_id,
+                "type": lazy_item.type,
+                "version": lazy_item.version,
+                "props": item_props,
+                "rendering_hints": lazy_item.rendering_hints,
+            })
+
+        validation = warm_generator().validate_items(items)
+        next_cursor = f"{self.session_id}.{index}.{row_offset}" if index < len(self.items) else None
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "total_components": len(self.items),
+            "validation": validation.model_dump(),
+        }
+
+
+class ManifestPageStore:
+    """Per-process LRU of paged sessions keyed by summary digest + rules fingerprint"""
+
+    def __init__(self, max_sessions: int = 128, ttl_seconds: float = 900.0, chunk_rows: int = 50):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.chunk_rows = chunk_rows
+        self._sessions: "OrderedDict[str, ManifestSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+
+    def _live(self, session: Optional[ManifestSession]) -> Optional[ManifestSession]:
+        """The session if used within the TTL (marking it used now), else None"""
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.touched_at > self.ttl_seconds:
+            self._sessions.pop(session.session_id, None)
+            self.expired += 1
+            return None
+        session.touched_at = now
+        return session
+
+    def open(self, summary_dict: Dict[str, Any]) -> ManifestSession:
+        """Session for a summary (reused if the same summary is already open)"""
+        fingerprint = manifest_fingerprint(warm_generator().rules_engine)
+        # Both halves in the ID: the fingerprint alone is 32 characters
+        session_id = hashlib.sha256(f"{fingerprint}{summary_digest(summary_dict)}".encode()).hexdigest()[:32]
+        with self._lock:
+            session = self._live(self._sessions.get(session_id))
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+        try:
+            summary = summary_struct(summary_dict)
+        except Exception as e:
+            raise ValueError(str(e)) from None
+        session = ManifestSession(session_id, summary, self.chunk_rows)
+
+        with self._lock:
+            self._sessions[session_id] = session
+            self.opened += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def resume(self, cursor: str) -> ManifestSession:
+        """Session for a cursor; raises SessionExpired if it is gone"""
+        session_id, _, _ = parse_cursor(cursor)
+        with self._lock:
+            session = self._live(self._sessions.get(session_id))
+            if session is None:
+                raise SessionExpired(f"Manifest session {session_id} expired")
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "opened": self.opened,
+                "expired": self.expired,
+            }
+
+
+_store: Optional[ManifestPageStore] = None
+
+
+def get_page_store() -> ManifestPageStore:
+    """Process-wide store configured from the MANIFEST_SESSION*/PAGE_ROWS environment variables"""
+    global _store
+    if _store is None:
+        _store = ManifestPageStore(
+            max_sessions=int(os.getenv("MANIFEST_SESSIONS", "128")),
+            ttl_seconds=float(os.getenv("MANIFEST_SESSION_TTL", "900")),
+            chunk_rows=int(os.getenv("MANIFEST_PAGE_ROWS", "50")),
+        )
+    return _store
+
+
+def default_page_size() -> int:
+    return int(os.getenv("MANIFEST_PAGE_SIZE", "20"))
@@ -0,0 +1,189 @@
+"""
+MANIFEST UPGRADES - Skeleton-first /analyze responses, upgraded over SSE.
+
+The LLM call dominates /analyze latency, but much of the manifest does not
+need it: header, critical alerts and finding cards with values, ranges and
+trends all follow from report_results. With progressive delivery
+(?delivery=progressive or X-Manifest-Delivery: progressive), /analyze:
+
+1. builds a skeleton manifest from the deterministic pre-summary
+   (preclassify.build_rules_only_summary) and stores it as an editable
+   summary (manifest_edits.py); the response carries its summary_id,
+   revision 0 and the skeleton, within milliseconds
+2. runs the LLM graph in the background, in an LLM scheduler slot at the
+   report's triage priority like a blocking request
+3. replaces the stored summary with the LLM summary; the manifest delta
+   (added / removed / updated items and order, keyed by the stable
+   component IDs) is published as one "upgrade" event on
+   GET /summaries/{summary_id}/events (Server-Sent Events)
+
+If the LLM call fails, an "error" event is published and the skeleton
+stays the final manifest. Finished upgrades stay replayable for
+UPGRADE_TTL seconds, so late or reconnecting subscribers still get the
+event. Like stored summaries, upgrades are held per process: behind several
+workers the events request can reach a process without the upgrade (404),
+so the frontend only asks for progressive delivery when built with
+VITE_PROGRESSIVE_DELIVERY=true, and fetches the complete manifest when the
+stream is refused.
+
+Configuration (environment):
+    UPGRADE_TTL                 Seconds a finished upgrade stays replayable (default: 300)
+    UPGRADE_KEEPALIVE_SECONDS   SSE comment interval while the LLM runs (default: 15)
+
+Usage:
+    registry = get_upgrade_registry()
+    registry.start(summary_id, upgrade_coroutine)     # on the event loop; returns the delta
+    upgrade = registry.get(summary_id)
+    StreamingResponse(registry.events(upgrade, encode), media_type="text/event-stream")
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from metrics import LatencyRecorder
+
+DELIVERY_MODES = ("complete", "progressive")
+
+
+class UpgradeNotFound(LookupError):
+    """No upgrade for this summary in this process (never started, or expired)"""
+
+
+def sse_event(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """One Server-Sent Event with a JSON payload"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class PendingUpgrade:
+    """The background LLM run for one skeleton and, once done, its delta or error"""
+
+    __slots__ = ("summary_id", "started_at", "finished_at", "done", "delta", "error")
+
+    def __init__(self, summary_id: str):
+        self.summary_id = summary_id
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+        self.delta: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def final_event_id(self) -> str:
+        """SSE id of the final event (the summary revision, or "failed")"""
+        return str(self.delta["revision"]) if self.delta is not None else "failed"
+
+
+class UpgradeRegistry:
+    """Per-process upgrades by summary ID; every method runs on the event loop except stats()"""
+
+    def __init__(self, ttl_seconds: float = 300.0, keepalive_seconds: float = 15.0):
+        self.ttl_seconds = ttl_seconds
+        self.keepalive_seconds = max(1.0, keepalive_seconds)
+        self._upgrades: Dict[str, PendingUpgrade] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.subscribers = 0
+        self.skeleton_latency = LatencyRecorder()
+        self.upgrade_latency = LatencyRecorder()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for summary_id in [summary_id for summary_id, upgrade in self._upgrades.items()
+                           if upgrade.finished_at is not None and now - upgrade.finished_at > self.ttl_seconds]:
+            del self._upgrades[summary_id]
+
+    def start(self, summary_id: str, work: Awaitable[Dict[str, Any]]) -> PendingUpgrade:
+        """Run `work` (resolving to the manifest delta) in the background for this skeleton"""
+        self._expire()
+        upgrade = PendingUpgrade(summary_id)
+        self._upgrades[summary_id] = upgrade
+        self.started += 1
+        task = asyncio.create_task(self._run(upgrade, work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return upgrade
+
+    async def _run(self, upgrade: PendingUpgrade, work: Awaitable[Dict[str, Any]]) -> None:
+        try:
+            upgrade.delta = await work
+            self.completed += 1
+            self.upgrade_latency.record(time.monotonic() - upgrade.started_at)
+        except BaseException as e:
+            upgrade.error = str(e) or type(e).__name__
+            self.failed += 1
+            print(f"⚠️ Manifest upgrade failed for {upgrade.summary_id}, skeleton is final: {upgrade.error}")
+            if not isinstance(e, Exception):
+                raise  # Cancelled (shutdown)
+        finally:
+            upgrade.finished_at = time.monotonic()
+            upgrade.done.set()
+
+    def get(self, summary_id: str) -> PendingUpgrade:
+        self._expire()
+        upgrade = self._upgrades.get(summary_id)
+        if upgrade is None:
+            raise UpgradeNotFound(f"No manifest upgrade for summary {summary_id}")
+        return upgrade
+
+    async def events(self, upgrade: PendingUpgrade,
+                     encode: Callable[[Dict[str, Any]], Dict[str, Any]]) -> AsyncIterator[str]:
+        """
+        SSE stream: keep-alive comments until the upgrade is done, then one
+        "upgrade" event (encode(delta)) or one "error" event
+        """
+        self.subscribers += 1
+        try:
+            while not upgrade.done.is_set():
+                try:
+                    await asyncio.wait_for(upgrade.done.wait(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": waiting for the LLM summary\n\n"
+            if upgrade.delta is not None:
+                yield sse_event("upgrade", encode(upgrade.delta), upgrade.final_event_id())
+            else:
+                yield sse_event("error", {"summary_id": upgrade.summary_id, "detail": upgrade.error},
+                                upgrade.final_event_id())
+        finally:
+            self.subscribers -= 1
+
+    async def shutdown(self) -> None:
+        """Cancel upgrades still running (their skeletons stay final)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        upgrades = list(self._upgrades.values())
+        return {
+            "pending": sum(1 for upgrade in upgrades if upgrade.finished_at is None),
+            "replayable": sum(1 for upgrade in upgrades if upgrade.finished_at is not None),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "subscribers": self.subscribers,
+            "skeleton": self.skeleton_latency.summary(),
+            "time_to_upgrade": self.upgrade_latency.summary(),
+        }
+
+
+_registry: Optional[UpgradeRegistry] = None
+
+
+def get_upgrade_registry() -> UpgradeRegistry:
+    """Process-wide registry configured from UPGRADE_TTL / UPGRADE_KEEPALIVE_SECONDS"""
+    global _registry
+    if _registry is None:
+        _registry = UpgradeRegistry(
+            ttl_seconds=float(os.getenv("UPGRADE_TTL", "300")),
+            keepalive_seconds=float(os.getenv("UPGRADE_KEEPALIVE_SECONDS", "15")),
+        )
+    return _registry
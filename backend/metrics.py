@@ -0,0 +1,68 @@
+"""
+METRICS - Lightweight in-process latency and counter tracking.
+
+No external metrics stack is assumed; subsystems keep their own recorders
+and expose a JSON-friendly snapshot that `/metrics` aggregates.
+
+Usage:
+    recorder = LatencyRecorder()
+    recorder.record(0.012)          # seconds
+    recorder.summary()              # {count, mean_ms, p50_ms, p99_ms, max_ms}
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Iterable, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+class LatencyRecorder:
+    """Bounded reservoir of recent durations plus lifetime count/total"""
+
+    def __init__(self, max_samples: int = 2048):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.record(value)
+
+    def summary(self) -> Dict[str, float]:
+        """Snapshot in milliseconds; percentiles cover the recent window only"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, peak = self.count, self.total, self.max
+        return {
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(peak * 1000, 3),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
@@ -0,0 +1,262 @@
+"""
+PRE-CLASSIFICATION - Cheap, deterministic scan of raw lab results.
+
+Runs before any LLM call. Looks only at the lab's own interpretation flags and
+numeric reference ranges, so it costs microseconds per report and can be used
+for admission decisions (e.g. scheduling CRITICAL reports first).
+
+Results are read from a lab_results.ResultTable; pass the one built for
+the request to share it with the other stages.
+
+The critical heuristics (analyte keywords, large bound breaches) are for
+scheduling only. The rules-only summary shown to patients marks a finding
+CRITICAL only when the lab itself flagged it (ResultClassification.lab_critical).
+
+Usage:
+    triage = triage_report(raw_report_dict)          # or (raw_report_dict, table)
+    triage.priority   # "CRITICAL" | "ELEVATED" | "ROUTINE"
+    triage.reasons    # ["Troponin I: 0.9 above 0.04 (x22.5)", ...]
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from lab_results import ResultTable, parse_reference_range, to_number  # noqa: F401  (re-exported)
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ("CRITICAL", "ELEVATED", "ROUTINE")
+
+# Lab interpretation flags (lower-cased). Critical flags match as whole words
+# ("critically high" too) and not when negated ("non-critical", "not critical")
+_CRITICAL_FLAG_RE = re.compile(r"\b(?:(non|not|no)[\s-]*)?(critical(?:ly)?|panic|alert|very\s+high|very\s+low)\b")
+_HIGH_FLAGS = ("high", "h", "elevated", "above", "increased", "positive", "reactive")
+_LOW_FLAGS = ("low", "l", "decreased", "below", "deficient")
+_ABNORMAL_FLAGS = ("abnormal", "borderline", "a")
+
+# Analytes where any out-of-range value warrants urgent review
+CRITICAL_ANALYTES = (
+    "troponin", "potassium", "sodium", "calcium", "bnp", "lactate", "inr",
+)
+# Names containing a critical analyte keyword that are a different test (LDH)
+CRITICAL_ANALYTE_EXCLUSIONS = ("dehydrogenase", "ldh")
+
+# Breach of a bound by at least this fraction is treated as critical
+CRITICAL_BREACH_RATIO = 0.5
+
+
+class ResultClassification(BaseModel):
+    """Deterministic classification of a single lab result"""
+    test_name: str
+    status: str  # HIGH / LOW / ABNORMAL / NORMAL / UNKNOWN
+    critical: bool = False  # Scheduling heuristic (flags, analytes, breach ratio)
+    lab_critical: bool = False  # The lab's own flag says critical / panic
+    reason: Optional[str] = None
+
+
+class Triage(BaseModel):
+    """Report-level admission priority"""
+    priority: str
+    abnormal_count: int = 0
+    critical_count: int = 0
+    reasons: List[str] = []
+
+
+def iter_results(report_results: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield leaf results of (possibly nested) panels in document order, as flat member dicts"""
+    table = ResultTable.from_results(report_results)
+    for row in table.results:
+        yield table.member(row)
+
+
+def classify_result(member: Dict[str, Any]) -> ResultClassification:
+    """Classify one result from its interpretation flag and reference range"""
+    low, high = parse_reference_range(member.get("reference_range"))
+    return _classify(member.get("test_name") or "Unknown", member.get("value"), to_number(member.get("value")),
+                     low, high, member.get("interpretation"))
+
+
+def classify_row(table: ResultTable, row: int) -> ResultClassification:
+    """classify_result for a ResultTable row (value and range already parsed)"""
+    low, high = table.bounds(row)
+    return _classify(table.text(table.name, row) or "Unknown", table.raw_value(row), table.number(row),
+                     low, high, table.text(table.interpretation, row))
+
+
+def _classify(name: str, raw_value: Any, value: Optional[float], low: Optional[float], high: Optional[float],
+              interpretation: Optional[str]) -> ResultClassification:
+    flag = (interpretation or "").strip().lower()
+    lowered = name.lower()
+    critical_analyte = (any(a in lowered for a in CRITICAL_ANALYTES)
+                        and not any(x in lowered for x in CRITICAL_ANALYTE_EXCLUSIONS))
+
+    status = "UNKNOWN"
+    critical = False
+    lab_critical = False
+    reason = None
+
+    # Numeric reference range breach
+    if value is not None and (low is not None or high is not None):
+        status = "NORMAL"
+        if high is not None and value > high:
+            status = "HIGH"
+            ratio = (value - high) / abs(high) if high else float("inf")
+            critical = ratio >= CRITICAL_BREACH_RATIO
+            reason = f"{name}: {raw_value} above {high:g}" + (f" (x{value / high:.1f})" if high else "")
+        elif low is not None and value < low:
+            status = "LOW"
+            ratio = (low - value) / abs(low) if low else float("inf")
+            critical = ratio >= CRITICAL_BREACH_RATIO
+            reason = f"{name}: {raw_value} below {low:g}"
+
+    # Lab interpretation flag (trusted over our range parsing when present)
+    if flag:
+        if any(not match.group(1) for match in _CRITICAL_FLAG_RE.finditer(flag)):
+            critical = lab_critical = True
+            status = status if status in ("HIGH", "LOW") else "ABNORMAL"
+            reason = reason or f"{name}: flagged '{interpretation}'"
+        elif flag in _HIGH_FLAGS or flag.startswith("high"):
+            status = "HIGH"
+        elif flag in _LOW_FLAGS or flag.startswith("low"):
+            status = "LOW"
+        elif flag in _ABNORMAL_FLAGS:
+            status = "ABNORMAL"
+        elif flag == "normal":
+            status, critical, reason = "NORMAL", False, None
+        if status in ("HIGH", "LOW", "ABNORMAL") and not reason:
+            reason = f"{name}: flagged '{interpretation}'"
+
+    if critical_analyte and status in ("HIGH", "LOW", "ABNORMAL"):
+        critical = True
+
+    return ResultClassification(test_name=name, status=status, critical=critical, lab_critical=lab_critical,
+                                reason=reason)
+
+
+def triage_report(report: Dict[str, Any], max_reasons: int = 5, table: Optional[ResultTable] = None) -> Triage:
+    """
+    Assign an admission priority class to a raw lab report.
+
+    CRITICAL: any critical flag, critical analyte out of range, or a bound
+              breached by >= CRITICAL_BREACH_RATIO
+    ELEVATED: any other abnormal result
+    ROUTINE:  everything within range (or unclassifiable)
+    """
+    table = table if table is not None else ResultTable.from_report(report)
+    abnormal = 0
+    critical = 0
+    critical_reasons: List[str] = []
+    other_reasons: List[str] = []
+
+    for row in table.results:
+        result = classify_row(table, row)
+        if result.status not in ("HIGH", "LOW", "ABNORMAL"):
+            continue
+        abnormal += 1
+        if result.critical:
+            critical += 1
+            critical_reasons.append(result.reason)
+        elif result.reason:
+            other_reasons.append(result.reason)
+
+    if critical:
+        priority = "CRITICAL"
+    elif abnormal:
+        priority = "ELEVATED"
+    else:
+        priority = "ROUTINE"
+
+    return Triage(
+        priority=priority,
+        abnormal_count=abnormal,
+        critical_count=critical,
+        reasons=(critical_reasons + other_reasons)[:max_reasons],
+    )
+
+
+# ============================================================================
+# RULES-ONLY SUMMARY (no LLM)
+# ============================================================================
+
+
+RULES_ONLY_NOTE = (
+    "This result is outside the reference range. A detailed interpretation "
+    "is not available right now; please review it with your doctor."
+)
+
+
+def _display_value(table: ResultTable, row: int) -> str:
+    value = table.raw_value(row)
+    if value is None:
+        value = table.text(table.value_text, row)
+    return "N/A" if value is None else str(value)
+
+
+def build_rules_only_summary(report: Dict[str, Any], table: Optional[ResultTable] = None) -> Dict[str, Any]:
+    """
+    Deterministic SmartSummary-shaped dict built from pre-classification.
+
+    Carries values, ranges and statuses but no LLM text (causes, effects and
+    clinical notes are empty or generic), so the rules engine can render a
+    usable manifest when the LLM is unavailable or overloaded.
+
+    Risk levels: CRITICAL only for lab-flagged critical results, HIGH for
+    results the triage heuristics consider critical, MODERATE otherwise.
+    """
+    table = table if table is not None else ResultTable.from_report(report)
+    abnormal: List[Dict[str, Any]] = []
+    normal: List[Dict[str, Any]] = []
+
+    for row in table.results:
+        result = classify_row(table, row)
+        common = {
+            "parameter_name": result.test_name,
+            "value": _display_value(table, row),
+            "units": table.text(table.unit, row),
+            "normal_range": table.text(table.reference_range, row),
+        }
+        if result.status in ("HIGH", "LOW", "ABNORMAL"):
+            abnormal.append({
+                **common,
+                "status": result.status,
+                "risk_level": "CRITICAL" if result.lab_critical else "HIGH" if result.critical else "MODERATE",
+                "system": None,
+                "causes": [],
+                "effects": [],
+                "clinical_note": RULES_ONLY_NOTE,
+            })
+        elif result.status == "NORMAL":
+            normal.append({**common, "clinical_interpretation": "Within the reference range"})
+
+    # Most severe findings first, mirroring how the LLM orders them
+    severity = {"CRITICAL": 0, "HIGH": 1, "MODERATE": 2}
+    abnormal.sort(key=lambda r: severity[r["risk_level"]])
+    risk_assessment = ("Low" if not abnormal else
+                       {0: "Critical", 1: "High"}.get(severity[abnormal[0]["risk_level"]], "Moderate"))
+    patient = report.get("patient_details") or {}
+    sample = report.get("sample_details") or {}
+
+    return {
+        "patient_info": {
+            "name": patient.get("name"),
+            "age": patient.get("age"),
+            "gender": patient.get("gender"),
+            "report_date": sample.get("reported_at") or sample.get("collected_at"),
+        },
+        "clinical_summary": {
+            "abnormal_readings": abnormal,
+            "normal_readings": normal,
+            "overall_health_status": {
+                "risk_assessment": risk_assessment,
+                "key_concerns": [r["parameter_name"] for r in abnormal[:5]],
+                "immediate_action_items": ["Review these results with your doctor"] if abnormal else [],
+            },
+        },
+        "management_plan": {
+            "follow_up_tests": [],
+            "lifestyle_modifications": [],
+            "medication_considerations": [],
+        },
+        "detailed_analysis": [],
+    }
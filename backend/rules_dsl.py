@@ -0,0 +1,176 @@
+"""
+RULES DSL - Condition expressions for data-defined manifest rules.
+
+Rule conditions in rules/manifest_rules.json are small Python-syntax
+expressions over named SmartSummary fields:
+
+    "any_risk(abnormal, 'CRITICAL')"
+    "count_containing(abnormal, 'Lipid') > 2"
+    "correlated_pairs(abnormal) > 0"
+    "risk_assessment == 'Low' and len(normal) > 0"
+
+Each expression is parsed once, checked against a whitelist (literals,
+comparisons, and/or/not, arithmetic, and calls to FUNCTIONS only), has its
+field names rewritten to attribute paths on the summary, and is compiled to
+a plain `lambda s: ...`. Evaluation therefore costs the same as a
+hand-written lambda; nothing is interpreted per call.
+
+Props generators declare the fields they read with @reads(...), so edits
+to a summary can be mapped to the rules and components they affect
+(manifest_edits.py).
+
+Usage:
+    condition = compile_condition("len(abnormal) > 0")
+    condition(smart_summary)        # -> bool
+    referenced_fields("len(abnormal) > 0")   # -> {"abnormal"}
+"""
+
+import ast
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from correlations import get_correlation_index
+from summary_structs import SummaryStruct
+
+# DSL name -> attribute path on SummaryStruct (and SmartSummary)
+FIELDS: Dict[str, str] = {
+    "abnormal": "clinical_summary.abnormal_readings",
+    "normal": "clinical_summary.normal_readings",
+    "risk_assessment": "clinical_summary.overall_health_status.risk_assessment",
+    "key_concerns": "clinical_summary.overall_health_status.key_concerns",
+    "follow_ups": "management_plan.follow_up_tests",
+    "lifestyle": "management_plan.lifestyle_modifications",
+    "patient": "patient_info",
+    "history": "history",
+}
+
+# Parameter-name keywords counted towards a biological system when a
+# finding's `system` field doesn't name it
+SYSTEM_KEYWORDS: Dict[str, List[str]] = {
+    "Metabolic": ["Glucose", "HbA1c", "Triglycerides", "Cholesterol"],
+    "Hematological": ["WBC", "RBC", "Hemoglobin", "Platelets"],
+    "Renal": ["Creatinine", "BUN", "eGFR"],
+    "Cardiac": ["Troponin", "BNP"],
+}
+
+
+def field_pointer(field: str) -> str:
+    """JSON pointer of a DSL field in a SmartSummary dict ("abnormal" -> "/clinical_summary/abnormal_readings")"""
+    return "/" + FIELDS[field].replace(".", "/")
+
+
+def reads(*fields: str) -> Callable[[Callable], Callable]:
+    """Declare the DSL fields a props generator reads (for incremental recomputation)"""
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields in @reads: {sorted(unknown)}")
+
+    def mark(generator: Callable) -> Callable:
+        generator.reads = frozenset(fields)
+        return generator
+    return mark
+
+
+def declared_reads(generator: Callable) -> Optional[FrozenSet[str]]:
+    """Fields a generator declared with @reads, or None (unknown: assume it reads everything)"""
+    return getattr(generator, "reads", None)
+
+
+def any_risk(readings: List[Any], level: str) -> bool:
+    """True if any reading has this risk level"""
+    return any(f.risk_level == level for f in readings)
+
+
+def count_risk(readings: List[Any], level: str) -> int:
+    """Number of readings with this risk level"""
+    return sum(1 for f in readings if f.risk_level == level)
+
+
+def count_containing(readings: List[Any], text: str) -> int:
+    """Number of readings whose parameter name contains `text`"""
+    return sum(1 for f in readings if text in f.parameter_name)
+
+
+def count_system(readings: List[Any], system: str) -> int:
+    """Number of readings in a biological system (by `system` field or parameter keyword)"""
+    keywords = SYSTEM_KEYWORDS.get(system, [])
+    return sum(1 for f in readings
+               if f.system == system or any(k in f.parameter_name for k in keywords))
+
+
+def correlated_pairs(readings: List[Any]) -> int:
+    """Number of known biomarker relationships among readings (correlations.py)"""
+    return get_correlation_index().count_edges(readings)
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    "len": len,
+    "any_risk": any_risk,
+    "count_risk": count_risk,
+    "count_containing": count_containing,
+    "count_system": count_system,
+    "correlated_pairs": correlated_pairs,
+}
+
+CONSTANTS = {"true": True, "false": False, "null": None}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.Call, ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple,
+)
+
+
+class RuleSyntaxError(ValueError):
+    """A rule condition is not a valid DSL expression"""
+
+
+def parse_condition(expression: str) -> ast.Expression:
+    """Parse and whitelist-check a condition (raises RuleSyntaxError)"""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleSyntaxError(f"Invalid condition {expression!r}: {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise RuleSyntaxError(f"Unsupported syntax in {expression!r}: {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise RuleSyntaxError(f"Unknown function call in {expression!r}")
+        elif isinstance(node, ast.Name) and node.id not in FIELDS and node.id not in FUNCTIONS \
+                and node.id not in CONSTANTS:
+            raise RuleSyntaxError(f"Unknown name {node.id!r} in {expression!r}")
+    return tree
+
+
+class _ResolveFields(ast.NodeTransformer):
+    """Rewrite DSL names to `s.<attribute path>` and constants to literals"""
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id in CONSTANTS:
+            return ast.copy_location(ast.Constant(CONSTANTS[node.id]), node)
+        if node.id not in FIELDS:
+            return node  # Function name, resolved from the lambda's globals
+        value: ast.AST = ast.Name(id="s", ctx=ast.Load())
+        for attribute in FIELDS[node.id].split("."):
+            value = ast.Attribute(value=value, attr=attribute, ctx=ast.Load())
+        return ast.copy_location(value, node)
+
+
+def compile_condition(expression: str) -> Callable[[SummaryStruct], bool]:
+    """Compile a condition expression into `lambda s: <expression>`"""
+    body = _ResolveFields().visit(parse_condition(expression)).body
+    tree = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg="s")], vararg=None, kwonlyargs=[],
+                           kw_defaults=[], kwarg=None, defaults=[]),
+        body=body,
+    ))
+    ast.fix_missing_locations(tree)
+    code = compile(tree, f"<rule: {expression}>", "eval")
+    return eval(code, {"__builtins__": {}, **FUNCTIONS})
+
+
+def referenced_fields(expression: str) -> Set[str]:
+    """DSL field names an expression reads"""
+    return {node.id for node in ast.walk(parse_condition(expression))
+            if isinstance(node, ast.Name) and node.id in FIELDS}
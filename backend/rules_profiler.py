@@ -0,0 +1,147 @@
+"""
+RULES PROFILER - Per-rule hit rates and timings for the rules engine.
+
+When enabled, RulesEngine.apply_rules times every rule condition and wraps
+each emitted spec's props_generator so its run is timed whenever the props
+are actually built (props are lazy, see ui_mapper.LazyManifest). Recorded:
+
+- per rule: condition calls, matches, match rate, condition time and props
+  generation time (count / total / mean / p50 / p99 / max)
+- per component type: props generation time
+
+Disabled (the default), apply_rules takes its uninstrumented path; the only
+cost is one attribute check per call.
+
+Stats are per process. With MANIFEST_EXECUTOR=process, mapping runs in the
+pool workers, so use the thread or inline executor while profiling.
+
+Configuration (environment):
+    RULES_PROFILING       true|false (default: false); togglable at runtime
+    RULES_PROFILE_FILE    Where dump() writes (default: rules_profile.json);
+                          also written at shutdown while profiling is on
+
+Usage:
+    profiler = get_rules_profiler()
+    profiler.enabled = True
+    ...                              # serve traffic
+    profiler.stats()                 # {"rules": {...}, "components": {...}}
+    profiler.dump()                  # JSON snapshot to RULES_PROFILE_FILE
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from metrics import LatencyRecorder
+
+
+class RuleProfile:
+    """Counters and recorders for one rule"""
+
+    def __init__(self):
+        self.calls = 0
+        self.matches = 0
+        self.condition = LatencyRecorder()
+        self.props = LatencyRecorder()
+
+    def summary(self) -> Dict[str, Any]:
+        condition, props = self.condition.summary(), self.props.summary()
+        return {
+            "calls": self.calls,
+            "matches": self.matches,
+            "match_rate": round(self.matches / self.calls, 4) if self.calls else 0.0,
+            "total_ms": round(condition["total_ms"] + props["total_ms"], 3),
+            "condition": condition,
+            "props": props,
+        }
+
+
+class RulesProfiler:
+    """Process-wide collector; thread-safe, enabled/disabled at runtime"""
+
+    def __init__(self, enabled: bool = False, dump_path: str = "rules_profile.json"):
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self._rules: Dict[str, RuleProfile] = {}
+        self._components: Dict[str, LatencyRecorder] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _rule(self, name: str) -> RuleProfile:
+        profile = self._rules.get(name)
+        if profile is None:
+            with self._lock:
+                profile = self._rules.setdefault(name, RuleProfile())
+        return profile
+
+    def _component(self, component_type: str) -> LatencyRecorder:
+        recorder = self._components.get(component_type)
+        if recorder is None:
+            with self._lock:
+                recorder = self._components.setdefault(component_type, LatencyRecorder())
+        return recorder
+
+    def record_condition(self, rule_name: str, seconds: float, matched: bool) -> None:
+        profile = self._rule(rule_name)
+        with self._lock:
+            profile.calls += 1
+            profile.matches += matched
+        profile.condition.record(seconds)
+
+    def record_props(self, rule_name: str, component_type: str, seconds: float) -> None:
+        self._rule(rule_name).props.record(seconds)
+        self._component(component_type).record(seconds)
+
+    def timed_props(self, rule_name: str, component_type: str,
+                    props_generator: Callable[[Any], Dict[str, Any]]) -> Callable[[Any], Dict[str, Any]]:
+        """Wrap a spec's props_generator so each run is recorded"""
+        def generate(summary):
+            started = time.perf_counter()
+            try:
+                return props_generator(summary)
+            finally:
+                self.record_props(rule_name, component_type, time.perf_counter() - started)
+        return generate
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot with rules ordered by total time (most expensive first)"""
+        with self._lock:
+            rules = dict(self._rules)
+            components = dict(self._components)
+        rule_stats = {name: profile.summary() for name, profile in rules.items()}
+        return {
+            "enabled": self.enabled,
+            "since": self.started_at,
+            "rules": dict(sorted(rule_stats.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)),
+            "components": dict(sorted(((t, r.summary()) for t, r in components.items()),
+                                      key=lambda kv: kv[1]["total_ms"], reverse=True)),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rules = {}
+            self._components = {}
+            self.started_at = time.time()
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """Write stats() as JSON; returns the path written"""
+        path = path or self.dump_path
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+        return path
+
+
+_profiler: Optional[RulesProfiler] = None
+
+
+def get_rules_profiler() -> RulesProfiler:
+    """Process-wide profiler configured from RULES_PROFILING / RULES_PROFILE_FILE"""
+    global _profiler
+    if _profiler is None:
+        _profiler = RulesProfiler(
+            enabled=os.getenv("RULES_PROFILING", "false").lower() == "true",
+            dump_path=os.getenv("RULES_PROFILE_FILE", "rules_profile.json"),
+        )
+    return _profiler
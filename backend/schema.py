@@ -22,6 +22,10 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Union, Dict, Any
 
 # --- INPUT SCHEMA (Raw Lab Report) ---
+# The request body of POST /analyze and /jobs. Panels nest through `members`.
+# lab_results.parse_report validates the top level with RawLabReport and, as
+# it flattens the tree into a ResultTable, each row (without its members)
+# with RecursiveMember, so deep nesting does not recurse through the model.
 class RecursiveMember(BaseModel):
     is_panel: bool = False
     test_name: str
@@ -37,9 +41,9 @@ class RecursiveMember(BaseModel):
 RecursiveMember.model_rebuild()
 
 class RawLabReport(BaseModel):
-    patient_details: Dict[str, Any]
-    lab_details: Dict[str, Any]
-    sample_details: Dict[str, Any]
+    patient_details: Dict[str, Any] = Field(default_factory=dict)
+    lab_details: Dict[str, Any] = Field(default_factory=dict)
+    sample_details: Dict[str, Any] = Field(default_factory=dict)  # collected_at dates the history store
     report_results: List[RecursiveMember]
     global_remarks: Optional[str] = None
 
@@ -107,11 +111,18 @@ class DetailedAnalysisItem(BaseModel):
     severity: Optional[str] = None
     monitoring: Optional[str] = None
 
+class ParameterHistory(BaseModel):
+    """Earlier values of one parameter plus this report's, from the history store"""
+    parameter_name: str
+    unit: Optional[str] = None
+    points: List[Dict[str, Any]]  # [{date, value}], oldest first
+
 class SmartSummary(BaseModel):
     patient_info: Optional[PatientInfo] = None
     clinical_summary: ClinicalSummary
     management_plan: ManagementPlan
     detailed_analysis: Optional[List[DetailedAnalysisItem]] = []
+    history: List[ParameterHistory] = []  # Attached after summarization (history_store.py), never by the LLM
 
 # --- UI MANIFEST SCHEMA (Component Registry & Dynamic Rendering) ---
 
@@ -162,7 +173,8 @@ class GuidelineTableProps(BaseModel):
 class CorrelationMapProps(BaseModel):
     """Props for CorrelationMap component"""
     nodes: List[Dict[str, Any]]  # [{id, label, severity}]
-    edges: List[Dict[str, Any]]  # [{source, target, relationship}]
+    edges: List[Dict[str, Any]]  # [{source, target, relationship, strength}]
+    title: Optional[str] = "Biomarker Correlations"
 
 class AbnormalCardProps(BaseModel):
     """Props for existing AbnormalCard component"""
@@ -229,7 +241,7 @@ PropTypes = Union[
 
 class UIManifestItem(BaseModel):
     """Individual component in the UI manifest"""
-    id: str  # UUID
+    id: str  # Stable ID derived from (type, rule, finding key, ordinal)
     type: str  # Component name
     version: str  # Component version
     props: Dict[str, Any]  # Component props (validated against PropSchema)
@@ -249,6 +261,7 @@ class UIManifest(BaseModel):
     items: List[UIManifestItem]
     validation_errors: List[ValidationError] = []
     notes: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 of the canonical items JSON
 
 class ValidationResult(BaseModel):
     """Result of manifest validation"""
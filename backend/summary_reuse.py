@@ -0,0 +1,401 @@
+"""
+SUMMARY REUSE - Near-duplicate LLM summaries for repeat reports.
+
+Repeat patients and routine panels produce reports that differ from an
+earlier one only by small value changes that don't move any result across
+its reference range. Exact-content caching misses these. This cache finds
+them and reuses the earlier SmartSummary with the new values patched in,
+so the LLM call is skipped.
+
+Fingerprint: every result of a report (lab_results.ResultTable row) becomes
+a token (parameter, classification, value bucket); buckets are the value
+quantized on a log scale in steps of BUCKET_WIDTH x SUMMARY_REUSE_TOLERANCE
+(coarse, so values drifting within tolerance rarely change bucket). A MinHash
+signature of the token set is cut into SUMMARY_REUSE_BANDS bands and
+reports sharing any band are candidates (locality-sensitive hashing), so a
+value that lands just across a bucket boundary still finds its neighbour.
+
+A candidate is reused only if:
+- it has the same results (parameter, unit, reference range) with the same
+  classification (preclassify.classify_row, including the critical flag)
+- every numeric value is within SUMMARY_REUSE_TOLERANCE (relative) of the
+  earlier one, and text values are equal
+- it is the same patient (patient_details.patient_id; reports without one
+  are never reused), with the same gender and age decade
+- every changed value can be located in the summary's readings (matched by
+  history_store.parameter_key); otherwise the LLM is called as usual
+- the reading's text quotes the earlier number only where it is tied to the
+  reading (see below)
+
+Patching replaces the number in each matched reading's value. In its note,
+interpretation and detailed analysis, a quote of the earlier number is
+replaced only when tied to the reading: followed by its units or right after
+its name, and not in a threshold or range ("above 150 mg/dL", "4.0-5.6 %").
+Any other quote, or one of a number that another result also has, is
+ambiguous and the summary is not reused. Every patient_info field is
+replaced from the new report, including the ones it leaves empty. Only clean LLM summaries (no JSON repairs, untrimmed prompt; see
+llm_budget.py) are stored.
+
+Configuration (environment):
+    SUMMARY_REUSE_SIZE        Max stored summaries per process (default: 512; 0 disables)
+    SUMMARY_REUSE_TOLERANCE   Max relative value change for reuse (default: 0.05)
+    SUMMARY_REUSE_BANDS       LSH bands (default: 32)
+    SUMMARY_REUSE_ROWS        MinHash values per band (default: 4)
+
+Usage:
+    reuse = get_summary_reuse()
+    fingerprint = reuse.fingerprint(raw_report_dict, table)
+    summary = reuse.lookup(fingerprint)       # patched copy, or None
+    if summary is None:
+        summary = ...                          # LLM
+        reuse.store(fingerprint, summary)
+"""
+
+import copy
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from history_store import parameter_key, patient_key
+from lab_results import ResultTable
+from metrics import LatencyRecorder
+from preclassify import classify_row
+from schema import PatientInfo
+
+_NUMBER_RE = re.compile(r"\d*\.?\d+")
+
+# A whole number in text: not part of "1,225", "22.5" or "HbA1c"
+_QUOTED_NUMBER_RE = re.compile(r"(?<![\w.])(?<!\d,)\d+(?:\.\d+)?(?!\.\d|,\d{3})")
+
+# Right before a quoted number (words: up to two words before), these make it a
+# threshold, range end or comparison
+_THRESHOLD_BEFORE_RE = re.compile(
+    r"(?:[<>≤≥±–-]|\b(?:above|below|over|under|than|between|and|to|from|within|target|goal|threshold|limit|"
+    r"range|cutoff)\b(?:\s+\w+){0,2})\s*$", re.IGNORECASE)
+_RANGE_AFTER_RE = re.compile(r"\s*[–-]\s*\d")
+
+# MinHash: h_i(x) = (a_i * x + b_i) mod 2^64 over 64-bit token hashes (a_i odd)
+_MASK = (1 << 64) - 1
+
+# Text that may quote a reading's value, besides the value itself
+_READING_FIELDS = ("clinical_note", "clinical_interpretation")
+_ANALYSIS_FIELDS = ("interpretation", "correlation", "monitoring")
+
+# Value bucket width, in multiples of the tolerance
+BUCKET_WIDTH = 4
+
+# Candidates verified per lookup, most shared bands first
+MAX_CANDIDATES = 16
+
+
+class ReportFingerprint(BaseModel):
+    """What a report is compared on: exact rows for verification plus LSH band keys"""
+    context: Tuple[str, Optional[str], Optional[int]]  # (patient key, gender, age decade)
+    # (parameter key, unit, reference range, status, critical, number, value text, number as reported),
+    # sorted; value text is set for non-numeric values only
+    rows: List[Tuple[str, Optional[str], Optional[str], str, bool, Optional[float], Optional[str], Optional[str]]]
+    bands: List[Tuple[int, ...]]
+    patient_info: Dict[str, Any]  # SmartSummary.patient_info fields from the report
+
+
+def _number_token(value: Any) -> Optional[str]:
+    match = _NUMBER_RE.search(str(value))
+    return match.group() if match else None
+
+
+def _age_decade(age: Any) -> Optional[int]:
+    token = _number_token(age) if age is not None else None
+    return int(float(token)) // 10 if token else None
+
+
+def _patch_value(value: Any, old: float, new: str) -> Optional[str]:
+    """A reading's value with `new` for `old`; None unless `old` is the only number in it"""
+    text = str(value) if value is not None else ""
+    numbers = list(_QUOTED_NUMBER_RE.finditer(text))
+    if len(numbers) != 1 or float(numbers[0].group()) != abs(old):
+        return None
+    return text[:numbers[0].start()] + new + text[numbers[0].end():]
+
+
+def _tied(text: str, match: "re.Match[str]", name: str, units: Tuple[str, ...]) -> bool:
+    """Whether a quoted number is the reading's value: after its name or before its units, not a bound"""
+    before, after = text[:match.start()], text[match.end():]
+    if _THRESHOLD_BEFORE_RE.search(before) or _RANGE_AFTER_RE.match(after):
+        return False
+    if any(re.match(rf"\s*{re.escape(unit)}(?![A-Za-z])", after, re.IGNORECASE) for unit in units):
+        return True
+    return bool(name) and re.search(rf"{re.escape(name)}(?:\s*[:(]|(?:\s+(?:is|are|was|were|of|at|now))*)\s*$",
+                                    before, re.IGNORECASE) is not None
+
+
+def _patch_text(text: Any, old: float, new: str, name: str, units: Tuple[str, ...],
+                shared: bool) -> Tuple[Any, bool]:
+    """
+    Replace the quotes of a reading's value (`old`) tied to the reading;
+    (text, False) if `old` is quoted in any other way, or at all when
+    `shared` (another result has the same number)
+    """
+    if not isinstance(text, str):
+        return text, True
+    pieces, end = [], 0
+    for match in _QUOTED_NUMBER_RE.finditer(text):
+        if float(match.group()) != abs(old):
+            continue
+        if shared or not _tied(text, match, name, units):
+            return text, False
+        pieces += [text[end:match.start()], new]
+        end = match.end()
+    return "".join(pieces) + text[end:], True
+
+
+class SummaryReuse:
+    """Thread-safe LRU of LLM summaries, indexed by MinHash LSH bands of their reports"""
+
+    def __init__(self, max_entries: int = 512, tolerance: float = 0.05, bands: int = 32, rows: int = 4):
+        self.max_entries = max(0, max_entries)
+        self.tolerance = max(0.0, tolerance)
+        self.band_count = max(1, bands)
+        self.band_rows = max(1, rows)
+        # Fixed seed: the same report gets the same signature in every process
+        rng = random.Random(0x5EED)
+        self._hashes = [(rng.getrandbits(64) | 1, rng.getrandbits(64))
+                        for _ in range(self.band_count * self.band_rows)]
+        self._step = math.log1p(BUCKET_WIDTH * self.tolerance) if self.tolerance > 0 else None
+        self._entries: "OrderedDict[int, Tuple[ReportFingerprint, Dict[str, Any]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, ...], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookup_time = LatencyRecorder()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.unpatchable = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Fingerprint
+    # ------------------------------------------------------------------
+
+    def _bucket(self, number: Optional[float], text: Optional[str]) -> str:
+        if number is None:
+            return f"t:{text}" if text is not None else "-"
+        if number == 0 or self._step is None:
+            return repr(number)
+        return f"{'-' if number < 0 else ''}{math.floor(math.log(abs(number)) / self._step)}"
+
+    def _signature(self, tokens: List[str]) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "big") for t in tokens]
+        return list(map(min, zip(*[[(a * h + b) & _MASK for a, b in self._hashes] for h in hashes])))
+
+    def fingerprint(self, report: Dict[str, Any], table: Optional[ResultTable] = None) -> Optional[ReportFingerprint]:
+        """
+        Fingerprint of a raw report (None when reuse is disabled, or the report
+        has no patient_id or no results)
+        """
+        patient = report.get("patient_details") or {}
+        patient_id = patient_key(patient)
+        if not self.max_entries or patient_id is None:
+            return None
+        table = table if table is not None else ResultTable.from_report(report)
+        rows = []
+        for row in table.results:
+            result = classify_row(table, row)
+            number = table.number(row)
+            raw = table.raw_value(row)
+            text = table.text(table.value_text, row) if raw is None else None if number is not None else str(raw)
+            rows.append((parameter_key(result.test_name), table.text(table.unit, row),
+                         table.text(table.reference_range, row), result.status, result.critical, number, text,
+                         _number_token(raw) if number is not None else None))
+        if not rows:
+            return None
+        rows.sort(key=lambda r: (r[0], r[1] or "", r[2] or ""))
+        gender = patient.get("gender")
+        context = (patient_id, str(gender).strip().lower() if gender else None, _age_decade(patient.get("age")))
+        tokens = ["context|" + "|".join(map(str, context))]
+        tokens += [f"{key}|{status}|{critical}|{self._bucket(number, text)}"
+                   for key, _, _, status, critical, number, text, _ in rows]
+        signature = self._signature(tokens)
+        bands = [(band, *signature[band * self.band_rows:(band + 1) * self.band_rows])
+                 for band in range(self.band_count)]
+        sample = report.get("sample_details") or {}
+        patient_info = dict.fromkeys(PatientInfo.model_fields)
+        patient_info.update(name=patient.get("name"), age=patient.get("age"), gender=gender,
+                            report_date=sample.get("reported_at") or sample.get("collected_at"))
+        return ReportFingerprint(context=context, rows=rows, bands=bands, patient_info=patient_info)
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def _matches(self, earlier: ReportFingerprint, current: ReportFingerprint) -> bool:
+        if earlier.context != current.context or len(earlier.rows) != len(current.rows):
+            return False
+        for old, new in zip(earlier.rows, current.rows):
+            if old[:5] != new[:5] or old[6] != new[6]:
+                return False
+            if old[5] is None or new[5] is None:
+                if old[5] != new[5]:
+                    return False
+            elif abs(new[5] - old[5]) > self.tolerance * abs(old[5]):
+                return False
+        return True
+
+    def lookup(self, fingerprint: Optional[ReportFingerprint]) -> Optional[Dict[str, Any]]:
+        """Patched copy of a near-identical report's summary, or None"""
+        if fingerprint is None:
+            return None
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                shared: Dict[int, int] = {}
+                for band in fingerprint.bands:
+                    for entry_id in self._buckets.get(band, ()):
+                        shared[entry_id] = shared.get(entry_id, 0) + 1
+                candidates = [self._entries[entry_id] for entry_id in
+                              sorted(shared, key=shared.get, reverse=True)[:MAX_CANDIDATES]]
+            for earlier, summary in candidates:
+                if not self._matches(earlier, fingerprint):
+                    self.rejected += 1
+                    continue
+                patched = self._patch(summary, earlier, fingerprint)
+                if patched is None:
+                    self.unpatchable += 1
+                    continue
+                self.hits += 1
+                return patched
+            self.misses += 1
+            return None
+        finally:
+            self.lookup_time.record(time.perf_counter() - start)
+
+    def store(self, fingerprint: Optional[ReportFingerprint], summary: Dict[str, Any]) -> None:
+        """Index a summary under its report's fingerprint (evicting the oldest beyond max_entries)"""
+        if fingerprint is None or not self.max_entries:
+            return
+        entry = (fingerprint, copy.deepcopy(summary))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            for band in fingerprint.bands:
+                self._buckets.setdefault(band, []).append(entry_id)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                evicted_id, (evicted, _) = self._entries.popitem(last=False)
+                for band in evicted.bands:
+                    bucket = self._buckets[band]
+                    bucket.remove(evicted_id)
+                    if not bucket:
+                        del self._buckets[band]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    # ------------------------------------------------------------------
+    # Patching
+    # ------------------------------------------------------------------
+
+    def _patch(self, summary: Dict[str, Any], earlier: ReportFingerprint,
+               current: ReportFingerprint) -> Optional[Dict[str, Any]]:
+        """
+        Summary with the current values, or None if a changed value can't be
+        located or is quoted ambiguously
+        """
+        changed: Dict[str, Tuple[float, str, Optional[str]]] = {}
+        for old, new in zip(earlier.rows, current.rows):
+            if old[5] is None or old[5] == new[5]:
+                continue
+            if old[0] in changed:
+                return None  # Same parameter reported twice with different values: ambiguous
+            changed[old[0]] = (old[5], new[7], old[1])
+        # Which parameters report each number: a quote of a shared one can't be attributed
+        reported_by: Dict[float, Set[str]] = {}
+        for row in earlier.rows:
+            if row[5] is not None:
+                reported_by.setdefault(abs(row[5]), set()).add(row[0])
+
+        def patch_fields(fields: Dict[str, Any], names: Tuple[str, ...], key: str, name: str,
+                         units: Tuple[str, ...]) -> bool:
+            old_number, new_token, _ = changed[key]
+            shared = len(reported_by[abs(old_number)]) > 1
+            for field in names:
+                fields[field], patchable = _patch_text(fields.get(field), old_number, new_token, name, units, shared)
+                if not patchable:
+                    return False
+            return True
+
+        patched = copy.deepcopy(summary)
+        located = set()
+        clinical = patched.get("clinical_summary") or {}
+        for reading in (clinical.get("abnormal_readings") or []) + (clinical.get("normal_readings") or []):
+            name = str(reading.get("parameter_name") or "")
+            key = parameter_key(name)
+            if key not in changed:
+                continue
+            old_number, new_token, unit = changed[key]
+            value = _patch_value(reading.get("value"), old_number, new_token)
+            units = tuple(u for u in (reading.get("units"), unit) if u)
+            if value is None or not patch_fields(reading, _READING_FIELDS, key, name, units):
+                return None
+            reading["value"] = value
+            located.add(key)
+        for item in patched.get("detailed_analysis") or []:
+            name = str(item.get("parameter") or "")
+            key = parameter_key(name)
+            if key not in changed:
+                continue
+            unit = changed[key][2]
+            if not patch_fields(item, _ANALYSIS_FIELDS, key, name, (unit,) if unit else ()):
+                return None
+        if located != set(changed):
+            return None
+
+        # Nothing of the earlier report's patient, even where the new report is blank
+        patched["patient_info"] = dict(current.patient_info)
+        return patched
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "max_entries": self.max_entries,
+            "tolerance": self.tolerance,
+            "size": size,
+            "stores": self.stores,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rejected_candidates": self.rejected,
+            "unpatchable_candidates": self.unpatchable,
+            "evictions": self.evictions,
+            "lookup": self.lookup_time.summary(),
+        }
+
+
+_reuse: Optional[SummaryReuse] = None
+
+
+def get_summary_reuse() -> SummaryReuse:
+    """Process-wide cache configured from SUMMARY_REUSE_*"""
+    global _reuse
+    if _reuse is None:
+        _reuse = SummaryReuse(
+            max_entries=int(os.getenv("SUMMARY_REUSE_SIZE", "512")),
+            tolerance=float(os.getenv("SUMMARY_REUSE_TOLERANCE", "0.05")),
+            bands=int(os.getenv("SUMMARY_REUSE_BANDS", "32")),
+            rows=int(os.getenv("SUMMARY_REUSE_ROWS", "4")),
+        )
+    return _reuse
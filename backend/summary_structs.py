@@ -0,0 +1,283 @@
+"""
+SUMMARY STRUCTS - Lightweight internal SmartSummary for the mapping hot path.
+
+schema.SmartSummary (pydantic) stays the contract at the API and LLM
+boundary. Inside the manifest pipeline the rules engine only reads
+attributes, so each summary is converted once into plain `__slots__`
+dataclasses with the same field names and nesting (SummaryStruct,
+AbnormalReadingStruct, ...). They are smaller and faster to build than
+pydantic models. Rule conditions, props generators, the correlation index
+and batch evaluation work unchanged on either representation.
+
+Conversion validates like the pydantic models do for JSON-shaped input:
+required fields, None only where the schema allows it, exact types (no
+number -> str coercion), unknown keys ignored. Errors raise ValueError
+naming the field path. The per-class converters are built once from the
+dataclass annotations.
+
+msgspec (requirements.txt) is optional: when it is installed,
+summary_struct() uses msgspec.convert and decode_summary() decodes JSON
+bytes straight into the structs, with no intermediate dicts. The summarizer
+(agents.generate_summary) checks clean LLM responses with decode_summary.
+
+Usage:
+    summary = summary_struct(summary_dict)           # at the boundary
+    summary = decode_summary(json_bytes)             # from raw JSON
+    plan = generator.plan_from_summary(summary)
+"""
+
+import json
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+try:
+    import msgspec
+except ImportError:  # Optional: pure-Python conversion below
+    msgspec = None
+
+
+@dataclass(slots=True)
+class PatientInfoStruct:
+    name: Optional[str] = None
+    age: Optional[Union[str, int]] = None
+    gender: Optional[str] = None
+    test_package_name: Optional[str] = None
+    report_date: Optional[str] = None
+
+
+@dataclass(slots=True)
+class AbnormalReadingStruct:
+    parameter_name: str
+    value: str
+    status: str
+    risk_level: str
+    causes: List[str]
+    effects: List[str]
+    clinical_note: str
+    units: Optional[str] = None
+    normal_range: Optional[str] = None
+    system: Optional[str] = None
+
+
+@dataclass(slots=True)
+class NormalReadingStruct:
+    parameter_name: str
+    value: str
+    clinical_interpretation: str
+    units: Optional[str] = None
+    normal_range: Optional[str] = None
+
+
+@dataclass(slots=True)
+class OverallHealthStatusStruct:
+    risk_assessment: str
+    key_concerns: List[str]
+    immediate_action_items: List[str]
+
+
+@dataclass(slots=True)
+class ClinicalSummaryStruct:
+    abnormal_readings: List[AbnormalReadingStruct]
+    normal_readings: List[NormalReadingStruct]
+    overall_health_status: OverallHealthStatusStruct
+
+
+@dataclass(slots=True)
+class FollowUpTestStruct:
+    timeline: str
+    recommended_tests: str
+    rationale: str
+
+
+@dataclass(slots=True)
+class LifestyleModificationStruct:
+    category: str
+    recommendations: str
+
+
+@dataclass(slots=True)
+class MedicationConsiderationStruct:
+    condition: str
+    supplements: Optional[str] = None
+    interactions: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ManagementPlanStruct:
+    follow_up_tests: List[FollowUpTestStruct]
+    lifestyle_modifications: List[LifestyleModificationStruct]
+    medication_considerations: Optional[List[MedicationConsiderationStruct]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class DetailedAnalysisItemStruct:
+    parameter: str
+    interpretation: str
+    correlation: Optional[str] = None
+    severity: Optional[str] = None
+    monitoring: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ParameterHistoryStruct:
+    parameter_name: str
+    points: List[Dict[str, Any]]
+    unit: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SummaryStruct:
+    clinical_summary: ClinicalSummaryStruct
+    management_plan: ManagementPlanStruct
+    patient_info: Optional[PatientInfoStruct] = None
+    detailed_analysis: Optional[List[DetailedAnalysisItemStruct]] = field(default_factory=list)
+    history: List[ParameterHistoryStruct] = field(default_factory=list)
+
+
+# ============================================================================
+# CONVERSION
+# ============================================================================
+
+class _Invalid(ValueError):
+    """Conversion error; the field path is collected while unwinding"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+        self.path: List[str] = []
+
+    def __str__(self) -> str:
+        return f"{'.'.join(self.path) or 'summary'}: {self.message}"
+
+
+_SCALARS = {str: (str,), int: (int,), float: (int, float), bool: (bool,)}
+
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def _converter(annotation: Any) -> Callable[[Any], Any]:
+    """Validate-and-convert function for one annotation"""
+    if annotation is Any:
+        return lambda value: value
+    origin, args = get_origin(annotation), get_args(annotation)
+
+    if origin is Union:
+        options = [a for a in args if a is not type(None)]
+        optional = len(options) < len(args)
+        if len(options) == 1:
+            if options[0] in _SCALARS:
+                return _scalar_converter(options[0], optional)
+            inner = _converter(options[0])
+            if not optional:
+                return inner
+            return lambda value: None if value is None else inner(value)
+        # Union of scalars, e.g. Optional[Union[str, int]]
+        accepted = tuple(t for option in options for t in _SCALARS[option])
+        expected = " or ".join(option.__name__ for option in options)
+
+        def union(value):
+            if value is None and optional:
+                return value
+            if isinstance(value, bool) and int in accepted:
+                return int(value)  # pydantic's lax int accepts booleans
+            if isinstance(value, accepted) and not isinstance(value, bool):
+                return value
+            raise _Invalid(f"expected {expected}, got {_type_name(value)}")
+        return union
+
+    if origin is list:
+        item = _converter(args[0])
+        scalar = _SCALARS.get(args[0])
+
+        def convert_list(value):
+            if not isinstance(value, list):
+                raise _Invalid(f"expected a list, got {_type_name(value)}")
+            if scalar is not None and all(type(element) in scalar for element in value):
+                return list(value)  # Fast path: List[str] already well-typed
+            converted = []
+            for index, element in enumerate(value):
+                try:
+                    converted.append(item(element))
+                except _Invalid as e:
+                    e.path.insert(0, str(index))
+                    raise
+            return converted
+        return convert_list
+
+    if origin is dict:
+        def convert_dict(value):
+            if not isinstance(value, dict):
+                raise _Invalid(f"expected an object, got {_type_name(value)}")
+            return dict(value)
+        return convert_dict
+
+    if is_dataclass(annotation):
+        return _struct_converter(annotation)
+    return _scalar_converter(annotation, optional=False)
+
+
+def _scalar_converter(annotation: type, optional: bool) -> Callable[[Any], Any]:
+    """One call per scalar field; None is folded in for Optional fields"""
+    accepted = _SCALARS[annotation]
+    exact = frozenset(accepted) | ({type(None)} if optional else set())
+    name = annotation.__name__
+
+    def scalar(value):
+        if type(value) in exact:
+            return value
+        if isinstance(value, accepted) and (annotation is bool or not isinstance(value, bool)):
+            return value
+        raise _Invalid(f"expected {name}, got {_type_name(value)}")
+    return scalar
+
+
+def _struct_converter(cls: type) -> Callable[[Any], Any]:
+    hints = get_type_hints(cls)
+    specs = [(f.name, _converter(hints[f.name]), f.default is MISSING and f.default_factory is MISSING)
+             for f in fields(cls)]
+
+    def convert_struct(value):
+        if not isinstance(value, dict):
+            raise _Invalid(f"expected an object, got {_type_name(value)}")
+        kwargs = {}
+        for name, convert, required in specs:
+            if name not in value:
+                if required:
+                    error = _Invalid("field required")
+                    error.path.append(name)
+                    raise error
+                continue
+            try:
+                kwargs[name] = convert(value[name])
+            except _Invalid as e:
+                e.path.insert(0, name)
+                raise
+        return cls(**kwargs)
+    return convert_struct
+
+
+_convert_summary = _struct_converter(SummaryStruct)
+
+
+def summary_struct(summary: Union[Dict[str, Any], SummaryStruct]) -> SummaryStruct:
+    """SummaryStruct for a SmartSummary-shaped dict (validated); structs pass through"""
+    if isinstance(summary, SummaryStruct):
+        return summary
+    if msgspec is not None:
+        try:
+            return msgspec.convert(summary, SummaryStruct)
+        except msgspec.DecodeError as e:  # ValidationError is a DecodeError
+            raise ValueError(str(e)) from None
+    return _convert_summary(summary)
+
+
+def decode_summary(data: Union[bytes, str]) -> SummaryStruct:
+    """SummaryStruct from SmartSummary JSON (decoded straight into structs with msgspec)"""
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(data, type=SummaryStruct)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+    return _convert_summary(json.loads(data))
@@ -13,19 +13,227 @@ Key design:
 - Enables adding new components without code changes (only rule config)
 - Provides detailed error tracking for debugging
 - Supports versioning and backward compatibility
+- Deterministic: component IDs and the manifest content hash depend only on
+  the input summary, so identical summaries produce identical item bytes
+  (usable for ETags, caching and React keys)
+- Lazy: plan_from_summary returns the component sequence with IDs and hints
+  but defers each props_generator until the item's props are read, so
+  components dropped before serialization (pagination, filtering) cost nothing
+- Internal model: the pipeline runs on summary_structs.SummaryStruct (slots
+  dataclasses, converted once at the boundary) and emits plain item dicts
+  (LazyManifest.item_dicts + validate_items); the pydantic SmartSummary and
+  UIManifest remain accepted and returned by generate_from_summary /
+  validate_manifest
 """
 
-import uuid
+import hashlib
+import json
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 from pydantic import ValidationError
 
-from schema import SmartSummary, UIManifest, UIManifestItem, ValidationResult
+from schema import UIManifest, UIManifestItem, ValidationResult
 from schema import ValidationError as UIValidationError
 from components import COMPONENT_REGISTRY
+from summary_structs import SummaryStruct
 from ui_rules import RulesEngine
 
 
+@lru_cache(maxsize=16384)
+def component_id(component_type: str, rule: Optional[str], key: Optional[str], ordinal: int) -> str:
+    """
+    Stable component ID, e.g. "MetricAccordion-3f9c0a1b2d4e5f60".
+
+    Derived from what the component *is* (type, producing rule, finding key and
+    the ordinal among identical triples), not from its props, so a component
+    keeps its ID when the underlying values change.
+    """
+    identity = f"{component_type}|{rule or ''}|{key or ''}|{ordinal}"
+    return f"{component_type}-{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+
+
+def canonical_json(data: Any) -> bytes:
+    """Compact, key-sorted JSON encoding used for content hashing"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def manifest_content_hash(items: List[Dict[str, Any]]) -> str:
+    """SHA-256 hex digest of the canonical JSON of manifest item dicts"""
+    return hashlib.sha256(canonical_json(items)).hexdigest()
+
+
+MANIFEST_FORMATS = ("full", "compact")
+PROPS_ENCODINGS = ("rows", "columnar")
+
+
+def compact_items(items: List[Dict[str, Any]]) -> tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Factor rendering hints out of manifest item dicts.
+
+    Returns (hints, items): `hints` maps "type@version" to the registry's
+    rendering hints; each item keeps `rendering_hints` only for keys that
+    differ from that table (per-instance overrides) and drops it otherwise.
+    Expand on the client with {...hints[`${type}@${version}`], ...item.rendering_hints}.
+    """
+    hints: Dict[str, Dict[str, Any]] = {}
+    compact: List[Dict[str, Any]] = []
+    for item in items:
+        table_key = f"{item['type']}@{item['version']}"
+        if table_key not in hints:
+            component_def = COMPONENT_REGISTRY.get(item["type"])
+            hints[table_key] = component_def.rendering_hints if component_def else {}
+        shared = hints[table_key]
+        overrides = {k: v for k, v in (item.get("rendering_hints") or {}).items() if shared.get(k) != v}
+        entry = {k: v for k, v in item.items() if k != "rendering_hints"}
+        if overrides:
+            entry["rendering_hints"] = overrides
+        compact.append(entry)
+    return hints, compact
+
+
+def to_columnar(records: Any) -> Optional[Dict[str, Any]]:
+    """
+    Encode a list of same-keyed dicts as {"columns": [...], "data": [[...], ...]}.
+
+    Returns None (leave the prop as-is) unless every record is a dict with
+    exactly the same keys, so decoding is always lossless.
+    """
+    if not isinstance(records, list) or not records or not isinstance(records[0], dict):
+        return None
+    columns = list(records[0])
+    key_set = set(columns)
+    if any(not isinstance(r, dict) or r.keys() != key_set for r in records):
+        return None
+    return {"columns": columns, "data": [[r[c] for c in columns] for r in records]}
+
+
+def columnar_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply to_columnar to each item's declared ComponentDefinition.columnar_props"""
+    encoded: List[Dict[str, Any]] = []
+    for item in items:
+        component_def = COMPONENT_REGISTRY.get(item["type"])
+        if component_def and component_def.columnar_props:
+            props = dict(item["props"])
+            for name in component_def.columnar_props:
+                table = to_columnar(props.get(name))
+                if table is not None:
+                    props[name] = table
+            item = {**item, "props": props}
+        encoded.append(item)
+    return encoded
+
+
+def encode_items(items: List[Dict[str, Any]], manifest_format: str = "full",
+                 props_encoding: str = "rows") -> tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Wire encoding of manifest item dicts: (hints table or None, items)"""
+    if props_encoding == "columnar":
+        items = columnar_items(items)
+    if manifest_format == "compact":
+        return compact_items(items)
+    return None, items
+
+
+class LazyManifestItem:
+    """
+    Manifest item whose props are generated on first access.
+
+    Everything except props (id, type, version, rendering hints, and the
+    producing rule/key) is known from the component spec alone.
+    """
+
+    __slots__ = ("id", "type", "version", "rendering_hints", "rule", "key",
+                 "_props_generator", "_summary", "_props")
+
+    def __init__(self, item_id: str, component_type: str, version: str, rendering_hints: Dict[str, Any],
+                 rule: Optional[str], key: Optional[str],
+                 props_generator: Optional[Callable[[SummaryStruct], Dict[str, Any]]], summary: SummaryStruct):
+        self.id = item_id
+        self.type = component_type
+        self.version = version
+        self.rendering_hints = rendering_hints
+        self.rule = rule
+        self.key = key
+        self._props_generator = props_generator
+        self._summary = summary
+        self._props: Optional[Dict[str, Any]] = None
+
+    @property
+    def materialized(self) -> bool:
+        return self._props is not None
+
+    @property
+    def props(self) -> Dict[str, Any]:
+        if self._props is None:
+            self._props = self._props_generator(self._summary) if self._props_generator else {}
+            self._props_generator = self._summary = None  # Done with them; don't pin the summary
+        return self._props
+
+    def to_item(self) -> UIManifestItem:
+        return UIManifestItem(
+            id=self.id,
+            type=self.type,
+            version=self.version,
+            props=self.props,
+            rendering_hints=self.rendering_hints,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialized item (same as to_item().model_dump(), without building the model)"""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "version": self.version,
+            "props": self.props,
+            "rendering_hints": self.rendering_hints,
+        }
+
+
+class LazyManifest:
+    """
+    Ordered component plan for one summary with deferred props.
+
+    Filter it down (select) before serializing; only the surviving items'
+    props generators ever run.
+    """
+
+    def __init__(self, items: List[LazyManifestItem]):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[LazyManifestItem]:
+        return iter(self.items)
+
+    def __getitem__(self, index: int) -> LazyManifestItem:
+        return self.items[index]
+
+    def select(self, predicate: Callable[[LazyManifestItem], bool]) -> "LazyManifest":
+        """Keep items matching predicate (evaluated without generating props)"""
+        return LazyManifest([item for item in self.items if predicate(item)])
+
+    @property
+    def props_generated(self) -> int:
+        return sum(1 for item in self.items if item.materialized)
+
+    def item_dicts(self) -> List[Dict[str, Any]]:
+        """Generate props for every remaining item; items as dicts, ready to serialize"""
+        return [item.to_dict() for item in self.items]
+
+    def materialize(self) -> UIManifest:
+        """Generate props for every remaining item and build the UIManifest"""
+        items = [item.to_item() for item in self.items]
+        # (generated_at is informational and excluded from the content hash)
+        return UIManifest(
+            version="1.0.0",
+            generated_at=datetime.utcnow().isoformat(),
+            items=items,
+            validation_errors=[],
+            content_hash=manifest_content_hash([item.model_dump() for item in items]),
+        )
+
+
 class UIManifestGenerator:
     """
     Generates UI manifests from clinical summaries using declarative rules.
@@ -34,12 +242,16 @@ class UIManifestGenerator:
         generator = UIManifestGenerator()
         manifest = generator.generate_from_summary(smart_summary)
         validation = generator.validate_manifest(manifest)
+        
+        # Props generated only for the items that survive pruning
+        plan = generator.plan_from_summary(smart_summary)
+        manifest = plan.select(lambda item: item.type != "SectionDivider").materialize()
     """
     
     def __init__(self):
         self.rules_engine = RulesEngine()
     
-    def generate_from_summary(self, smart_summary: SmartSummary) -> UIManifest:
+    def generate_from_summary(self, smart_summary: SummaryStruct) -> UIManifest:
         """
         Generate a complete UI manifest from a SmartSummary.
         
@@ -50,37 +262,50 @@ class UIManifestGenerator:
             UIManifest: Generated manifest with component sequence and props
         """
         
-        items: List[UIManifestItem] = []
+        return self.plan_from_summary(smart_summary).materialize()
+    
+    def plan_from_summary(self, smart_summary: SummaryStruct) -> LazyManifest:
+        """
+        Component sequence for a SmartSummary with props not yet generated.
+        
+        Args:
+            smart_summary: Processed clinical summary with abnormal/normal findings
+        
+        Returns:
+            LazyManifest: Items with IDs, types and hints; props run on access
+        """
         
         # Stage 1: Apply rules to determine component sequence
         component_specs = self.rules_engine.apply_rules(smart_summary)
         
-        # Stage 2: Convert component specs to UIManifestItems with full props
-        for spec in component_specs:
-            item = self._create_manifest_item(spec, smart_summary)
-            items.append(item)
+        # Stage 2: Convert component specs to lazy items (props deferred)
+        return self.plan_from_specs(component_specs, smart_summary)
+    
+    def plan_from_specs(self, component_specs: List[Dict[str, Any]], smart_summary: SummaryStruct) -> LazyManifest:
+        """Lazy items for component specs from the rules engine, with stable IDs"""
         
-        # Stage 3: Create manifest with metadata
-        manifest = UIManifest(
-            version="1.0.0",
-            generated_at=datetime.utcnow().isoformat(),
-            items=items,
-            validation_errors=[],
-        )
+        items: List[LazyManifestItem] = []
+        ordinals: Dict[tuple, int] = {}
+        for spec in component_specs:
+            identity = (spec["type"], spec.get("rule"), spec.get("key"))
+            ordinals[identity] = ordinals.get(identity, -1) + 1
+            items.append(self._create_manifest_item(spec, smart_summary, ordinals[identity]))
         
-        return manifest
+        return LazyManifest(items)
     
-    def _create_manifest_item(self, spec: Dict[str, Any], smart_summary: SmartSummary) -> UIManifestItem:
+    def _create_manifest_item(self, spec: Dict[str, Any], smart_summary: SummaryStruct,
+                              ordinal: int = 0) -> LazyManifestItem:
         """
-        Convert a component specification into a UIManifestItem with props.
+        Convert a component specification into a lazy manifest item.
         
         Args:
             spec: Component specification from rules engine
-                {type: str, props_generator: callable}
+                {type: str, props_generator: callable, rule: str, key: str}
             smart_summary: Full summary for context
+            ordinal: Index among earlier specs with the same (type, rule, key)
         
         Returns:
-            UIManifestItem: Complete item with ID, type, version, props
+            LazyManifestItem: ID, type, version and hints; props on first access
         """
         
         component_type = spec["type"]
@@ -89,26 +314,19 @@ class UIManifestGenerator:
         if not component_def:
             raise ValueError(f"Unknown component type: {component_type}")
         
-        # Generate props using the spec's props_generator function
-        props_generator = spec.get("props_generator")
-        if props_generator:
-            props = props_generator(smart_summary)
-        else:
-            props = {}
-        
-        # Get rendering hints from component definition
-        rendering_hints = component_def.rendering_hints.copy()
+        # Registry rendering hints plus any per-instance overrides from the rule
+        rendering_hints = {**component_def.rendering_hints, **(spec.get("rendering_hints") or {})}
         
-        # Create manifest item
-        item = UIManifestItem(
-            id=str(uuid.uuid4()),
-            type=component_type,
+        return LazyManifestItem(
+            item_id=component_id(component_type, spec.get("rule"), spec.get("key"), ordinal),
+            component_type=component_type,
             version=component_def.version,
-            props=props,
             rendering_hints=rendering_hints,
+            rule=spec.get("rule"),
+            key=spec.get("key"),
+            props_generator=spec.get("props_generator"),
+            summary=smart_summary,
         )
-        
-        return item
     
     def validate_manifest(self, manifest: UIManifest) -> ValidationResult:
         """
@@ -126,35 +344,43 @@ class UIManifestGenerator:
             ValidationResult: is_valid flag + error list
         """
         
+        return self.validate_items(
+            {"id": item.id, "type": item.type, "version": item.version, "props": item.props}
+            for item in manifest.items
+        )
+    
+    def validate_items(self, items: Iterable[Dict[str, Any]]) -> ValidationResult:
+        """validate_manifest for item dicts (LazyManifest.item_dicts, stored manifests)"""
+        
         errors = []
         warnings = []
         
-        for item in manifest.items:
+        for item in items:
             # Check component exists
-            component_def = COMPONENT_REGISTRY.get(item.type)
+            component_def = COMPONENT_REGISTRY.get(item["type"])
             if not component_def:
-                errors.append(f"Unknown component type: {item.type}")
+                errors.append(f"Unknown component type: {item['type']}")
                 continue
             
             # Check version matches (warning if different)
-            if item.version != component_def.version:
+            if item["version"] != component_def.version:
                 warnings.append(
-                    f"Component {item.type} version mismatch: "
-                    f"manifest has {item.version}, current is {component_def.version}"
+                    f"Component {item['type']} version mismatch: "
+                    f"manifest has {item['version']}, current is {component_def.version}"
                 )
             
             # Validate props against component's Pydantic model
             try:
-                component_def.props_model(**item.props)
+                component_def.props_model(**item["props"])
             except Exception as e:
                 errors.append(
-                    f"Invalid props for component {item.type} (id={item.id}): {str(e)}"
+                    f"Invalid props for component {item['type']} (id={item['id']}): {str(e)}"
                 )
         
         is_valid = len(errors) == 0
         return ValidationResult(is_valid=is_valid, errors=errors, warnings=warnings)
     
-    def generate_and_validate(self, smart_summary: SmartSummary) -> tuple[UIManifest, ValidationResult]:
+    def generate_and_validate(self, smart_summary: SummaryStruct) -> tuple[UIManifest, ValidationResult]:
         """
         Generate manifest and validate in one call.
         
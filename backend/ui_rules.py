@@ -10,14 +10,52 @@ Rule Categories:
 3. TONE ADAPTATION - Adjust UI hierarchy based on risk level
 4. CONDITIONAL RENDERING - Show/hide components based on data presence
 
+Rules live in rules/manifest_rules.json, not code: each has a name,
+priority, a condition in the rules DSL (rules_dsl.py) and actions that
+prepend/append a component whose props are either a literal mapping or a
+named props generator below (`"props": "critical_alert"` ->
+_props_critical_alert). An action with `for_each` emits one component per
+element of a summary list (e.g. one MetricAccordion per abnormal reading).
+
+The file is compiled once into a RuleSet (conditions become plain lambdas).
+reload() compiles a changed file off the request path and swaps the RuleSet
+in with a single reference assignment; apply_rules reads that reference once
+per call, so requests never lock and never see a half-loaded rule set. A
+file that fails to compile leaves the current rules in place.
+
+Configuration (environment):
+    RULES_FILE              Rules file (default: rules/manifest_rules.json)
+    RULES_RELOAD_SECONDS    Poll the file for changes this often (default: 0 = off)
+    RULES_PROFILING         Per-rule hit rates and timings (see rules_profiler.py)
+
 Usage:
     engine = RulesEngine()
     component_specs = engine.apply_rules(smart_summary)
-    # Returns list of {type, props_generator, rendering_hints}
+    # Returns list of {type, props_generator, rendering_hints, rule, key}
+    engine.reload()   # True if a changed rules file was swapped in
 """
 
-from typing import Callable, List, Dict, Any, Optional
-from schema import SmartSummary, AbnormalReading
+import copy
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from operator import attrgetter
+from typing import Callable, FrozenSet, List, Dict, Any, Optional, Tuple
+from summary_structs import SummaryStruct, AbnormalReadingStruct, ParameterHistoryStruct
+import correlations
+import rules_dsl
+from correlations import get_correlation_index
+from rules_dsl import FIELDS, compile_condition, declared_reads, reads, referenced_fields
+from rules_profiler import RulesProfiler, get_rules_profiler
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "manifest_rules.json")
+
+ACTION_TYPES = ("prepend", "append")
+
 
 class Rule:
     """Single declarative rule: condition + actions"""
@@ -25,18 +63,37 @@ class Rule:
     def __init__(
         self,
         name: str,
-        condition: Callable[[SmartSummary], bool],
+        condition: Callable[[SummaryStruct], bool],
         actions: List["Action"],
-        priority: int = 0
+        priority: int = 0,
+        when: Optional[str] = None,
+        category: Optional[str] = None,
     ):
         self.name = name
         self.condition = condition
         self.actions = actions
         self.priority = priority  # Higher priority evaluated first
+        self.when = when  # DSL source of the condition
+        self.category = category
+        # Summary fields the condition reads (None: unknown, e.g. a hand-written lambda)
+        self.reads: Optional[FrozenSet[str]] = frozenset(referenced_fields(when)) if when is not None else None
     
-    def applies_to(self, summary: SmartSummary) -> bool:
+    def applies_to(self, summary: SummaryStruct) -> bool:
         """Check if this rule's condition is met"""
         return self.condition(summary)
+    
+    def emit(self, components: List[Dict[str, Any]], summary: SummaryStruct,
+             wrap: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Add this rule's component specs to `components` (prepend/append)"""
+        for action in self.actions:
+            specs = action.specs(summary, self.name)
+            if wrap is not None:
+                for spec in specs:
+                    wrap(spec)
+            if action.action_type == "prepend":
+                components[0:0] = specs
+            else:
+                components.extend(specs)
 
 
 class Action:
@@ -44,241 +101,280 @@ class Action:
     
     def __init__(
         self,
-        action_type: str,  # "prepend", "append", "replace", "merge"
+        action_type: str,  # "prepend", "append"
         component_type: str,
         props_generator: Optional[Callable] = None,
         target_index: int = None,
-        rendering_hints: Optional[Dict] = None
+        rendering_hints: Optional[Dict] = None,
+        for_each: Optional[str] = None,
+        key: Optional[str] = None,
     ):
         self.action_type = action_type
         self.component_type = component_type
         self.props_generator = props_generator or (lambda s: {})
         self.target_index = target_index
         self.rendering_hints = rendering_hints or {}
+        # for_each: DSL field to iterate; props_generator then takes (summary, element)
+        # and `key` names the element attribute used as the component key
+        self.for_each = for_each
+        self.key = key
+        self._elements = attrgetter(FIELDS[for_each]) if for_each else None
+        # Summary fields the props read besides a for_each element (None: unknown)
+        self.reads: Optional[FrozenSet[str]] = declared_reads(self.props_generator)
+    
+    def specs(self, summary: SummaryStruct, rule_name: str) -> List[Dict[str, Any]]:
+        """
+        Component specs this action contributes for a summary.
+        
+        Besides the keys consumed by the manifest generator, each spec carries
+        `reads` (see above) and `element`: (for_each field, index) for
+        per-element components, otherwise None.
+        """
+        if self._elements is None:
+            return [{
+                "type": self.component_type,
+                "props_generator": self.props_generator,
+                "rendering_hints": self.rendering_hints,
+                "rule": rule_name,
+                "key": None,
+                "reads": self.reads,
+                "element": None,
+            }]
+        generator = self.props_generator
+        return [
+            {
+                "type": self.component_type,
+                # Capture the element in the closure properly
+                "props_generator": (lambda e=element: lambda s: generator(s, e))(),
+                "rendering_hints": self.rendering_hints,
+                "rule": rule_name,
+                "key": getattr(element, self.key) if self.key else None,
+                "reads": self.reads,
+                "element": (self.for_each, index),
+            }
+            for index, element in enumerate(self._elements(summary))
+        ]
+
+
+class RuleSet:
+    """Compiled, immutable rules (sorted by priority) plus their fingerprint"""
+    
+    def __init__(self, rules: List[Rule], fingerprint: str, source: str, stamp: Tuple[int, int]):
+        self.rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self.fingerprint = fingerprint
+        self.source = source
+        self.stamp = stamp  # (mtime_ns, size) of the file it was compiled from
+        self.loaded_at = time.time()
+    
+    def evaluate(self, summary: SummaryStruct, previous: Optional[Dict[str, bool]] = None,
+                 changed: Optional[FrozenSet[str]] = None) -> Dict[str, bool]:
+        """
+        {rule name: condition result}. With `previous` results and the set of
+        `changed` fields, only conditions reading a changed field are re-run.
+        """
+        if previous is None or changed is None:
+            return {rule.name: rule.applies_to(summary) for rule in self.rules}
+        return {
+            rule.name: (previous[rule.name]
+                        if rule.name in previous and rule.reads is not None and not (rule.reads & changed)
+                        else rule.applies_to(summary))
+            for rule in self.rules
+        }
+    
+    def expand(self, summary: SummaryStruct, matches: Dict[str, bool]) -> List[Dict[str, Any]]:
+        """Component specs for the rules that matched (same order as apply_rules)"""
+        components: List[Dict[str, Any]] = []
+        for rule in self.rules:
+            if matches[rule.name]:
+                rule.emit(components, summary)
+        return components
 
 
 class RulesEngine:
     """Evaluates rules and generates component specifications"""
     
-    def __init__(self):
-        self.rules = self._build_rules()
+    def __init__(self, rules_file: Optional[str] = None, profiler: Optional[RulesProfiler] = None):
+        self.rules_file = rules_file or os.getenv("RULES_FILE") or DEFAULT_RULES_FILE
+        self.profiler = profiler or get_rules_profiler()
+        self._rule_set = self._build_rules()
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.last_reload_error: Optional[str] = None
+    
+    @property
+    def rules(self) -> List[Rule]:
+        return self._rule_set.rules
     
-    def _build_rules(self) -> List[Rule]:
+    @property
+    def rule_set(self) -> RuleSet:
+        """Current compiled rules (callers needing several passes hold on to one)"""
+        return self._rule_set
+    
+    @property
+    def fingerprint(self) -> str:
+        return self._rule_set.fingerprint
+    
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.rules_file)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _fingerprint(self, document: bytes) -> str:
         """
-        Construct the declarative rules for manifest generation.
+        Short digest of the rules file, the biomarker correlation data and the
+        source of this module, the DSL and the correlation index, which cover
+        props generators and condition functions.
+        Used to invalidate cached manifests when the rules change.
+        """
+        digest = hashlib.sha256(document)
+        digest.update(get_correlation_index().fingerprint.encode("utf-8"))
+        for module in (sys.modules[__name__], rules_dsl, correlations):
+            try:
+                digest.update(inspect.getsource(module).encode("utf-8"))
+            except (OSError, TypeError):
+                pass  # Source unavailable (e.g. frozen build); rules file only
+        return digest.hexdigest()[:16]
+    
+    def _build_rules(self) -> RuleSet:
+        """
+        Load and compile the declarative rules for manifest generation.
         
         Rules are evaluated in order of priority (highest first).
-        Rules can add, modify, or merge components based on conditions.
+        Raises ValueError if the file has an invalid rule.
         """
         
-        return [
-            # ================================================================
-            # SEVERITY RULES - Handle CRITICAL/HIGH findings
-            # ================================================================
-            
-            Rule(
-                name="critical_alert_prepend",
-                condition=lambda s: self._has_critical_findings(s),
-                priority=100,
-                actions=[
-                    Action(
-                        action_type="prepend",
-                        component_type="CriticalAlert",
-                        props_generator=self._props_critical_alert,
-                    )
-                ]
-            ),
-            
-            Rule(
-                name="render_insight_header",
-                condition=lambda s: True, # Always render header to show patient info
-                priority=90,
-                actions=[
-                    Action(
-                        action_type="prepend",
-                        component_type="InsightHeader",
-                        props_generator=self._props_insight_header,
-                    )
-                ]
-            ),
-            
-            # ================================================================
-            # ABNORMAL FINDINGS RENDERING
-            # ================================================================
-            
-            Rule(
-                name="render_abnormal_findings",
-                condition=lambda s: len(s.clinical_summary.abnormal_readings) > 0,
-                priority=80,
-                actions=[]  # Will be dynamically built in apply_rules
-            ),
-            
-            # ================================================================
-            # GROUPING RULES - Merge related findings
-            # ================================================================
-            
-            Rule(
-                name="group_lipid_panel",
-                condition=lambda s: self._count_findings_by_category(s, "Lipid") > 2,
-                priority=70,
-                actions=[
-                    Action(
-                        action_type="append",
-                        component_type="MetricAccordion",
-                        props_generator=self._props_lipid_group,
-                    )
-                ]
-            ),
-            
-            Rule(
-                name="group_metabolic_findings",
-                condition=lambda s: self._count_findings_by_system(s, "Metabolic") > 3,
-                priority=65,
-                actions=[
-                    Action(
-                        action_type="append",
-                        component_type="MetricAccordion",
-                        props_generator=self._props_metabolic_group,
-                    )
-                ]
-            ),
-            
-            # ================================================================
-            # FOLLOW-UP & ACTIONS
-            # ================================================================
-            
-            Rule(
-                name="render_action_timeline",
-                condition=lambda s: len(s.management_plan.follow_up_tests) > 0,
-                priority=60,
-                actions=[
-                    Action(
-                        action_type="append",
-                        component_type="SectionDivider",
-                        props_generator=lambda s: {"title": "📋 Recommended Follow-Up Tests"},
-                    ),
-                    Action(
-                        action_type="append",
-                        component_type="ActionTimeline",
-                        props_generator=self._props_action_timeline,
-                    )
-                ]
-            ),
-            
-            Rule(
-                name="render_lifestyle_guidelines",
-                condition=lambda s: len(s.management_plan.lifestyle_modifications) > 0,
-                priority=55,
-                actions=[
-                    Action(
-                        action_type="append",
-                        component_type="SectionDivider",
-                        props_generator=lambda s: {"title": "💡 Lifestyle Recommendations"},
-                    ),
-                    Action(
-                        action_type="append",
-                        component_type="GuidelineTable",
-                        props_generator=self._props_lifestyle_table,
-                    )
-                ]
-            ),
-            
-            # ================================================================
-            # REASSURANCE SECTION - Normal findings
-            # ================================================================
-            
-            Rule(
-                name="render_reassurance",
-                condition=lambda s: len(s.clinical_summary.normal_readings) > 0,
-                priority=50,
-                actions=[
-                    Action(
-                        action_type="append",
-                        component_type="SectionDivider",
-                        props_generator=lambda s: {"title": "✅ Good News - Normal Results"},
-                    ),
-                    Action(
-                        action_type="append",
-                        component_type="ReassuranceGrid",
-                        props_generator=self._props_reassurance_grid,
-                    )
-                ]
-            ),
-            
-            # ================================================================
-            # LOW-RISK TONE ADAPTATION
-            # ================================================================
-            
-            Rule(
-                name="low_risk_lead_with_reassurance",
-                condition=lambda s: s.clinical_summary.overall_health_status.risk_assessment == "Low",
-                priority=40,
-                actions=[
-                    # Prepend ReassuranceGrid if not already there
-                    Action(
-                        action_type="prepend",
-                        component_type="ReassuranceGrid",
-                        props_generator=self._props_reassurance_grid,
-                    )
-                ]
-            ),
-        ]
+        stamp = self._file_stamp()
+        with open(self.rules_file, "rb") as f:
+            document = f.read()
+        rules = [self._compile_rule(spec) for spec in json.loads(document)["rules"]]
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate rule names in {self.rules_file}")
+        return RuleSet(rules, self._fingerprint(document), self.rules_file, stamp)
+    
+    def _compile_rule(self, spec: Dict[str, Any]) -> Rule:
+        name = spec.get("name")
+        if not name:
+            raise ValueError(f"Rule without a name: {spec}")
+        try:
+            actions = [self._compile_action(action) for action in spec.get("actions", [])]
+            return Rule(
+                name=name,
+                condition=compile_condition(spec.get("when", "true")),
+                actions=actions,
+                priority=int(spec.get("priority", 0)),
+                when=spec.get("when", "true"),
+                category=spec.get("category"),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Rule {name}: {e}") from None
+    
+    def _compile_action(self, spec: Dict[str, Any]) -> Action:
+        action_type = spec.get("op", "append")
+        if action_type not in ACTION_TYPES:
+            raise ValueError(f"Unknown action {action_type!r} (expected one of {ACTION_TYPES})")
+        for_each = spec.get("for_each")
+        if for_each is not None and for_each not in FIELDS:
+            raise ValueError(f"Unknown for_each field {for_each!r}")
+        
+        props = spec.get("props", {})
+        if isinstance(props, str):
+            props_generator = getattr(self, f"_props_{props}", None)
+            if props_generator is None:
+                raise ValueError(f"Unknown props generator {props!r}")
+        elif isinstance(props, dict):
+            props_generator = reads()(lambda s, *_, literal=props: copy.deepcopy(literal))
+        else:
+            raise ValueError(f"props must be a generator name or a mapping, got {props!r}")
+        
+        return Action(
+            action_type=action_type,
+            component_type=spec["component"],
+            props_generator=props_generator,
+            rendering_hints=spec.get("rendering_hints"),
+            for_each=for_each,
+            key=spec.get("key"),
+        )
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile the rules file if it changed and swap it in.
+        
+        Returns True if new rules were installed. Compile errors keep the
+        current rules and are kept in last_reload_error.
+        """
+        with self._reload_lock:
+            try:
+                if not force and self._file_stamp() == self._rule_set.stamp:
+                    return False
+                rule_set = self._build_rules()
+            except (OSError, ValueError) as e:
+                self.last_reload_error = str(e)
+                print(f"⚠️ Rules reload failed, keeping current rules: {e}")
+                return False
+            self._rule_set = rule_set  # Atomic swap; in-flight apply_rules calls keep the old set
+            self.reloads += 1
+            self.last_reload_error = None
+            return True
+    
+    def rules_info(self) -> Dict[str, Any]:
+        rule_set = self._rule_set
+        return {
+            "file": rule_set.source,
+            "fingerprint": rule_set.fingerprint,
+            "loaded_at": rule_set.loaded_at,
+            "rules": [{"name": r.name, "priority": r.priority, "when": r.when} for r in rule_set.rules],
+            "reloads": self.reloads,
+            "last_reload_error": self.last_reload_error,
+            "correlations": get_correlation_index().stats(),
+        }
     
-    def apply_rules(self, summary: SmartSummary) -> List[Dict[str, Any]]:
+    def apply_rules(self, summary: SummaryStruct) -> List[Dict[str, Any]]:
         """
         Apply all matching rules to generate component specifications.
         
         Process:
-        1. Sort rules by priority (highest first)
+        1. Take the current rule set (already sorted by priority)
         2. For each rule, check condition
         3. If true, execute actions to add/modify components
         4. Return final component list
         
         Args:
-            summary: SmartSummary to analyze
+            summary: SummaryStruct (or pydantic SmartSummary) to analyze
             
         Returns:
-            List of component specs: {type, props_generator, rendering_hints}
+            List of component specs: {type, props_generator, rendering_hints, rule, key}
+            (rule/key identify the component for stable IDs; key is the finding's
+            parameter name for per-finding components, otherwise None)
         """
         
-        # Sort rules by priority (highest first)
-        sorted_rules = sorted(self.rules, key=lambda r: r.priority, reverse=True)
+        # One read of the current rule set; a concurrent reload swaps the whole object
+        rule_set = self._rule_set
+        if self.profiler.enabled:
+            return self._apply_rules_profiled(rule_set, summary)
         
         # Track components in insertion order
         components: List[Dict[str, Any]] = []
         
         # Apply rules
-        for rule in sorted_rules:
+        for rule in rule_set.rules:
             if rule.applies_to(summary):
-                # Special handling for abnormal findings
-                if rule.name == "render_abnormal_findings":
-                    components.append({
-                        "type": "SectionDivider",
-                        "props_generator": lambda s: {"title": "⚠️ Findings Requiring Attention"},
-                        "rendering_hints": {},
-                    })
-                    for finding in summary.clinical_summary.abnormal_readings:
-                        # Capture finding in closure properly
-                        components.append({
-                            "type": "MetricAccordion",
-                            "props_generator": (lambda f=finding: lambda s: self._props_metric_accordion(s, f))(),
-                            "rendering_hints": {},
-                        })
-                else:
-                    # Regular rule action processing
-                    for action in rule.actions:
-                        if action.action_type == "prepend":
-                            components.insert(0, {
-                                "type": action.component_type,
-                                "props_generator": action.props_generator,
-                                "rendering_hints": action.rendering_hints,
-                            })
-                        elif action.action_type == "append":
-                            components.append({
-                                "type": action.component_type,
-                                "props_generator": action.props_generator,
-                                "rendering_hints": action.rendering_hints,
-                            })
+                rule.emit(components, summary)
+        
+        return components
+    
+    def _apply_rules_profiled(self, rule_set: RuleSet, summary: SummaryStruct) -> List[Dict[str, Any]]:
+        """apply_rules with condition timing and timed props generators (see rules_profiler.py)"""
+        profiler = self.profiler
+        components: List[Dict[str, Any]] = []
+        
+        for rule in rule_set.rules:
+            started = time.perf_counter()
+            matched = rule.applies_to(summary)
+            profiler.record_condition(rule.name, time.perf_counter() - started, matched)
+            if matched:
+                def timed(spec, rule_name=rule.name):
+                    spec["props_generator"] = profiler.timed_props(rule_name, spec["type"], spec["props_generator"])
+                rule.emit(components, summary, wrap=timed)
         
         return components
     
@@ -286,38 +382,26 @@ class RulesEngine:
     # HELPER METHODS - Condition checks
     # ========================================================================
     
-    def _has_critical_findings(self, summary: SmartSummary) -> bool:
+    def _has_critical_findings(self, summary: SummaryStruct) -> bool:
         """Check if any finding has CRITICAL status"""
-        return any(f.risk_level == "CRITICAL" for f in summary.clinical_summary.abnormal_readings)
+        return rules_dsl.any_risk(summary.clinical_summary.abnormal_readings, "CRITICAL")
     
-    def _count_findings_by_category(self, summary: SmartSummary, category: str) -> int:
+    def _count_findings_by_category(self, summary: SummaryStruct, category: str) -> int:
         """Count findings matching a category keyword"""
-        return sum(1 for f in summary.clinical_summary.abnormal_readings if category in f.parameter_name)
-    
-    def _count_findings_by_system(self, summary: SmartSummary, system: str) -> int:
-        """Count findings by biological system"""
-        # Checks if 'system' field matches or if parameter is in known keywords
-        count = 0
-        system_keywords = {
-            "Metabolic": ["Glucose", "HbA1c", "Triglycerides", "Cholesterol"],
-            "Hematological": ["WBC", "RBC", "Hemoglobin", "Platelets"],
-            "Renal": ["Creatinine", "BUN", "eGFR"],
-            "Cardiac": ["Troponin", "BNP"],
-        }
-        keywords = system_keywords.get(system, [])
-        
-        for f in summary.clinical_summary.abnormal_readings:
-            if f.system == system:
-                count += 1
-            elif any(k in f.parameter_name for k in keywords):
-                count += 1
-        return count
+        return rules_dsl.count_containing(summary.clinical_summary.abnormal_readings, category)
+    
+    def _count_findings_by_system(self, summary: SummaryStruct, system: str) -> int:
+        """Count findings by biological system (system field or known parameter keywords)"""
+        return rules_dsl.count_system(summary.clinical_summary.abnormal_readings, system)
     
     # ========================================================================
     # PROPS GENERATORS - Build component props from SmartSummary
+    # (@reads lists the summary fields used; per-element generators only
+    # read their element)
     # ========================================================================
     
-    def _props_critical_alert(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("abnormal")
+    def _props_critical_alert(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for CriticalAlert component"""
         critical_findings = [f for f in summary.clinical_summary.abnormal_readings if f.risk_level == "CRITICAL"]
         return {
@@ -333,7 +417,8 @@ class RulesEngine:
             "urgency_level": "CRITICAL"
         }
     
-    def _props_insight_header(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("patient", "risk_assessment", "key_concerns")
+    def _props_insight_header(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for InsightHeader component"""
         return {
             "patient_info": {
@@ -343,10 +428,11 @@ class RulesEngine:
             },
             "risk_level": summary.clinical_summary.overall_health_status.risk_assessment,
             "overall_concerns": summary.clinical_summary.overall_health_status.key_concerns,
-            "date": summary.patient_info.report_date if summary.patient_info else "Today"
+            "date": (summary.patient_info.report_date if summary.patient_info else None) or "Today"
         }
     
-    def _props_metric_accordion(self, summary: SmartSummary, finding: AbnormalReading) -> Dict[str, Any]:
+    @reads()
+    def _props_metric_accordion(self, summary: SummaryStruct, finding: AbnormalReadingStruct) -> Dict[str, Any]:
         """Generate props for MetricAccordion component"""
         return {
             "parameter": finding.parameter_name,
@@ -358,19 +444,21 @@ class RulesEngine:
             "correlation": {} 
         }
     
-    def _props_lipid_group(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("abnormal")
+    def _props_lipid_group(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for grouped lipid findings"""
         lipid_findings = [f for f in summary.clinical_summary.abnormal_readings if "Lipid" in f.parameter_name or "Triglycerides" in f.parameter_name or "Cholesterol" in f.parameter_name]
         return {
             "parameter": "Lipid Panel",
             "value": f"{len(lipid_findings)} abnormalities",
             "status": "HIGH" if any(f.risk_level == "HIGH" for f in lipid_findings) else "LOW",
-            "causes": list(set(c for f in lipid_findings for c in f.causes)),
-            "effects": list(set(e for f in lipid_findings for e in f.effects)),
+            "causes": list(dict.fromkeys(c for f in lipid_findings for c in f.causes)),
+            "effects": list(dict.fromkeys(e for f in lipid_findings for e in f.effects)),
             "clinical_note": "Multiple lipid abnormalities detected",
         }
     
-    def _props_metabolic_group(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("abnormal")
+    def _props_metabolic_group(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for grouped metabolic findings"""
         metabolic_keywords = ["Glucose", "HbA1c", "Triglycerides"]
         metabolic_findings = [f for f in summary.clinical_summary.abnormal_readings if any(k in f.parameter_name for k in metabolic_keywords)]
@@ -378,12 +466,29 @@ class RulesEngine:
             "parameter": "Metabolic Syndrome Indicators",
             "value": f"{len(metabolic_findings)} abnormalities",
             "status": "HIGH" if any(f.risk_level in ["CRITICAL", "HIGH"] for f in metabolic_findings) else "LOW",
-            "causes": list(set(c for f in metabolic_findings for c in f.causes)),
-            "effects": list(set(e for f in metabolic_findings for e in f.effects)),
+            "causes": list(dict.fromkeys(c for f in metabolic_findings for c in f.causes)),
+            "effects": list(dict.fromkeys(e for f in metabolic_findings for e in f.effects)),
             "clinical_note": "Pattern suggests metabolic dysfunction",
         }
     
-    def _props_action_timeline(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads()
+    def _props_trend_chart(self, summary: SummaryStruct, history: ParameterHistoryStruct) -> Dict[str, Any]:
+        """Generate props for one TrendChart (a parameter's earlier values and this report's)"""
+        return {
+            "title": f"{history.parameter_name} ({history.unit})" if history.unit else history.parameter_name,
+            "data": history.points,
+        }
+    
+    @reads("abnormal")
+    def _props_correlation_map(self, summary: SummaryStruct) -> Dict[str, Any]:
+        """Generate props for CorrelationMap (known relationships among abnormal findings)"""
+        return {
+            **get_correlation_index().subgraph(summary.clinical_summary.abnormal_readings),
+            "title": "How Your Findings Are Connected",
+        }
+    
+    @reads("follow_ups")
+    def _props_action_timeline(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for ActionTimeline component"""
         return {
             "events": [
@@ -397,7 +502,8 @@ class RulesEngine:
             ]
         }
     
-    def _props_lifestyle_table(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("lifestyle")
+    def _props_lifestyle_table(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for GuidelineTable (lifestyle)"""
         return {
             "headers": ["Category", "Recommendation"],
@@ -412,7 +518,8 @@ class RulesEngine:
             "themeColor": "green"
         }
     
-    def _props_reassurance_grid(self, summary: SmartSummary) -> Dict[str, Any]:
+    @reads("normal")
+    def _props_reassurance_grid(self, summary: SummaryStruct) -> Dict[str, Any]:
         """Generate props for ReassuranceGrid component"""
         return {
             "items": [
@@ -424,3 +531,23 @@ class RulesEngine:
                 for f in summary.clinical_summary.normal_readings
             ]
         }
+
+
+def start_rules_watcher(engine: RulesEngine, interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """
+    Poll the engine's rules file and hot-reload it on change (daemon thread).
+    
+    interval defaults to RULES_RELOAD_SECONDS; 0 disables watching.
+    """
+    interval = interval if interval is not None else float(os.getenv("RULES_RELOAD_SECONDS", "0"))
+    if interval <= 0:
+        return None
+    
+    def watch():
+        while True:
+            time.sleep(interval)
+            engine.reload()
+    
+    thread = threading.Thread(target=watch, name="rules-watcher", daemon=True)
+    thread.start()
+    return thread
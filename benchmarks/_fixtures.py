@@ -0,0 +1,105 @@
+"""
+Shared synthetic data for the benchmark scripts.
+
+Every benchmark adds backend/ to sys.path by importing this module first.
+"""
+
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Biomarkers seen in real reports: (name, system, units, normal range)
+BIOMARKERS = [
+    ("HbA1c", "Metabolic", "%", "4.00-5.60"),
+    ("Glucose Fasting", "Metabolic", "mg/dL", "70-100"),
+    ("Triglycerides", "Metabolic", "mg/dL", "<150"),
+    ("Total Cholesterol", "Metabolic", "mg/dL", "<200"),
+    ("LDL Cholesterol", "Metabolic", "mg/dL", "<100"),
+    ("HDL Cholesterol", "Metabolic", "mg/dL", ">40"),
+    ("Hemoglobin", "Hematological", "g/dL", "13.0-17.0"),
+    ("WBC Count", "Hematological", "10^3/uL", "4.0-10.0"),
+    ("Platelets", "Hematological", "10^3/uL", "150-410"),
+    ("Creatinine", "Renal", "mg/dL", "0.70-1.30"),
+    ("eGFR", "Renal", "mL/min/1.73m2", ">59"),
+    ("Urea", "Renal", "mg/dL", "13.00-43.00"),
+    ("Troponin I", "Cardiac", "ng/mL", "<0.04"),
+    ("BNP", "Cardiac", "pg/mL", "<100"),
+    ("TSH", "Endocrine", "mIU/L", "0.4-4.0"),
+    ("Vitamin D", "Nutritional", "ng/mL", "30-100"),
+    ("Vitamin B12", "Nutritional", "pg/mL", "211-911"),
+    ("ALT (SGPT)", "Hepatic", "U/L", "10.00-49.00"),
+    ("AST (SGOT)", "Hepatic", "U/L", "15.00-40.00"),
+    ("Uric Acid", "Renal", "mg/dL", "3.50-7.20"),
+]
+
+RISK_LEVELS = ["CRITICAL", "HIGH", "MODERATE", "LOW"]
+
+
+def _name(index):
+    name, system, units, normal_range = BIOMARKERS[index % len(BIOMARKERS)]
+    suffix = f" #{index // len(BIOMARKERS)}" if index >= len(BIOMARKERS) else ""
+    return name + suffix, system, units, normal_range
+
+
+def make_summary(n_abnormal=10, n_normal=20, n_followups=4, n_lifestyle=4, seed=0, risk="High"):
+    """Build a SmartSummary-shaped dict of the requested size"""
+    rng = random.Random(seed)
+    abnormal = []
+    for i in range(n_abnormal):
+        name, system, units, normal_range = _name(i)
+        abnormal.append({
+            "parameter_name": name,
+            "value": f"{rng.uniform(1, 300):.1f}",
+            "units": units,
+            "normal_range": normal_range,
+            "status": rng.choice(["HIGH", "LOW"]),
+            "risk_level": rng.choice(RISK_LEVELS),
+            "system": system,
+            "causes": [f"Cause {j} for {name}" for j in range(3)],
+            "effects": [f"Effect {j} of {name}" for j in range(3)],
+            "clinical_note": f"{name} is outside the reference range and should be reviewed.",
+        })
+    normal = []
+    for i in range(n_normal):
+        name, _, units, normal_range = _name(i + n_abnormal)
+        normal.append({
+            "parameter_name": name,
+            "value": f"{rng.uniform(1, 300):.1f}",
+            "units": units,
+            "normal_range": normal_range,
+            "clinical_interpretation": f"{name} is within the healthy range.",
+        })
+    return {
+        "patient_info": {
+            "name": f"Patient {seed}",
+            "age": 30 + seed % 50,
+            "gender": "Female" if seed % 2 else "Male",
+            "test_package_name": "Comprehensive Health Check",
+            "report_date": "2025-07-06",
+        },
+        "clinical_summary": {
+            "abnormal_readings": abnormal,
+            "normal_readings": normal,
+            "overall_health_status": {
+                "risk_assessment": risk,
+                "key_concerns": [a["parameter_name"] for a in abnormal[:3]],
+                "immediate_action_items": ["Consult physician"],
+            },
+        },
+        "management_plan": {
+            "follow_up_tests": [
+                {"timeline": t, "recommended_tests": f"Repeat panel {i}", "rationale": "Confirm trend"}
+                for i, t in enumerate((["Immediate", "1 Week", "1 Month", "3 Months"] * n_followups)[:n_followups])
+            ],
+            "lifestyle_modifications": [
+                {"category": c, "recommendations": f"{c} recommendation {i}"}
+                for i, c in enumerate((["Diet", "Exercise", "Sleep", "Stress"] * n_lifestyle)[:n_lifestyle])
+            ],
+            "medication_considerations": [],
+        },
+        "detailed_analysis": [],
+    }
@@ -0,0 +1,93 @@
+"""
+Columnar batch rules evaluation vs the per-summary loop.
+
+For each batch size, times:
+- per-object: RuleSet.evaluate per summary (conditions), then
+              plan_from_summary per summary (conditions + component IDs)
+- batch:      SummaryTable load, BatchEvaluator.evaluate (conditions),
+              then BatchEvaluator.plans (component IDs in bulk)
+
+Batches reuse a pool of --distinct summaries (100k distinct SmartSummary
+models would need several GB); both paths do the same work per summary
+either way. Results are checked against the per-object loop before timing.
+
+Usage:
+    python benchmarks/bench_batch_rules.py [--sizes 10000 100000] [--distinct 2000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from batch_rules import BatchEvaluator, SummaryTable
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator
+
+
+def best_of(repeat, function):
+    """(best seconds, last result); GC paused so collections don't land on one side"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--distinct", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pool = [
+        SmartSummary(**make_summary(n_abnormal=i % 25, n_normal=i % 40, n_followups=i % 4,
+                                    n_lifestyle=i % 3, seed=i, risk=("Low", "Moderate", "High", "Critical")[i % 4]))
+        for i in range(args.distinct)
+    ]
+    generator = UIManifestGenerator()
+    rule_set = generator.rules_engine.rule_set
+    evaluator = BatchEvaluator(rule_set)
+
+    check = SummaryTable(pool)
+    matches = evaluator.evaluate(check)
+    plans = evaluator.plans(check, matches)
+    for i, summary in enumerate(pool):
+        assert {name: column[i] for name, column in matches.items()} == rule_set.evaluate(summary), \
+            f"condition results differ for summary {i}"
+        assert plans[i] == tuple((item.id, item.type, item.rule, item.key)
+                                 for item in generator.plan_from_summary(summary)), f"plan differs for summary {i}"
+    print(f"{len(rule_set.rules)} rules, {len(evaluator.vectorized)} vectorized; "
+          f"results match the per-object loop on {len(pool)} summaries\n")
+
+    print(f"{'summaries':>10} {'path':<12} {'load ms':>9} {'conditions ms':>14} {'plans ms':>11} "
+          f"{'summaries/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        summaries = [pool[i % len(pool)] for i in range(size)]
+
+        loop_conditions, _ = best_of(args.repeat, lambda: [rule_set.evaluate(s) for s in summaries])
+        loop_plans, _ = best_of(args.repeat, lambda: [generator.plan_from_summary(s) for s in summaries])
+
+        load, table = best_of(args.repeat, lambda: SummaryTable(summaries))
+        batch_conditions, matches = best_of(args.repeat, lambda: evaluator.evaluate(table))
+        batch_plans, _ = best_of(args.repeat, lambda: evaluator.plans(table, matches))
+
+        batch_total = load + batch_conditions + batch_plans
+        print(f"{size:>10} {'per-object':<12} {'-':>9} {loop_conditions * 1000:>14.1f} {loop_plans * 1000:>11.1f} "
+              f"{size / loop_plans:>12,.0f} {'':>8}")
+        print(f"{size:>10} {'batch':<12} {load * 1000:>9.1f} {batch_conditions * 1000:>14.1f} "
+              f"{batch_plans * 1000:>11.1f} {size / batch_total:>12,.0f} {loop_plans / batch_total:>7.1f}x")
+        print(f"{'':>10} conditions only: {loop_conditions / (load + batch_conditions):.1f}x with load, "
+              f"{loop_conditions / batch_conditions:.1f}x on a loaded table\n")
+        del summaries, table, matches
+
+
+if __name__ == "__main__":
+    main()
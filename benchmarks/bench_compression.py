@@ -0,0 +1,89 @@
+"""
+Compression CPU cost vs bytes saved for manifest responses, per encoding.
+
+Bodies are built from summaries the dictionary was *not* trained on
+(train_manifest_dictionary.py uses seeds >= 10000), in the default wire
+encoding (full / rows) and the compact + columnar one.
+
+Usage:
+    python benchmarks/bench_compression.py [--samples 50] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from compression import brotli, compress_body, get_manifest_dictionary, zstandard
+from components import get_schema_export_json
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator, canonical_json, encode_items
+
+# (label, abnormal, normal)
+SIZES = [("small", 3, 10), ("medium", 12, 40), ("large", 60, 200)]
+
+
+def decompress(body, coding):
+    if coding == "dcz":
+        return get_manifest_dictionary().decompress(body)
+    if coding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(body)
+    if coding == "br":
+        return brotli.decompress(body)
+    return gzip.decompress(body)
+
+
+def build_bodies(generator, n_abnormal, n_normal, samples, manifest_format, props_encoding):
+    bodies = []
+    for seed in range(samples):
+        summary = SmartSummary(**make_summary(n_abnormal, n_normal, seed=seed))
+        items = [item.model_dump() for item in generator.generate_from_summary(summary).items]
+        hints, encoded = encode_items(items, manifest_format, props_encoding)
+        bodies.append(canonical_json({"ui_manifest": encoded} if hints is None else {"hints": hints, "ui_manifest": encoded}))
+    return bodies
+
+
+def measure(bodies, coding, repeat):
+    compressed = [compress_body(b, coding) for b in bodies]
+    assert all(decompress(c, coding) == b for c, b in zip(compressed, bodies))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for b in bodies:
+            compress_body(b, coding)
+    compress_us = (time.perf_counter() - start) / (repeat * len(bodies)) * 1e6
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for c in compressed:
+            decompress(c, coding)
+    decompress_us = (time.perf_counter() - start) / (repeat * len(bodies)) * 1e6
+    return sum(map(len, bodies)) / len(bodies), sum(map(len, compressed)) / len(compressed), compress_us, decompress_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    codings = ["gzip"] + (["br"] if brotli else []) + (["zstd"] if zstandard else [])
+    codings += ["dcz"] if get_manifest_dictionary() else []
+    generator = UIManifestGenerator()
+
+    cases = []
+    for label, n_abnormal, n_normal in SIZES:
+        for manifest_format, props_encoding in (("full", "rows"), ("compact", "columnar")):
+            bodies = build_bodies(generator, n_abnormal, n_normal, args.samples, manifest_format, props_encoding)
+            cases.append((f"{label} {manifest_format}/{props_encoding}", bodies))
+    cases.append(("schema-export", [get_schema_export_json()]))
+
+    print(f"{'body':<26} {'coding':<6} {'raw B':>8} {'out B':>8} {'ratio':>6} {'comp us':>8} {'decomp us':>9} {'us/KB saved':>11}")
+    for name, bodies in cases:
+        for coding in codings:
+            raw, out, comp_us, decomp_us = measure(bodies, coding, args.repeat)
+            per_kb = comp_us / max((raw - out) / 1024, 1e-9)
+            print(f"{name:<26} {coding:<6} {raw:>8.0f} {out:>8.0f} {raw / out:>6.2f} {comp_us:>8.1f} {decomp_us:>9.1f} {per_kb:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
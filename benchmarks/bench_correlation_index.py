@@ -0,0 +1,144 @@
+"""
+Biomarker correlation index: name lookup, subgraph build and memory.
+
+- lookup:   CorrelationIndex.resolve over report-style parameter names
+            (aliases, casing, "Name (Alias)" forms, unknown names)
+- subgraph: CorrelationMap props for N findings, via the index (resolve
+            each finding, scan its neighbour slice) vs comparing every pair
+            of findings against a relationship dict
+- memory:   CSR arrays vs the same graph as a dict of dicts
+
+Usage:
+    python benchmarks/bench_correlation_index.py [--findings 10 50 200 1000] [--repeat 5]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from correlations import get_correlation_index
+from schema import AbnormalReading
+
+
+def report_names(index, count, rng):
+    """Parameter names as labs write them: labels, aliases, upper case, 'Label (alias)', unknown tests"""
+    with open(index.source) as f:
+        aliases_by_code = [biomarker.get("aliases") or [biomarker["id"]] for biomarker in json.load(f)["biomarkers"]]
+    names = []
+    for _ in range(count):
+        code = rng.randrange(len(index))
+        aliases = aliases_by_code[code]
+        style = rng.random()
+        if style < 0.1:
+            names.append(f"Unlisted Marker {rng.randrange(1000)}")
+        elif style < 0.4:
+            names.append(index.labels[code].upper())
+        elif style < 0.7:
+            names.append(f"{index.labels[code]} ({rng.choice(aliases)})")
+        else:
+            names.append(rng.choice(aliases).title())
+    return names
+
+
+def finding(name, rng):
+    return AbnormalReading(parameter_name=name, value="1", status="HIGH", causes=[], effects=[], clinical_note="",
+                           risk_level=rng.choice(["CRITICAL", "HIGH", "MODERATE", "LOW"]))
+
+
+def pairwise_subgraph(index, relationships, findings):
+    """Baseline: every pair of findings checked against the relationship dict"""
+    resolved = [(f, index.resolve(f.parameter_name)) for f in findings]
+    edges, connected = [], {}
+    for i, (a, a_id) in enumerate(resolved):
+        for b, b_id in resolved[i + 1:]:
+            if a_id is None or b_id is None or a_id == b_id:
+                continue
+            relationship = relationships.get((a_id, b_id)) or relationships.get((b_id, a_id))
+            if relationship and (relationship[0], relationship[1]) not in {(e["source"], e["target"]) for e in edges}:
+                edges.append({"source": relationship[0], "target": relationship[1],
+                              "relationship": relationship[2], "strength": relationship[3]})
+                connected.setdefault(a_id, a)
+                connected.setdefault(b_id, b)
+    return {"nodes": [{"id": i, "label": f.parameter_name, "severity": f.risk_level} for i, f in connected.items()],
+            "edges": edges}
+
+
+def deep_size(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def best_us(repeat, loops, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    index = get_correlation_index()
+    load_ms = (time.perf_counter() - start) * 1000
+    stats = index.stats()
+    print(f"{stats['biomarkers']} biomarkers, {stats['aliases']} aliases, {stats['relationships']} relationships; "
+          f"loaded in {load_ms:.2f} ms")
+
+    names = report_names(index, 10000, rng)
+    lookup_ns = []
+    for _ in range(2):  # First pass fills the resolved-name cache
+        start = time.perf_counter()
+        resolved = sum(index.resolve(name) is not None for name in names)
+        lookup_ns.append((time.perf_counter() - start) / len(names) * 1e9)
+    print(f"lookup: {lookup_ns[0]:.0f} ns/name first pass, {lookup_ns[1]:.0f} ns/name repeated, "
+          f"{resolved / len(names):.0%} resolved\n")
+
+    relationships = {}
+    for code, biomarker_id in enumerate(index.ids):
+        for i in range(index.offsets[code], index.offsets[code + 1]):
+            if index.forward[i]:
+                target = index.ids[index.neighbors[i]]
+                relationships[(biomarker_id, target)] = (
+                    biomarker_id, target, index.relationships[index.relationship[i]], round(index.strength[i], 3))
+
+    print(f"{'findings':>9} {'index us':>10} {'pairwise us':>12} {'speedup':>8} {'nodes':>6} {'edges':>6}")
+    for count in args.findings:
+        findings = [finding(name, rng) for name in report_names(index, count, rng)]
+        props = index.subgraph(findings)
+        baseline = pairwise_subgraph(index, relationships, findings)
+        assert sorted(map(str, props["edges"])) == sorted(map(str, baseline["edges"])), "edge sets differ"
+        loops = max(1, 2000 // count)
+        index_us = best_us(args.repeat, loops, lambda: index.subgraph(findings))
+        pairwise_us = best_us(args.repeat, max(1, loops // 10), lambda: pairwise_subgraph(index, relationships, findings))
+        print(f"{count:>9} {index_us:>10.1f} {pairwise_us:>12.1f} {pairwise_us / index_us:>7.1f}x "
+              f"{len(props['nodes']):>6} {len(props['edges']):>6}")
+
+    dict_of_dicts = {}
+    for (source, target), (_, _, relationship, strength) in relationships.items():
+        dict_of_dicts.setdefault(source, {})[target] = {"relationship": relationship, "strength": strength}
+        dict_of_dicts.setdefault(target, {})[source] = {"relationship": relationship, "strength": strength}
+    print(f"\nadjacency memory: CSR arrays {stats['adjacency_bytes']:,} B "
+          f"vs dict of dicts {deep_size(dict_of_dicts):,} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Event-loop lag under mixed load, per manifest executor mode.
+
+A probe coroutine sleeps 1 ms in a loop and records how late it wakes up
+while concurrent "requests" generate manifests for large summaries and
+light requests do trivial async work. Lag on the probe is what every other
+coroutine (health checks, streaming responses, ...) experiences.
+
+Usage:
+    python benchmarks/bench_event_loop_lag.py [--requests 200] [--abnormal 150] [--normal 300]
+"""
+
+import argparse
+import asyncio
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from manifest_executor import ManifestExecutor
+from metrics import percentile
+
+
+async def probe(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def light_request(latencies):
+    start = time.perf_counter()
+    await asyncio.sleep(0)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_mode(mode, workers, summaries, concurrency):
+    executor = ManifestExecutor(mode=mode, workers=workers).start()
+    lags, light = [], []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def heavy(summary):
+        async with semaphore:
+            # Inline mode mimics the old behaviour: work on the loop thread
+            if mode == "inline":
+                executor.run_sync(summary)
+            else:
+                await executor.run(summary)
+            await light_request(light)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(heavy(s) for s in summaries))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    stats = executor.stats()
+    executor.shutdown()
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "throughput": len(summaries) / elapsed,
+        "lag_p50_ms": percentile(lags, 50) * 1000,
+        "lag_p99_ms": percentile(lags, 99) * 1000,
+        "lag_max_ms": (lags[-1] if lags else 0) * 1000,
+        "queue_wait_p99_ms": stats["queue_wait"]["p99_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--abnormal", type=int, default=150)
+    parser.add_argument("--normal", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    summaries = [make_summary(args.abnormal, args.normal, seed=i) for i in range(args.requests)]
+    print(f"{args.requests} requests, {args.abnormal} abnormal / {args.normal} normal readings each, "
+          f"{args.workers} workers, concurrency {args.concurrency}")
+    print(f"{'mode':<8} {'req/s':>8} {'lag p50':>9} {'lag p99':>9} {'lag max':>9} {'wait p99':>9}")
+    for mode in ("inline", "thread", "process"):
+        r = asyncio.run(run_mode(mode, args.workers, summaries, args.concurrency))
+        print(f"{r['mode']:<8} {r['throughput']:>8.1f} {r['lag_p50_ms']:>7.2f}ms {r['lag_p99_ms']:>7.2f}ms "
+              f"{r['lag_max_ms']:>7.2f}ms {r['queue_wait_p99_ms']:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+History store at scale: batched load throughput and TrendChart lookups.
+
+Loads --rows synthetic results (patients x --parameters x --visits) through
+the store's batching writer, then times the lookup a TrendChart rule makes:
+the last --points values of --lookup-parameters parameters for one random
+patient (HistoryStore.last_values).
+
+The database is written to a temporary directory unless --db is given
+(10M rows take roughly 350 MB).
+
+Usage:
+    python benchmarks/bench_history_store.py [--rows 10000000] [--parameters 40] [--visits 5]
+                                             [--lookups 2000] [--lookup-parameters 20] [--points 10]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from history_store import LAST_VALUES_SQL, HistoryStore, parameter_key
+from metrics import percentile
+
+DAY = 86400
+
+
+def parameter_names(count):
+    names = [name for name, _, _, _ in BIOMARKERS]
+    return (names + [f"Marker {i}" for i in range(count)])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--parameters", type=int, default=40)
+    parser.add_argument("--visits", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--lookup-parameters", type=int, default=20)
+    parser.add_argument("--points", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=50_000, help="rows per write transaction")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    directory = None
+    if args.db is None:
+        directory = tempfile.TemporaryDirectory()
+        args.db = os.path.join(directory.name, "history.db")
+    rng = random.Random(7)
+    names = parameter_names(args.parameters)
+    keys = [parameter_key(name) for name in names]
+    patients = max(1, args.rows // (args.parameters * args.visits))
+
+    store = HistoryStore(args.db, batch_size=args.batch, flush_seconds=5.0)
+    start = time.perf_counter()
+    rows = []
+    for patient in range(patients):
+        first_visit = 1_600_000_000 + rng.randrange(365) * DAY
+        for visit in range(args.visits):
+            when = first_visit + visit * 90 * DAY
+            for name, key in zip(names, keys):
+                rows.append((f"id:{patient}", key, name, when, round(rng.uniform(1, 300), 1), None, "mg/dL"))
+        if len(rows) >= args.batch:
+            store.record_rows(rows)
+            rows = []
+    store.record_rows(rows)
+    store.flush()
+    load_s = time.perf_counter() - start
+    written = store.rows_written
+    size_mb = sum(os.path.getsize(args.db + suffix) for suffix in ("", "-wal") if os.path.exists(args.db + suffix)) / 1e6
+    print(f"loaded {written:,} rows ({patients:,} patients x {args.parameters} parameters x {args.visits} visits) "
+          f"in {load_s:.1f} s: {written / load_s:,.0f} rows/s, {size_mb:,.0f} MB")
+
+    plan = sqlite3.connect(args.db).execute("EXPLAIN QUERY PLAN " + LAST_VALUES_SQL, (1, 1, 2 ** 62, 10)).fetchall()
+    print(f"query plan: {plan[0][-1]}")
+
+    for label in ("first lookups", "repeat lookups"):
+        latencies = []
+        found = 0
+        sample = random.Random(11)
+        for _ in range(args.lookups):
+            patient = f"id:{sample.randrange(patients)}"
+            wanted = sample.sample(names, min(args.lookup_parameters, len(names)))
+            started = time.perf_counter()
+            history = store.last_values(patient, wanted, limit=args.points)
+            latencies.append(time.perf_counter() - started)
+            found += sum(len(points) for points in history.values())
+        latencies.sort()
+        print(f"{label:<15} {args.lookups} x ({args.lookup_parameters} parameters, last {args.points}): "
+              f"p50 {percentile(latencies, 50) * 1000:.2f} ms  p99 {percentile(latencies, 99) * 1000:.2f} ms  "
+              f"max {latencies[-1] * 1000:.2f} ms  ({found / args.lookups:.0f} values/lookup)")
+
+    store.close()
+    if directory is not None:
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Job queue throughput: enqueue, then claim + complete from competing processes.
+
+Enqueues --jobs reports (mixed triage classes) into a fresh SQLite queue,
+then drains it with each --processes count of worker processes, every one
+looping claim -> complete with a --work-ms stand-in for the analysis. The
+LLM is not involved; this measures what the queue adds per job and how it
+holds up as workers contend for the WAL database.
+
+Reports per process count:
+- enqueue/s (single process, before draining)
+- drained jobs/s and the mean claim + complete ms per job
+- double claims (must be 0: every job completed exactly once)
+
+Usage:
+    python benchmarks/bench_job_queue.py [--jobs 500] [--processes 1 2 4] [--work-ms 2]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from job_queue import JobQueue
+
+PRIORITIES = ("ROUTINE", "ROUTINE", "ELEVATED", "CRITICAL")
+
+
+def report(i):
+    name, _, unit, normal_range = BIOMARKERS[i % len(BIOMARKERS)]
+    return {"patient_details": {"name": f"Bench Patient {i}"}, "lab_details": {}, "sample_details": {},
+            "report_results": [{"is_panel": False, "test_name": name, "value": 1.0, "unit": unit,
+                                "reference_range": normal_range, "interpretation": None}]}
+
+
+def drain(path, work_ms, ready, done):
+    """Claim and complete jobs until the queue is empty; puts (jobs, queue seconds, first claim, last finish)"""
+    queue = JobQueue(path)
+    jobs, queue_s = 0, 0.0
+    ready.wait()  # Process start-up is not queue time
+    first = time.time()
+    while True:
+        start = time.perf_counter()
+        claim = queue.claim(f"bench:{os.getpid()}")
+        queue_s += time.perf_counter() - start
+        if claim is None:
+            break
+        time.sleep(work_ms / 1000)
+        start = time.perf_counter()
+        if not queue.complete(claim, {"ui_manifest": []}):
+            raise RuntimeError(f"Lost the lease on {claim.job_id}")
+        queue_s += time.perf_counter() - start
+        jobs += 1
+    done.put((jobs, queue_s, first, time.time()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--work-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'processes':>9} {'enqueue/s':>9} {'drained/s':>9} {'queue ms/job':>12} {'double claims':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for processes in args.processes:
+            path = os.path.join(directory, f"jobs-{processes}.db")
+            queue = JobQueue(path, max_queued=args.jobs)
+            start = time.perf_counter()
+            for i in range(args.jobs):
+                queue.enqueue(report(i), PRIORITIES[i % len(PRIORITIES)])
+            enqueue_s = time.perf_counter() - start
+
+            ready, done = context.Event(), context.Queue()
+            workers = [context.Process(target=drain, args=(path, args.work_ms, ready, done))
+                       for _ in range(processes)]
+            for worker in workers:
+                worker.start()
+            time.sleep(1.0)  # Let every process import and open the database
+            ready.set()
+            results = [done.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+
+            jobs = sum(result[0] for result in results)
+            queue_ms = sum(result[1] for result in results) / max(1, jobs) * 1000
+            drain_s = max(result[3] for result in results) - min(result[2] for result in results)
+            succeeded = queue.stats()["jobs"]["succeeded"]
+            print(f"{processes:>9} {args.jobs / enqueue_s:>9,.0f} {jobs / drain_s:>9,.0f} {queue_ms:>12.2f} "
+                  f"{jobs - succeeded:>13}")
+
+
+if __name__ == "__main__":
+    main()
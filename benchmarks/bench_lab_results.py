@@ -0,0 +1,146 @@
+"""
+Lab report decoding: nested RawLabReport tree vs the flattened ResultTable.
+
+For reports of --nodes members (wide: panels of --panel-size results; deep:
+panels nested --depth levels), measures:
+
+- decode:  JSON body -> RawLabReport (json.loads + pydantic validation;
+           recursive) -> model_dump() dict tree + ResultTable.from_results,
+           vs parse_report (json.loads + table + per-row validation, as
+           POST /analyze and /jobs do)
+- memory:  traced allocations of the model objects, the dict tree and the
+           table (tracemalloc)
+- stages:  triage over the dict tree (walk + parse every value and range
+           per stage, as before) vs over the table (parsed once)
+- prompt:  json.dumps of the raw report vs of prompt_report (flat rows)
+
+Usage:
+    python benchmarks/bench_lab_results.py [--nodes 5000] [--panel-size 50] [--depth 100] [--repeat 5]
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from lab_results import ResultTable, parse_report, prompt_report
+from preclassify import classify_result, classify_row
+from schema import RawLabReport
+
+
+def result(i, rng):
+    name, _, unit, normal_range = BIOMARKERS[i % len(BIOMARKERS)]
+    return {"is_panel": False, "test_name": f"{name} {i}", "value": round(rng.uniform(1, 300), 2),
+            "value_text": None, "unit": unit, "reference_range": normal_range,
+            "interpretation": rng.choice(["Normal", "Normal", "High", "Low", None]),
+            "sample_type": "SERUM", "method": None, "test_remarks": None, "extra_details": None}
+
+
+def panel(i):
+    return {"is_panel": True, "test_name": f"PANEL {i}", "value": None, "value_text": None, "unit": None,
+            "reference_range": None, "interpretation": None, "members": []}
+
+
+def wide_report(nodes, panel_size, rng):
+    results, i = [], 0
+    while i < nodes:
+        current = panel(i)
+        i += 1
+        for _ in range(min(panel_size - 1, nodes - i)):
+            current["members"].append(result(i, rng))
+            i += 1
+        results.append(current)
+    return {"patient_details": {"name": "Bench Patient"}, "lab_details": {}, "sample_details": {},
+            "report_results": results}
+
+
+def deep_report(nodes, depth, rng):
+    """Chains of `depth` nested panels, each also holding one result"""
+    results, i = [], 0
+    while i < nodes:
+        top = current = panel(i)
+        i += 1
+        for _ in range(depth - 1):
+            if i + 2 > nodes:
+                break
+            current["members"].append(result(i, rng))
+            child = panel(i + 1)
+            current["members"].append(child)
+            current, i = child, i + 2
+        results.append(top)
+    return {"patient_details": {"name": "Bench Patient"}, "lab_details": {}, "sample_details": {},
+            "report_results": results}
+
+
+def walk(report_results):
+    """Per-stage tree walk the stages used before the table (leaf results, document order)"""
+    stack = list(reversed(report_results))
+    while stack:
+        member = stack.pop()
+        children = member.get("members")
+        if children:
+            stack.extend(reversed(children))
+        if not member.get("is_panel") or member.get("value") is not None:
+            yield member
+
+
+def best_ms(repeat, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def traced_kb(function):
+    tracemalloc.start()
+    try:
+        value = function()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, size / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--panel-size", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=100, help="panel nesting depth of the deep shape")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    shapes = [("wide", wide_report(args.nodes, args.panel_size, rng)),
+              ("deep", deep_report(args.nodes, args.depth, rng))]
+    for label, raw in shapes:
+        body = json.dumps(raw)
+        model, model_kb = traced_kb(lambda: RawLabReport.model_validate(json.loads(body)))
+        tree, tree_kb = traced_kb(model.model_dump)
+        table, table_kb = traced_kb(lambda: ResultTable.from_results(tree["report_results"]))
+        assert [m["test_name"] for m in walk(tree["report_results"])] == [table.text(table.name, i) for i in table.results]
+
+        validate_ms = best_ms(args.repeat, lambda: RawLabReport.model_validate(json.loads(body)))
+        dump_ms = best_ms(args.repeat, model.model_dump)
+        table_ms = best_ms(args.repeat, lambda: ResultTable.from_results(tree["report_results"]))
+        parse_ms = best_ms(args.repeat, lambda: parse_report(body))
+        walk_ms = best_ms(args.repeat, lambda: [classify_result(m) for m in walk(tree["report_results"])])
+        rows_ms = best_ms(args.repeat, lambda: [classify_row(table, i) for i in table.results])
+        raw_prompt, flat_prompt = json.dumps(tree), json.dumps(prompt_report(tree, table))
+
+        print(f"{label}: {len(table):,} nodes, {len(table.results):,} results, max depth {max(table.depth) + 1}, "
+              f"{len(body) / 1024:,.0f} KB JSON")
+        print(f"  decode   validate {validate_ms:.2f} ms + model_dump {dump_ms:.2f} ms | "
+              f"ResultTable.from_results {table_ms:.2f} ms | parse_report {parse_ms:.2f} ms")
+        print(f"  memory   models {model_kb:,.0f} KB, dict tree {tree_kb:,.0f} KB | "
+              f"table {table_kb:,.0f} KB traced ({table.nbytes() / 1024:,.0f} KB nbytes)")
+        print(f"  classify tree walk {walk_ms:.2f} ms | table rows {rows_ms:.2f} ms (ranges parsed at build)")
+        print(f"  prompt   raw {len(raw_prompt) / 1024:,.0f} KB | flat rows {len(flat_prompt) / 1024:,.0f} KB\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Eager vs lazy props generation when most manifest items are pruned.
+
+The summary is validated once up front; timings cover mapping + pruning +
+serializing the surviving items:
+- eager: every item is built with its props (UIManifestItem, as
+         generate_from_summary did before LazyManifest), then pruned
+- lazy:  plan_from_summary, prune, then only the survivors' props run
+
+Pruning scenarios:
+- first page:  keep the first --keep items (pagination)
+- no findings: drop per-finding MetricAccordions (e.g. a client that only
+               renders the overview)
+
+Usage:
+    python benchmarks/bench_lazy_props.py [--abnormal 50 150 400] [--normal 300] [--keep 20] [--repeat 20]
+"""
+
+import argparse
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from schema import SmartSummary
+from ui_mapper import LazyManifest, UIManifestGenerator, canonical_json
+
+
+def first_page(keep):
+    return lambda plan: LazyManifest(plan.items[:keep])
+
+
+def no_findings(plan):
+    return plan.select(lambda item: not (item.type == "MetricAccordion" and item.rule == "render_abnormal_findings"))
+
+
+def eager(generator, summary, prune):
+    plan = generator.plan_from_summary(summary)
+    built = {item.id: item.to_item() for item in plan}
+    kept = [built[item.id] for item in prune(plan)]
+    return len(kept), len(canonical_json([item.model_dump() for item in kept]))
+
+
+def lazy(generator, summary, prune):
+    kept = prune(generator.plan_from_summary(summary))
+    return len(kept), len(canonical_json([item.to_item().model_dump() for item in kept]))
+
+
+def timed(fn, *args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abnormal", type=int, nargs="+", default=[50, 150, 400])
+    parser.add_argument("--normal", type=int, default=300)
+    parser.add_argument("--keep", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = UIManifestGenerator()
+    print(f"{'abnormal':>8} {'scenario':<12} {'items':>6} {'kept':>5} {'eager ms':>9} {'lazy ms':>8} {'speedup':>8}")
+    for n_abnormal in args.abnormal:
+        summary = SmartSummary(**make_summary(n_abnormal, args.normal))
+        total = len(generator.plan_from_summary(summary))
+        for label, prune in (("first page", first_page(args.keep)), ("no findings", no_findings)):
+            eager_ms, (kept, eager_bytes) = timed(eager, generator, summary, prune, repeat=args.repeat)
+            lazy_ms, (_, lazy_bytes) = timed(lazy, generator, summary, prune, repeat=args.repeat)
+            assert eager_bytes == lazy_bytes
+            print(f"{n_abnormal:>8} {label:<12} {total:>6} {kept:>5} {eager_ms:>9.2f} {lazy_ms:>8.2f} "
+                  f"{eager_ms / lazy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
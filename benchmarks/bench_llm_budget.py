@@ -0,0 +1,71 @@
+"""
+Prompt budgeting: summarizer prompt size, full vs trimmed to key results.
+
+For reports of N results (--abnormal fraction outside their range), shows
+the estimated input tokens (MASTER_PROMPT + report) and predicted LLM
+seconds of the full prompt and of the trimmed one (abnormal results plus
+LLM_BUDGET_NORMAL_RESULTS normal ones closest to a bound), plus the time
+LLMBudget.plan() adds per request.
+
+Predictions use LLM_SECONDS_PER_1K_TOKENS (no calls measured here).
+
+Usage:
+    python benchmarks/bench_llm_budget.py [--results 20 100 400] [--abnormal 0.15] [--normal-results 7]
+"""
+
+import argparse
+import random
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from lab_results import ResultTable
+from llm_budget import LLMBudget
+from prompts import MASTER_PROMPT
+
+
+def report(n, abnormal, rng):
+    results = []
+    for i in range(n):
+        name, _, unit, normal_range = BIOMARKERS[i % len(BIOMARKERS)]
+        if normal_range[0] in "<>":
+            bound = float(normal_range[1:])
+            inside = bound * (0.5 if normal_range[0] == "<" else 1.5)
+            outside = bound * (1.5 if normal_range[0] == "<" else 0.5)
+        else:
+            low, high = (float(x) for x in normal_range.split("-"))
+            inside, outside = rng.uniform(low, high), high * 1.3
+        results.append({"is_panel": False, "test_name": f"{name} {i}", "value": round(outside if rng.random() < abnormal
+                                                                                    else inside, 2),
+                        "unit": unit, "reference_range": normal_range, "interpretation": None})
+    return {"patient_details": {"name": "Bench Patient", "age": 50, "gender": "Female"}, "lab_details": {},
+            "sample_details": {}, "report_results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--abnormal", type=float, default=0.15)
+    parser.add_argument("--normal-results", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    always = LLMBudget(latency_budget=1e-9, normal_results=args.normal_results)  # Trims whenever it can
+    print(f"{'results':>7} {'full tok':>9} {'full s':>7} {'trim tok':>9} {'trim s':>7} {'omitted':>7} {'plan ms':>8}")
+    for n in args.results:
+        raw = report(n, args.abnormal, rng)
+        table = ResultTable.from_report(raw)
+        full = LLMBudget().plan(MASTER_PROMPT, raw, table)
+        trimmed = always.plan(MASTER_PROMPT, raw, table)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            always.plan(MASTER_PROMPT, raw, table)
+        plan_ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{n:>7} {full.estimated_input_tokens:>9,} {full.predicted_seconds:>7.1f} "
+              f"{trimmed.estimated_input_tokens:>9,} {trimmed.predicted_seconds:>7.1f} {trimmed.omitted_results:>7} "
+              f"{plan_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
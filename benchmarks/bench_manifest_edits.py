@@ -0,0 +1,74 @@
+"""
+Incremental manifest update vs full regeneration after a one-field edit.
+
+For a stored summary, applies a JSON Patch changing one abnormal reading and
+compares:
+- full:        patch the dict, validate the SmartSummary, generate the whole
+               manifest and its content hash (what a re-submit costs today)
+- incremental: EditableManifest.patch (re-evaluates only dependent rules,
+               regenerates only affected props, returns a delta)
+
+Edits: a clinical note (only that finding's card changes) and a risk level
+(also the aggregate components reading abnormal results).
+
+Usage:
+    python benchmarks/bench_manifest_edits.py [--abnormal 20 100 400] [--normal 300] [--repeat 20]
+"""
+
+import argparse
+import time
+
+import jsonpatch
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from manifest_edits import SummaryStore
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator, canonical_json
+
+EDITS = {
+    "note": lambda i, n: [{"op": "replace", "path": f"/clinical_summary/abnormal_readings/{i}/clinical_note",
+                           "value": f"Reviewed ({n})"}],
+    "risk": lambda i, n: [{"op": "replace", "path": f"/clinical_summary/abnormal_readings/{i}/risk_level",
+                           "value": ("HIGH", "MODERATE")[n % 2]}],
+}
+
+
+def full(generator, summary_dict, operations):
+    patched = jsonpatch.JsonPatch(operations).apply(summary_dict)
+    manifest = generator.generate_from_summary(SmartSummary(**patched))
+    generator.validate_manifest(manifest)
+    return patched, len(canonical_json([item.model_dump() for item in manifest.items]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abnormal", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--normal", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = UIManifestGenerator()
+    print(f"{'abnormal':>8} {'edit':<5} {'full ms':>8} {'full B':>8} {'incr ms':>8} {'delta B':>8} {'props':>6}")
+    for n_abnormal in args.abnormal:
+        summary = make_summary(n_abnormal, args.normal)
+        for name, edit in EDITS.items():
+            index = n_abnormal // 2
+            start = time.perf_counter()
+            patched = summary
+            for n in range(args.repeat):
+                patched, full_bytes = full(generator, patched, edit(index, n))
+            full_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+            editable = SummaryStore().create(summary)
+            start = time.perf_counter()
+            for n in range(args.repeat):
+                delta = editable.patch(edit(index, n))
+            incr_ms = (time.perf_counter() - start) / args.repeat * 1000
+            delta_bytes = len(canonical_json({k: delta[k] for k in ("added", "removed", "updated", "order")}))
+            print(f"{n_abnormal:>8} {name:<5} {full_ms:>8.2f} {full_bytes:>8} {incr_ms:>8.2f} {delta_bytes:>8} "
+                  f"{delta['stats']['props_generated']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Payload size and serialization time per manifest wire encoding.
+
+- format full / compact: rendering_hints in every item vs a shared
+  "type@version" hints table
+- props rows / columnar: list-of-records props (ReassuranceGrid.items,
+  GuidelineTable.rows, ...) as lists of dicts vs {columns, data}
+
+Serialization time includes the encoding step itself.
+
+Usage:
+    python benchmarks/bench_manifest_format.py [--abnormal 10 40 150] [--normal 30 300] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from schema import SmartSummary
+from ui_mapper import MANIFEST_FORMATS, PROPS_ENCODINGS, UIManifestGenerator, canonical_json, encode_items
+
+
+def serialize(items, manifest_format, props_encoding):
+    hints, encoded = encode_items(items, manifest_format, props_encoding)
+    return canonical_json({"hints": hints, "ui_manifest": encoded})
+
+
+def time_per_call(items, manifest_format, props_encoding, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serialize(items, manifest_format, props_encoding)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abnormal", type=int, nargs="+", default=[10, 40, 150])
+    parser.add_argument("--normal", type=int, nargs="+", default=[30, 300])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    generator = UIManifestGenerator()
+    print(f"{'abnormal':>8} {'normal':>6} {'format':<8} {'props':<9} {'bytes':>9} {'gzip':>8} {'ser ms':>8}")
+    for n_normal in args.normal:
+        for n_abnormal in args.abnormal:
+            summary = SmartSummary(**make_summary(n_abnormal, n_normal))
+            items = [item.model_dump() for item in generator.generate_from_summary(summary).items]
+            for manifest_format in MANIFEST_FORMATS:
+                for props_encoding in PROPS_ENCODINGS:
+                    body = serialize(items, manifest_format, props_encoding)
+                    ms = time_per_call(items, manifest_format, props_encoding, args.repeat)
+                    print(f"{n_abnormal:>8} {n_normal:>6} {manifest_format:<8} {props_encoding:<9} "
+                          f"{len(body):>9} {len(gzip.compress(body)):>8} {ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
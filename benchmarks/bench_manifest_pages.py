@@ -0,0 +1,70 @@
+"""
+First-page cost of the paged manifest vs generating the full manifest.
+
+For large summaries, compares server time and payload of:
+- full:        generate_from_summary + validate + serialize every item
+- first page:  open a paged session + build/validate/serialize one page
+- all pages:   walking every page (the cost if the user scrolls to the end)
+
+Usage:
+    python benchmarks/bench_manifest_pages.py [--abnormal 50 150 400] [--normal 300] [--limit 20]
+"""
+
+import argparse
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from manifest_pages import ManifestPageStore
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator, canonical_json
+
+
+def full_manifest(generator, summary_dict):
+    manifest = generator.generate_from_summary(SmartSummary(**summary_dict))
+    generator.validate_manifest(manifest)
+    return len(canonical_json([item.model_dump() for item in manifest.items]))
+
+
+def first_page(summary_dict, limit):
+    session = ManifestPageStore().open(summary_dict)
+    return len(canonical_json(session.page(session.first_cursor(), limit)["items"]))
+
+
+def all_pages(summary_dict, limit):
+    session = ManifestPageStore().open(summary_dict)
+    cursor, total = session.first_cursor(), 0
+    while cursor:
+        page = session.page(cursor, limit)
+        total += len(canonical_json(page["items"]))
+        cursor = page["next_cursor"]
+    return total
+
+
+def timed(fn, *args, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abnormal", type=int, nargs="+", default=[50, 150, 400])
+    parser.add_argument("--normal", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = UIManifestGenerator()
+    print(f"{'abnormal':>8} {'mode':<11} {'ms':>8} {'bytes':>9}")
+    for n_abnormal in args.abnormal:
+        summary = make_summary(n_abnormal, args.normal)
+        for label, fn, fn_args in (("full", full_manifest, (generator, summary)),
+                                   ("first page", first_page, (summary, args.limit)),
+                                   ("all pages", all_pages, (summary, args.limit))):
+            ms, size = timed(fn, *fn_args)
+            print(f"{n_abnormal:>8} {label:<11} {ms:>8.2f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Progressive delivery: skeleton manifest time and the size of its LLM upgrade.
+
+For reports of N results (--abnormal fraction outside their range), builds
+the skeleton the way a progressive /analyze does (rules-only summary stored
+as an editable summary) and then replaces it with an "LLM" summary: the
+same readings enriched the way the LLM enriches them (risk levels, body
+system, causes, effects, notes, interpretations, follow-up tests and
+lifestyle advice).
+
+Reports per size:
+- skeleton ms: pre-summary + manifest (what the client waits for)
+- upgrade ms: replacing the summary and computing the delta
+- added / removed / updated / kept components of the upgrade delta (kept:
+  same ID and props, not resent)
+- delta KB vs the full enriched manifest KB
+
+History is disabled (no TrendCharts); the LLM call itself is not timed.
+
+Usage:
+    python benchmarks/bench_progressive.py [--results 20 100 400] [--abnormal 0.2] [--repeat 10]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from manifest_edits import SummaryStore
+from preclassify import build_rules_only_summary
+
+
+def report(n, abnormal, rng):
+    results = []
+    for i in range(n):
+        name, _, unit, normal_range = BIOMARKERS[i % len(BIOMARKERS)]
+        bound = float(normal_range.lstrip("<>").split("-")[-1])
+        outside = rng.random() < abnormal
+        if normal_range.startswith(">"):
+            value = bound * (0.6 if outside else 1.3)
+        else:
+            value = bound * (1.4 if outside else 0.9)
+        results.append({"is_panel": False, "test_name": f"{name} {i}", "value": round(value, 2), "unit": unit,
+                        "reference_range": normal_range, "interpretation": None})
+    return {"patient_details": {"name": "Bench Patient", "age": 50, "gender": "Female"}, "lab_details": {},
+            "sample_details": {"reported_at": "2026-01-02"}, "report_results": results}
+
+
+def enriched(skeleton, rng):
+    """What the LLM adds to the same readings"""
+    summary = json.loads(json.dumps(skeleton))
+    clinical = summary["clinical_summary"]
+    for reading in clinical["abnormal_readings"]:
+        if reading["risk_level"] != "CRITICAL":
+            reading["risk_level"] = rng.choice(["HIGH", "MODERATE", "LOW"])
+        reading["system"] = "Metabolic"
+        reading["causes"] = [f"Possible cause of {reading['parameter_name']}", "Dietary factors"]
+        reading["effects"] = ["Fatigue", "Long-term organ strain"]
+        reading["clinical_note"] = f"{reading['parameter_name']} is outside the range; recheck in 3 months."
+    for reading in clinical["normal_readings"]:
+        reading["clinical_interpretation"] = f"{reading['parameter_name']} is healthy."
+    clinical["overall_health_status"]["immediate_action_items"] = ["Book a follow-up with your physician"]
+    summary["management_plan"]["follow_up_tests"] = [
+        {"timeline": "3 months", "recommended_tests": r["parameter_name"], "rationale": "Confirm the trend"}
+        for r in clinical["abnormal_readings"][:5]]
+    summary["management_plan"]["lifestyle_modifications"] = [
+        {"category": "Diet", "recommendations": "Reduce refined carbohydrates"}]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--abnormal", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    store = SummaryStore()
+    print(f"{'results':>7} {'skeleton ms':>11} {'upgrade ms':>10} {'added':>5} {'removed':>7} {'updated':>7} "
+          f"{'kept':>5} {'delta KB':>8} {'full KB':>7}")
+    for n in args.results:
+        raw = report(n, args.abnormal, rng)
+        skeleton_s = upgrade_s = 0.0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            editable = store.create(build_rules_only_summary(raw))
+            skeleton_s += time.perf_counter() - start
+            llm_summary = enriched(editable.summary_dict, rng)
+            start = time.perf_counter()
+            delta = editable.replace(llm_summary)
+            upgrade_s += time.perf_counter() - start
+        components = delta["stats"]["components"]
+        changed = len(delta["added"]) + len(delta["updated"])
+        delta_kb = len(json.dumps({k: delta[k] for k in ("added", "removed", "updated", "order")})) / 1024
+        full_kb = len(json.dumps(editable.snapshot()["items"])) / 1024
+        print(f"{n:>7} {skeleton_s / args.repeat * 1000:>11.2f} {upgrade_s / args.repeat * 1000:>10.2f} "
+              f"{len(delta['added']):>5} {len(delta['removed']):>7} {len(delta['updated']):>7} "
+              f"{components - changed:>5} {delta_kb:>8.1f} {full_kb:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
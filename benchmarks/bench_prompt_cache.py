@@ -0,0 +1,105 @@
+"""
+Prompt prefix caching: summarizer latency, tokens and cost, MASTER_PROMPT
+inline vs as a cached prefix.
+
+Runs --calls summarizer calls against the offline stand-in model
+(LocalChatModel) for reports of each size in --results, once with the
+prefix cache disabled (system prompt sent every call) and once enabled
+(created on the first call, then referred to by handle). The stand-in
+sleeps --prefill-ms per 1k uncached input tokens (cached ones at
+CACHED_PREFILL_FACTOR of that) plus --decode-ms per 1k output tokens
+(defaults: a tenth of LOCAL_LLM_*, same ratio); tokens and cost are
+accounted by LLMBudget at its default prices.
+
+A final pass expires the handle provider-side mid-run to show the
+rejected-handle fallback (one inline call, then a new handle).
+
+Usage:
+    python benchmarks/bench_prompt_cache.py [--results 10 40 160] [--calls 10] [--prefill-ms 25] [--decode-ms 100]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from lab_results import ResultTable
+from llm_backends import LocalChatModel, LocalPrefixStore, PrefixCache
+from llm_budget import LLMBudget
+from prompts import MASTER_PROMPT
+
+
+def report(n, rng):
+    results = []
+    for i in range(n):
+        name, _, unit, normal_range = BIOMARKERS[i % len(BIOMARKERS)]
+        bound = float(normal_range.lstrip("<>").split("-")[-1])
+        results.append({"is_panel": False, "test_name": f"{name} {i}", "value": round(bound * rng.uniform(0.5, 1.5), 2),
+                        "unit": unit, "reference_range": normal_range, "interpretation": None})
+    return {"patient_details": {"name": "Bench Patient", "age": 50, "gender": "Female"}, "lab_details": {},
+            "sample_details": {}, "report_results": results}
+
+
+def run(model, cache, raw, calls):
+    """(mean seconds, LLMBudget stats) over `calls` summarizer calls"""
+    budget = LLMBudget()
+    table = ResultTable.from_report(raw)
+    elapsed = 0.0
+    for _ in range(calls):
+        handle = cache.handle(MASTER_PROMPT)
+        plan = budget.plan(MASTER_PROMPT, raw, table, prefix_cached=handle is not None)
+        question = ("human", f"Analyze this report: {plan.text}")
+        start = time.perf_counter()
+        try:
+            response = model.invoke([question], cached_content=handle) if handle else None
+        except KeyError as e:
+            cache.invalidate(handle, e)
+            response = None
+        if response is None:
+            response = model.invoke([("system", MASTER_PROMPT), question])
+        seconds = time.perf_counter() - start
+        elapsed += seconds
+        with contextlib.redirect_stdout(io.StringIO()):  # Per-call usage log
+            budget.record(response, plan, seconds)
+    return elapsed / calls, budget.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--prefill-ms", type=float, default=25.0)
+    parser.add_argument("--decode-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'results':>7} {'mode':>7} {'call ms':>8} {'uncached/call':>13} {'cached/call':>11} {'USD/1k calls':>12}")
+    for n in args.results:
+        raw = report(n, rng)
+        for mode, enabled in (("inline", False), ("cached", True)):
+            store = LocalPrefixStore()
+            model = LocalChatModel(store, args.prefill_ms, args.decode_ms)
+            seconds, stats = run(model, PrefixCache(store, enabled=enabled), raw, args.calls)
+            cached = stats["cached_input_tokens"] / args.calls
+            uncached = stats["input_tokens"] / args.calls - cached
+            print(f"{n:>7} {mode:>7} {seconds * 1000:>8.1f} {uncached:>13,.0f} {cached:>11,.0f} "
+                  f"{stats['cost_usd'] / args.calls * 1000:>12.3f}")
+
+    # Handle expiring mid-run: rejected once, then re-created
+    store = LocalPrefixStore()
+    model = LocalChatModel(store, args.prefill_ms, args.decode_ms)
+    cache = PrefixCache(store, ttl_seconds=60, refresh_seconds=30, retry_seconds=0)
+    raw = report(args.results[0], rng)
+    run(model, cache, raw, args.calls // 2)
+    store.refresh(cache._handle, -1)  # Provider-side expiry
+    run(model, cache, raw, args.calls - args.calls // 2)
+    stats = cache.stats()
+    print(f"\nexpired handle: {stats['cached_calls']} cached / {stats['inline_calls']} inline calls, "
+          f"{stats['creates']} creates, {stats['rejected_handles']} rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Compiled rules DSL vs the hand-written condition lambdas it replaced.
+
+Evaluates every rule condition over a batch of synthetic summaries:
+- lambdas: the conditions as they were written in RulesEngine._build_rules
+           (helper methods with inline generator expressions)
+- dsl:     the same conditions compiled from rules/manifest_rules.json
+
+Times are the best of --repeat passes. Also reports the full apply_rules
+time per summary and the one-off cost of compiling the rules file (what a
+hot reload pays).
+
+Usage:
+    python benchmarks/bench_rules_dsl.py [--summaries 2000] [--repeat 7]
+"""
+
+import argparse
+import gc
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from schema import SmartSummary
+from ui_rules import RulesEngine
+
+
+def legacy_conditions():
+    """Rule conditions exactly as the pre-DSL engine defined them"""
+
+    def has_critical(s):
+        return any(f.risk_level == "CRITICAL" for f in s.clinical_summary.abnormal_readings)
+
+    def count_category(s, category):
+        return sum(1 for f in s.clinical_summary.abnormal_readings if category in f.parameter_name)
+
+    def count_system(s, system):
+        count = 0
+        system_keywords = {
+            "Metabolic": ["Glucose", "HbA1c", "Triglycerides", "Cholesterol"],
+            "Hematological": ["WBC", "RBC", "Hemoglobin", "Platelets"],
+            "Renal": ["Creatinine", "BUN", "eGFR"],
+            "Cardiac": ["Troponin", "BNP"],
+        }
+        keywords = system_keywords.get(system, [])
+        for f in s.clinical_summary.abnormal_readings:
+            if f.system == system:
+                count += 1
+            elif any(k in f.parameter_name for k in keywords):
+                count += 1
+        return count
+
+    return [
+        lambda s: has_critical(s),
+        lambda s: True,
+        lambda s: len(s.clinical_summary.abnormal_readings) > 0,
+        lambda s: count_category(s, "Lipid") > 2,
+        lambda s: count_system(s, "Metabolic") > 3,
+        lambda s: len(s.management_plan.follow_up_tests) > 0,
+        lambda s: len(s.management_plan.lifestyle_modifications) > 0,
+        lambda s: len(s.clinical_summary.normal_readings) > 0,
+        lambda s: s.clinical_summary.overall_health_status.risk_assessment == "Low",
+    ]
+
+
+def evaluate(conditions, summaries):
+    """(seconds, results) for one pass; GC paused so collections don't land on one side"""
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        results = [[condition(s) for condition in conditions] for s in summaries]
+        return time.perf_counter() - start, results
+    finally:
+        gc.enable()
+
+
+def best_of(conditions, summaries, repeat):
+    return min(evaluate(conditions, summaries)[0] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summaries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    summaries = [
+        SmartSummary(**make_summary(n_abnormal=1 + i % 25, n_normal=i % 40, n_followups=i % 4,
+                                    n_lifestyle=i % 3, seed=i, risk=("Low", "Moderate", "High", "Critical")[i % 4]))
+        for i in range(args.summaries)
+    ]
+
+    start = time.perf_counter()
+    engine = RulesEngine()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    # DSL rules in file order, matching legacy_conditions()
+    by_name = {rule.name: rule for rule in engine.rules}
+    order = ["critical_alert_prepend", "render_insight_header", "render_abnormal_findings",
+             "group_lipid_panel", "group_metabolic_findings", "render_action_timeline",
+             "render_lifestyle_guidelines", "render_reassurance", "low_risk_lead_with_reassurance"]
+    dsl = [by_name[name].condition for name in order]
+
+    legacy = legacy_conditions()
+    assert evaluate(legacy, summaries)[1] == evaluate(dsl, summaries)[1], \
+        "DSL conditions disagree with the legacy lambdas"
+    legacy_s = best_of(legacy, summaries, args.repeat)
+    dsl_s = best_of(dsl, summaries, args.repeat)
+
+    apply_s = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for s in summaries:
+            engine.apply_rules(s)
+        apply_s = min(apply_s, time.perf_counter() - start)
+
+    n = len(summaries)
+    print(f"{n} summaries x {len(dsl)} conditions")
+    print(f"  lambdas      {legacy_s / n * 1e6:8.2f} us/summary")
+    print(f"  dsl          {dsl_s / n * 1e6:8.2f} us/summary  ({legacy_s / dsl_s:.2f}x)")
+    print(f"  apply_rules  {apply_s / n * 1e6:8.2f} us/summary")
+    print(f"  compile rules file: {compile_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
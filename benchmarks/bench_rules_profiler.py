@@ -0,0 +1,60 @@
+"""
+Overhead of the rules profiler on manifest generation.
+
+Times plan_from_summary + materialize (rules, props, item construction) per
+summary with profiling off and on, then prints the collected profile.
+
+Usage:
+    python benchmarks/bench_rules_profiler.py [--summaries 500] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from rules_profiler import RulesProfiler
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator
+from ui_rules import RulesEngine
+
+
+def per_summary_us(generator, summaries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in summaries:
+            generator.plan_from_summary(s).materialize()
+        best = min(best, time.perf_counter() - start)
+    return best / len(summaries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summaries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    summaries = [
+        SmartSummary(**make_summary(n_abnormal=1 + i % 25, n_normal=i % 40, n_followups=i % 4,
+                                    n_lifestyle=i % 3, seed=i, risk=("Low", "Moderate", "High", "Critical")[i % 4]))
+        for i in range(args.summaries)
+    ]
+    profiler = RulesProfiler()
+    generator = UIManifestGenerator()
+    generator.rules_engine = RulesEngine(profiler=profiler)
+
+    off = per_summary_us(generator, summaries, args.repeat)
+    profiler.enabled = True
+    on = per_summary_us(generator, summaries, args.repeat)
+
+    print(f"profiling off  {off:8.1f} us/summary")
+    print(f"profiling on   {on:8.1f} us/summary  (+{(on / off - 1) * 100:.1f}%)")
+    print(f"\n{'rule':<32} {'calls':>7} {'match':>6} {'cond p99 ms':>11} {'props p99 ms':>12} {'total ms':>9}")
+    for name, rule in profiler.stats()["rules"].items():
+        print(f"{name:<32} {rule['calls']:>7} {rule['match_rate']:>6.2f} {rule['condition']['p99_ms']:>11.3f} "
+              f"{rule['props']['p99_ms']:>12.3f} {rule['total_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
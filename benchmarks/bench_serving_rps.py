@@ -0,0 +1,98 @@
+"""
+Requests per second (and per core) on /debug/generate-manifest for the
+preloaded multi-process serving profile (backend/gunicorn.conf.py).
+
+Starts gunicorn with each requested worker count, drives it with a
+thread pool of HTTP clients and reports throughput and latency.
+
+Usage:
+    python benchmarks/bench_serving_rps.py [--workers 1 2 4] [--requests 2000] [--clients 16]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from _fixtures import BACKEND_DIR, make_summary
+from metrics import percentile
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def drive(base_url, body, total, clients):
+    latencies = []
+
+    def worker(count):
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.post("/debug/generate-manifest", content=body,
+                                       headers={"Content-Type": "application/json"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+    per_client = [total // clients + (1 if i < total % clients else 0) for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, per_client))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--abnormal", type=int, default=20)
+    parser.add_argument("--normal", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    body = json.dumps(make_summary(args.abnormal, args.normal)).encode()
+    cores = os.cpu_count() or 1
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{args.requests} requests, {args.clients} clients, {cores} core(s), "
+          f"{args.abnormal} abnormal / {args.normal} normal readings")
+    print(f"{'workers':>7} {'req/s':>9} {'req/s/core':>11} {'p50':>8} {'p99':>8}")
+
+    for workers in args.workers:
+        # Inline mapping measures raw per-core cost without pool hand-off
+        env = dict(os.environ, SMART_REPORT_WORKERS=str(workers), BACKEND_HOST="127.0.0.1",
+                   BACKEND_PORT=str(args.port), MANIFEST_EXECUTOR="inline")
+        env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(base_url + "/")
+            drive(base_url, body, min(200, args.requests), args.clients)  # warm-up
+            rps, latencies = drive(base_url, body, args.requests, args.clients)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        used_cores = min(workers, cores)
+        print(f"{workers:>7} {rps:>9.1f} {rps / used_cores:>11.1f} "
+              f"{percentile(latencies, 50) * 1000:>6.1f}ms {percentile(latencies, 99) * 1000:>6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
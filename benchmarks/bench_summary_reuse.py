@@ -0,0 +1,116 @@
+"""
+Near-duplicate summary reuse: hit rate on a synthetic repeat-patient corpus.
+
+Each of --patients patients has a routine panel (--panel results from the
+fixture biomarkers) and comes back --visits times; every visit moves each
+value by a random relative drift (normal, sigma --drift), so some results
+cross their reference range between visits. Reports are processed visit by
+visit; on a miss the "LLM" summary (build_rules_only_summary, which carries
+the same values) is stored.
+
+For each tolerance, reports:
+- hit rate of an exact-content cache (sha256 of the results) vs SummaryReuse
+- stale values: readings of a reused summary whose value differs from the
+  report (must be 0), and abnormal sets that differ from a fresh summary
+- fingerprint + lookup time per report
+
+Usage:
+    python benchmarks/bench_summary_reuse.py [--patients 200] [--visits 4] [--drift 0.02] [--tolerance 0.02 0.05 0.1]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import BIOMARKERS
+from lab_results import ResultTable
+from preclassify import build_rules_only_summary
+from summary_reuse import SummaryReuse
+
+
+def base_value(normal_range, rng):
+    if normal_range.startswith("<"):
+        bound = float(normal_range[1:])
+        return rng.uniform(0.5, 1.1) * bound
+    if normal_range.startswith(">"):
+        bound = float(normal_range[1:])
+        return rng.uniform(0.9, 2.0) * bound
+    low, high = (float(x) for x in normal_range.split("-"))
+    return rng.uniform(low * 0.9, high * 1.1)
+
+
+def corpus(patients, panel, visits, drift, rng):
+    """[(visit, report)] ordered by visit"""
+    people = []
+    for p in range(patients):
+        tests = rng.sample(BIOMARKERS, min(panel, len(BIOMARKERS)))
+        people.append((p, tests, [base_value(r, rng) for _, _, _, r in tests]))
+    reports = []
+    for visit in range(visits):
+        for p, tests, values in people:
+            if visit:
+                values[:] = [v * (1 + rng.gauss(0, drift)) for v in values]
+            reports.append((visit, {
+                "patient_details": {"patient_id": f"P-{p}", "name": f"Patient {p}", "age": 30 + p % 50,
+                                    "gender": "Female" if p % 2 else "Male"},
+                "lab_details": {}, "sample_details": {},
+                "report_results": [{"is_panel": False, "test_name": name, "value": round(value, 2), "unit": unit,
+                                    "reference_range": normal_range, "interpretation": None}
+                                   for (name, _, unit, normal_range), value in zip(tests, values)],
+            }))
+    return reports
+
+
+def readings(summary):
+    clinical = summary["clinical_summary"]
+    return {r["parameter_name"]: r["value"] for r in clinical["abnormal_readings"] + clinical["normal_readings"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--panel", type=int, default=12)
+    parser.add_argument("--visits", type=int, default=4)
+    parser.add_argument("--drift", type=float, default=0.02)
+    parser.add_argument("--tolerance", type=float, nargs="+", default=[0.02, 0.05, 0.1])
+    args = parser.parse_args()
+
+    reports = corpus(args.patients, args.panel, args.visits, args.drift, random.Random(7))
+    repeats = sum(1 for visit, _ in reports if visit)
+    exact, exact_hits = set(), 0
+    for _, report in reports:
+        digest = hashlib.sha256(json.dumps(report["report_results"], sort_keys=True).encode()).hexdigest()
+        exact_hits += digest in exact
+        exact.add(digest)
+
+    print(f"{len(reports):,} reports ({args.patients} patients x {args.visits} visits, {args.panel} results, "
+          f"drift {args.drift:.0%}); exact-content cache: {exact_hits} hits ({exact_hits / len(reports):.1%})\n")
+    print(f"{'tolerance':>9} {'hits':>6} {'hit rate':>8} {'of repeats':>10} {'stale':>5} {'abn diff':>8} "
+          f"{'lookup ms':>9}")
+    for tolerance in args.tolerance:
+        reuse = SummaryReuse(max_entries=len(reports), tolerance=tolerance)
+        stale = abnormal_diff = 0
+        elapsed = 0.0
+        for _, report in reports:
+            table = ResultTable.from_report(report)
+            start = time.perf_counter()
+            fingerprint = reuse.fingerprint(report, table)
+            summary = reuse.lookup(fingerprint)
+            elapsed += time.perf_counter() - start
+            fresh = build_rules_only_summary(report, table)
+            if summary is None:
+                reuse.store(fingerprint, fresh)
+                continue
+            stale += sum(value != readings(fresh)[name] for name, value in readings(summary).items())
+            abnormal_diff += ({r["parameter_name"] for r in summary["clinical_summary"]["abnormal_readings"]} !=
+                              {r["parameter_name"] for r in fresh["clinical_summary"]["abnormal_readings"]})
+        stats = reuse.stats()
+        print(f"{tolerance:>9.0%} {stats['hits']:>6} {stats['hit_rate']:>8.1%} {stats['hits'] / repeats:>10.1%} "
+              f"{stale:>5} {abnormal_diff:>8} {elapsed / len(reports) * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
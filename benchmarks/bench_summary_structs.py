@@ -0,0 +1,102 @@
+"""
+Internal summary representation: pydantic models vs slots structs.
+
+For summaries of N abnormal (and 2N normal) findings, measures:
+
+- memory:   traced allocations of one SmartSummary vs one SummaryStruct
+            built from the same dict (tracemalloc)
+- convert:  SmartSummary(**dict) vs summary_struct(dict), and JSON bytes ->
+            model (model_validate_json) vs decode_summary
+- rules:    RuleSet.evaluate on each representation (attribute access only)
+- mapping:  the manifest job (build_manifest_payload) as it was, with pydantic
+            SmartSummary / UIManifestItem / UIManifest and the content hash
+            serialized separately, vs the struct + item-dict path
+
+msgspec is used by summary_struct/decode_summary when installed (reported
+below); otherwise the pure-Python converters run.
+
+Usage:
+    python benchmarks/bench_summary_structs.py [--abnormal 5 20 80] [--repeat 200]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import _fixtures  # noqa: F401  (adds backend/ to sys.path)
+from _fixtures import make_summary
+from manifest_executor import build_manifest_payload, warm_generator
+from schema import SmartSummary
+from summary_structs import decode_summary, msgspec, summary_struct
+from ui_mapper import canonical_json, encode_items
+
+
+def pydantic_payload(generator, summary_dict):
+    """build_manifest_payload before the struct path"""
+    manifest = generator.generate_from_summary(SmartSummary(**summary_dict))
+    validation = generator.validate_manifest(manifest)
+    _, items = encode_items([item.model_dump() for item in manifest.items])
+    return canonical_json(items), manifest.content_hash, validation.model_dump()
+
+
+def best_us(repeat, function):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1e6
+
+
+def traced_bytes(function):
+    tracemalloc.start()
+    try:
+        value = function()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abnormal", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    generator = warm_generator()
+    rule_set = generator.rules_engine.rule_set
+    print(f"msgspec: {'installed' if msgspec is not None else 'not installed (pure-Python conversion)'}\n")
+    print(f"{'abnormal':>8} {'measure':<10} {'pydantic':>12} {'structs':>12} {'ratio':>7}")
+    for n in args.abnormal:
+        summary_dict = make_summary(n_abnormal=n, n_normal=2 * n, n_followups=4, n_lifestyle=4, seed=n)
+        document = json.dumps(summary_dict).encode()
+        model, model_bytes = traced_bytes(lambda: SmartSummary(**summary_dict))
+        struct, struct_bytes = traced_bytes(lambda: summary_struct(summary_dict))
+
+        items_json, content_hash, validation = pydantic_payload(generator, summary_dict)
+        payload = build_manifest_payload(summary_dict)
+        assert (payload["items_json"], payload["content_hash"], payload["validation"]) == \
+            (items_json, content_hash, validation), "payloads differ"
+        assert rule_set.evaluate(model) == rule_set.evaluate(struct)
+
+        rows = [
+            ("memory B", model_bytes, struct_bytes),
+            ("convert us", best_us(args.repeat, lambda: SmartSummary(**summary_dict)),
+             best_us(args.repeat, lambda: summary_struct(summary_dict))),
+            ("decode us", best_us(args.repeat, lambda: SmartSummary.model_validate_json(document)),
+             best_us(args.repeat, lambda: decode_summary(document))),
+            ("rules us", best_us(args.repeat, lambda: rule_set.evaluate(model)),
+             best_us(args.repeat, lambda: rule_set.evaluate(struct))),
+            ("mapping us", best_us(args.repeat // 4 or 1, lambda: pydantic_payload(generator, summary_dict)),
+             best_us(args.repeat // 4 or 1, lambda: build_manifest_payload(summary_dict))),
+        ]
+        for label, before, after in rows:
+            print(f"{n:>8} {label:<10} {before:>12,.1f} {after:>12,.1f} {before / after:>6.2f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
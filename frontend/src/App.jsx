@@ -248,12 +248,18 @@
 // export default App;
 
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { FileText, Activity, ChevronRight, RefreshCw, AlertCircle, CheckCircle } from 'lucide-react';
 
 // Import registry and validator
-import { initializeComponentRegistry } from './config/componentRegistry';
+import {
+  initializeComponentRegistry,
+  applyManifestDelta,
+  decodeManifestResponse,
+  MANIFEST_ENCODING_HEADERS,
+  MANIFEST_ENCODING_QUERY,
+} from './config/componentRegistry';
 import { validateManifest, formatValidationErrors, isSafeToRender } from './utils/manifestValidator';
 
 // Error Boundary Component
@@ -1545,6 +1551,10 @@ const MOCK_RAW_REPORT = {
 // Backend URL configuration
 const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000';
 
+// Skeleton-first /analyze (opt-in): upgrades are held by the backend process
+// that built the skeleton, so behind several workers the SSE stream can 404
+const PROGRESSIVE_DELIVERY = import.meta.env.VITE_PROGRESSIVE_DELIVERY === 'true';
+
 export default function AppWrapper() {
   return (
     <ErrorBoundary>
@@ -1561,6 +1571,44 @@ function App() {
   const [componentMap, setComponentMap] = useState(DEFAULT_COMPONENT_MAP);
   const [schemas, setSchemas] = useState({});
   const [validationWarnings, setValidationWarnings] = useState([]);
+  // Progressive /analyze: the skeleton is shown while the LLM upgrade streams in
+  const [upgrading, setUpgrading] = useState(false);
+  const upgradeSource = useRef(null);
+
+  const closeUpgrade = () => {
+    upgradeSource.current?.close();
+    upgradeSource.current = null;
+    setUpgrading(false);
+  };
+
+  useEffect(() => closeUpgrade, []);
+
+  // Apply the LLM upgrade of a skeleton manifest (one SSE event) when it arrives
+  const awaitUpgrade = (eventsPath) => {
+    const source = new EventSource(`${BACKEND_URL}${eventsPath}?${MANIFEST_ENCODING_QUERY}`);
+    upgradeSource.current = source;
+    setUpgrading(true);
+
+    source.addEventListener('upgrade', (event) => {
+      const delta = JSON.parse(event.data);
+      setManifest((items) => applyManifestDelta(items || [], delta, schemas));
+      console.log('[App] Skeleton upgraded to revision', delta.revision);
+      closeUpgrade();
+    });
+    // Failed LLM call (event with data): the skeleton is final. Stream refused
+    // (404 from a worker without the upgrade): fetch the complete manifest.
+    // A dropped connection reconnects by itself.
+    source.addEventListener('error', (event) => {
+      if (event.data) {
+        console.warn('[App] Manifest upgrade failed, keeping the skeleton', event.data);
+        closeUpgrade();
+      } else if (source.readyState === EventSource.CLOSED) {
+        console.warn('[App] Manifest upgrade not available, fetching the complete manifest');
+        closeUpgrade();
+        generateSmartReport(false);
+      }
+    });
+  };
 
   // --- MANUAL INPUT STATE ---
   const [manualJson, setManualJson] = useState('');
@@ -1581,9 +1629,11 @@ function App() {
       }
 
       console.log('[App] Sending manual JSON to debug endpoint...');
-      const response = await axios.post(`${BACKEND_URL}/debug/generate-manifest`, parsed);
+      const response = await axios.post(`${BACKEND_URL}/debug/generate-manifest`, parsed, {
+        headers: MANIFEST_ENCODING_HEADERS,
+      });
 
-      const generatedManifest = response.data.ui_manifest;
+      const generatedManifest = decodeManifestResponse(response.data, schemas);
 
       if (!generatedManifest) {
         throw new Error('Backend returned no manifest');
@@ -1642,16 +1692,22 @@ function App() {
     initRegistry();
   }, []);
 
-  const generateSmartReport = async () => {
+  const generateSmartReport = async (progressive = PROGRESSIVE_DELIVERY) => {
+    closeUpgrade();
     setLoading(true);
     setError(null);
     setValidationWarnings([]);
 
     try {
-      // Send raw data to backend
-      const response = await axios.post(`${BACKEND_URL}/analyze`, MOCK_RAW_REPORT);
+      // Send raw data to backend; progressive delivery answers with a
+      // rules-only skeleton at once and streams the LLM upgrade
+      const response = await axios.post(`${BACKEND_URL}/analyze`, MOCK_RAW_REPORT, {
+        headers: progressive
+          ? { ...MANIFEST_ENCODING_HEADERS, 'X-Manifest-Delivery': 'progressive' }
+          : MANIFEST_ENCODING_HEADERS,
+      });
 
-      const generatedManifest = response.data.ui_manifest || response.data.manifest;
+      const generatedManifest = decodeManifestResponse(response.data, schemas);
 
       if (!generatedManifest) {
         throw new Error('Backend returned no manifest');
@@ -1673,7 +1729,10 @@ function App() {
       }
 
       setManifest(generatedManifest);
-      console.log('[App] Report generated successfully with', generatedManifest.items?.length || 0, 'components');
+      console.log('[App] Report generated successfully with', generatedManifest.length || 0, 'components');
+      if (response.data.upgrade_events) {
+        awaitUpgrade(response.data.upgrade_events);
+      }
     } catch (err) {
       console.error('[App] Analysis failed:', err);
       let errorMsg = 'Failed to generate report.';
@@ -1716,7 +1775,7 @@ function App() {
           </div>
 
           <button
-            onClick={generateSmartReport}
+            onClick={() => generateSmartReport()}
             disabled={loading}
             style={{
               backgroundColor: '#111827',
@@ -1751,6 +1810,13 @@ function App() {
           </div>
         )}
 
+        {upgrading && (
+          <div style={{ backgroundColor: '#eff6ff', border: '1px solid #bfdbfe', color: '#1e40af', padding: '0.75rem 1rem', borderRadius: '0.75rem', marginBottom: '1rem', display: 'flex', alignItems: 'center', gap: '0.75rem', fontSize: '0.875rem' }}>
+            <RefreshCw size={16} style={{ animation: 'spin 1s linear infinite' }} />
+            <span>Showing your results; adding clinical explanations...</span>
+          </div>
+        )}
+
         {/* ERROR STATE */}
         {error && (
           <div style={{ backgroundColor: '#fee2e2', border: '1px solid #fecaca', color: '#991b1b', padding: '1rem', borderRadius: '0.75rem', marginBottom: '2rem', display: 'flex', alignItems: 'center', gap: '0.75rem' }}>
@@ -18,10 +18,21 @@
  *   const registry = await getComponentRegistry();
  *   const componentMap = registry.componentMap;
  *   const schemas = registry.schemas;
+ *
+ * Manifest responses may use compact/columnar wire encodings; decode them with
+ * decodeManifestResponse(body, schemas), and apply manifest deltas with
+ * applyManifestDelta(items, delta, schemas) (re-exported from utils/manifestDecoder).
  */
 
 import React from 'react';
 
+export {
+  applyManifestDelta,
+  decodeManifestResponse,
+  MANIFEST_ENCODING_HEADERS,
+  MANIFEST_ENCODING_QUERY,
+} from '../utils/manifestDecoder';
+
 /**
  * Dynamically import a React component
  * Returns lazy-loaded component for performance
@@ -0,0 +1,142 @@
+/**
+ * MANIFEST DECODER - Expands wire encodings of UI manifests
+ *
+ * The backend can send manifests in more compact encodings
+ * (see `requested_encoding` in backend/main.py):
+ *
+ * - manifest_format "compact": rendering hints are sent once in a top-level
+ *   `hints` table keyed by "type@version"; items only carry overrides
+ * - props_encoding "columnar": list-of-records props declared in a
+ *   component's `columnarProps` arrive as {columns: [...], data: [[...], ...]}
+ *
+ * decodeManifestResponse turns any of these back into the plain item list
+ * ({id, type, version, props, rendering_hints}) the renderer expects, and
+ * applyManifestDelta applies a delta keyed by component ID (an edit, or the
+ * LLM upgrade of a progressive /analyze skeleton) to such a list.
+ *
+ * Usage:
+ *   import { decodeManifestResponse, MANIFEST_ENCODING_HEADERS } from './manifestDecoder';
+ *   const response = await axios.post(url, data, { headers: MANIFEST_ENCODING_HEADERS });
+ *   const items = decodeManifestResponse(response.data, schemas);
+ *   const upgraded = applyManifestDelta(items, delta, schemas);
+ */
+
+/**
+ * Request headers asking for the most compact encoding this decoder supports
+ */
+export const MANIFEST_ENCODING_HEADERS = {
+  'X-Manifest-Format': 'compact',
+  'X-Props-Encoding': 'columnar',
+};
+
+/**
+ * The same encoding as query parameters (EventSource cannot set headers)
+ */
+export const MANIFEST_ENCODING_QUERY = 'manifest_format=compact&props_encoding=columnar';
+
+/**
+ * Check whether a value is a columnar table ({columns, data})
+ *
+ * @param {*} value
+ * @returns {boolean}
+ */
+function isColumnarTable(value) {
+  return (
+    value !== null &&
+    typeof value === 'object' &&
+    !Array.isArray(value) &&
+    Array.isArray(value.columns) &&
+    Array.isArray(value.data)
+  );
+}
+
+/**
+ * Convert {columns, data} back into a list of records
+ *
+ * @param {Object} table - {columns: string[], data: any[][]}
+ * @returns {Array<Object>}
+ */
+export function fromColumnar(table) {
+  return table.data.map((row) => {
+    const record = {};
+    table.columns.forEach((column, i) => {
+      record[column] = row[i];
+    });
+    return record;
+  });
+}
+
+/**
+ * Decode one item's columnar props
+ *
+ * Uses the component's `columnarProps` from /api/schema-export; without a
+ * schema (fallback registry) any {columns, data} prop is decoded.
+ *
+ * @param {Object} item - Manifest item
+ * @param {Object} schemas - Component schemas from /api/schema-export
+ * @returns {Object} - Item with list-of-records props
+ */
+export function decodeColumnarProps(item, schemas = {}) {
+  const declared = schemas[item.type]?.columnarProps;
+  const props = { ...item.props };
+  for (const [key, value] of Object.entries(props)) {
+    if ((!declared || declared.includes(key)) && isColumnarTable(value)) {
+      props[key] = fromColumnar(value);
+    }
+  }
+  return { ...item, props };
+}
+
+/**
+ * Decode a manifest response body into a plain item list
+ *
+ * @param {Object} body - Response JSON ({ui_manifest, hints?, manifest_format?, props_encoding?})
+ * @param {Object} schemas - Component schemas from /api/schema-export
+ * @returns {Array<Object>|undefined} - Items, or undefined if the body has none
+ */
+export function decodeManifestResponse(body, schemas = {}) {
+  let items = body?.ui_manifest || body?.manifest;
+  if (!Array.isArray(items)) return items;
+
+  if (body.props_encoding === 'columnar') {
+    items = items.map((item) => decodeColumnarProps(item, schemas));
+  }
+
+  if (body.manifest_format === 'compact' && body.hints) {
+    items = items.map((item) => ({
+      ...item,
+      rendering_hints: {
+        ...(body.hints[`${item.type}@${item.version}`] || {}),
+        ...(item.rendering_hints || {}),
+      },
+    }));
+  }
+
+  return items;
+}
+
+/**
+ * Apply a manifest delta to a decoded item list
+ *
+ * Deltas come from PATCH /summaries/{id} and from the "upgrade" event of a
+ * progressive /analyze. Items are matched by their stable IDs: removed IDs
+ * are dropped, updated and added items (decoded like a response body) take
+ * their place, and `order`, when sent, gives the new order.
+ *
+ * @param {Array<Object>} items - Current decoded items
+ * @param {Object} delta - {added, removed, updated, order, hints?, manifest_format?, props_encoding?}
+ * @param {Object} schemas - Component schemas from /api/schema-export
+ * @returns {Array<Object>} - New item list
+ */
+export function applyManifestDelta(items, delta, schemas = {}) {
+  const decode = (list) => decodeManifestResponse({ ...delta, ui_manifest: list || [] }, schemas);
+  const byId = new Map(items.map((item) => [item.id, item]));
+  for (const id of delta.removed || []) {
+    byId.delete(id);
+  }
+  for (const item of [...decode(delta.updated), ...decode(delta.added)]) {
+    byId.set(item.id, item);
+  }
+  const order = delta.order || [...byId.keys()];
+  return order.map((id) => byId.get(id)).filter(Boolean);
+}
@@ -0,0 +1,85 @@
+"""
+Train the zstd dictionary used for `dcz` manifest responses.
+
+Builds a corpus of response bodies the API actually produces (manifests for
+the sample summary and synthetic summaries of varied size and risk, in every
+wire encoding, plus the schema export), trains a dictionary on it and writes
+backend/dictionaries/manifest-<version>.zdict.
+
+Bump compression.DICTIONARY_VERSION before retraining so clients holding the
+old dictionary keep getting valid (non-dcz) responses.
+
+Usage:
+    python train_manifest_dictionary.py [--size 32768] [--summaries 400]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, 'backend'))
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+import zstandard
+
+from _fixtures import make_summary
+from compression import DICTIONARY_DIR, DICTIONARY_PATH, DICTIONARY_VERSION
+from components import get_schema_export_json
+from schema import SmartSummary
+from ui_mapper import MANIFEST_FORMATS, PROPS_ENCODINGS, UIManifestGenerator, canonical_json, encode_items
+
+SAMPLE_SUMMARY = os.path.join(ROOT, 'backend', 'patient_smart_summary.json')
+
+# Seeds used for training; benchmarks evaluate on other seeds
+TRAINING_SEED_OFFSET = 10_000
+
+
+def response_bodies(generator, summary_dict):
+    """Every wire encoding of one summary's manifest, as served"""
+    items = [item.model_dump() for item in generator.generate_from_summary(SmartSummary(**summary_dict)).items]
+    for manifest_format in MANIFEST_FORMATS:
+        for props_encoding in PROPS_ENCODINGS:
+            hints, encoded = encode_items(items, manifest_format, props_encoding)
+            body = {"ui_manifest": encoded} if hints is None else {"hints": hints, "ui_manifest": encoded}
+            yield canonical_json(body)
+
+
+def build_corpus(n_summaries):
+    generator = UIManifestGenerator()
+    with open(SAMPLE_SUMMARY) as f:
+        summaries = [json.load(f)]
+    for i in range(n_summaries):
+        seed = TRAINING_SEED_OFFSET + i
+        summaries.append(make_summary(
+            n_abnormal=1 + seed % 25,
+            n_normal=seed % 60,
+            n_followups=seed % 5,
+            n_lifestyle=seed % 5,
+            seed=seed,
+            risk=("Low", "Moderate", "High", "Critical")[seed % 4],
+        ))
+    corpus = [body for summary in summaries for body in response_bodies(generator, summary)]
+    corpus.append(get_schema_export_json())
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=32 * 1024, help="Dictionary size in bytes")
+    parser.add_argument("--summaries", type=int, default=400)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.summaries)
+    print(f"Training {DICTIONARY_VERSION} on {len(corpus)} bodies ({sum(map(len, corpus)) / 1e6:.1f} MB)")
+    dictionary = zstandard.train_dictionary(args.size, corpus, level=3)
+
+    os.makedirs(DICTIONARY_DIR, exist_ok=True)
+    with open(DICTIONARY_PATH, "wb") as f:
+        f.write(dictionary.as_bytes())
+    print(f"✅ Wrote {DICTIONARY_PATH} ({len(dictionary.as_bytes())} bytes, id {dictionary.dict_id()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main builds the Gemini client; degraded requests make no call
+
+from fastapi.testclient import TestClient
+
+from admission import AdmissionController
+from llm_scheduler import PriorityScheduler
+from preclassify import build_rules_only_summary, triage_report
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator
+
+
+def result(name, value, reference_range, interpretation=None):
+    return {"is_panel": False, "test_name": name, "value": value, "unit": "mg/dL",
+            "reference_range": reference_range, "interpretation": interpretation}
+
+
+def report(*results):
+    return {"patient_details": {"name": "Verify Patient", "age": 50, "gender": "Female"},
+            "lab_details": {}, "sample_details": {}, "report_results": list(results)}
+
+
+def check_admission():
+    failures = 0
+
+    # In-flight bound: shed beyond it, admit again after a release
+    controller = AdmissionController(PriorityScheduler(slots=1), max_in_flight=2, degrade_after_seconds=20)
+    actions = [controller.admit("ROUTINE").action for _ in range(3)]
+    if actions != ["admit", "admit", "shed"]:
+        print(f"❌ Decisions under the in-flight bound: {actions}")
+        failures += 1
+    controller.release()
+    if controller.admit("ROUTINE").action != "admit":
+        print("❌ Not admitted again after a release")
+        failures += 1
+
+    async def degrade():
+        # Every LLM slot taken: the estimated wait decides degrade vs admit
+        scheduler = PriorityScheduler(slots=1, aging_seconds=30, expected_service_seconds=30)
+        await scheduler.acquire("ROUTINE")
+        degrading = AdmissionController(scheduler, max_in_flight=10, degrade_after_seconds=20)
+        patient = AdmissionController(scheduler, max_in_flight=10, degrade_after_seconds=60)
+        disabled = AdmissionController(scheduler, max_in_flight=10, degrade_after_seconds=0)
+        return [degrading.admit("ROUTINE").action, patient.admit("ROUTINE").action,
+                disabled.admit("ROUTINE").action]
+
+    actions = asyncio.run(degrade())
+    if actions != ["degrade", "admit", "admit"]:
+        print(f"❌ Degrade decisions (wait 30s; thresholds 20s / 60s / disabled): {actions}")
+        failures += 1
+
+    full = AdmissionController(PriorityScheduler(slots=1), max_in_flight=1)
+    full.admit("ROUTINE")
+    shed = full.admit("ROUTINE")
+    if shed.action != "shed" or shed.retry_after < 1:
+        print(f"❌ Shed without a usable Retry-After: {shed.retry_after}")
+        failures += 1
+    return failures
+
+
+def check_rules_only_risk():
+    failures = 0
+    generator = UIManifestGenerator()
+
+    # Heuristically critical (bound missed by >50%): scheduled first, but not a CriticalAlert
+    heuristic = report(result("Triglycerides", 225, "<150"), result("Glucose", 90, "70-99"))
+    if triage_report(heuristic).priority != "CRITICAL":
+        print("❌ Triglycerides at 225 / <150 no longer triaged CRITICAL")
+        failures += 1
+    summary = build_rules_only_summary(heuristic)
+    readings = summary["clinical_summary"]["abnormal_readings"]
+    if [r["risk_level"] for r in readings] != ["HIGH"]:
+        print(f"❌ Rules-only risk levels: {[(r['parameter_name'], r['risk_level']) for r in readings]}")
+        failures += 1
+    manifest = generator.generate_from_summary(SmartSummary(**summary))
+    if "CriticalAlert" in [item.type for item in manifest.items]:
+        print("❌ Heuristic finding rendered as a CriticalAlert")
+        failures += 1
+    # No sample dates in the report: the manifest is still valid (header dated "Today")
+    validation = generator.validate_manifest(manifest)
+    if not validation.is_valid:
+        print(f"❌ Rules-only manifest of an undated report invalid: {validation.errors}")
+        failures += 1
+
+    # LDH is not lactate
+    ldh = report(result("Lactate Dehydrogenase (LDH)", 300, "140-280"))
+    if triage_report(ldh).priority != "ELEVATED":
+        print(f"❌ LDH slightly out of range triaged {triage_report(ldh).priority}")
+        failures += 1
+
+    # Flagged critical by the lab: CRITICAL and a CriticalAlert
+    flagged = report(result("Potassium", 6.9, "3.5-5.1", "Critical"), result("Triglycerides", 225, "<150"))
+    summary = build_rules_only_summary(flagged)
+    readings = summary["clinical_summary"]["abnormal_readings"]
+    if [r["risk_level"] for r in readings] != ["CRITICAL", "HIGH"]:
+        print(f"❌ Lab-flagged risk levels: {[(r['parameter_name'], r['risk_level']) for r in readings]}")
+        failures += 1
+    if summary["clinical_summary"]["overall_health_status"]["risk_assessment"] != "Critical":
+        print("❌ Lab-flagged critical result did not make the report Critical")
+        failures += 1
+    types = [item.type for item in generator.generate_from_summary(SmartSummary(**summary)).items]
+    if types.count("CriticalAlert") != 1:
+        print(f"❌ Expected one CriticalAlert for the lab-flagged result, got {types}")
+        failures += 1
+
+    # Only whole, un-negated critical flags count as the lab's critical flag
+    for flag, critical in (("Critically High", True), ("PANIC", True), ("Non-critical", False),
+                           ("not critical", False), ("High (not critical)", False), ("Alerted", False)):
+        classified = triage_report(report(result("Glucose", 90, "70-99", flag)))
+        if (classified.critical_count == 1) != critical:
+            print(f"❌ Flag {flag!r} triaged {classified.priority} ({classified.critical_count} critical)")
+            failures += 1
+    return failures
+
+
+def check_degraded_endpoint():
+    failures = 0
+    import main
+
+    async def saturated():
+        scheduler = PriorityScheduler(slots=1, expected_service_seconds=30)
+        await scheduler.acquire("ROUTINE")
+        return AdmissionController(scheduler, max_in_flight=10, degrade_after_seconds=1)
+
+    controller = asyncio.run(saturated())
+    main.get_admission_controller = lambda: controller
+    body = report(*[result(f"Marker {i}", 200, "<150") for i in range(6)])
+    with TestClient(main.app) as client:
+        # A degraded answer still honours ?page_limit=
+        response = client.post("/analyze?page_limit=2", json=body)
+        page = response.json()
+        if (response.status_code != 200 or response.headers.get("x-manifest-mode") != "rules-only"
+                or len(page.get("ui_manifest", [])) != 2 or not page.get("next_cursor") or not page.get("degraded")):
+            print(f"❌ Degraded /analyze?page_limit=2: {response.status_code} {response.headers.get('x-manifest-mode')} "
+                  f"{len(page.get('ui_manifest', []))} items, next_cursor {page.get('next_cursor')}")
+            failures += 1
+        response = client.post("/analyze", json=body)
+        if response.status_code != 200 or not response.json().get("degraded") or "next_cursor" in response.json():
+            print(f"❌ Degraded /analyze: {response.status_code}")
+            failures += 1
+    return failures
+
+
+def verify():
+    print("--- Verifying Admission Control ---")
+    failures = check_admission() + check_rules_only_risk()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # The agent writes patient_smart_summary.json to the working directory
+        try:
+            failures += check_degraded_endpoint()
+        finally:
+            os.chdir(cwd)
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Requests are admitted, degraded or shed as configured")
+
+
+if __name__ == "__main__":
+    verify()
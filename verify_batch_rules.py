@@ -0,0 +1,121 @@
+import copy
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+# The shipped rules plus conditions that exercise the rest of the DSL
+RULES_DIR = tempfile.mkdtemp()
+RULES_FILE = os.path.join(RULES_DIR, "manifest_rules.json")
+os.environ["RULES_FILE"] = RULES_FILE
+
+from batch_rules import BatchEvaluator, SummaryTable
+from summary_structs import summary_struct
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+EXTRA_CONDITIONS = [
+    "len(normal) > 0 and len(abnormal) / len(normal) > 1",  # Divides by zero over the whole column
+    "count_risk(abnormal, 'HIGH') - count_risk(abnormal, 'LOW') >= 1 or not risk_assessment in ['High', 'Critical']",
+    "count_system(abnormal, 'Renal') > 0 and any_risk(abnormal, 'MODERATE')",
+    "correlated_pairs(normal) > 0",
+    "len(key_concerns) * 2 > len(follow_ups) + len(lifestyle)",
+]
+NAMES = ["LDL Cholesterol", "HDL Cholesterol", "Lipid Profile Ratio", "Lipid Index", "Triglycerides", "Glucose",
+         "HbA1c", "Creatinine", "eGFR", "BUN", "Hemoglobin", "WBC", "Troponin", "TSH", "Vitamin D"]
+SYSTEMS = ["Metabolic", "Renal", "Hematological", "Cardiac", "Endocrine", None]
+RISKS = ["CRITICAL", "HIGH", "MODERATE", "LOW"]
+
+
+def write_rules():
+    with open(os.path.join(BACKEND, "rules", "manifest_rules.json")) as f:
+        document = json.load(f)
+    for i, condition in enumerate(EXTRA_CONDITIONS):
+        document["rules"].append({
+            "name": f"verify_condition_{i}", "category": "findings", "priority": 10 - i, "when": condition,
+            "actions": [{"op": "append", "component": "SectionDivider", "props": {"title": f"Verify {i}"}},
+                        {"op": "append", "component": "MetricAccordion", "props": "metric_accordion",
+                         "for_each": "abnormal", "key": "parameter_name"}],
+        })
+    with open(RULES_FILE, "w") as f:
+        json.dump(document, f)
+
+
+def variants(base, count):
+    """Summaries of every shape: empty lists, repeated names, unset systems, each risk level"""
+    rng = random.Random(0)
+    template = base["clinical_summary"]["abnormal_readings"][0]
+    normal_template = base["clinical_summary"]["normal_readings"][0]
+    for i in range(count):
+        summary = copy.deepcopy(base)
+        clinical = summary["clinical_summary"]
+        clinical["abnormal_readings"] = [
+            {**template, "parameter_name": rng.choice(NAMES), "risk_level": rng.choice(RISKS),
+             "system": rng.choice(SYSTEMS)}
+            for _ in range(rng.choice([0, 1, 2, 4, 8]))]
+        clinical["normal_readings"] = [{**normal_template, "parameter_name": rng.choice(NAMES)}
+                                       for _ in range(rng.choice([0, 1, 3, 6]))]
+        clinical["overall_health_status"]["risk_assessment"] = rng.choice(["Low", "Moderate", "High", "Critical"])
+        clinical["overall_health_status"]["key_concerns"] = ["Concern"] * rng.randint(0, 3)
+        plan = summary["management_plan"]
+        plan["follow_up_tests"] = plan["follow_up_tests"][:rng.randint(0, len(plan["follow_up_tests"]))]
+        plan["lifestyle_modifications"] = plan["lifestyle_modifications"][:rng.randint(0, 2)]
+        summary["history"] = [{"parameter_name": rng.choice(NAMES), "points": [{"date": "2026-01-01", "value": 1.0}]}
+                              for _ in range(rng.choice([0, 0, 1, 2]))]
+        yield summary_struct(summary)
+
+
+def verify():
+    print("--- Verifying Batch Rules ---")
+    failures = 0
+    write_rules()
+    with open(SUMMARY_PATH) as f:
+        base = json.load(f)
+    summaries = list(variants(base, 300))
+
+    generator = UIManifestGenerator()
+    rule_set = generator.rules_engine.rule_set
+    evaluator = BatchEvaluator(rule_set)
+    table = SummaryTable(summaries)
+    matches = evaluator.evaluate(table)
+    plans = evaluator.plans(table, matches)
+
+    # Condition results and plans equal the per-summary RulesEngine
+    for i, summary in enumerate(summaries):
+        expected = rule_set.evaluate(summary)
+        batch = {name: column[i] for name, column in matches.items()}
+        if batch != expected:
+            wrong = sorted(name for name in expected if batch.get(name) != expected[name])
+            print(f"❌ Summary {i}: conditions differ for {wrong}")
+            failures += 1
+        plan = tuple((item.id, item.type, item.rule, item.key) for item in generator.plan_from_summary(summary))
+        if plans[i] != plan:
+            print(f"❌ Summary {i}: batch plan differs from plan_from_summary")
+            failures += 1
+        if failures > 5:
+            break
+
+    # Every condition (but `true`) matched some summaries and missed others
+    constant = sorted(rule.name for rule in rule_set.rules
+                      if rule.when != "true" and len(set(map(bool, matches[rule.name]))) < 2)
+    if constant:
+        print(f"❌ Same result for every summary, so only one branch was compared: {constant}")
+        failures += 1
+
+    print(f"Checked {len(summaries)} summaries against {len(rule_set.rules)} rules "
+          f"({len(evaluator.vectorized)} vectorized)")
+    shutil.rmtree(RULES_DIR, ignore_errors=True)
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Batch conditions and plans match the per-summary rules engine")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,90 @@
+import gzip
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main builds the Gemini client; no call is made
+
+import zstandard
+from fastapi.testclient import TestClient
+
+from compression import get_manifest_dictionary
+from preclassify import build_rules_only_summary
+
+
+def summary():
+    results = [{"is_panel": False, "test_name": f"Marker {i}", "value": 150 + i, "unit": "mg/dL",
+                "reference_range": "<150", "interpretation": "High"} for i in range(8)]
+    return build_rules_only_summary({"patient_details": {"name": "Verify Patient", "age": 50, "gender": "Female"},
+                                     "sample_details": {"reported_at": "2026-01-05"}, "report_results": results})
+
+
+def fetch(client, method, url, headers, **kwargs):
+    """(status, headers, raw body as sent, i.e. still encoded)"""
+    with client.stream(method, url, headers=headers, **kwargs) as response:
+        return response.status_code, response.headers, b"".join(response.iter_raw())
+
+
+def decode(body, coding):
+    if coding == "gzip":
+        return gzip.decompress(body)
+    if coding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if coding == "dcz":
+        return get_manifest_dictionary().decompress(body)
+    return body
+
+
+def verify():
+    print("--- Verifying Response Compression ---")
+    failures = 0
+    import main
+    dictionary = get_manifest_dictionary()
+    requests = {"identity": {"Accept-Encoding": "identity"}, "gzip": {"Accept-Encoding": "gzip"},
+                "zstd": {"Accept-Encoding": "zstd, gzip"},
+                "dcz": {"Accept-Encoding": "dcz, zstd", "Available-Dictionary": dictionary.available_header}}
+    with TestClient(main.app) as client:
+        # Each coding decodes to the identity body and gets its own ETag
+        _, headers, identity = fetch(client, "POST", "/debug/generate-manifest", requests["identity"], json=summary())
+        identity_etag = headers["etag"]
+        etags = {identity_etag}
+        for coding in ("gzip", "zstd", "dcz"):
+            status, headers, body = fetch(client, "POST", "/debug/generate-manifest", requests[coding], json=summary())
+            vary = headers.get("vary", "")
+            if status != 200 or headers.get("content-encoding") != coding or decode(body, coding) != identity:
+                print(f"❌ {coding}: {status} {headers.get('content-encoding')}, decodes to the identity body: "
+                      f"{status == 200 and decode(body, coding) == identity}")
+                failures += 1
+            if "Accept-Encoding" not in vary or (coding == "dcz") != ("Available-Dictionary" in vary):
+                print(f"❌ {coding} Vary: {vary}")
+                failures += 1
+            etags.add(headers.get("etag"))
+
+            # Revalidating with the encoded ETag: 304 carrying that ETag
+            revalidate = {**requests[coding], "If-None-Match": headers.get("etag", "")}
+            status, not_modified, _ = fetch(client, "POST", "/debug/generate-manifest", revalidate, json=summary())
+            if status != 304 or not_modified.get("etag") != headers.get("etag"):
+                print(f"❌ {coding} revalidation: {status} {not_modified.get('etag')} (sent {headers.get('etag')})")
+                failures += 1
+        if len(etags) != 4 or not all(etag.startswith(identity_etag[:-1]) for etag in etags):
+            print(f"❌ ETags per coding: {etags}")
+            failures += 1
+
+        # An ETag received with a compressed body works as If-Match
+        created = client.post("/summaries", json=summary(), headers=requests["identity"]).json()
+        _, headers, _ = fetch(client, "GET", f"/summaries/{created['summary_id']}", requests["gzip"])
+        patched = client.patch(f"/summaries/{created['summary_id']}", headers={"If-Match": headers.get("etag", "")},
+                               json=[{"op": "replace", "path": "/patient_info/name", "value": "Renamed"}])
+        if headers.get("content-encoding") != "gzip" or patched.status_code != 200:
+            print(f"❌ If-Match {headers.get('etag')} from a gzip response: {patched.status_code} {patched.text[:200]}")
+            failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Encoded responses decode to the same body and carry per-coding ETags")
+
+
+if __name__ == "__main__":
+    verify()
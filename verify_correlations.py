@@ -0,0 +1,65 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from correlations import get_correlation_index
+
+RESOLVES = {
+    # Aliases, whole and piece by piece
+    "HbA1c (GLYCOSYLATED HEMOGLOBIN)": "hba1c",
+    "Fasting Blood Sugar": "glucose_fasting",
+    "Glucose (Fasting)": "glucose_fasting",
+    "ALT (SGPT)": "alt",
+    "Calcium, Total": "calcium",
+    "LDL Cholesterol, Calculated": "ldl",
+    "Creatinine, Serum": "creatinine",
+    "Apolipoprotein (Apo B)": "apob",
+    "CARDIO C-REACTIVE PROTEIN (hsCRP)": "hscrp",
+    # Ratios, other specimens and other analytes are not the serum biomarker
+    "Cholesterol/HDL Ratio": None,
+    "Triglycerides/HDL Ratio": None,
+    "BUN/Creatinine Ratio": None,
+    "Apo B / Apo A1 Ratio": None,
+    "Glucose (Urine)": None,
+    "Bilirubin (Direct)": None,
+    "Unknown Marker": None,
+}
+
+
+def finding(name):
+    return SimpleNamespace(parameter_name=name, risk_level="HIGH")
+
+
+def verify():
+    print("--- Verifying Biomarker Name Resolution ---")
+    failures = 0
+    index = get_correlation_index()
+    for name, expected in RESOLVES.items():
+        for _ in range(2):  # Uncached, then from the resolved-name cache
+            if index.resolve(name) != expected:
+                print(f"❌ {name!r} resolved to {index.resolve(name)!r}, expected {expected!r}")
+                failures += 1
+                break
+
+    # A ratio does not draw the serum biomarker's edges
+    edges = index.subgraph([finding("Cholesterol/HDL Ratio"), finding("HDL Cholesterol")])["edges"]
+    if edges:
+        print(f"❌ Cholesterol/HDL Ratio drew edges {edges}")
+        failures += 1
+    props = index.subgraph([finding("Triglycerides"), finding("HDL Cholesterol"), finding("Glucose (Urine)")])
+    if [(e["source"], e["target"]) for e in props["edges"]] != [("triglycerides", "hdl")] or len(props["nodes"]) != 2:
+        print(f"❌ Triglycerides / HDL subgraph: {props}")
+        failures += 1
+
+    print(f"Checked {len(RESOLVES)} names against {len(index)} biomarkers")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Parameter names resolve to the biomarker they measure")
+
+
+if __name__ == "__main__":
+    verify()
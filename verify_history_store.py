@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from history_store import HistoryStore, get_history_store, report_rows, trend_history
+
+
+def report(patient_details, value, reported_at):
+    return {"patient_details": patient_details, "lab_details": {},
+            "sample_details": {"reported_at": reported_at},
+            "report_results": [{"is_panel": False, "test_name": "HbA1c", "value": value, "unit": "%",
+                                "reference_range": "4.0-5.6", "interpretation": None}]}
+
+
+def summary_for(value):
+    return {"clinical_summary": {"abnormal_readings": [{"parameter_name": "HbA1c", "value": str(value),
+                                                        "units": "%"}]}}
+
+
+def verify():
+    print("--- Verifying Lab History Store ---")
+    failures = 0
+
+    # Opt-in: no HISTORY_DB, no store
+    saved = os.environ.pop("HISTORY_DB", None)
+    if get_history_store() is not None:
+        print("❌ History store opened without HISTORY_DB")
+        failures += 1
+    if saved is not None:
+        os.environ["HISTORY_DB"] = saved
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"), flush_seconds=0.01)
+
+        # Same name, different patients: separate series; no patient_id: nothing recorded
+        first_patient = {"patient_id": "P-1", "name": "Alex Kim"}
+        second_patient = {"patient_id": "P-2", "name": "Alex Kim"}
+        for details, value, date in ((first_patient, 6.1, "2026-01-01"), (first_patient, 6.4, "2026-04-01"),
+                                     (second_patient, 9.9, "2026-02-01")):
+            store.record_report(report(details, value, date))
+        if report_rows(report({"name": "Alex Kim"}, 7.0, "2026-03-01")):
+            print("❌ Report without patient_id produced history rows")
+            failures += 1
+        store.flush()
+
+        history = trend_history(summary_for(6.8), report(first_patient, 6.8, "2026-07-01"), store)
+        values = [point["value"] for point in history[0]["points"]] if history else []
+        if values != [6.1, 6.4, 6.8]:
+            print(f"❌ Patient P-1 trend {values}, expected [6.1, 6.4, 6.8]")
+            failures += 1
+        if trend_history(summary_for(7.0), report({"name": "Alex Kim"}, 7.0, "2026-07-01"), store):
+            print("❌ Name-only report got another patient's history")
+            failures += 1
+
+        # Ratios keep their own series; a key reported twice with different values and undated reports are skipped
+        lipids = report(first_patient, 6.1, "2026-05-01")
+        lipids["report_results"] = [
+            {"is_panel": False, "test_name": name, "value": value, "unit": unit, "reference_range": None}
+            for name, value, unit in (("Total Cholesterol", 210, "mg/dL"), ("Cholesterol/HDL Ratio", 4.5, None),
+                                      ("Glucose", 95, "mg/dL"), ("Fasting Blood Sugar", 99, "mg/dL"))]
+        keys = [row[1] for row in report_rows(lipids)]
+        if keys != ["total_cholesterol", "cholesterol hdl ratio"]:
+            print(f"❌ Lipid panel series keys {keys}")
+            failures += 1
+        if report_rows(report(first_patient, 6.5, None)):
+            print("❌ Undated report produced history rows")
+            failures += 1
+
+        # A failed (rolled back) batch does not leave IDs in the caches
+        connection = sqlite3.connect(store.path)
+        connection.execute("ALTER TABLE results RENAME TO results_saved")
+        connection.commit()
+        store.record_report(report({"patient_id": "P-3"}, 5.0, "2026-01-01"))
+        store.flush()
+        if "id:P-3" in store._patient_ids or store.write_errors != 1:
+            print(f"❌ Rolled-back write cached {store._patient_ids} ({store.write_errors} write errors)")
+            failures += 1
+        connection.execute("ALTER TABLE results_saved RENAME TO results")
+        connection.commit()
+        store.record_report(report({"patient_id": "P-4"}, 5.5, "2026-01-01"))
+        store.record_report(report({"patient_id": "P-4"}, 5.9, "2026-02-01"))
+        store.flush()
+        stored = dict(connection.execute("SELECT key, id FROM patients").fetchall())
+        if any(store._patient_ids[key] != stored.get(key) for key in store._patient_ids):
+            print(f"❌ Cached patient IDs {store._patient_ids} differ from the database {stored}")
+            failures += 1
+        history = trend_history(summary_for(6.0), report({"patient_id": "P-4"}, 6.0, "2026-03-01"), store)
+        if not history or [p["value"] for p in history[0]["points"]] != [5.5, 5.9, 6.0]:
+            print(f"❌ History after a failed batch: {history}")
+            failures += 1
+        connection.close()
+        store.close()
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ History is per patient ID and opt-in")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,173 @@
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from job_queue import JobQueue, QueueFull, check_webhook_url
+from job_worker import Worker, deliver_webhook
+
+REPORT = {"patient_details": {"name": "Verify Patient"}, "report_results": []}
+
+
+def expire_lease(queue, job_id):
+    """As if the worker holding the job crashed a visibility timeout ago"""
+    queue._connection().execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+
+
+class WebhookReceiver(http.server.BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        self.received.append((self.path, self.rfile.read(int(self.headers["Content-Length"]))))
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/landed")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def check_queue(directory):
+    failures = 0
+
+    # CRITICAL first; a failed attempt waits out its backoff
+    queue = JobQueue(os.path.join(directory, "order.db"), retry_seconds=0.2, aging_seconds=30)
+    routine = queue.enqueue(REPORT, "ROUTINE")
+    critical = queue.enqueue(REPORT, "CRITICAL")
+    first = queue.claim("w")
+    if first.job_id != critical:
+        print("❌ ROUTINE job claimed before a CRITICAL one")
+        failures += 1
+    if queue.fail(first, "boom") != "queued" or queue.claim("w").job_id != routine or queue.claim("w") is not None:
+        print("❌ Failed job claimable again before its retry backoff")
+        failures += 1
+    time.sleep(0.25)
+    retried = queue.claim("w")
+    if retried is None or retried.job_id != critical or retried.attempt != 2:
+        print(f"❌ Failed job not retried after its backoff: {retried}")
+        failures += 1
+
+    # Expired leases are reclaimed; the old lease can no longer write
+    queue = JobQueue(os.path.join(directory, "lease.db"), max_attempts=2)
+    job_id = queue.enqueue(REPORT)
+    stale = queue.claim("crashed")
+    expire_lease(queue, job_id)
+    fresh = queue.claim("w")
+    if fresh is None or fresh.attempt != 2 or queue.heartbeat(stale) or queue.complete(stale, {"ui_manifest": []}):
+        print("❌ Expired lease not reclaimed, or the stale lease still writes")
+        failures += 1
+
+    # ...until the last attempt's lease expires: failed and reported to on_expired
+    expired = []
+    expire_lease(queue, job_id)
+    if queue.claim("w", on_expired=lambda claim, error: expired.append((claim, error))) is not None:
+        print("❌ Job claimed beyond its max attempts")
+        failures += 1
+    status = queue.get(job_id)
+    if status.status != "failed" or [claim.job_id for claim, _ in expired] != [job_id]:
+        print(f"❌ Final expired attempt: status {status.status}, on_expired {expired}")
+        failures += 1
+
+    full = JobQueue(os.path.join(directory, "full.db"), max_queued=2)
+    full.enqueue(REPORT)
+    full.enqueue(REPORT)
+    try:
+        full.enqueue(REPORT)
+        print("❌ Enqueue beyond JOB_QUEUE_MAX accepted")
+        failures += 1
+    except QueueFull as e:
+        if e.retry_after < 1:
+            print(f"❌ QueueFull retry_after {e.retry_after}")
+            failures += 1
+    return failures
+
+
+def check_webhook_urls():
+    failures = 0
+    for url in ("http://127.0.0.1:8000/hook", "http://localhost/hook", "http://169.254.169.254/latest/meta-data",
+                "http://10.0.0.5/hook", "http://192.168.1.1/hook", "http://[::1]/hook", "http://[::ffff:127.0.0.1]/",
+                "http://0.0.0.0/", "ftp://93.184.216.34/hook", "http://host.invalid/hook"):
+        try:
+            check_webhook_url(url, [])
+            print(f"❌ Webhook URL accepted without an allow-list: {url}")
+            failures += 1
+        except ValueError:
+            pass
+    try:
+        check_webhook_url("https://93.184.216.34/hook", [])
+        check_webhook_url("https://hooks.example.com/hook", ["hooks.example.com"])
+    except ValueError as e:
+        print(f"❌ Allowed webhook URL refused: {e}")
+        failures += 1
+    try:
+        check_webhook_url("https://93.184.216.34/hook", ["hooks.example.com"])
+        print("❌ Host outside JOB_WEBHOOK_HOSTS accepted")
+        failures += 1
+    except ValueError:
+        pass
+    return failures
+
+
+def check_delivery(directory):
+    failures = 0
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), WebhookReceiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        # Checked again at delivery time; redirects are not followed
+        if not deliver_webhook(f"{base}/hook", {}, None, 1, 5).startswith("refused"):
+            print("❌ Webhook delivered to a loopback host without an allow-list")
+            failures += 1
+        status = deliver_webhook(f"{base}/redirect", {}, None, 1, 5, ["127.0.0.1"])
+        if status == "delivered" or [path for path, _ in WebhookReceiver.received] != ["/redirect"]:
+            print(f"❌ Webhook redirect followed ({status}, {WebhookReceiver.received})")
+            failures += 1
+        WebhookReceiver.received.clear()
+
+        # A job failed on its expired last attempt still gets its webhook
+        os.environ.update(JOBS_DB=os.path.join(directory, "worker.db"), JOB_WEBHOOK_HOSTS="127.0.0.1",
+                          JOB_MAX_ATTEMPTS="1", JOB_WEBHOOK_ATTEMPTS="1")
+        worker = Worker("verify", poll_seconds=0.01)
+        job_id = worker.jobs.enqueue(REPORT, webhook_url=f"{base}/hook")
+        worker.jobs.claim("crashed")
+        expire_lease(worker.jobs, job_id)
+        loop = threading.Thread(target=worker._claim_loop)
+        loop.start()
+        deadline = time.time() + 5
+        while not WebhookReceiver.received and time.time() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        loop.join()
+        status = worker.jobs.get(job_id)
+        if not any(job_id.encode() in body and b'"failed"' in body for _, body in WebhookReceiver.received):
+            print(f"❌ No webhook for the job failed on an expired lease: {WebhookReceiver.received}")
+            failures += 1
+        if status.status != "failed" or status.webhook_status != "delivered":
+            print(f"❌ Expired job status {status.status}, webhook {status.webhook_status}")
+            failures += 1
+    finally:
+        server.shutdown()
+    return failures
+
+
+def verify():
+    print("--- Verifying Job Queue ---")
+    with tempfile.TemporaryDirectory() as directory:
+        failures = check_queue(directory) + check_webhook_urls() + check_delivery(directory)
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Jobs are leased, retried and failed with their webhooks")
+
+
+if __name__ == "__main__":
+    verify()
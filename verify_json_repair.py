@@ -0,0 +1,162 @@
+import copy
+import json
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # agents builds the Gemini client; the LLM call is replaced
+os.environ["LLM_BACKEND"] = "local"  # No provider prefix cache either
+
+from schema import SmartSummary
+from json_repair import repair_json, salvage_summary, JSONRepairError
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'patient_smart_summary.json')
+
+with open(SUMMARY_PATH) as f:
+    REFERENCE = json.load(f)
+
+PRETTY = json.dumps(REFERENCE, indent=2)
+COMPACT = json.dumps(REFERENCE)
+
+# Same document with list fields last, so truncation can hit a reading that
+# already has every required field (only truncation tracking can catch it)
+_REORDERED = json.loads(COMPACT)
+for _section in ("abnormal_readings", "normal_readings"):
+    _REORDERED["clinical_summary"][_section] = [
+        dict(sorted(r.items(), key=lambda kv: isinstance(kv[1], list)))
+        for r in _REORDERED["clinical_summary"][_section]
+    ]
+REORDERED = json.dumps(_REORDERED)
+
+
+def build_corpus():
+    """
+    Malformed LLM outputs derived from a real summary: (name, text, expected)
+
+    expected is the intended document, None for truncated text (salvage
+    checks apply) or False when the text must be rejected.
+    """
+    newline_doc = copy.deepcopy(REFERENCE)
+    causes = newline_doc["clinical_summary"]["abnormal_readings"][0]["causes"]
+    causes[0] = causes[0].replace(" ", "\n", 1)
+
+    corpus = [
+        ("valid", PRETTY, REFERENCE),
+        ("json fence", f"```json\n{PRETTY}\n```", REFERENCE),
+        ("bare fence", f"```\n{COMPACT}\n```", REFERENCE),
+        ("leading prose", f"Here is the summary you asked for:\n{PRETTY}", REFERENCE),
+        ("trailing prose", f"{PRETTY}\n\nLet me know if you need anything else.", REFERENCE),
+        ("trailing commas in arrays", PRETTY.replace('"\n        ],', '",\n        ],'), REFERENCE),
+        ("trailing comma in object", COMPACT[:-1] + ',}', REFERENCE),
+        ("raw newline in string", COMPACT.replace(REFERENCE["clinical_summary"]["abnormal_readings"][0]["causes"][0],
+                                                  causes[0], 1), newline_doc),
+        ("no json at all", "I'm sorry, I can't help with that.", False),
+        ("empty", "", False),
+    ]
+    # Truncation at every ~2% of the document (pretty and compact layouts)
+    for text, label in ((PRETTY, "pretty"), (COMPACT, "compact"), (REORDERED, "reordered")):
+        step = max(1, len(text) // 50)
+        for cut in range(1, len(text), step):
+            corpus.append((f"truncated {label} @{cut}", text[:cut], None))
+    return corpus
+
+
+def complete_readings(text, field):
+    """Readings whose full JSON object appears in the (possibly truncated) text"""
+    readings = REFERENCE["clinical_summary"][field]
+    return [r for r in readings
+            if json.dumps(r) in text or json.dumps(r, indent=2).replace("\n", "\n      ") in text]
+
+
+def check_summarizer():
+    """Valid JSON that is not a valid summary is salvaged, and not stored for reuse"""
+    import agents
+    failures = 0
+    invalid = copy.deepcopy(REFERENCE)
+    invalid["clinical_summary"]["abnormal_readings"][0]["value"] = 8.2  # A number, not a string
+    report = {"patient_details": {"patient_id": "P-1", "name": "Verify Patient"}, "sample_details": {},
+              "report_results": [{"test_name": "HbA1c", "value": 8.2, "unit": "%", "reference_range": "<5.7"}]}
+    stored = []
+    agents.invoke_llm = lambda plan, handle: SimpleNamespace(content=json.dumps(invalid))
+    agents.get_summary_reuse().store = lambda fingerprint, summary: stored.append(summary)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # The agent writes patient_smart_summary.json to the working directory
+        try:
+            state = agents.generate_summary({"raw_data": report})
+        finally:
+            os.chdir(cwd)
+    readings = state["smart_summary"]["clinical_summary"]["abnormal_readings"]
+    if not state["summary_repairs"] or any(r["value"] == 8.2 for r in readings) or stored:
+        print(f"❌ Schema-invalid LLM JSON: repairs {state['summary_repairs']}, stored for reuse: {bool(stored)}")
+        failures += 1
+    return failures
+
+
+def verify():
+    print("--- Verifying Lenient JSON Repair ---")
+    generator = UIManifestGenerator()
+    failures = 0
+    salvaged = 0
+    corpus = build_corpus()
+
+    for name, text, expected in corpus:
+        try:
+            result = repair_json(text)
+        except JSONRepairError as e:
+            if expected:
+                print(f"❌ {name}: unexpected repair failure: {e}")
+                failures += 1
+            continue
+
+        if expected is False:
+            print(f"❌ {name}: expected failure but parsed")
+            failures += 1
+            continue
+        if expected is not None:
+            if result.data != expected:
+                print(f"❌ {name}: repaired document differs from the intended one")
+                failures += 1
+            continue
+        if not isinstance(result.data, dict):
+            continue
+
+        # Salvage and make sure the manifest can still be generated
+        try:
+            salvage = salvage_summary(result.data, result.truncated_paths)
+            summary = SmartSummary(**salvage.data)
+            generator.generate_from_summary(summary)
+        except Exception as e:
+            print(f"❌ {name}: salvage/manifest failed: {e}")
+            failures += 1
+            continue
+
+        # Every kept reading must be an exact, complete original reading
+        for field in ("abnormal_readings", "normal_readings"):
+            kept = salvage.data["clinical_summary"][field]
+            originals = REFERENCE["clinical_summary"][field]
+            if any(r not in originals for r in kept):  # dict equality ignores key order
+                print(f"❌ {name}: kept a corrupted entry in {field}")
+                failures += 1
+            missing = [r for r in complete_readings(text, field) if r not in kept]
+            if missing:
+                print(f"❌ {name}: dropped {len(missing)} complete {field}")
+                failures += 1
+
+        if salvage.dropped or salvage.defaults_applied:
+            salvaged += 1
+
+    failures += check_summarizer()
+    print(f"Checked {len(corpus)} corpus entries ({salvaged} needed salvage)")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ All corpus entries repaired or rejected as expected")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main builds the Gemini client; no call is made
+
+from fastapi.testclient import TestClient
+
+from lab_results import ReportValidationError, parse_report
+from schema import RawLabReport
+
+
+def errors_of(document):
+    try:
+        parse_report(json.dumps(document))
+    except ReportValidationError as e:
+        return [(tuple(error["loc"]), error["type"]) for error in e.errors]
+    return []
+
+
+def verify():
+    print("--- Verifying Lab Report Parsing ---")
+    failures = 0
+
+    # Whatever RawLabReport accepts is accepted, with its coercions
+    document = {"patient_details": {"name": "Verify Patient"},
+                "report_results": [{"is_panel": "true", "test_name": "Lipid Panel", "members": [
+                    {"is_panel": "false", "test_name": "Triglycerides", "value": 225, "unit": "mg/dL"}]}]}
+    RawLabReport.model_validate(document)
+    try:
+        report, table = parse_report(json.dumps(document))
+        if [table.is_panel[i] for i in range(len(table))] != [1, 0] or table.results.tolist() != [1]:
+            print(f"❌ is_panel strings not coerced: {table.is_panel.tolist()} / results {table.results.tolist()}")
+            failures += 1
+    except ReportValidationError as e:
+        print(f"❌ Body accepted by RawLabReport rejected: {e.errors}")
+        failures += 1
+
+    # ...and whatever it rejects is rejected, located in the body
+    bad = {"patient_details": None, "report_results": [
+        {"test_name": "Panel", "is_panel": True, "members": [{"test_name": 5}, 3, {"test_name": "Glucose", "value": [1]}]},
+        {"test_name": "Odd", "is_panel": "maybe", "members": "none"}]}
+    expected = [(("body", "patient_details"), "dict_type"),
+                (("body", "report_results", 0, "members", 1), "dict_type"),
+                (("body", "report_results", 0, "members", 0, "test_name"), "string_type"),
+                (("body", "report_results", 0, "members", 2, "value", "float"), "float_type"),
+                (("body", "report_results", 0, "members", 2, "value", "str"), "string_type"),
+                (("body", "report_results", 1, "is_panel"), "bool_parsing"),
+                (("body", "report_results", 1, "members"), "list_type")]
+    if errors_of(bad) != expected:
+        print(f"❌ Errors {errors_of(bad)}")
+        failures += 1
+
+    # Nesting beyond the recursion limit is flattened, not recursed through
+    depth = 1000
+    body = ('{"report_results": [' + '{"is_panel": true, "test_name": "Panel", "members": [' * depth
+            + '{"test_name": "Leaf", "value": 1}' + ']}' * depth + ']}')
+    _, table = parse_report(body)
+    if len(table) != depth + 1 or table.depth[-1] != depth:
+        print(f"❌ Depth {depth} report flattened to {len(table)} rows")
+        failures += 1
+
+    # The body read by lab_report is still documented
+    import main
+    schema = TestClient(main.app).get("/openapi.json").json()
+    for path in ("/analyze", "/jobs"):
+        body = schema["paths"][path]["post"].get("requestBody", {})
+        if body.get("content", {}).get("application/json", {}).get("schema") != {"$ref": "#/components/schemas/RawLabReport"}:
+            print(f"❌ {path} request body missing from OpenAPI: {body}")
+            failures += 1
+    if not {"RawLabReport", "RecursiveMember"} <= set(schema["components"]["schemas"]):
+        print("❌ RawLabReport / RecursiveMember not in OpenAPI components")
+        failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Report bodies are validated with RawLabReport row by row and documented")
+
+
+if __name__ == "__main__":
+    verify()
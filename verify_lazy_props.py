@@ -0,0 +1,71 @@
+import copy
+import json
+import os
+import sys
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+from manifest_pages import ManifestPageStore
+from summary_structs import summary_struct
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+
+
+def large(summary, readings):
+    """The sample summary with `readings` abnormal findings"""
+    large = copy.deepcopy(summary)
+    template = large["clinical_summary"]["abnormal_readings"][0]
+    large["clinical_summary"]["abnormal_readings"] = [{**template, "parameter_name": f"Marker {i}"}
+                                                      for i in range(readings)]
+    return large
+
+
+def verify():
+    print("--- Verifying Lazy Props ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        summary = large(json.load(f), 100)
+    struct = summary_struct(summary)
+    generator = UIManifestGenerator()
+    full = {item.id: item.model_dump() for item in generator.generate_from_summary(struct).items}
+
+    # Planning and pruning generate no props; only the kept items' generators run
+    plan = generator.plan_from_summary(struct)
+    kept = plan.select(lambda item: item.type != "MetricAccordion")
+    if plan.props_generated:
+        print(f"❌ {plan.props_generated} props generated while planning and pruning")
+        failures += 1
+    items = kept.item_dicts()
+    pruned = [item for item in plan if item.type == "MetricAccordion"]
+    if len(pruned) + len(kept) != len(plan) or any(item.materialized for item in pruned) or plan.props_generated != len(kept):
+        print(f"❌ Props generated for {plan.props_generated} of {len(plan)} items ({len(kept)} kept)")
+        failures += 1
+
+    # ...and are the props the eager manifest has
+    if [item["id"] for item in items] != [i for i, item in full.items() if item["type"] != "MetricAccordion"] \
+            or any(item != full[item["id"]] for item in items):
+        print("❌ Pruned plan items differ from the eager manifest's")
+        failures += 1
+
+    # A paged session generates props for the requested page only (chunks share their item's)
+    session = ManifestPageStore(max_sessions=2).open(summary)
+    page = session.page(session.first_cursor(), 10)
+    served = {item["id"].split(":")[0] for item in page["items"]}
+    chunked = {item["id"].split(":")[0] for item in page["items"] if ":" in item["id"]}
+    if session.props_generated != len(served) or any(item["props"] != full[item["id"]]["props"]
+                                                     for item in page["items"]
+                                                     if item["id"].split(":")[0] not in chunked):
+        print(f"❌ First page of {len(served)} items: {session.props_generated} props generated of {len(full)}")
+        failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Props are generated only for the manifest items that are served")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from lab_results import ResultTable
+from llm_budget import LLMBudget, estimate_tokens
+
+SYSTEM_PROMPT = "Summarize this lab report. " * 100
+ABNORMAL = ["Triglycerides", "HbA1c", "Vitamin D"]
+# Normal values by distance to a bound of 0-100: the first three are the closest
+CLOSE = {"Near High": 99, "Near Low": 2, "Edge High": 96}
+
+
+def report():
+    results = [{"is_panel": False, "test_name": "Triglycerides", "value": 225, "unit": "mg/dL",
+                "reference_range": "<150", "interpretation": "High"},
+               {"is_panel": False, "test_name": "HbA1c", "value": 6.5, "unit": "%", "reference_range": "4.0-5.6"}]
+    members = [{"is_panel": False, "test_name": f"Normal {i}", "value": 40 + i % 20, "unit": "u",
+                "reference_range": "0-100"} for i in range(24)]
+    members += [{"is_panel": False, "test_name": name, "value": value, "unit": "u", "reference_range": "0-100"}
+                for name, value in CLOSE.items()]
+    members.append({"is_panel": False, "test_name": "Vitamin D", "value": 12, "unit": "ng/mL",
+                    "reference_range": "30-100", "interpretation": "Low"})
+    results.append({"is_panel": True, "test_name": "Panel", "members": members})
+    return {"patient_details": {"name": "Verify Patient"}, "report_results": results}
+
+
+def sent_results(plan):
+    return [row["test_name"] for row in json.loads(plan.text)["report_results"] if not row.get("is_panel")]
+
+
+def verify():
+    print("--- Verifying LLM Budget ---")
+    failures = 0
+    document = report()
+    table = ResultTable.from_report(document)
+    everything = sent_results(LLMBudget().plan(SYSTEM_PROMPT, document, table))
+
+    # No budget, or a prompt predicted within it: sent whole
+    for budget in (LLMBudget(), LLMBudget(latency_budget=3600)):
+        plan = budget.plan(SYSTEM_PROMPT, document, table)
+        if plan.trimmed or plan.omitted_results or sent_results(plan) != everything:
+            print(f"❌ Trimmed with a budget of {budget.latency_budget}s: {plan.omitted_results} omitted")
+            failures += 1
+
+    # Over budget: every abnormal result plus the normal ones closest to a bound, in document order
+    budget = LLMBudget(latency_budget=0.01, normal_results=3)
+    full = LLMBudget().plan(SYSTEM_PROMPT, document, table)
+    plan = budget.plan(SYSTEM_PROMPT, document, table)
+    kept = [name for name in everything if name in ABNORMAL or name in CLOSE]
+    if not plan.trimmed or plan.omitted_results != 24 or sent_results(plan) != kept:
+        print(f"❌ Trimmed plan: trimmed {plan.trimmed}, omitted {plan.omitted_results}, sent {sent_results(plan)}")
+        failures += 1
+    if json.loads(plan.text).get("omitted_normal_results") != 24 \
+            or plan.estimated_input_tokens >= full.estimated_input_tokens:
+        print(f"❌ Trimmed prompt: {plan.estimated_input_tokens} tokens (full {full.estimated_input_tokens}), "
+              f"omitted_normal_results {json.loads(plan.text).get('omitted_normal_results')}")
+        failures += 1
+
+    # Nothing to omit: sent whole even over budget
+    plan = LLMBudget(latency_budget=0.01, normal_results=100).plan(SYSTEM_PROMPT, document, table)
+    if plan.trimmed or sent_results(plan) != everything:
+        print("❌ Trimmed although every normal result fits")
+        failures += 1
+
+    # A cached system prompt is left out of the prediction
+    budget = LLMBudget(seconds_per_1k_tokens=1.0)
+    plain, cached = (budget.plan(SYSTEM_PROMPT, document, table, prefix_cached=flag) for flag in (False, True))
+    if cached.estimated_cached_tokens != estimate_tokens(SYSTEM_PROMPT) or \
+            abs(plain.predicted_seconds - cached.predicted_seconds - cached.estimated_cached_tokens / 1000) > 1e-9:
+        print(f"❌ Cached prefix: {cached.estimated_cached_tokens} cached, "
+              f"predicted {cached.predicted_seconds:.3f}s vs {plain.predicted_seconds:.3f}s")
+        failures += 1
+
+    # Accounting: reported usage priced per token kind; estimated otherwise
+    budget = LLMBudget(input_cost_per_mtok=1.0, cached_input_cost_per_mtok=0.25, output_cost_per_mtok=4.0)
+    plan = budget.plan(SYSTEM_PROMPT, document, table, prefix_cached=True)
+    response = SimpleNamespace(content="{}", usage_metadata={
+        "input_tokens": 2000, "output_tokens": 500, "input_token_details": {"cache_read": 800}})
+    usage = budget.record(response, plan, 2.0)
+    expected_cost = (1200 * 1.0 + 800 * 0.25 + 500 * 4.0) / 1e6
+    if (usage.input_tokens, usage.output_tokens, usage.cached_input_tokens, usage.estimated) != (2000, 500, 800, False) \
+            or abs(usage.cost_usd - expected_cost) > 1e-9:
+        print(f"❌ Reported usage accounted as {usage}")
+        failures += 1
+    gemini = SimpleNamespace(content="{}", response_metadata={"usage_metadata": {
+        "prompt_token_count": 1000, "candidates_token_count": 100}})
+    estimated = SimpleNamespace(content="x" * 400)
+    budget.record(gemini, budget.plan(SYSTEM_PROMPT, document, table), 1.0)
+    usage = budget.record(estimated, budget.plan(SYSTEM_PROMPT, document, table), 1.0)
+    stats = budget.stats()
+    if not usage.estimated or usage.output_tokens <= 0:
+        print(f"❌ Response without usage metadata accounted as {usage}")
+        failures += 1
+    if (stats["requests"], stats["estimated_requests"], stats["output_tokens"]) != (3, 1, 600 + usage.output_tokens) \
+            or stats["input_tokens"] != 3000 + usage.input_tokens or stats["cached_input_tokens"] != 800:
+        print(f"❌ Totals: {stats}")
+        failures += 1
+    if stats["estimate_calibration"] == 1.0:
+        print("❌ Estimates not calibrated against reported token counts")
+        failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Prompts over the latency budget are trimmed to key results and calls are accounted")
+
+
+if __name__ == "__main__":
+    verify()
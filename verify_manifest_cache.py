@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+# The generator reads a copy of the rules, which the check then edits
+RULES_DIR = tempfile.mkdtemp()
+RULES_FILE = os.path.join(RULES_DIR, "manifest_rules.json")
+shutil.copy(os.path.join(BACKEND, "rules", "manifest_rules.json"), RULES_FILE)
+os.environ["RULES_FILE"] = RULES_FILE
+
+from components import COMPONENT_REGISTRY
+from manifest_cache import ManifestCache
+from manifest_executor import ManifestExecutor, warm_generator
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+TITLE = "⚠️ Findings Requiring Attention"
+
+
+def titles(payload):
+    return [item["props"]["title"] for item in json.loads(payload["items_json"]) if item["type"] == "SectionDivider"]
+
+
+def rename_section(old, new):
+    with open(RULES_FILE) as f:
+        document = json.load(f)
+    for rule in document["rules"]:
+        for action in rule.get("actions", []):
+            if isinstance(action.get("props"), dict) and action["props"].get("title") == old:
+                action["props"]["title"] = new
+    with open(RULES_FILE, "w") as f:
+        json.dump(document, f)
+
+
+def verify():
+    print("--- Verifying Manifest Cache ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        summary = json.load(f)
+    executor = ManifestExecutor(mode="inline", cache=ManifestCache(max_entries=8))
+
+    # Same summary: served from the cache; another encoding is its own entry
+    first = executor.run_sync(summary)
+    again = executor.run_sync(json.loads(json.dumps(summary)))
+    compact = executor.run_sync(summary, "compact")
+    if first["cached"] or not again["cached"] or compact["cached"] or again["items_json"] != first["items_json"]:
+        print(f"❌ Cache use: first {first['cached']}, repeat {again['cached']}, compact {compact['cached']}")
+        failures += 1
+
+    # Rules reload: the cached manifest is dropped and the new title served
+    rename_section(TITLE, "Needs Attention")
+    if not warm_generator().rules_engine.reload(force=True):
+        print(f"❌ Rules reload failed: {warm_generator().rules_engine.last_reload_error}")
+        failures += 1
+    reloaded = executor.run_sync(summary)
+    if reloaded["cached"] or "Needs Attention" not in titles(reloaded) or TITLE in titles(reloaded):
+        print(f"❌ After a rules reload: cached {reloaded['cached']}, titles {titles(reloaded)}")
+        failures += 1
+    if executor.cache.stats()["invalidations"] != 1:
+        print(f"❌ Cache stats after the reload: {executor.cache.stats()}")
+        failures += 1
+
+    # A component version bump invalidates as well
+    divider = COMPONENT_REGISTRY["SectionDivider"]
+    version = divider.version
+    divider.version = f"{version}-verify"
+    try:
+        bumped = executor.run_sync(summary)
+        versions = {item["version"] for item in json.loads(bumped["items_json"]) if item["type"] == "SectionDivider"}
+        if bumped["cached"] or versions != {divider.version}:
+            print(f"❌ After a version bump: cached {bumped['cached']}, SectionDivider versions {versions}")
+            failures += 1
+    finally:
+        divider.version = version
+
+    shutil.rmtree(RULES_DIR, ignore_errors=True)
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Cached manifests are reused until the rules or registry change")
+
+
+if __name__ == "__main__":
+    verify()
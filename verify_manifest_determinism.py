@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator, canonical_json, manifest_content_hash
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+
+# Prints canonical item bytes + content hash from a fresh interpreter
+CHILD = f"""
+import json, sys
+sys.path.append({BACKEND!r})
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator, canonical_json
+summary = SmartSummary(**json.load(open({SUMMARY_PATH!r})))
+manifest = UIManifestGenerator().generate_from_summary(summary)
+sys.stdout.write(json.dumps([canonical_json([i.model_dump() for i in manifest.items]).decode(), manifest.content_hash]))
+"""
+
+
+def run_child(hash_seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return tuple(json.loads(out.stdout.strip().splitlines()[-1]))
+
+
+def verify():
+    print("--- Verifying Deterministic Manifests ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        data = json.load(f)
+
+    generator = UIManifestGenerator()
+    first = generator.generate_from_summary(SmartSummary(**data))
+    second = generator.generate_from_summary(SmartSummary(**data))
+
+    ids = [item.id for item in first.items]
+    if len(set(ids)) != len(ids):
+        print(f"❌ Duplicate component IDs: {ids}")
+        failures += 1
+    if ids != [item.id for item in second.items] or first.content_hash != second.content_hash:
+        print("❌ Same summary produced different IDs or content hash in one process")
+        failures += 1
+    if first.content_hash != manifest_content_hash([item.model_dump() for item in first.items]):
+        print("❌ content_hash does not match the items")
+        failures += 1
+
+    # Across processes (set/dict ordering must not depend on hash randomization)
+    results = {run_child(seed) for seed in (0, 1, 42)}
+    if len(results) != 1:
+        print("❌ Manifest bytes differ between processes")
+        failures += 1
+
+    # IDs identify components, not values: editing a value keeps the IDs
+    data["clinical_summary"]["abnormal_readings"][0]["value"] = "999"
+    edited = generator.generate_from_summary(SmartSummary(**data))
+    if [item.id for item in edited.items] != ids:
+        print("❌ Component IDs changed after a value edit")
+        failures += 1
+    if edited.content_hash == first.content_hash:
+        print("❌ content_hash did not change after a value edit")
+        failures += 1
+
+    print(f"Checked {len(ids)} components, content hash {first.content_hash[:12]}…")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Manifests are deterministic")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,160 @@
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+
+import jsonpatch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from manifest_edits import RevisionConflict, SummaryNotFound, SummaryStore
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'patient_smart_summary.json')
+PATCHES = 450
+RISK_LEVELS = ["CRITICAL", "HIGH", "MODERATE", "LOW"]
+
+
+def random_patch(summary, rng):
+    """One random JSON Patch (1-3 operations) against the current summary"""
+    operations = []
+    for _ in range(rng.randint(1, 3)):
+        abnormal = summary["clinical_summary"]["abnormal_readings"]
+        normal = summary["clinical_summary"]["normal_readings"]
+        i = rng.randrange(len(abnormal)) if abnormal else None
+        operation = None
+        choice = rng.choice(["risk", "value", "note", "name", "concern", "remove", "copy", "move", "lifestyle"])
+        if choice == "risk" and i is not None:
+            operation = {"op": "replace", "path": f"/clinical_summary/abnormal_readings/{i}/risk_level",
+                         "value": rng.choice(RISK_LEVELS)}
+        elif choice == "value" and i is not None:
+            operation = {"op": "replace", "path": f"/clinical_summary/abnormal_readings/{i}/value",
+                         "value": f"{rng.uniform(1, 300):.1f}"}
+        elif choice == "note" and i is not None:
+            operation = {"op": "replace", "path": f"/clinical_summary/abnormal_readings/{i}/clinical_note",
+                         "value": f"Reviewed note {rng.random():.4f}"}
+        elif choice == "name":
+            operation = {"op": "replace", "path": "/patient_info/name", "value": f"Patient {rng.randint(1, 99)}"}
+        elif choice == "concern":
+            operation = {"op": "add", "path": "/clinical_summary/overall_health_status/key_concerns/-",
+                         "value": f"Concern {rng.randint(1, 99)}"}
+        elif choice == "remove" and len(abnormal) > 1:
+            operation = {"op": "remove", "path": f"/clinical_summary/abnormal_readings/{i}"}
+        elif choice == "copy" and i is not None and len(abnormal) < 12:
+            operation = {"op": "copy", "from": f"/clinical_summary/abnormal_readings/{i}",
+                         "path": "/clinical_summary/abnormal_readings/-"}
+        elif choice == "move" and len(normal) > 1:
+            operation = {"op": "move", "from": f"/clinical_summary/normal_readings/{rng.randrange(len(normal))}",
+                         "path": "/clinical_summary/normal_readings/0"}
+        elif choice == "lifestyle":
+            operation = {"op": "add", "path": "/management_plan/lifestyle_modifications/-",
+                         "value": {"category": "Diet", "recommendations": f"Advice {rng.randint(1, 99)}"}}
+        if operation is not None:
+            operations.append(operation)
+            summary = jsonpatch.apply_patch(summary, [operation])  # Later operations see this one applied
+    return operations
+
+
+def apply_delta(items, delta):
+    """Previous manifest items + delta -> new manifest items"""
+    by_id = {item["id"]: item for item in items}
+    for item_id in delta["removed"]:
+        by_id.pop(item_id, None)
+    for item in delta["added"] + delta["updated"]:
+        by_id[item["id"]] = item
+    order = delta["order"] or [item["id"] for item in items if item["id"] in by_id]
+    return [by_id[item_id] for item_id in order]
+
+
+def full_manifest(summary):
+    return [item.model_dump() for item in UIManifestGenerator().generate_from_summary(SmartSummary(**summary)).items]
+
+
+def verify():
+    print("--- Verifying Incremental Manifest Edits ---")
+    failures = 0
+    rng = random.Random(40)
+    with open(SUMMARY_PATH) as f:
+        reference = json.load(f)
+
+    store = SummaryStore()
+    editable = store.create(copy.deepcopy(reference))
+    if json.loads(json.dumps(editable.snapshot()["items"])) != json.loads(json.dumps(full_manifest(reference))):
+        print("❌ Stored summary's manifest differs from a full generation")
+        failures += 1
+
+    incremental = 0
+    for n in range(PATCHES):
+        before = editable.snapshot()
+        stored = copy.deepcopy(before["smart_summary"])
+        operations = random_patch(before["smart_summary"], rng)
+        try:
+            delta = store.patch(editable.summary_id, operations, revision=before["revision"])
+        except ValueError as e:
+            if editable.snapshot()["smart_summary"] != stored or editable.revision != before["revision"]:
+                print(f"❌ Patch {n} was rejected ({e}) but changed the stored summary")
+                failures += 1
+            continue
+        after = editable.snapshot()
+        if before["smart_summary"] != stored:
+            print(f"❌ Patch {n} mutated the previous summary document: {operations}")
+            failures += 1
+        expected = json.loads(json.dumps(full_manifest(after["smart_summary"])))
+        if json.loads(json.dumps(after["items"])) != expected:
+            print(f"❌ Patch {n}: incremental manifest differs from full regeneration: {operations}")
+            failures += 1
+        if json.loads(json.dumps(apply_delta(before["items"], delta))) != expected:
+            print(f"❌ Patch {n}: delta applied to the previous manifest differs: {operations}")
+            failures += 1
+        incremental += not delta["stats"]["full"]
+
+    # Stale revisions are refused
+    try:
+        store.patch(editable.summary_id, [{"op": "replace", "path": "/patient_info/name", "value": "X"}], revision=0)
+        print("❌ Edit against revision 0 accepted")
+        failures += 1
+    except RevisionConflict:
+        pass
+
+    # Two workers sharing SUMMARY_STORE_DB see (and serialize) each other's edits
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "summaries.db")
+        worker_a, worker_b = SummaryStore(path=path), SummaryStore(path=path)
+        created = worker_a.create(copy.deepcopy(reference))
+        rename = [{"op": "replace", "path": "/patient_info/name", "value": "Edited Elsewhere"}]
+        delta = worker_b.patch(created.summary_id, rename, revision=0)
+        seen = worker_a.get(created.summary_id).snapshot()
+        if delta["revision"] != 1 or seen["revision"] != 1 or seen["smart_summary"]["patient_info"]["name"] != "Edited Elsewhere":
+            print(f"❌ Worker A after worker B's edit: revision {seen['revision']}")
+            failures += 1
+        if json.loads(json.dumps(seen["items"])) != json.loads(json.dumps(full_manifest(seen["smart_summary"]))):
+            print("❌ Worker A's manifest not rebuilt after worker B's edit")
+            failures += 1
+        try:
+            worker_a.patch(created.summary_id, rename, revision=0)
+            print("❌ Worker A accepted an edit against the revision worker B replaced")
+            failures += 1
+        except RevisionConflict:
+            pass
+    try:
+        SummaryStore().get(created.summary_id)
+        print("❌ Per-process store found another store's summary")
+        failures += 1
+    except SummaryNotFound as e:
+        if "SUMMARY_STORE_DB" not in str(e):
+            print(f"❌ Per-process 404 does not explain itself: {e}")
+            failures += 1
+
+    print(f"Checked {PATCHES} random patches ({incremental} incremental), now at revision {editable.revision}")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Incremental manifests match full regeneration")
+
+
+if __name__ == "__main__":
+    verify()
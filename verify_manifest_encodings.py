@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+# Add backend to path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(ROOT, 'backend')
+sys.path.append(BACKEND)
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main builds the Gemini client; no call is made
+
+from fastapi.testclient import TestClient
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+DECODER = Path(ROOT, 'frontend', 'src', 'utils', 'manifestDecoder.js')
+
+# Decodes each case with the frontend's own decoder: a body, or items + a delta -> items
+DECODE_JS = """
+const { decodeManifestResponse, applyManifestDelta } = await import(process.argv[1]);
+let input = '';
+for await (const chunk of process.stdin) input += chunk;
+const { schemas, cases } = JSON.parse(input);
+console.log(JSON.stringify(cases.map((c) => (
+  c.delta ? applyManifestDelta(c.items, c.delta, schemas) : decodeManifestResponse(c, schemas)))));
+"""
+
+
+def decode_in_frontend(cases, schemas):
+    result = subprocess.run(["node", "--input-type=module", "-e", DECODE_JS, DECODER.as_uri()],
+                            input=json.dumps({"schemas": schemas, "cases": cases}),
+                            capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout)
+
+
+def verify():
+    print("--- Verifying Manifest Wire Encodings ---")
+    if shutil.which("node") is None:
+        print("⚠️ node not found; the frontend decoder cannot be run")
+        sys.exit(1)
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        summary = json.load(f)
+
+    import main
+    client = TestClient(main.app)
+    schemas = client.get("/api/schema-export").json()
+    reference = client.post("/debug/generate-manifest", json=summary).json()
+    encodings = [("full", "rows"), ("compact", "rows"), ("full", "columnar"), ("compact", "columnar")]
+    bodies = [client.post(f"/debug/generate-manifest?manifest_format={manifest_format}&props_encoding={props}",
+                          json=summary).json() for manifest_format, props in encodings]
+
+    # The compact body really factors the hints out
+    compact = bodies[1]
+    if not compact.get("hints") or any(item.get("rendering_hints") for item in compact["ui_manifest"]):
+        print("❌ Compact manifest still carries rendering_hints on its items")
+        failures += 1
+
+    # Columnar props are sent as {columns, data}
+    columnar = [(item["type"], name) for item in bodies[3]["ui_manifest"] for name, value in item["props"].items()
+                if isinstance(value, dict) and set(value) == {"columns", "data"}]
+    if not columnar or any(name not in schemas[kind]["columnarProps"] for kind, name in columnar):
+        print(f"❌ Columnar props sent: {columnar}")
+        failures += 1
+
+    # An edit's delta, compact and columnar, applied to the full manifest
+    stored = client.post("/summaries", json=summary).json()
+    edit = [{"op": "replace", "path": "/clinical_summary/abnormal_readings/0/risk_level", "value": "CRITICAL"},
+            {"op": "remove", "path": "/clinical_summary/normal_readings/0"}]
+    delta = client.patch(f"/summaries/{stored['summary_id']}?manifest_format=compact&props_encoding=columnar",
+                         json=edit).json()
+    edited = client.get(f"/summaries/{stored['summary_id']}").json()["ui_manifest"]
+    *decoded, patched = decode_in_frontend(bodies + [{"items": stored["ui_manifest"], "delta": delta}], schemas)
+    if patched != edited:
+        print("❌ Compact/columnar delta applied in the frontend differs from the edited manifest")
+        failures += 1
+
+    # Each encoding decodes, in the frontend, to the full manifest
+    for (manifest_format, props), items in zip(encodings, decoded):
+        if items != reference["ui_manifest"]:
+            print(f"❌ {manifest_format}/{props} manifest decodes to different items")
+            failures += 1
+
+    print(f"Checked {len(encodings)} encodings of {len(reference['ui_manifest'])} items "
+          f"({len(columnar)} columnar props) and a delta")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Encoded manifests decode to the full manifest in the frontend decoder")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,136 @@
+import copy
+import json
+import os
+import sys
+import time
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main imports the agent graph; no LLM call is made
+
+from fastapi.testclient import TestClient
+
+from manifest_pages import ManifestPageStore, SessionExpired
+from schema import SmartSummary
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+
+
+def other_patient(summary):
+    """Same shape, different patient and values"""
+    other = copy.deepcopy(summary)
+    other["patient_info"]["name"] = "Someone Else"
+    other["clinical_summary"]["abnormal_readings"][0]["value"] = "999"
+    return other
+
+
+def header_name(page):
+    header = next(item for item in page["items"] if item["type"] == "InsightHeader")
+    return json.dumps(header["props"])
+
+
+def all_pages(store, session, limit):
+    page = session.page(session.first_cursor(), limit)
+    items = list(page["items"])
+    while page["next_cursor"]:
+        page = store.resume(page["next_cursor"]).page(page["next_cursor"], limit)
+        items += page["items"]
+    return items
+
+
+def verify():
+    print("--- Verifying Paged Manifests ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        first = json.load(f)
+    second = other_patient(first)
+
+    # Different summaries never share a session (or each other's props)
+    store = ManifestPageStore(max_sessions=8, chunk_rows=2)
+    session_a = store.open(first)
+    session_b = store.open(second)
+    if session_a.session_id == session_b.session_id:
+        print(f"❌ Two different summaries opened the same session {session_a.session_id}")
+        failures += 1
+    page_b = session_b.page(session_b.first_cursor(), 5)
+    if "Someone Else" not in header_name(page_b) or first["patient_info"]["name"] in header_name(page_b):
+        print("❌ Second patient's first page shows another patient's header")
+        failures += 1
+    if store.open(copy.deepcopy(first)) is not session_a:
+        print("❌ Re-opening the same summary did not reuse its session")
+        failures += 1
+
+    # Every page together covers the full manifest (chunks share the component ID)
+    full = UIManifestGenerator().generate_from_summary(SmartSummary(**first))
+    paged = all_pages(store, session_a, 3)
+    paged_ids = {item["id"].split(":")[0] for item in paged}
+    if paged_ids != {item.id for item in full.items}:
+        print(f"❌ Pages cover {sorted(paged_ids)}, full manifest {sorted(item.id for item in full.items)}")
+        failures += 1
+    if paged[0]["type"] != full.items[0].type:
+        print("❌ First page does not start with the manifest header")
+        failures += 1
+
+    # Evicted sessions raise SessionExpired; a foreign cursor is rejected
+    small = ManifestPageStore(max_sessions=1)
+    cursor = small.open(first).page(small.open(first).first_cursor(), 2)["next_cursor"]
+    small.open(second)
+    try:
+        small.resume(cursor)
+        print("❌ Evicted session still resumed")
+        failures += 1
+    except SessionExpired:
+        pass
+    try:
+        session_b.page(session_a.first_cursor(), 2)
+        print("❌ Cursor of another session accepted")
+        failures += 1
+    except ValueError:
+        pass
+
+    # The TTL counts from the last page fetched, not from when the session was opened
+    idle = ManifestPageStore(ttl_seconds=0.3)
+    page = idle.open(first).page(idle.open(first).first_cursor(), 1)
+    for _ in range(3):  # 0.6s in all, each fetch within the TTL of the previous one
+        time.sleep(0.2)
+        try:
+            page = idle.resume(page["next_cursor"]).page(page["next_cursor"], 1)
+        except SessionExpired:
+            print("❌ Session in use expired (TTL counted from its creation)")
+            failures += 1
+            break
+    time.sleep(0.4)
+    try:
+        idle.resume(page["next_cursor"])
+        print("❌ Session unused for longer than its TTL still resumed")
+        failures += 1
+    except SessionExpired:
+        pass
+
+    # Bad page sizes are refused before any work (422, not 500 after an LLM call)
+    import main
+    client = TestClient(main.app)
+    for method, url, body in (("post", "/manifest/pages?limit=abc", first),
+                              ("post", "/manifest/pages?limit=0", first),
+                              ("get", f"/manifest/pages/{session_a.first_cursor()}?limit=-1", None),
+                              ("post", "/analyze?page_limit=abc", {"report_results": []})):
+        response = getattr(client, method)(url, json=body) if body is not None else client.get(url)
+        if response.status_code != 422:
+            print(f"❌ {method.upper()} {url} returned {response.status_code}, expected 422")
+            failures += 1
+    response = client.post("/manifest/pages?limit=4", json=second)
+    if response.status_code != 200 or len(response.json()["ui_manifest"]) != 4:
+        print(f"❌ POST /manifest/pages?limit=4 returned {response.status_code}")
+        failures += 1
+
+    print(f"Checked {len(paged)} paged items against {len(full.items)} components")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Paged manifests are isolated per summary")
+
+
+if __name__ == "__main__":
+    verify()
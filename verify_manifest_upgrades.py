@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault("GOOGLE_API_KEY", "verify")  # main builds the Gemini client; calls go to the local backend
+os.environ["LLM_BACKEND"] = "local"  # Rules-only "LLM" with simulated latency
+
+from fastapi.testclient import TestClient
+
+from manifest_upgrades import UpgradeNotFound, UpgradeRegistry
+
+
+def report():
+    results = [{"is_panel": False, "test_name": "Triglycerides", "value": 225, "unit": "mg/dL",
+                "reference_range": "<150", "interpretation": "High"},
+               {"is_panel": False, "test_name": "Glucose", "value": 90, "unit": "mg/dL",
+                "reference_range": "70-99", "interpretation": None}]
+    return {"patient_details": {"name": "Verify Patient", "age": 50, "gender": "Female"},
+            "lab_details": {}, "sample_details": {}, "report_results": results}
+
+
+async def collect(registry, upgrade):
+    return [event async for event in registry.events(upgrade, lambda delta: delta)]
+
+
+async def check_registry():
+    failures = 0
+    registry = UpgradeRegistry(ttl_seconds=0.05, keepalive_seconds=1)
+
+    async def succeed():
+        await asyncio.sleep(0.01)
+        return {"revision": 1, "added": [], "removed": [], "updated": [], "order": None}
+
+    async def fail():
+        raise RuntimeError("LLM unavailable")
+
+    # Subscribers during and after the run get the same final event
+    upgrade = registry.start("s-ok", succeed())
+    live = await collect(registry, upgrade)
+    replayed = await collect(registry, registry.get("s-ok"))
+    if [e.split("\n")[:2] for e in live + replayed] != [["event: upgrade", "id: 1"]] * 2:
+        print(f"❌ Upgrade events live {live} / replayed {replayed}")
+        failures += 1
+
+    failed = registry.start("s-fail", fail())
+    events = await collect(registry, failed)
+    if len(events) != 1 or not events[0].startswith("event: error\nid: failed") or "LLM unavailable" not in events[0]:
+        print(f"❌ Failed upgrade events: {events}")
+        failures += 1
+
+    # Finished upgrades expire after the TTL; unknown summaries were never here
+    await asyncio.sleep(0.1)
+    for summary_id in ("s-ok", "unknown"):
+        try:
+            registry.get(summary_id)
+            print(f"❌ Upgrade for {summary_id} still found")
+            failures += 1
+        except UpgradeNotFound:
+            pass
+    stats = registry.stats()
+    if (stats["completed"], stats["failed"], stats["subscribers"]) != (1, 1, 0):
+        print(f"❌ Registry stats {stats}")
+        failures += 1
+    return failures
+
+
+def check_endpoints():
+    failures = 0
+    import main
+    with TestClient(main.app) as client:
+        response = client.post("/analyze", json=report(), headers={"X-Manifest-Delivery": "progressive"})
+        body = response.json()
+        types = [item["type"] for item in body.get("ui_manifest", [])]
+        if response.status_code != 200 or response.headers.get("x-manifest-mode") != "skeleton" or not types:
+            print(f"❌ Progressive /analyze returned {response.status_code} {response.headers.get('x-manifest-mode')}")
+            return failures + 1
+        if "CriticalAlert" in types:
+            print("❌ Skeleton shows a CriticalAlert for a heuristic finding")
+            failures += 1
+
+        with client.stream("GET", body["upgrade_events"]) as stream:
+            text = "".join(stream.iter_text())
+        if "event: upgrade" not in text:
+            print(f"❌ No upgrade event on {body['upgrade_events']}: {text[:200]}")
+            failures += 1
+        # Final event already received: 204 stops EventSource reconnecting
+        response = client.get(body["upgrade_events"], headers={"Last-Event-ID": "1"})
+        if response.status_code != 204:
+            print(f"❌ Reconnect after the final event returned {response.status_code}")
+            failures += 1
+
+        # Another worker's skeleton: 404, and the client's fallback (complete delivery) works
+        if client.get("/summaries/not-in-this-process/events").status_code != 404:
+            print("❌ Events for an unknown summary not refused with 404")
+            failures += 1
+        response = client.post("/analyze", json=report())
+        if response.status_code != 200 or "upgrade_events" in response.json():
+            print(f"❌ Complete /analyze returned {response.status_code}")
+            failures += 1
+    return failures
+
+
+def verify():
+    print("--- Verifying Progressive Manifest Upgrades ---")
+    failures = asyncio.run(check_registry())
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # The agent writes patient_smart_summary.json to the working directory
+        try:
+            failures += check_endpoints()
+        finally:
+            os.chdir(cwd)
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Skeletons are upgraded over SSE, or refused for a complete fetch")
+
+
+if __name__ == "__main__":
+    verify()
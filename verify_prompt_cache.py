@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from llm_backends import LocalPrefixStore, PrefixCache
+
+PROMPT = "You are a clinical summarizer. " * 200
+
+
+class SlowStore(LocalPrefixStore):
+    """Provider calls block until released, as a slow caches API would"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.calls = []
+
+    def create(self, prompt, ttl_seconds):
+        self.calls.append("create")
+        self.release.wait(5)
+        return super().create(prompt, ttl_seconds)
+
+    def refresh(self, handle, ttl_seconds):
+        self.calls.append("refresh")
+        self.release.wait(5)
+        return super().refresh(handle, ttl_seconds)
+
+
+def in_background(cache, results):
+    thread = threading.Thread(target=lambda: results.append(cache.handle(PROMPT)))
+    thread.start()
+    deadline = time.time() + 5
+    while not cache.store.calls and time.time() < deadline:
+        time.sleep(0.001)
+    return thread
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def verify():
+    print("--- Verifying Prompt Prefix Cache ---")
+    failures = 0
+
+    # While one caller creates the prefix, others go inline without waiting
+    cache = PrefixCache(SlowStore(), ttl_seconds=3600, refresh_seconds=300)
+    created = []
+    creator = in_background(cache, created)
+    (handle, seconds), (stats, stats_seconds) = timed(lambda: cache.handle(PROMPT)), timed(cache.stats)
+    if handle is not None or seconds > 0.5 or stats_seconds > 0.5:
+        print(f"❌ Caller during creation: handle {handle!r} after {seconds:.2f}s, stats after {stats_seconds:.2f}s")
+        failures += 1
+    cache.store.release.set()
+    creator.join()
+    if created[0] is None or cache.handle(PROMPT) != created[0] or cache.store.calls != ["create"]:
+        print(f"❌ Single-flight creation: {created}, store calls {cache.store.calls}")
+        failures += 1
+
+    # While one caller refreshes it, others keep using the still-valid handle
+    store = SlowStore()
+    store.release.set()
+    cache = PrefixCache(store, ttl_seconds=60, refresh_seconds=30)
+    handle = cache.handle(PROMPT)
+    store.release.clear()
+    store.calls.clear()
+    cache._expires_at = time.time() + 10  # Within the refresh window
+    refreshed = []
+    refresher = in_background(cache, refreshed)
+    current, seconds = timed(lambda: cache.handle(PROMPT))
+    if current != handle or seconds > 0.5:
+        print(f"❌ Caller during refresh: {current!r} after {seconds:.2f}s")
+        failures += 1
+    store.release.set()
+    refresher.join()
+    if refreshed != [handle] or store.calls != ["refresh"] or cache._expires_at < time.time() + 30:
+        print(f"❌ Refresh: {refreshed}, store calls {store.calls}")
+        failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ The prefix is created and refreshed by one caller, without blocking the others")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+from rules_dsl import RuleSyntaxError, compile_condition, referenced_fields
+from summary_structs import summary_struct
+from ui_rules import RulesEngine
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+
+# Each would reach past the whitelist: builtins, attributes, dunders, lambdas, comprehensions...
+REJECTED = [
+    "__import__('os').system('true')",
+    "open('/etc/passwd')",
+    "abnormal.__class__",
+    "patient.name == 'x'",
+    "().__class__.__bases__[0].__subclasses__()",
+    "abnormal[0]",
+    "(lambda: 1)()",
+    "[f for f in abnormal]",
+    "len(abnormal, key=1)",
+    "getattr(abnormal, 'x')",
+    "x := 1",
+    "unknown_field > 0",
+    "len(abnormal) >",
+]
+
+
+def verify():
+    print("--- Verifying Rules DSL ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        summary = summary_struct(json.load(f))
+
+    # Whitelisted expressions compile and evaluate like the hand-written lambda
+    accepted = {
+        "len(abnormal) > 0": len(summary.clinical_summary.abnormal_readings) > 0,
+        "any_risk(abnormal, 'CRITICAL') or not true": any(
+            f.risk_level == "CRITICAL" for f in summary.clinical_summary.abnormal_readings),
+        "risk_assessment in ['Low', 'Moderate'] and len(normal) - 1 >= 0": (
+            summary.clinical_summary.overall_health_status.risk_assessment in ["Low", "Moderate"]
+            and len(summary.clinical_summary.normal_readings) - 1 >= 0),
+    }
+    for expression, expected in accepted.items():
+        try:
+            if compile_condition(expression)(summary) != expected:
+                print(f"❌ {expression!r} evaluated differently")
+                failures += 1
+        except RuleSyntaxError as e:
+            print(f"❌ Valid expression rejected: {e}")
+            failures += 1
+    if referenced_fields("len(abnormal) > len(normal) and true") != {"abnormal", "normal"}:
+        print(f"❌ Referenced fields: {referenced_fields('len(abnormal) > len(normal) and true')}")
+        failures += 1
+
+    # Anything else is a RuleSyntaxError (a ValueError) before any code runs
+    for expression in REJECTED:
+        try:
+            compile_condition(expression)
+            print(f"❌ Accepted {expression!r}")
+            failures += 1
+        except RuleSyntaxError:
+            pass
+
+    # A reload with a bad condition keeps the current rules
+    rules_dir = tempfile.mkdtemp()
+    rules_file = os.path.join(rules_dir, "manifest_rules.json")
+    shutil.copy(os.path.join(BACKEND, "rules", "manifest_rules.json"), rules_file)
+    engine = RulesEngine(rules_file)
+    rules, fingerprint = engine.rules, engine.fingerprint
+    with open(rules_file) as f:
+        document = json.load(f)
+    document["rules"][0]["when"] = "abnormal.__class__"
+    with open(rules_file, "w") as f:
+        json.dump(document, f)
+    if engine.reload(force=True) or engine.rules is not rules or engine.fingerprint != fingerprint \
+            or not engine.last_reload_error:
+        print(f"❌ Bad rules installed on reload (error {engine.last_reload_error!r})")
+        failures += 1
+    shutil.rmtree(rules_dir, ignore_errors=True)
+
+    print(f"Checked {len(accepted)} accepted and {len(REJECTED)} rejected conditions")
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Rule conditions are whitelist-checked and bad reloads keep the current rules")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,83 @@
+import copy
+import json
+import os
+import sys
+from collections import Counter
+
+# Add backend to path
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+from rules_profiler import RulesProfiler
+from summary_structs import summary_struct
+from ui_mapper import UIManifestGenerator
+
+SUMMARY_PATH = os.path.join(BACKEND, 'patient_smart_summary.json')
+
+
+def variants(summary):
+    """The sample summary, and copies without critical findings / with no abnormal findings"""
+    calm = copy.deepcopy(summary)
+    for reading in calm["clinical_summary"]["abnormal_readings"]:
+        reading["risk_level"] = "MODERATE"
+    healthy = copy.deepcopy(summary)
+    healthy["clinical_summary"]["abnormal_readings"] = []
+    return [summary_struct(s) for s in (summary, calm, healthy, summary)]
+
+
+def verify():
+    print("--- Verifying Rules Profiler ---")
+    failures = 0
+    with open(SUMMARY_PATH) as f:
+        summaries = variants(json.load(f))
+    generator = UIManifestGenerator()
+    rule_set = generator.rules_engine.rule_set
+    expected = [generator.plan_from_summary(s).item_dicts() for s in summaries]
+
+    # Disabled: nothing recorded
+    profiler = RulesProfiler(enabled=False)
+    generator.rules_engine.profiler = profiler
+    for summary in summaries:
+        generator.plan_from_summary(summary).item_dicts()
+    if profiler.stats()["rules"]:
+        print(f"❌ Disabled profiler recorded {sorted(profiler.stats()['rules'])}")
+        failures += 1
+
+    # Enabled: one condition call per rule and summary; matches as RuleSet.evaluate
+    profiler.enabled = True
+    plans = [generator.plan_from_summary(s) for s in summaries]
+    stats = profiler.stats()["rules"]
+    matches = Counter(name for s in summaries for name, matched in rule_set.evaluate(s).items() if matched)
+    for rule in rule_set.rules:
+        recorded = stats.get(rule.name, {})
+        if recorded.get("calls") != len(summaries) or recorded.get("matches") != matches[rule.name]:
+            print(f"❌ {rule.name}: {recorded.get('calls')} calls / {recorded.get('matches')} matches, "
+                  f"expected {len(summaries)} / {matches[rule.name]}")
+            failures += 1
+    if any(recorded["props"]["count"] for recorded in profiler.stats()["rules"].values()):
+        print("❌ Props timed before any were generated")
+        failures += 1
+
+    # Props are timed when generated, once per item, and come out unchanged
+    items = [plan.item_dicts() for plan in plans]
+    if items != expected:
+        print("❌ Profiled manifests differ from unprofiled ones")
+        failures += 1
+    per_rule = Counter(item.rule for plan in plans for item in plan)
+    per_type = Counter(item.type for plan in plans for item in plan)
+    stats = profiler.stats()
+    timed_rules = {name: recorded["props"]["count"] for name, recorded in stats["rules"].items()
+                   if recorded["props"]["count"]}
+    timed_types = {name: recorded["count"] for name, recorded in stats["components"].items()}
+    if timed_rules != dict(per_rule) or timed_types != dict(per_type):
+        print(f"❌ Props timed per rule {timed_rules} (expected {dict(per_rule)}), per type {timed_types}")
+        failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Rule conditions and props generation are counted once each while profiling")
+
+
+if __name__ == "__main__":
+    verify()
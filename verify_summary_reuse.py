@@ -0,0 +1,100 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from preclassify import build_rules_only_summary
+from summary_reuse import SummaryReuse
+
+
+def report(triglycerides, glucose=90, name="Verify Patient", patient_id="P-1", reported_at="2026-01-05"):
+    results = [{"is_panel": False, "test_name": "Triglycerides", "value": triglycerides, "unit": "mg/dL",
+                "reference_range": "<150", "interpretation": None},
+               {"is_panel": False, "test_name": "Glucose", "value": glucose, "unit": "mg/dL",
+                "reference_range": "70-99", "interpretation": None}]
+    return {"patient_details": {"patient_id": patient_id, "name": name, "age": 52, "gender": "Female"},
+            "lab_details": {}, "sample_details": {"reported_at": reported_at}, "report_results": results}
+
+
+def summary_with_note(triglycerides, note, glucose=90):
+    """An "LLM" summary of the report whose triglycerides reading carries `note`"""
+    summary = build_rules_only_summary(report(triglycerides, glucose))
+    reading = next(r for r in summary["clinical_summary"]["abnormal_readings"] if r["parameter_name"] == "Triglycerides")
+    reading["clinical_note"] = note
+    summary["detailed_analysis"] = [{"parameter": "Triglycerides", "interpretation": note,
+                                     "correlation": "", "monitoring": "Recheck in 3 months"}]
+    return summary
+
+
+def reused(earlier, note, current, earlier_glucose=90, current_glucose=90):
+    """Note of the triglycerides reading after reuse for `current`, or None if not reused"""
+    reuse = SummaryReuse(max_entries=8, tolerance=0.05)
+    reuse.store(reuse.fingerprint(report(earlier, earlier_glucose)),
+                summary_with_note(earlier, note, earlier_glucose))
+    summary = reuse.lookup(reuse.fingerprint(report(current, current_glucose, name="Next Visit")))
+    if summary is None:
+        return None
+    reading = next(r for r in summary["clinical_summary"]["abnormal_readings"] if r["parameter_name"] == "Triglycerides")
+    return reading["value"], reading["clinical_note"], summary["detailed_analysis"][0]["interpretation"], summary
+
+
+def verify():
+    print("--- Verifying Near-Duplicate Summary Reuse ---")
+    failures = 0
+
+    # Value and tied quotes patched; thresholds, other numbers and look-alikes untouched
+    note = "Triglycerides of 225 mg/dL exceed the 150 mg/dL target (1,225 and 22.5 are not this value)."
+    result = reused(225, note, 230)
+    expected = "Triglycerides of 230 mg/dL exceed the 150 mg/dL target (1,225 and 22.5 are not this value)."
+    if result is None:
+        print("❌ Near-identical report did not reuse the summary")
+        failures += 1
+    else:
+        value, patched_note, analysis, summary = result
+        if value != "230" or patched_note != expected or analysis != expected:
+            print(f"❌ Patched reading: value {value!r}, note {patched_note!r}, analysis {analysis!r}")
+            failures += 1
+        if summary["patient_info"]["name"] != "Next Visit":
+            print("❌ patient_info not taken from the new report")
+            failures += 1
+
+    # Another patient (or none identified) never gets the summary; a blank name or date stays blank
+    reuse = SummaryReuse(max_entries=8, tolerance=0.05)
+    reuse.store(reuse.fingerprint(report(225, name="Alice Jones")), summary_with_note(225, "Triglycerides 225 mg/dL."))
+    for other in (report(225, patient_id="P-2"), report(225, patient_id=None)):
+        if reuse.lookup(reuse.fingerprint(other)) is not None:
+            print(f"❌ Summary reused for patient {other['patient_details']['patient_id']}")
+            failures += 1
+    blank = reuse.lookup(reuse.fingerprint(report(230, name=None, reported_at=None)))
+    if blank is None or blank["patient_info"]["name"] is not None or blank["patient_info"]["report_date"] is not None:
+        print(f"❌ Reused patient_info for a report without name or date: {blank and blank['patient_info']}")
+        failures += 1
+
+    # The earlier value also quoted as a threshold / range / untied number: not reused
+    for ambiguous in ("Triglycerides at 152 mg/dL are above the 152 mg/dL goal.",
+                      "Triglycerides 152 mg/dL, in the 152-199 mg/dL borderline band.",
+                      "Values near 152 call for dietary review."):
+        if reused(152, ambiguous, 155) is not None:
+            print(f"❌ Reused despite an ambiguous quote: {ambiguous!r}")
+            failures += 1
+
+    # Same number reported by another result: its quotes cannot be attributed
+    if reused(160, "Triglycerides 160 mg/dL.", 163, earlier_glucose=160, current_glucose=160) is not None:
+        print("❌ Reused with a quote of a value shared by two results")
+        failures += 1
+
+    # Outside the tolerance, or across the reference range: the LLM is called
+    for current in (260, 140):
+        if reused(225, "Triglycerides of 225 mg/dL.", current) is not None:
+            print(f"❌ Summary for 225 reused for {current}")
+            failures += 1
+
+    if failures:
+        print(f"❌ {failures} failure(s)")
+        sys.exit(1)
+    print("✅ Reused summaries carry the new values and only tied quotes change")
+
+
+if __name__ == "__main__":
+    verify()